@@ -1,32 +1,34 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.cv_agent import process_cv
 from src.agents.invoice_agent import process_invoice
 from src.agents.report_agent import process_report
-from src.renderers.pdf_cv import render_pdf_cv
-from src.renderers.pdf_invoice import render_pdf_invoice
-from src.renderers.pdf_report import render_pdf_report
+from src.renderers.pdf_cv import render_pdf_cv, draw_cv
+from src.renderers.pdf_invoice import render_pdf_invoice, draw_invoice
+from src.renderers.pdf_report import render_pdf_report, draw_report
+from src.renderers.preview import render_preview
 from src.utils.validate import validate_data
 
 
 class Orchestrator:
     """Coordonne les agents pour générer différents types de documents."""
 
-    def generate_document(self, doc_type: str, data: Dict[str, Any]) -> str:
+    def generate_document(self, doc_type: str, data: Dict[str, Any], font_family: Optional[str] = None,
+                          profile: Optional[str] = None) -> str:
         """Génère un document structuré (CV, facture, rapport)."""
         try:
             validate_data(data, doc_type)
 
             if doc_type == "cv":
                 processed = process_cv(data)
-                return render_pdf_cv(processed)
+                return render_pdf_cv(processed, font_family=font_family, profile=profile)
 
             elif doc_type == "invoice":
                 processed = process_invoice(data)
-                return render_pdf_invoice(processed)
+                return render_pdf_invoice(processed, font_family=font_family, profile=profile)
 
             elif doc_type == "report":
                 processed = process_report(data)
-                return render_pdf_report(processed)
+                return render_pdf_report(processed, font_family=font_family, profile=profile)
 
             else:
                 raise ValueError(f"Type de document non pris en charge : {doc_type}")
@@ -34,6 +36,25 @@ class Orchestrator:
         except Exception as e:
             raise RuntimeError(f"Erreur d'orchestration : {str(e)}")
 
+    def preview_document(self, doc_type: str, data: Dict[str, Any], fmt: str = "png",
+                         font_family: Optional[str] = None) -> bytes:
+        """Aperçu de la première page (PNG ou HTML), sans produire de PDF ni écrire dans out/."""
+        try:
+            if doc_type == "cv":
+                return render_preview(draw_cv, process_cv(data), fmt, font_family)
+
+            elif doc_type == "invoice":
+                return render_preview(draw_invoice, process_invoice(data), fmt, font_family)
+
+            elif doc_type == "report":
+                return render_preview(draw_report, process_report(data), fmt, font_family)
+
+            else:
+                raise ValueError(f"Type de document non pris en charge : {doc_type}")
+
+        except Exception as e:
+            raise RuntimeError(f"Erreur de prévisualisation : {str(e)}")
+
 
 # Instance unique à importer partout
 orchestrator = Orchestrator()
@@ -0,0 +1,200 @@
+"""
+Familles de polices utilisées par les renderers PDF.
+
+Les polices standard (Helvetica) ne couvrent que Latin-1 : pour les noms et
+contenus Unicode, on enregistre des familles TrueType. Chaque fichier .ttf est
+parsé une seule fois par processus, et les sous-ensembles de glyphes générés
+pour un document sont réutilisés par les suivants.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+
+# --------------------------------------------------------------------
+#                   CONFIGURATION
+# --------------------------------------------------------------------
+DEFAULT_FONT_FAMILY = os.getenv("PDF_FONT_FAMILY", "helvetica")
+
+# Nombre de sous-ensembles de glyphes conservés par police
+SUBSET_CACHE_SIZE = 128
+
+FONT_DIRS: List[Path] = [
+    *(Path(p) for p in os.getenv("PDF_FONT_DIR", "").split(os.pathsep) if p),
+    Path("assets/fonts"),
+    Path(reportlab.__file__).parent / "fonts",
+    Path("/usr/share/fonts/truetype/dejavu"),
+    Path("/usr/share/fonts/TTF"),
+    Path("/Library/Fonts"),
+    Path("C:/Windows/Fonts"),
+]
+
+STYLES = ("regular", "bold", "italic", "bold_italic")
+
+
+@dataclass(frozen=True)
+class FontFamily:
+    """Noms de polices ReportLab à utiliser pour chaque style d'une famille."""
+    name: str
+    regular: str
+    bold: str
+    italic: str
+    bold_italic: str
+    truetype: bool = False
+
+
+# Familles TrueType déclarées : fichiers par style (parsés au premier usage)
+_FAMILY_FILES: Dict[str, Dict[str, Optional[str]]] = {
+    "dejavu": {
+        "regular": "DejaVuSans.ttf",
+        "bold": "DejaVuSans-Bold.ttf",
+        "italic": "DejaVuSans-Oblique.ttf",
+        "bold_italic": "DejaVuSans-BoldOblique.ttf",
+    },
+    "vera": {
+        "regular": "Vera.ttf",
+        "bold": "VeraBd.ttf",
+        "italic": "VeraIt.ttf",
+        "bold_italic": "VeraBI.ttf",
+    },
+}
+
+# Familles prêtes à l'emploi (les polices standard n'ont rien à parser)
+_loaded: Dict[str, FontFamily] = {
+    "helvetica": FontFamily(
+        "helvetica", "Helvetica", "Helvetica-Bold",
+        "Helvetica-Oblique", "Helvetica-BoldOblique",
+    ),
+}
+_lock = threading.Lock()
+
+
+# --------------------------------------------------------------------
+#                   API PUBLIQUE
+# --------------------------------------------------------------------
+def register_font_family(
+    name: str,
+    regular: str,
+    bold: Optional[str] = None,
+    italic: Optional[str] = None,
+    bold_italic: Optional[str] = None,
+) -> None:
+    """Déclare une famille TrueType. Les fichiers ne sont lus qu'au premier usage."""
+    key = name.lower()
+    with _lock:
+        if key in _loaded and not _loaded[key].truetype:
+            raise ValueError(f"La famille standard '{name}' ne peut pas être redéfinie")
+        _FAMILY_FILES[key] = {
+            "regular": regular,
+            "bold": bold,
+            "italic": italic,
+            "bold_italic": bold_italic,
+        }
+        _loaded.pop(key, None)
+
+
+def available_font_families() -> List[str]:
+    """Liste des familles sélectionnables par les renderers."""
+    return sorted(set(_loaded) | set(_FAMILY_FILES))
+
+
+def get_font_family(name: Optional[str] = None) -> FontFamily:
+    """Retourne la famille demandée, en la parsant et l'enregistrant si besoin."""
+    key = (name or DEFAULT_FONT_FAMILY).lower()
+    family = _loaded.get(key)
+    if family is not None:
+        return family
+
+    with _lock:
+        family = _loaded.get(key)
+        if family is None:
+            family = _load_family(key)
+            _loaded[key] = family
+    return family
+
+
+# --------------------------------------------------------------------
+#                   CHARGEMENT DES FICHIERS TTF
+# --------------------------------------------------------------------
+def _resolve_font_file(filename: str) -> Optional[Path]:
+    """Cherche un fichier de police en chemin direct puis dans FONT_DIRS."""
+    path = Path(filename)
+    if path.is_file():
+        return path
+    for directory in FONT_DIRS:
+        candidate = directory / filename
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _load_family(key: str) -> FontFamily:
+    files = _FAMILY_FILES.get(key)
+    if files is None:
+        raise ValueError(
+            f"Famille de police inconnue : {key} "
+            f"(disponibles : {', '.join(available_font_families())})"
+        )
+    if not files.get("regular"):
+        raise ValueError(f"Aucun fichier de police regular déclaré pour '{key}'")
+
+    # Un style déclaré doit exister : pas de repli silencieux sur une faute de chemin
+    paths: Dict[str, Path] = {}
+    for style in STYLES:
+        filename = files.get(style)
+        if not filename:
+            continue
+        path = _resolve_font_file(filename)
+        if path is None:
+            raise ValueError(f"Fichier de police introuvable pour '{key}' ({style}) : {filename}")
+        paths[style] = path
+
+    # Styles non déclarés : gras et italique -> regular, gras italique -> gras
+    paths.setdefault("bold", paths["regular"])
+    paths.setdefault("italic", paths["regular"])
+    paths.setdefault("bold_italic", paths["bold"])
+
+    names: Dict[str, str] = {}
+    parsed: Dict[Path, str] = {}
+    for style in STYLES:
+        path = paths[style]
+        if path not in parsed:
+            font_name = f"{key}-{style}"
+            font = TTFont(font_name, str(path))
+            _share_subsets(font)
+            pdfmetrics.registerFont(font)
+            parsed[path] = font_name
+        names[style] = parsed[path]
+
+    # Permet <b>/<i> dans les Paragraph avec cette famille
+    pdfmetrics.registerFontFamily(
+        names["regular"],
+        normal=names["regular"],
+        bold=names["bold"],
+        italic=names["italic"],
+        boldItalic=names["bold_italic"],
+    )
+    return FontFamily(key, truetype=True, **names)
+
+
+def _share_subsets(font: TTFont) -> None:
+    """
+    Mémorise les sous-ensembles de glyphes produits par la police.
+    ReportLab reconstruit le sous-ensemble à chaque sauvegarde de document ;
+    un document qui utilise les mêmes glyphes réutilise ici les octets déjà générés.
+    """
+    make_subset = font.face.makeSubset
+
+    @lru_cache(maxsize=SUBSET_CACHE_SIZE)
+    def cached(subset: tuple) -> bytes:
+        return make_subset(list(subset))
+
+    font.face.makeSubset = lambda subset: cached(tuple(subset))
+    font.face.subset_cache_info = cached.cache_info
@@ -2,13 +2,19 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.units import mm
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 from src.utils.file_utils import ensure_dir
+from src.renderers.fonts import FontFamily
+from src.renderers.profiles import apply_metadata, create_canvas, get_profile, resolve_fonts
 
-def render_pdf_cv(data: Dict[str, Any]) -> str:
+def render_pdf_cv(data: Dict[str, Any], font_family: Optional[str] = None,
+                  profile: Optional[str] = None) -> str:
     """Render CV data to PDF format using ReportLab."""
     try:
+        output_profile = get_profile(profile)
+        fonts = resolve_fonts(output_profile, font_family)
+
         # Create output directory
         output_dir = Path("out/cv")
         ensure_dir(output_dir)
@@ -16,41 +22,48 @@ def render_pdf_cv(data: Dict[str, Any]) -> str:
         output_path = output_dir / f"{name}_cv.pdf"
 
         # Setup canvas
-        c = canvas.Canvas(str(output_path), pagesize=A4)
-        width, height = A4
-        y = height - 40
+        c = create_canvas(str(output_path), output_profile)
+        draw_cv(c, data, fonts)
+        person = data.get("personal", {}).get("name", "")
+        apply_metadata(c, output_profile, title=f"CV {person}".strip(), author=person, subject="cv")
+        c.save()
+        return str(output_path)
 
-        # === Personal Information ===
-        _add_personal_info(c, data.get("personal", {}), y)
-        y -= 100
+    except Exception as e:
+        raise RuntimeError(f"CV PDF rendering failed: {str(e)}")
 
-        # === Experience ===
-        if "experience" in data:
-            y = _add_section(c, "Experience", data["experience"], y - 10)
 
-        # === Education ===
-        if "education" in data:
-            y = _add_section(c, "Education", data["education"], y - 10)
+def draw_cv(c: canvas.Canvas, data: Dict[str, Any], fonts: FontFamily):
+    """Lay out the CV on a canvas (PDF file or preview)"""
+    width, height = A4
+    y = height - 40
 
-        # === Skills ===
-        if "skills" in data:
-            y = _add_section(c, "Skills", data["skills"], y - 10)
+    # === Personal Information ===
+    _add_personal_info(c, data.get("personal", {}), y, fonts)
+    y -= 100
 
-        c.showPage()
-        c.save()
-        return str(output_path)
+    # === Experience ===
+    if "experience" in data:
+        y = _add_section(c, "Experience", data["experience"], y - 10, fonts)
 
-    except Exception as e:
-        raise RuntimeError(f"CV PDF rendering failed: {str(e)}")
+    # === Education ===
+    if "education" in data:
+        y = _add_section(c, "Education", data["education"], y - 10, fonts)
+
+    # === Skills ===
+    if "skills" in data:
+        y = _add_section(c, "Skills", data["skills"], y - 10, fonts)
+
+    c.showPage()
 
 
-def _add_personal_info(c: canvas.Canvas, personal: Dict[str, Any], y: int):
+def _add_personal_info(c: canvas.Canvas, personal: Dict[str, Any], y: int, fonts: FontFamily):
     """Add personal information section"""
-    c.setFont("Helvetica-Bold", 18)
+    c.setFont(fonts.bold, 18)
     c.drawCentredString(105 * mm, y, personal.get("name", "Unnamed"))
     y -= 15
 
-    c.setFont("Helvetica", 11)
+    c.setFont(fonts.regular, 11)
     email = personal.get("email", "")
     phone = personal.get("phone", "")
     location = personal.get("location", "")
@@ -66,33 +79,33 @@ def _add_personal_info(c: canvas.Canvas, personal: Dict[str, Any], y: int):
         y -= 12
 
 
-def _add_section(c: canvas.Canvas, title: str, items: list, y: int) -> int:
+def _add_section(c: canvas.Canvas, title: str, items: list, y: int, fonts: FontFamily) -> int:
     """Add a formatted section with multiple items"""
-    c.setFont("Helvetica-Bold", 14)
+    c.setFont(fonts.bold, 14)
     c.setFillColor(colors.darkblue)
     c.drawString(30, y, title)
     y -= 20
 
     c.setFillColor(colors.black)
-    c.setFont("Helvetica", 11)
+    c.setFont(fonts.regular, 11)
 
     for item in items:
         if isinstance(item, dict):
             for key, value in item.items():
                 if key in ["title", "position"]:
-                    c.setFont("Helvetica-Bold", 11)
+                    c.setFont(fonts.bold, 11)
                     c.drawString(40, y, value)
                     y -= 14
                 elif key in ["company", "institution"]:
-                    c.setFont("Helvetica-Oblique", 10)
+                    c.setFont(fonts.italic, 10)
                     c.drawString(45, y, value)
                     y -= 12
                 elif key == "date":
-                    c.setFont("Helvetica", 9)
+                    c.setFont(fonts.regular, 9)
                     c.drawString(45, y, f"Date: {value}")
                     y -= 12
                 elif key == "description":
-                    c.setFont("Helvetica", 10)
+                    c.setFont(fonts.regular, 10)
                     for line in value.split("\n"):
                         c.drawString(50, y, line)
                         y -= 12
@@ -104,5 +117,5 @@ def _add_section(c: canvas.Canvas, title: str, items: list, y: int) -> int:
         if y < 100:  # Add a new page if reaching bottom
             c.showPage()
             y = A4[1] - 50
-            c.setFont("Helvetica", 11)
+            c.setFont(fonts.regular, 11)
     return y
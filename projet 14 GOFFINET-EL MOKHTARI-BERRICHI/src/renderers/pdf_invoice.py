@@ -2,33 +2,59 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
+from typing import Optional
+from src.renderers.fonts import FontFamily
+from src.renderers.profiles import apply_metadata, create_canvas, get_profile, resolve_fonts
+import copy
 import os
 import json
 
-def render_pdf_invoice(data: dict) -> str:
+# Valeurs utilisées quand l'agent ne renvoie pas certains champs
+DEFAULTS = {
+    "invoice_number": "INV-0000",
+    "date": "2025-10-30",
+    "company": {"name": "IMSA Solutions", "address": "10 rue des Startups, Paris", "vat_number": "FR000000000"},
+    "client": {"name": "EPF École d’ingénieurs", "address": "3 rue Lakanal, Cachan"},
+    "items": [
+        {"description": "Développement Web", "quantity": 10, "unit_price": 50, "total": 500},
+        {"description": "Maintenance", "quantity": 5, "unit_price": 60, "total": 300},
+    ],
+    "subtotal": 800,
+    "tax_rate": 20,
+    "tax_amount": 160,
+    "total": 960,
+    "payment_terms": "Virement sous 30 jours",
+}
+
+
+def render_pdf_invoice(data: dict, font_family: Optional[str] = None, profile: Optional[str] = None) -> str:
     """
     Génère un PDF de facture à partir d'un dictionnaire structuré.
     Si des données manquent, des valeurs par défaut sont utilisées.
     """
+    output_profile = get_profile(profile)
+    fonts = resolve_fonts(output_profile, font_family)
 
     # === 🔍 Étape 1 : fallback automatique ===
-    defaults = {
-        "invoice_number": "INV-0000",
-        "date": "2025-10-30",
-        "company": {"name": "IMSA Solutions", "address": "10 rue des Startups, Paris", "vat_number": "FR000000000"},
-        "client": {"name": "EPF École d’ingénieurs", "address": "3 rue Lakanal, Cachan"},
-        "items": [
-            {"description": "Développement Web", "quantity": 10, "unit_price": 50, "total": 500},
-            {"description": "Maintenance", "quantity": 5, "unit_price": 60, "total": 300},
-        ],
-        "subtotal": 800,
-        "tax_rate": 20,
-        "tax_amount": 160,
-        "total": 960,
-        "payment_terms": "Virement sous 30 jours",
-    }
-
-    # Fusionner données réelles et valeurs par défaut
+    data = _with_defaults(data)
+
+    # === 🔍 Étape 2 : log JSON brut pour debug ===
+    os.makedirs("out/invoice", exist_ok=True)
+    with open("out/invoice/last_invoice_data.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    # === 🧾 Étape 3 : création du PDF ===
+    output_path = f"out/invoice/out_invoice_{data['invoice_number']}.pdf"
+    c = create_canvas(output_path, output_profile)
+    draw_invoice(c, data, fonts)
+    apply_metadata(c, output_profile, title=f"Invoice {data['invoice_number']}",
+                   author=data["company"]["name"], subject="invoice")
+    c.save()
+    return output_path
+
+
+def _with_defaults(data: dict) -> dict:
+    """Fusionne données réelles et valeurs par défaut (sans écraser les premières)."""
     def merge_data(base, override):
         for k, v in override.items():
             if isinstance(v, dict):
@@ -37,52 +63,47 @@ def render_pdf_invoice(data: dict) -> str:
                 base.setdefault(k, v)
         return base
 
-    data = merge_data(data if isinstance(data, dict) else {}, defaults)
-
-    # === 🔍 Étape 2 : log JSON brut pour debug ===
-    os.makedirs("out/invoice", exist_ok=True)
-    with open("out/invoice/last_invoice_data.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    return merge_data(data if isinstance(data, dict) else {}, copy.deepcopy(DEFAULTS))
 
-    # === 🧾 Étape 3 : création du PDF ===
-    output_path = f"out/invoice/out_invoice_{data['invoice_number']}.pdf"
-    c = canvas.Canvas(output_path, pagesize=A4)
 
+def draw_invoice(c: canvas.Canvas, data: dict, fonts: FontFamily):
+    """Mise en page de la facture sur un canvas (fichier PDF ou aperçu)."""
+    data = _with_defaults(data)
     width, height = A4
 
     # --- En-tête ---
-    c.setFont("Helvetica-Bold", 16)
+    c.setFont(fonts.bold, 16)
     c.setFillColor(colors.darkblue)
     c.drawString(400, height - 50, f"INVOICE #{data['invoice_number']}")
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     c.setFillColor(colors.black)
     c.drawString(400, height - 65, f"Date: {data['date']}")
 
     # --- Émetteur ---
-    c.setFont("Helvetica-Bold", 12)
+    c.setFont(fonts.bold, 12)
     c.drawString(40, height - 100, data["company"]["name"])
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     c.drawString(40, height - 115, data["company"]["address"])
     c.drawString(40, height - 130, f"TVA: {data['company']['vat_number']}")
 
     # --- Client ---
-    c.setFont("Helvetica-Bold", 12)
+    c.setFont(fonts.bold, 12)
     c.setFillColor(colors.red)
     c.drawString(40, height - 160, "Bill To:")
     c.setFillColor(colors.black)
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     c.drawString(100, height - 160, data["client"]["name"])
     c.drawString(100, height - 175, data["client"]["address"])
 
     # --- Tableau des articles ---
     y = height - 220
-    c.setFont("Helvetica-Bold", 10)
+    c.setFont(fonts.bold, 10)
     c.drawString(40, y, "Description")
     c.drawString(250, y, "Qty")
     c.drawString(300, y, "Unit Price (€)")
     c.drawString(400, y, "Total (€)")
     y -= 15
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
 
     for item in data["items"]:
         c.drawString(40, y, item["description"])
@@ -93,7 +114,7 @@ def render_pdf_invoice(data: dict) -> str:
 
     # --- Totaux ---
     y -= 10
-    c.setFont("Helvetica-Bold", 10)
+    c.setFont(fonts.bold, 10)
     c.drawRightString(500, y, f"Subtotal: {data['subtotal']:.2f}")
     y -= 15
     c.drawRightString(500, y, f"Tax ({data['tax_rate']}%): {data['tax_amount']:.2f}")
@@ -104,8 +125,5 @@ def render_pdf_invoice(data: dict) -> str:
 
     # --- Conditions ---
     y -= 30
-    c.setFont("Helvetica-Oblique", 9)
+    c.setFont(fonts.italic, 9)
     c.drawString(40, y, f"Conditions de paiement : {data['payment_terms']}")
-
-    c.save()
-    return output_path
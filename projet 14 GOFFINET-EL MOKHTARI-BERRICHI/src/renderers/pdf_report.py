@@ -5,8 +5,10 @@ from reportlab.lib.units import mm
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import Paragraph, Frame
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.utils.file_utils import ensure_dir
+from src.renderers.fonts import FontFamily
+from src.renderers.profiles import apply_metadata, create_canvas, get_profile, resolve_fonts
 from reportlab.platypus import Paragraph, Frame
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
@@ -25,11 +27,11 @@ CONTENT_WIDTH = A4[0] - LEFT_MARGIN - 25 * mm
 # --------------------------------------------------------------------
 #                   HEADER & FOOTER
 # --------------------------------------------------------------------
-def _add_header_footer(c: canvas.Canvas, title: str, author: str):
+def _add_header_footer(c: canvas.Canvas, title: str, author: str, fonts: FontFamily):
     width, height = A4
 
     # Ligne d'en-tête violette + titre centré
-    c.setFont("Helvetica-Bold", 11)
+    c.setFont(fonts.bold, 11)
     c.setFillColor(colors.HexColor("#4B0082"))
     c.drawCentredString(width / 2, height - 20, title)
 
@@ -38,7 +40,7 @@ def _add_header_footer(c: canvas.Canvas, title: str, author: str):
     c.line(LEFT_MARGIN, height - 28, width - LEFT_MARGIN, height - 28)
 
     # Pied de page
-    c.setFont("Helvetica", 9)
+    c.setFont(fonts.regular, 9)
     c.setFillColor(colors.grey)
     footer_text = f"{author} – EPF | Page {c.getPageNumber()}"
     c.drawRightString(width - LEFT_MARGIN, 25, footer_text)
@@ -59,38 +61,21 @@ def _draw_left_band(c: canvas.Canvas):
 # --------------------------------------------------------------------
 #                   MAIN FUNCTION
 # --------------------------------------------------------------------
-def render_pdf_report(data: Dict[str, Any]) -> str:
+def render_pdf_report(data: Dict[str, Any], font_family: Optional[str] = None,
+                      profile: Optional[str] = None) -> str:
     try:
-        # Normalisation
-        if isinstance(data.get("author"), dict):
-            a = data["author"]
-            data["author"] = f"{a.get('name', '')} ({a.get('organization', '')})"
-
-        if "summary" in data and "executive_summary" not in data:
-            data["executive_summary"] = data["summary"]
-
-        if "content" in data and not data.get("sections"):
-            data["sections"] = [
-                {"title": sec.get("section_title", "Untitled Section"),
-                 "content": sec.get("section_content", "")}
-                for sec in data["content"]
-            ]
+        output_profile = get_profile(profile)
+        fonts = resolve_fonts(output_profile, font_family)
 
         output_dir = Path("out/report")
         ensure_dir(output_dir)
         report_id = data.get("report_id", "0001")
         output_path = output_dir / f"report_{report_id}.pdf"
 
-        c = canvas.Canvas(str(output_path), pagesize=A4)
-        width, height = A4
-
-        _add_title_page(c, data, width, height)
-        _add_executive_summary(c, data.get("executive_summary", ""), data)
-        _add_table_of_contents(c, data.get("sections", []), data)
-
-        for idx, section in enumerate(data.get("sections", []), 1):
-            _add_section(c, section, data, idx)
-
+        c = create_canvas(str(output_path), output_profile)
+        draw_report(c, data, fonts)
+        apply_metadata(c, output_profile, title=data.get("title", ""),
+                       author=data.get("author", ""), subject="report")
         c.save()
         return str(output_path)
 
@@ -98,10 +83,40 @@ def render_pdf_report(data: Dict[str, Any]) -> str:
         raise RuntimeError(f"Report PDF rendering failed: {str(e)}")
 
 
+def draw_report(c: canvas.Canvas, data: Dict[str, Any], fonts: FontFamily):
+    """Mise en page complète du rapport sur un canvas (fichier PDF ou aperçu)."""
+    _normalize_report(data)
+    width, height = A4
+
+    _add_title_page(c, data, width, height, fonts)
+    _add_executive_summary(c, data.get("executive_summary", ""), data, fonts)
+    _add_table_of_contents(c, data.get("sections", []), data, fonts)
+
+    for idx, section in enumerate(data.get("sections", []), 1):
+        _add_section(c, section, data, idx, fonts)
+
+
+def _normalize_report(data: Dict[str, Any]):
+    """Ramène les variantes de structure produites par l'agent au format attendu."""
+    if isinstance(data.get("author"), dict):
+        a = data["author"]
+        data["author"] = f"{a.get('name', '')} ({a.get('organization', '')})"
+
+    if "summary" in data and "executive_summary" not in data:
+        data["executive_summary"] = data["summary"]
+
+    if "content" in data and not data.get("sections"):
+        data["sections"] = [
+            {"title": sec.get("section_title", "Untitled Section"),
+             "content": sec.get("section_content", "")}
+            for sec in data["content"]
+        ]
+
+
 # --------------------------------------------------------------------
 #                   PAGE DE TITRE (centrée verticalement + horizontalement)
 # --------------------------------------------------------------------
-def _add_title_page(c, data, width, height):
+def _add_title_page(c, data, width, height, fonts):
     """Page de garde professionnelle et institutionnelle EPF."""
     # === Fond lavande clair sur 25 mm ===
     c.setFillColor(colors.HexColor("#EAE6FF"))
@@ -123,7 +138,7 @@ def _add_title_page(c, data, width, height):
     # === Titre principal (centré verticalement) ===
     y_center = height / 2 + 30
 
-    c.setFont("Helvetica-Bold", 26)
+    c.setFont(fonts.bold, 26)
     c.setFillColor(colors.HexColor("#001F7F"))
 
     # Gestion automatique du retour à la ligne
@@ -131,7 +146,7 @@ def _add_title_page(c, data, width, height):
     line = ""
     lines = []
     for word in words:
-        if c.stringWidth(line + " " + word, "Helvetica-Bold", 26) > width - 120:
+        if c.stringWidth(line + " " + word, fonts.bold, 26) > width - 120:
             lines.append(line)
             line = word
         else:
@@ -142,7 +157,7 @@ def _add_title_page(c, data, width, height):
         c.drawCentredString(width / 2 + 10 * mm, y_center - (i * 30), l.strip())
 
     # === Sous-titre (violet) ===
-    c.setFont("Helvetica-Bold", 15)
+    c.setFont(fonts.bold, 15)
     c.setFillColor(colors.HexColor("#4B0082"))
     c.drawCentredString(width / 2 + 10 * mm, y_center - (len(lines) * 35), subtitle)
 
@@ -160,13 +175,13 @@ def _add_title_page(c, data, width, height):
     c.setStrokeColor(colors.lightgrey)
     c.line(LEFT_MARGIN, 100, width - LEFT_MARGIN, 100)
 
-    c.setFont("Helvetica", 12)
+    c.setFont(fonts.regular, 12)
     c.setFillColor(colors.black)
     c.drawCentredString(width / 2 + 10 * mm, 80, f"Auteur : {author}")
     c.drawCentredString(width / 2 + 10 * mm, 60, f"Date : {date}")
 
     # === Mention institutionnelle ===
-    c.setFont("Helvetica-Oblique", 10)
+    c.setFont(fonts.italic, 10)
     c.setFillColor(colors.grey)
     c.drawCentredString(width / 2 + 10 * mm, 40, "École d’ingénieurs EPF – Département Ingénierie Numérique")
 
@@ -177,36 +192,36 @@ def _add_title_page(c, data, width, height):
 # --------------------------------------------------------------------
 #                   EXECUTIVE SUMMARY
 # --------------------------------------------------------------------
-def _add_executive_summary(c, summary, data):
+def _add_executive_summary(c, summary, data, fonts):
     if not summary:
         return
 
     _draw_left_band(c)
-    _add_header_footer(c, data.get("title", "Rapport Technique"), data.get("author", ""))
+    _add_header_footer(c, data.get("title", "Rapport Technique"), data.get("author", ""), fonts)
 
-    c.setFont("Helvetica-Bold", 18)
+    c.setFont(fonts.bold, 18)
     c.setFillColor(colors.HexColor("#001F7F"))
     c.drawString(LEFT_MARGIN, TOP_MARGIN, "Executive Summary")
 
     c.setStrokeColor(colors.HexColor("#4B0082"))
     c.line(LEFT_MARGIN, TOP_MARGIN - 5, RIGHT_MARGIN, TOP_MARGIN - 5)
 
-    _draw_paragraph(c, summary, LEFT_MARGIN, TOP_MARGIN - 25, font_size=11)
+    _draw_paragraph(c, summary, LEFT_MARGIN, TOP_MARGIN - 25, fonts, font_size=11)
     c.showPage()
 
 
 # --------------------------------------------------------------------
 #                   TABLE DES MATIÈRES (TOC)
 # --------------------------------------------------------------------
-def _add_table_of_contents(c, sections, data):
+def _add_table_of_contents(c, sections, data, fonts):
     if not sections:
         return
 
     _draw_left_band(c)
-    _add_header_footer(c, data.get("title", ""), data.get("author", ""))
+    _add_header_footer(c, data.get("title", ""), data.get("author", ""), fonts)
 
     # Titre bleu foncé comme les autres sections
-    c.setFont("Helvetica-Bold", 18)
+    c.setFont(fonts.bold, 18)
     c.setFillColor(colors.HexColor("#001F7F"))
     c.drawString(LEFT_MARGIN, TOP_MARGIN, "Table of Contents")
 
@@ -215,7 +230,7 @@ def _add_table_of_contents(c, sections, data):
     c.line(LEFT_MARGIN, TOP_MARGIN - 5, RIGHT_MARGIN, TOP_MARGIN - 5)
 
     # Corps du sommaire
-    c.setFont("Helvetica", 12)
+    c.setFont(fonts.regular, 12)
     c.setFillColor(colors.black)
     y = TOP_MARGIN - 30
 
@@ -224,7 +239,7 @@ def _add_table_of_contents(c, sections, data):
         page_number = i + 3  # estimation : après résumé + TOC
 
         # Crée les points et le texte aligné
-        dot_line = _create_leader_dots(title, LEFT_MARGIN + 5, RIGHT_MARGIN - 25, page_number, c)
+        dot_line = _create_leader_dots(title, LEFT_MARGIN + 5, RIGHT_MARGIN - 25, page_number, c, fonts)
 
         c.drawString(LEFT_MARGIN + 5, y, dot_line["text"])
         c.drawRightString(RIGHT_MARGIN, y, dot_line["page"])
@@ -233,7 +248,7 @@ def _add_table_of_contents(c, sections, data):
         if y < 60 * mm:
             c.showPage()
             _draw_left_band(c)
-            _add_header_footer(c, data.get("title", ""), data.get("author", ""))
+            _add_header_footer(c, data.get("title", ""), data.get("author", ""), fonts)
             y = TOP_MARGIN - 20
 
     c.showPage()
@@ -242,23 +257,23 @@ def _add_table_of_contents(c, sections, data):
 # --------------------------------------------------------------------
 #                   LEADER DOTS UTILITY
 # --------------------------------------------------------------------
-def _create_leader_dots(title: str, x_start: float, x_end: float, page_num: int, c: canvas.Canvas) -> dict:
+def _create_leader_dots(title: str, x_start: float, x_end: float, page_num: int, c: canvas.Canvas, fonts: FontFamily) -> dict:
     """
     Crée une ligne avec des points entre le titre et le numéro de page.
     Exemple : "1. Architecture MERN ....................... Page 4"
     """
-    c.setFont("Helvetica", 12)
+    c.setFont(fonts.regular, 12)
     text = f"{title}"
     page_label = f"Page {page_num}"
 
     # Calcul largeur dispo
-    text_width = c.stringWidth(text, "Helvetica", 12)
-    page_width = c.stringWidth(page_label, "Helvetica", 12)
+    text_width = c.stringWidth(text, fonts.regular, 12)
+    page_width = c.stringWidth(page_label, fonts.regular, 12)
     available_width = x_end - x_start - text_width - page_width - 10
 
     # Nombre de points selon espace disponible
     if available_width > 0:
-        num_dots = int(available_width / c.stringWidth(".", "Helvetica", 12))
+        num_dots = int(available_width / c.stringWidth(".", fonts.regular, 12))
         dots = "." * num_dots
     else:
         dots = " "
@@ -269,28 +284,28 @@ def _create_leader_dots(title: str, x_start: float, x_end: float, page_num: int,
 # --------------------------------------------------------------------
 #                   SECTIONS
 # --------------------------------------------------------------------
-def _add_section(c, section, data, index):
+def _add_section(c, section, data, index, fonts):
     _draw_left_band(c)
-    _add_header_footer(c, data.get("title", ""), data.get("author", ""))
+    _add_header_footer(c, data.get("title", ""), data.get("author", ""), fonts)
 
-    c.setFont("Helvetica-Bold", 16)
+    c.setFont(fonts.bold, 16)
     c.setFillColor(colors.HexColor("#001F7F"))
     c.drawString(LEFT_MARGIN, TOP_MARGIN, section.get("title", f"Section {index}"))
     c.setStrokeColor(colors.HexColor("#4B0082"))
     c.line(LEFT_MARGIN, TOP_MARGIN - 5, RIGHT_MARGIN, TOP_MARGIN - 5)
 
-    _draw_paragraph(c, section.get("content", ""), LEFT_MARGIN, TOP_MARGIN - 25, font_size=11)
+    _draw_paragraph(c, section.get("content", ""), LEFT_MARGIN, TOP_MARGIN - 25, fonts, font_size=11)
     c.showPage()
 
 
 # --------------------------------------------------------------------
 #                   PARAGRAPHES JUSTIFIÉS
 # --------------------------------------------------------------------
-def _draw_paragraph(c, text, x, y, font_size=11):
+def _draw_paragraph(c, text, x, y, fonts, font_size=11):
     """Paragraphe justifié avec gestion fluide."""
     style = ParagraphStyle(
         "Justify",
-        fontName="Helvetica",
+        fontName=fonts.regular,
         fontSize=font_size,
         leading=font_size + 4,
         alignment=4,  # Justified
@@ -0,0 +1,290 @@
+"""
+Aperçu rapide de la première page d'un document (PNG ou HTML).
+
+Les fonctions draw_* des renderers dessinent sur un PreviewCanvas qui
+enregistre les opérations de la première page au lieu de produire un PDF :
+pas d'embarquement de polices, pas de compression, rien d'écrit dans out/.
+"""
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+from html import escape
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import reportlab
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.pdfgen.textobject import PDFTextObject
+
+from src.renderers.fonts import FontFamily, get_font_family
+
+
+PREVIEW_FORMATS = {"png": "image/png", "html": "text/html"}
+
+# Largeur par défaut de la vignette PNG (pixels)
+THUMBNAIL_WIDTH = 420
+
+# Polices utilisées pour rasteriser le texte (livrées avec ReportLab)
+_RASTER_FONTS = {
+    "regular": "Vera.ttf",
+    "bold": "VeraBd.ttf",
+    "italic": "VeraIt.ttf",
+    "bold_italic": "VeraBI.ttf",
+}
+
+Color = Tuple[float, float, float]
+
+
+@dataclass
+class TextOp:
+    x: float
+    y: float
+    text: str
+    style: str
+    size: float
+    color: Color
+    width: float
+
+
+@dataclass
+class ShapeOp:
+    kind: str  # "line" ou "rect"
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    stroke: Optional[Color]
+    fill: Optional[Color]
+    width: float
+
+
+# --------------------------------------------------------------------
+#                   CANVAS D'ENREGISTREMENT
+# --------------------------------------------------------------------
+class PreviewCanvas(canvas.Canvas):
+    """Canvas qui enregistre le texte et les formes de la première page."""
+
+    def __init__(self, fonts: FontFamily, pagesize=A4):
+        super().__init__(io.BytesIO(), pagesize=pagesize, pageCompression=0)
+        self.page_width, self.page_height = pagesize
+        self.ops: List[Any] = []
+        self._styles = {
+            fonts.bold_italic: "bold_italic",
+            fonts.italic: "italic",
+            fonts.bold: "bold",
+            fonts.regular: "regular",
+        }
+        self._done = False
+
+    # --- état courant ---
+    def _style(self, font_name: str) -> str:
+        return self._styles.get(font_name, "bold" if "Bold" in font_name else "regular")
+
+    def _point(self, x: float, y: float) -> Tuple[float, float]:
+        a, b, c, d, e, f = self._currentMatrix
+        return a * x + c * y + e, b * x + d * y + f
+
+    @staticmethod
+    def _rgb(color_obj) -> Color:
+        if hasattr(color_obj, "rgb"):
+            return tuple(color_obj.rgb())
+        return tuple(color_obj) if color_obj else (0, 0, 0)
+
+    def _add_text(self, x, y, text, font_name, font_size, color_obj):
+        if self._done or not text:
+            return
+        px, py = self._point(x, y)
+        width = self.stringWidth(text, font_name, font_size)
+        self.ops.append(TextOp(px, py, text, self._style(font_name), font_size, self._rgb(color_obj), width))
+
+    # --- texte ---
+    def drawString(self, x, y, text, *args, **kwargs):
+        self._add_text(x, y, text, self._fontname, self._fontsize, self._fillColorObj)
+
+    def drawRightString(self, x, y, text, *args, **kwargs):
+        x -= self.stringWidth(text, self._fontname, self._fontsize)
+        self._add_text(x, y, text, self._fontname, self._fontsize, self._fillColorObj)
+
+    def drawCentredString(self, x, y, text, *args, **kwargs):
+        x -= self.stringWidth(text, self._fontname, self._fontsize) / 2
+        self._add_text(x, y, text, self._fontname, self._fontsize, self._fillColorObj)
+
+    def beginText(self, x=0, y=0, direction=None):
+        return _PreviewTextObject(self, x, y, direction=direction)
+
+    def drawText(self, aTextObject):
+        for x, y, text, font_name, font_size, color in getattr(aTextObject, "runs", []):
+            self._add_text(x, y, text, font_name, font_size, color or self._fillColorObj)
+
+    # --- formes ---
+    def line(self, x1, y1, x2, y2):
+        if self._done:
+            return
+        (ax, ay), (bx, by) = self._point(x1, y1), self._point(x2, y2)
+        self.ops.append(ShapeOp("line", ax, ay, bx, by, self._rgb(self._strokeColorObj), None, self._lineWidth))
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        if self._done:
+            return
+        (ax, ay), (bx, by) = self._point(x, y), self._point(x + width, y + height)
+        self.ops.append(ShapeOp(
+            "rect", ax, ay, bx, by,
+            self._rgb(self._strokeColorObj) if stroke else None,
+            self._rgb(self._fillColorObj) if fill else None,
+            self._lineWidth,
+        ))
+
+    def drawImage(self, image, x, y, width=None, height=None, *args, **kwargs):
+        # Les images ne sont pas décodées : un cadre gris les remplace
+        if width and height:
+            self.saveState()
+            self.setStrokeColorRGB(0.8, 0.8, 0.8)
+            self.rect(x, y, width, height, stroke=1, fill=0)
+            self.restoreState()
+
+    # --- pagination ---
+    def showPage(self):
+        # Seule la première page est enregistrée, la suite est ignorée
+        self._done = True
+        self._startPage()
+
+    def save(self):
+        pass
+
+
+class _PreviewTextObject(PDFTextObject):
+    """Objet texte qui suit la position des lignes au lieu d'émettre du PDF."""
+
+    def __init__(self, canvas, x=0, y=0, direction=None):
+        self.runs = []
+        super().__init__(canvas, x, y, direction=direction)
+
+    def setTextOrigin(self, x, y):
+        super().setTextOrigin(x, y)
+        self._line_x, self._line_y = x, y
+        self._pen_x = x
+
+    def moveCursor(self, dx, dy):
+        super().moveCursor(dx, dy)
+        self._line_x += dx
+        self._line_y -= dy
+        self._pen_x = self._line_x
+
+    def _textOut(self, text, TStar=0):
+        if text:
+            color = getattr(self, "_fillColorObj", None)
+            self.runs.append((self._pen_x, self._line_y, text, self._fontname, self._fontsize, color))
+            self._pen_x += self._canvas.stringWidth(text, self._fontname, self._fontsize)
+        if TStar:
+            self._line_y -= self._leading
+            self._pen_x = self._line_x
+
+    def textOut(self, text):
+        self._textOut(text)
+
+    def textLine(self, text=""):
+        self._textOut(text, 1)
+
+
+# --------------------------------------------------------------------
+#                   SORTIES
+# --------------------------------------------------------------------
+def render_preview(
+    draw: Callable[[canvas.Canvas, Dict[str, Any], FontFamily], None],
+    data: Dict[str, Any],
+    fmt: str = "png",
+    font_family: Optional[str] = None,
+    width: int = THUMBNAIL_WIDTH,
+) -> bytes:
+    """Exécute la mise en page `draw` et retourne l'aperçu de la première page."""
+    if fmt not in PREVIEW_FORMATS:
+        raise ValueError(f"Format d'aperçu non pris en charge : {fmt}")
+
+    fonts = get_font_family(font_family)
+    c = PreviewCanvas(fonts)
+    draw(c, data, fonts)
+
+    if fmt == "html":
+        return _to_html(c).encode("utf-8")
+    return _to_png(c, width)
+
+
+def _css(color: Optional[Color]) -> str:
+    if color is None:
+        return "none"
+    r, g, b = (round(v * 255) for v in color)
+    return f"rgb({r},{g},{b})"
+
+
+def _to_html(c: PreviewCanvas) -> str:
+    w, h = c.page_width, c.page_height
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body style=\"margin:0\">",
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w:.0f} {h:.0f}" '
+        f'style="width:100%;background:#fff;font-family:Helvetica,Arial,sans-serif">',
+    ]
+    for op in c.ops:
+        if isinstance(op, TextOp):
+            weight = "bold" if "bold" in op.style else "normal"
+            italic = "italic" if "italic" in op.style else "normal"
+            parts.append(
+                f'<text x="{op.x:.1f}" y="{h - op.y:.1f}" font-size="{op.size}" '
+                f'font-weight="{weight}" font-style="{italic}" fill="{_css(op.color)}" '
+                f'xml:space="preserve">{escape(op.text)}</text>'
+            )
+        elif op.kind == "line":
+            parts.append(
+                f'<line x1="{op.x1:.1f}" y1="{h - op.y1:.1f}" x2="{op.x2:.1f}" y2="{h - op.y2:.1f}" '
+                f'stroke="{_css(op.stroke)}" stroke-width="{op.width}"/>'
+            )
+        else:
+            x, y = min(op.x1, op.x2), h - max(op.y1, op.y2)
+            parts.append(
+                f'<rect x="{x:.1f}" y="{y:.1f}" width="{abs(op.x2 - op.x1):.1f}" '
+                f'height="{abs(op.y2 - op.y1):.1f}" fill="{_css(op.fill)}" stroke="{_css(op.stroke)}"/>'
+            )
+    parts.append("</svg></body></html>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=64)
+def _raster_font(style: str, size: int):
+    path = Path(reportlab.__file__).parent / "fonts" / _RASTER_FONTS[style]
+    return ImageFont.truetype(str(path), size)
+
+
+def _to_png(c: PreviewCanvas, width: int) -> bytes:
+    scale = width / c.page_width
+    height = round(c.page_height * scale)
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+
+    def px(x, y):
+        return x * scale, (c.page_height - y) * scale
+
+    def rgb(color):
+        return tuple(round(v * 255) for v in color) if color is not None else None
+
+    for op in c.ops:
+        if isinstance(op, TextOp):
+            size = max(1, round(op.size * scale))
+            font = _raster_font(op.style, size)
+            # Les métriques de Vera diffèrent de la police du PDF : on réduit
+            # la taille pour que le texte tienne dans la largeur mise en page
+            natural = font.getlength(op.text)
+            if natural > op.width * scale > 0:
+                font = _raster_font(op.style, max(1, int(size * op.width * scale / natural)))
+            draw.text(px(op.x, op.y), op.text, fill=rgb(op.color), font=font, anchor="ls")
+        elif op.kind == "line":
+            draw.line([px(op.x1, op.y1), px(op.x2, op.y2)], fill=rgb(op.stroke),
+                      width=max(1, round(op.width * scale)))
+        else:
+            (x1, y1), (x2, y2) = px(op.x1, op.y1), px(op.x2, op.y2)
+            draw.rectangle([min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)],
+                           fill=rgb(op.fill), outline=rgb(op.stroke))
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
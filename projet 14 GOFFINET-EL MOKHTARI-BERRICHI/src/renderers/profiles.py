@@ -0,0 +1,102 @@
+"""
+Profils de sortie PDF : compromis entre vitesse de rendu et taille du fichier.
+
+    fast     téléchargement interactif : pas de compression ni de métadonnées
+    compact  fichier le plus léger : compression, images ré-échantillonnées
+    archive  conservation : compression, polices embarquées, métadonnées complètes
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from src.renderers.fonts import FontFamily, get_font_family
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    name: str
+    page_compression: bool
+    # Résolution maximale des images (None = images gardées telles quelles)
+    image_dpi: Optional[int]
+    # Force une famille TrueType embarquée si la famille demandée est standard
+    embed_fonts: bool
+    metadata: bool
+
+
+PROFILES: Dict[str, OutputProfile] = {
+    "fast": OutputProfile("fast", page_compression=False, image_dpi=None, embed_fonts=False, metadata=False),
+    "compact": OutputProfile("compact", page_compression=True, image_dpi=150, embed_fonts=False, metadata=False),
+    "archive": OutputProfile("archive", page_compression=True, image_dpi=None, embed_fonts=True, metadata=True),
+}
+
+DEFAULT_PROFILE = os.getenv("PDF_OUTPUT_PROFILE", "compact")
+
+# Familles essayées, dans l'ordre, quand le profil exige des polices embarquées
+EMBEDDED_FALLBACKS = ("dejavu", "vera")
+
+
+def get_profile(name: Optional[str] = None) -> OutputProfile:
+    key = (name or DEFAULT_PROFILE).lower()
+    try:
+        return PROFILES[key]
+    except KeyError:
+        raise ValueError(f"Profil de sortie inconnu : {key} (disponibles : {', '.join(PROFILES)})")
+
+
+def resolve_fonts(profile: OutputProfile, font_family: Optional[str] = None) -> FontFamily:
+    """Famille de polices à utiliser pour ce profil."""
+    fonts = get_font_family(font_family)
+    if not profile.embed_fonts or fonts.truetype:
+        return fonts
+    for name in EMBEDDED_FALLBACKS:
+        try:
+            return get_font_family(name)
+        except ValueError:
+            continue
+    return fonts
+
+
+class ProfiledCanvas(canvas.Canvas):
+    """Canvas dont les images sont ré-échantillonnées selon le profil."""
+
+    def __init__(self, filename, profile: OutputProfile, pagesize=A4, **kwargs):
+        super().__init__(filename, pagesize=pagesize, pageCompression=int(profile.page_compression), **kwargs)
+        self.profile = profile
+
+    def drawImage(self, image, x, y, width=None, height=None, *args, **kwargs):
+        if self.profile.image_dpi and width and isinstance(image, (str, os.PathLike)):
+            image = _downsample(str(image), width, height, self.profile.image_dpi)
+        return super().drawImage(image, x, y, width, height, *args, **kwargs)
+
+
+def create_canvas(filename, profile: OutputProfile, pagesize=A4) -> ProfiledCanvas:
+    return ProfiledCanvas(filename, profile, pagesize=pagesize)
+
+
+def apply_metadata(c: canvas.Canvas, profile: OutputProfile, title: str = "", author: str = "",
+                   subject: str = ""):
+    """Renseigne les métadonnées du document si le profil les conserve."""
+    if not profile.metadata:
+        return
+    c.setTitle(title)
+    c.setAuthor(author)
+    c.setSubject(subject)
+    c.setCreator("Structured Content Generator")
+    c.setKeywords([subject, profile.name])
+
+
+def _downsample(path: str, width: float, height: Optional[float], dpi: int) -> ImageReader:
+    """Réduit l'image à `dpi` pour la taille à laquelle elle est dessinée (en points)."""
+    img = Image.open(path)
+    img.load()
+    ratio = img.height / img.width
+    target_w = max(1, round(width / 72 * dpi))
+    target_h = max(1, round((height if height else width * ratio) / 72 * dpi))
+    if target_w < img.width and target_h < img.height:
+        img = img.resize((target_w, target_h), Image.Resampling.LANCZOS)
+    return ImageReader(img)
@@ -1,17 +1,23 @@
-from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import FileResponse
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.responses import FileResponse, Response
 from src.utils.validate import validate_data
 from src.orchestrator import orchestrator
+from src.renderers.preview import PREVIEW_FORMATS
 from src.agents.semantic_agent import process_prompt_to_json
 
 router = APIRouter()
 
 # ---------- CV ----------
 @router.post("/cv")
-async def create_cv(data: dict = Body(...)):
+async def create_cv(
+    data: dict = Body(...),
+    font: Optional[str] = Query(None),
+    profile: Optional[str] = Query(None, description="fast, compact ou archive"),
+):
     """Generate a CV PDF from structured data"""
     try:
-        output_path = orchestrator.generate_document("cv", data)
+        output_path = orchestrator.generate_document("cv", data, font_family=font, profile=profile)
         return FileResponse(
             output_path,
             media_type="application/pdf",
@@ -23,10 +29,14 @@ async def create_cv(data: dict = Body(...)):
 
 # ---------- INVOICE ----------
 @router.post("/invoice")
-async def create_invoice(data: dict = Body(...)):
+async def create_invoice(
+    data: dict = Body(...),
+    font: Optional[str] = Query(None),
+    profile: Optional[str] = Query(None, description="fast, compact ou archive"),
+):
     """Generate an Invoice PDF from structured data"""
     try:
-        output_path = orchestrator.generate_document("invoice", data)
+        output_path = orchestrator.generate_document("invoice", data, font_family=font, profile=profile)
         return FileResponse(
             output_path,
             media_type="application/pdf",
@@ -38,10 +48,14 @@ async def create_invoice(data: dict = Body(...)):
 
 # ---------- REPORT ----------
 @router.post("/report")
-async def create_report(data: dict = Body(...)):
+async def create_report(
+    data: dict = Body(...),
+    font: Optional[str] = Query(None),
+    profile: Optional[str] = Query(None, description="fast, compact ou archive"),
+):
     """Generate a Report PDF from structured data"""
     try:
-        output_path = orchestrator.generate_document("report", data)
+        output_path = orchestrator.generate_document("report", data, font_family=font, profile=profile)
         return FileResponse(
             output_path,
             media_type="application/pdf",
@@ -51,9 +65,33 @@ async def create_report(data: dict = Body(...)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ---------- PREVIEW ----------
+@router.post("/preview/{doc_type}")
+def preview_document(
+    doc_type: str,
+    data: dict = Body(...),
+    fmt: str = Query("png", alias="format", description="png (vignette) ou html"),
+    font: Optional[str] = Query(None),
+):
+    """
+    Fast first-page preview (PNG thumbnail or HTML) for live editing.
+    Uses the same layout code as the PDF routes, without writing to out/.
+    """
+    try:
+        content = orchestrator.preview_document(doc_type, data, fmt=fmt, font_family=font)
+        return Response(content, media_type=PREVIEW_FORMATS[fmt])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ---------- SEMANTIC AGENT ----------
 @router.post("/semantic/{doc_type}")
-async def generate_from_prompt(doc_type: str, payload: dict = Body(...)):
+async def generate_from_prompt(
+    doc_type: str,
+    payload: dict = Body(...),
+    font: Optional[str] = Query(None),
+    profile: Optional[str] = Query(None, description="fast, compact ou archive"),
+):
     """
     Generate a structured document from a natural language prompt.
     Example:
@@ -71,7 +109,7 @@ async def generate_from_prompt(doc_type: str, payload: dict = Body(...)):
         structured_data = await process_prompt_to_json(prompt, doc_type)
 
         # 3️⃣ Générer le PDF via Orchestrator
-        output_path = orchestrator.generate_document(doc_type, structured_data)
+        output_path = orchestrator.generate_document(doc_type, structured_data, font_family=font, profile=profile)
 
         return FileResponse(
             output_path,
@@ -0,0 +1,99 @@
+"""
+Mesure le temps de rendu et la taille des PDF pour chaque profil de sortie.
+
+    python -m src.utils.benchmark --runs 20
+    python -m src.utils.benchmark --doc invoice --profile fast --profile archive
+"""
+import argparse
+import copy
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from src.renderers.pdf_cv import render_pdf_cv
+from src.renderers.pdf_invoice import render_pdf_invoice
+from src.renderers.pdf_report import render_pdf_report
+from src.renderers.profiles import PROFILES
+
+RENDERERS = {
+    "cv": render_pdf_cv,
+    "invoice": render_pdf_invoice,
+    "report": render_pdf_report,
+}
+
+# Documents synthétiques représentatifs (accents compris)
+SAMPLES: Dict[str, dict] = {
+    "cv": {
+        "personal": {"name": "Benchmark Zoë", "email": "zoe@example.com", "phone": "0600000000", "location": "Paris"},
+        "experience": [
+            {"title": f"Ingénieure logiciel {i}", "company": "Société Générale d'Édition",
+             "date": "2020 - 2024", "description": "Conception d'API\nRevue de code\nMentorat"}
+            for i in range(6)
+        ],
+        "education": [{"title": "Diplôme d'ingénieur", "institution": "EPF", "date": "2019"}],
+        "skills": ["Python", "FastAPI", "ReportLab", "PostgreSQL", "React"],
+    },
+    "invoice": {
+        "invoice_number": "BENCH-001",
+        "date": "2025-10-30",
+        "company": {"name": "IMSA Solutions", "address": "10 rue des Startups, Paris", "vat_number": "FR000000000"},
+        "client": {"name": "EPF École d'ingénieurs", "address": "3 rue Lakanal, Cachan"},
+        "items": [
+            {"description": f"Prestation {i}", "quantity": i + 1, "unit_price": 50.0, "total": 50.0 * (i + 1)}
+            for i in range(20)
+        ],
+        "subtotal": 10500, "tax_rate": 20, "tax_amount": 2100, "total": 12600,
+    },
+    "report": {
+        "title": "Rapport de performance du générateur",
+        "author": "Équipe EPF",
+        "report_id": "BENCH",
+        "executive_summary": "Synthèse des mesures de rendu. " * 40,
+        "sections": [
+            {"title": f"Section {i}", "content": "Analyse détaillée des résultats obtenus. " * 80}
+            for i in range(1, 6)
+        ],
+    },
+}
+
+
+def run(docs: List[str], profiles: List[str], runs: int, font_family=None) -> List[dict]:
+    results = []
+    for doc in docs:
+        render = RENDERERS[doc]
+        for profile in profiles:
+            timings = []
+            size = 0
+            for _ in range(runs):
+                data = copy.deepcopy(SAMPLES[doc])
+                start = time.perf_counter()
+                path = render(data, font_family=font_family, profile=profile)
+                timings.append((time.perf_counter() - start) * 1000)
+                size = os.path.getsize(path)
+                os.remove(path)
+            results.append({
+                "doc": doc,
+                "profile": profile,
+                "median_ms": statistics.median(timings),
+                "min_ms": min(timings),
+                "bytes": size,
+            })
+    return results
+
+
+def print_table(results: List[dict]):
+    print(f"{'doc':<8} {'profile':<8} {'median ms':>10} {'min ms':>8} {'bytes':>9}")
+    for r in results:
+        print(f"{r['doc']:<8} {r['profile']:<8} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} {r['bytes']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PDF output profiles")
+    parser.add_argument("--doc", action="append", choices=list(RENDERERS), help="Document type (repeatable)")
+    parser.add_argument("--profile", action="append", choices=list(PROFILES), help="Output profile (repeatable)")
+    parser.add_argument("--font", default=None, help="Font family to use")
+    parser.add_argument("--runs", type=int, default=10, help="Renders per doc/profile")
+
+    args = parser.parse_args()
+    print_table(run(args.doc or list(RENDERERS), args.profile or list(PROFILES), args.runs, args.font))
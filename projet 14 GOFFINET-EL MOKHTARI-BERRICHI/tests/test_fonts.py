@@ -0,0 +1,63 @@
+import os
+import pytest
+from reportlab.pdfbase import pdfmetrics
+from src.renderers.fonts import get_font_family, available_font_families, register_font_family
+from src.renderers.pdf_cv import render_pdf_cv
+
+
+def _cv(name):
+    return {
+        "personal": {"name": name, "email": "a@ex.com"},
+        "skills": ["Python", "ReportLab"]
+    }
+
+
+def test_font_family_parsed_once():
+    first = get_font_family("vera")
+    assert first is get_font_family("VERA")
+    assert first.truetype
+    assert pdfmetrics.getFont(first.bold).face is pdfmetrics.getFont(get_font_family("vera").bold).face
+
+
+def test_unknown_font_family():
+    assert "helvetica" in available_font_families()
+    with pytest.raises(ValueError):
+        get_font_family("does-not-exist")
+
+
+def test_subset_reused_across_documents():
+    fonts = get_font_family("vera")
+    face = pdfmetrics.getFont(fonts.regular).face
+    hits = face.subset_cache_info().hits
+
+    for _ in range(2):
+        path = render_pdf_cv(_cv("Zoë Ångström"), font_family="vera")
+        assert os.path.exists(path)
+        os.remove(path)
+
+    assert face.subset_cache_info().hits > hits
+
+
+def test_render_cv_unicode_name():
+    try:
+        get_font_family("dejavu")
+    except ValueError:
+        pytest.skip("DejaVu fonts not installed")
+    path = render_pdf_cv(_cv("Łukasz Żółć Σωκράτης"), font_family="dejavu")
+    assert os.path.exists(path)
+    os.remove(path)
+
+
+def test_undeclared_styles_fall_back():
+    register_font_family("vera-regular-only", "Vera.ttf")
+    fonts = get_font_family("vera-regular-only")
+    assert fonts.regular == fonts.bold == fonts.italic == fonts.bold_italic
+
+
+def test_missing_style_file_is_reported():
+    register_font_family("vera-missing-bold", "Vera.ttf", bold="VeraBold-absent.ttf", italic="VeraIt.ttf")
+    with pytest.raises(ValueError, match=r"\(bold\) : VeraBold-absent.ttf"):
+        get_font_family("vera-missing-bold")
+    register_font_family("vera-missing-regular", "Vera-absent.ttf")
+    with pytest.raises(ValueError, match="regular"):
+        get_font_family("vera-missing-regular")
@@ -0,0 +1,32 @@
+import os
+from fastapi.testclient import TestClient
+from src.main import app
+
+client = TestClient(app)
+
+CV = {
+    "personal": {"name": "Zoë Doe", "email": "zoe@ex.com"},
+    "experience": [{"title": "Engineer", "company": "ACME", "description": "Line 1\nLine 2"}],
+    "skills": ["Python"]
+}
+
+
+def test_preview_png_thumbnail():
+    response = client.post("/api/preview/cv", json=CV)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+
+def test_preview_html_does_not_write_output():
+    before = set(os.listdir("out/invoice")) if os.path.isdir("out/invoice") else set()
+    response = client.post("/api/preview/invoice?format=html", json={"invoice_number": "PREVIEW-1"})
+    assert response.status_code == 200
+    assert "INVOICE #PREVIEW-1" in response.text
+    after = set(os.listdir("out/invoice")) if os.path.isdir("out/invoice") else set()
+    assert after == before
+
+
+def test_preview_unknown_format():
+    response = client.post("/api/preview/report?format=gif", json={"title": "T"})
+    assert response.status_code == 400
@@ -0,0 +1,31 @@
+import os
+import pytest
+from src.renderers.pdf_invoice import render_pdf_invoice
+from src.renderers.profiles import get_profile
+
+
+def _render(profile):
+    data = {
+        "invoice_number": f"INV-{profile}",
+        "items": [{"description": f"Item {i}", "quantity": 1, "unit_price": 10, "total": 10} for i in range(15)]
+    }
+    path = render_pdf_invoice(data, profile=profile)
+    with open(path, "rb") as f:
+        content = f.read()
+    os.remove(path)
+    return content
+
+
+def test_compact_smaller_than_fast():
+    assert len(_render("compact")) < len(_render("fast"))
+
+
+def test_archive_embeds_fonts_and_metadata():
+    content = _render("archive")
+    assert b"/FontFile2" in content
+    assert b"Invoice INV-archive" in content
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        get_profile("tiny")
@@ -25,6 +25,23 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Objets de recherche plein texte créés par la migration 0002 hors des modèles :
+# à ignorer par l'autogénération
+SEARCH_OBJECTS = {
+    "search_vector",
+    "ix_applications_search_vector",
+    "ix_applications_company_name_trgm",
+    "ix_applications_job_title_trgm",
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if reflected and compare_to is None:
+        if name in SEARCH_OBJECTS or (type_ == "table" and name.startswith("applications_fts")):
+            return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +64,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -70,7 +88,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,79 @@
+"""Schéma initial (candidatures, événements, emails)
+
+Schéma antérieur à la synchronisation incrémentale : les tables et colonnes
+ajoutées depuis font chacune l'objet d'une révision (0001a, 0001b, 0001c).
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 22:42:06.179485
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('applications',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('job_title', sa.String(length=255), nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('source', sa.String(length=100), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('next_action_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_applications_status'), 'applications', ['status'], unique=False)
+    op.create_table('application_events',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('application_id', sa.Uuid(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['application_id'], ['applications.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_application_events_application_id'), 'application_events', ['application_id'], unique=False)
+    op.create_table('emails',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('application_id', sa.Uuid(), nullable=True),
+    sa.Column('external_id', sa.String(length=512), nullable=True),
+    sa.Column('subject', sa.Text(), nullable=True),
+    sa.Column('sender', sa.String(length=512), nullable=True),
+    sa.Column('recipients', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.Column('cc', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('snippet', sa.Text(), nullable=True),
+    sa.Column('raw_headers', sa.Text(), nullable=True),
+    sa.Column('raw_body', sa.Text(), nullable=True),
+    sa.Column('classification', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['application_id'], ['applications.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_emails_application_id'), 'emails', ['application_id'], unique=False)
+    op.create_index(op.f('ix_emails_external_id'), 'emails', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_emails_external_id'), table_name='emails')
+    op.drop_index(op.f('ix_emails_application_id'), table_name='emails')
+    op.drop_table('emails')
+    op.drop_index(op.f('ix_application_events_application_id'), table_name='application_events')
+    op.drop_table('application_events')
+    op.drop_index(op.f('ix_applications_status'), table_name='applications')
+    op.drop_table('applications')
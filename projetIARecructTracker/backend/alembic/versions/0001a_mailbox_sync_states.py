@@ -0,0 +1,38 @@
+"""Curseurs de synchronisation des boîtes distantes (watermark IMAP UIDVALIDITY/UID)
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 22:23:44.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mailbox_sync_states',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('account', sa.String(length=255), nullable=False),
+    sa.Column('mailbox', sa.String(length=255), nullable=False),
+    sa.Column('uid_validity', sa.BigInteger(), nullable=True),
+    sa.Column('last_uid', sa.BigInteger(), nullable=False),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account', 'mailbox', name='uq_mailbox_sync_account_mailbox')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('mailbox_sync_states')
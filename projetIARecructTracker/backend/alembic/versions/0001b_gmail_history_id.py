@@ -0,0 +1,28 @@
+"""Curseur historyId Gmail (mailbox_sync_states.history_id)
+
+Revision ID: 0001b
+Revises: 0001a
+Create Date: 2026-10-18 22:26:03.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001b'
+down_revision: Union[str, Sequence[str], None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('mailbox_sync_states', sa.Column('history_id', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('mailbox_sync_states', 'history_id')
@@ -0,0 +1,33 @@
+"""Origine de la classification des emails (emails.classification_source)
+
+Les emails déjà classés restent sans origine : seules les corrections
+manuelles ("user") servent à l'entraînement du modèle.
+
+Revision ID: 0001c
+Revises: 0001b
+Create Date: 2026-10-18 22:37:22.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001c'
+down_revision: Union[str, Sequence[str], None] = '0001b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emails', sa.Column('classification_source', sa.String(length=10), nullable=True))
+    op.create_index(op.f('ix_emails_classification_source'), 'emails', ['classification_source'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_emails_classification_source'), table_name='emails')
+    op.drop_column('emails', 'classification_source')
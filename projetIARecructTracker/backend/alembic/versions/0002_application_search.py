@@ -0,0 +1,76 @@
+"""Recherche plein texte des candidatures (tsvector + GIN, trigrammes ; FTS5 sous SQLite)
+
+Revision ID: 0002
+Revises: 0001c
+Create Date: 2026-10-18 22:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Entreprise en 'simple' (noms propres, pas de racinisation), intitulé et notes en français et anglais
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple'::regconfig, coalesce(company_name, '')), 'A') ||
+    setweight(to_tsvector('french'::regconfig, coalesce(job_title, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, coalesce(job_title, '')), 'A') ||
+    setweight(to_tsvector('french'::regconfig, coalesce(notes, '')), 'C') ||
+    setweight(to_tsvector('english'::regconfig, coalesce(notes, '')), 'C')
+"""
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE applications_fts USING fts5("
+    "application_id UNINDEXED, job_title, company_name, notes, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO applications_fts (application_id, job_title, company_name, notes) "
+    "SELECT id, job_title, company_name, notes FROM applications",
+    "CREATE TRIGGER applications_fts_insert AFTER INSERT ON applications BEGIN "
+    "INSERT INTO applications_fts (application_id, job_title, company_name, notes) "
+    "VALUES (new.id, new.job_title, new.company_name, new.notes); END",
+    "CREATE TRIGGER applications_fts_update AFTER UPDATE OF job_title, company_name, notes ON applications BEGIN "
+    "UPDATE applications_fts SET job_title = new.job_title, company_name = new.company_name, notes = new.notes "
+    "WHERE application_id = new.id; END",
+    "CREATE TRIGGER applications_fts_delete AFTER DELETE ON applications BEGIN "
+    "DELETE FROM applications_fts WHERE application_id = old.id; END",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        return
+    if dialect != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Colonne générée : maintenue par PostgreSQL à chaque écriture
+    op.execute(f"ALTER TABLE applications ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED")
+    op.execute("CREATE INDEX ix_applications_search_vector ON applications USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_applications_company_name_trgm ON applications USING gin (company_name gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_applications_job_title_trgm ON applications USING gin (job_title gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS applications_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS applications_fts")
+        return
+    if dialect != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_applications_job_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_applications_company_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_applications_search_vector")
+    op.execute("ALTER TABLE applications DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,29 @@
+"""Index composites pour la pagination par curseur (updated_at, id) / (created_at, id)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 22:44:11.825330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_applications_updated_at_id', 'applications', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_emails_created_at_id', 'emails', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_emails_created_at_id', table_name='emails')
+    op.drop_index('ix_applications_updated_at_id', table_name='applications')
@@ -0,0 +1,60 @@
+"""Agrégats analytiques journaliers (entonnoir, délais de réponse) et jalons par candidature
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 22:46:54.089791
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analytics_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('source', sa.String(length=100), nullable=False),
+    sa.Column('metric', sa.String(length=40), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'company_name', 'source', 'metric', 'bucket')
+    )
+    op.create_index('ix_analytics_daily_rollups_metric_day', 'analytics_daily_rollups', ['metric', 'day'], unique=False)
+    op.create_table('analytics_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_event_id', sa.Uuid(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('application_milestones',
+    sa.Column('application_id', sa.Uuid(), nullable=False),
+    sa.Column('cohort_day', sa.Date(), nullable=False),
+    sa.Column('company_name', sa.String(length=255), nullable=False),
+    sa.Column('source', sa.String(length=100), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=False),
+    sa.Column('first_response_at', sa.DateTime(), nullable=True),
+    sa.Column('stages', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=False),
+    sa.ForeignKeyConstraint(['application_id'], ['applications.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('application_id')
+    )
+    op.create_index('ix_application_events_created_at_id', 'application_events', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_application_events_created_at_id', table_name='application_events')
+    op.drop_table('application_milestones')
+    op.drop_table('analytics_watermarks')
+    op.drop_index('ix_analytics_daily_rollups_metric_day', table_name='analytics_daily_rollups')
+    op.drop_table('analytics_daily_rollups')
@@ -0,0 +1,127 @@
+"""Contenu brut des emails compressé (zstd) dans email_contents
+
+Les en-têtes et corps existants sont recopiés compressés par lots, puis les
+colonnes emails.raw_headers / raw_body supprimées. Sous PostgreSQL, l'espace
+libéré n'est rendu qu'après VACUUM FULL emails (ou pg_repack).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 23:00:29.504636
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+import zstandard
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+emails = sa.table(
+    'emails',
+    sa.column('id', sa.Uuid()),
+    sa.column('raw_headers', sa.Text()),
+    sa.column('raw_body', sa.Text()),
+)
+email_contents = sa.table(
+    'email_contents',
+    sa.column('email_id', sa.Uuid()),
+    sa.column('codec', sa.String()),
+    sa.column('raw_headers', sa.LargeBinary()),
+    sa.column('raw_body', sa.LargeBinary()),
+    sa.column('raw_size', sa.Integer()),
+)
+
+
+def _require_online() -> None:
+    if context.is_offline_mode():
+        raise RuntimeError("Migration de données (compression) : à exécuter en ligne, pas en mode --sql")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _require_online()
+    op.create_table('email_contents',
+    sa.Column('email_id', sa.Uuid(), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('raw_headers', sa.LargeBinary(), nullable=True),
+    sa.Column('raw_body', sa.LargeBinary(), nullable=True),
+    sa.Column('raw_size', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['email_id'], ['emails.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('email_id')
+    )
+
+    bind = op.get_bind()
+    compressor = zstandard.ZstdCompressor(level=3)
+
+    def pack(text):
+        return None if text is None else compressor.compress(text.encode('utf-8'))
+
+    has_content = sa.or_(emails.c.raw_headers.isnot(None), emails.c.raw_body.isnot(None))
+    for batch in _batches(bind, emails.c.id, [emails.c.raw_headers, emails.c.raw_body], has_content):
+        bind.execute(sa.insert(email_contents), [
+            {
+                'email_id': row.id,
+                'codec': 'zstd',
+                'raw_headers': pack(row.raw_headers),
+                'raw_body': pack(row.raw_body),
+                'raw_size': len((row.raw_headers or '').encode('utf-8')) + len((row.raw_body or '').encode('utf-8')),
+            }
+            for row in batch
+        ])
+
+    op.drop_column('emails', 'raw_body')
+    op.drop_column('emails', 'raw_headers')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _require_online()
+    op.add_column('emails', sa.Column('raw_headers', sa.Text(), nullable=True))
+    op.add_column('emails', sa.Column('raw_body', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+
+    def unpack(blob):
+        return None if blob is None else decompressor.decompress(blob).decode('utf-8')
+
+    columns = [email_contents.c.raw_headers, email_contents.c.raw_body]
+    for batch in _batches(bind, email_contents.c.email_id, columns):
+        bind.execute(
+            emails.update().where(emails.c.id == sa.bindparam('b_id')).values(
+                raw_headers=sa.bindparam('b_headers'), raw_body=sa.bindparam('b_body')
+            ),
+            [
+                {'b_id': row.email_id, 'b_headers': unpack(row.raw_headers), 'b_body': unpack(row.raw_body)}
+                for row in batch
+            ],
+        )
+
+    op.drop_table('email_contents')
+
+
+def _batches(bind, id_column, columns, condition=None):
+    """
+    Lots de BATCH_SIZE lignes par position sur l'identifiant (aucun curseur
+    ouvert pendant les écritures, mémoire bornée)
+    """
+    last_id = None
+    while True:
+        query = sa.select(id_column, *columns).order_by(id_column).limit(BATCH_SIZE)
+        if condition is not None:
+            query = query.where(condition)
+        if last_id is not None:
+            query = query.where(id_column > last_id)
+        rows = bind.execute(query).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
@@ -0,0 +1,30 @@
+"""Rappels de prochaine action : index sur next_action_at, échéance rappelée (reminded_at)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:04:15.014399
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('applications', sa.Column('reminded_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_applications_next_action_at'), 'applications', ['next_action_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_applications_next_action_at'), table_name='applications')
+    op.drop_column('applications', 'reminded_at')
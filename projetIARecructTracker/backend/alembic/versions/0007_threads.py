@@ -0,0 +1,40 @@
+"""Fils de discussion : Message-ID connus (email_thread_refs) et emails.thread_id
+
+Les emails existants sont regroupés ensuite par POST /api/v1/emails/threads/rebuild.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 23:06:57.457604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('email_thread_refs',
+    sa.Column('message_id', sa.String(length=512), nullable=False),
+    sa.Column('thread_id', sa.Uuid(), nullable=False),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.create_index(op.f('ix_email_thread_refs_thread_id'), 'email_thread_refs', ['thread_id'], unique=False)
+    op.add_column('emails', sa.Column('thread_id', sa.Uuid(), nullable=True))
+    op.create_index(op.f('ix_emails_thread_id'), 'emails', ['thread_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_emails_thread_id'), table_name='emails')
+    op.drop_column('emails', 'thread_id')
+    op.drop_index(op.f('ix_email_thread_refs_thread_id'), table_name='email_thread_refs')
+    op.drop_table('email_thread_refs')
@@ -0,0 +1,32 @@
+"""Quasi-doublons d'emails : empreinte SimHash (emails.simhash) et original (emails.duplicate_of)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 23:10:00.701251
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emails', sa.Column('simhash', sa.BigInteger(), nullable=True))
+    op.add_column('emails', sa.Column('duplicate_of', sa.Uuid(), nullable=True))
+    op.create_index(op.f('ix_emails_duplicate_of'), 'emails', ['duplicate_of'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_emails_duplicate_of'), table_name='emails')
+    op.drop_column('emails', 'duplicate_of')
+    op.drop_column('emails', 'simhash')
@@ -0,0 +1,32 @@
+"""Extraction d'entités : langue détectée (emails.language) et entités extraites (emails.entities)
+
+Les emails existants sont traités ensuite par POST /api/v1/ingestion/extraction/run.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 23:14:00.503333
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emails', sa.Column('language', sa.String(length=10), nullable=True))
+    op.add_column('emails', sa.Column('entities', sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), 'postgresql'), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('emails', 'entities')
+    op.drop_column('emails', 'language')
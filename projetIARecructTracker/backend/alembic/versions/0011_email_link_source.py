@@ -0,0 +1,30 @@
+"""Origine du rattachement des emails (emails.link_source) : seules les liaisons manuelles apprennent des domaines
+
+Les rattachements existants restent sans origine : aucun domaine n'en est
+appris avant d'être confirmé par une liaison manuelle.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 09:12:41.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emails', sa.Column('link_source', sa.String(length=10), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('emails', 'link_source')
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import applications, emails, ingestion
+from app.api.v1.endpoints import analytics, applications, emails, ingestion, tasks
 
 api_router = APIRouter()
 
 api_router.include_router(applications.router, prefix="/applications", tags=["applications"])
 api_router.include_router(emails.router, prefix="/emails", tags=["emails"])
 api_router.include_router(ingestion.router, prefix="/ingestion", tags=["ingestion"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
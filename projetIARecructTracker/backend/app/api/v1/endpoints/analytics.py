@@ -0,0 +1,74 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.database import get_async_db, get_db
+from app.services.analytics_service import AnalyticsService
+from app.services.async_service import AsyncService
+
+router = APIRouter()
+
+
+def _filters(
+    start: Optional[date] = Query(None, description="Premier jour de cohorte (date de candidature)"),
+    end: Optional[date] = Query(None, description="Dernier jour de cohorte"),
+    company: Optional[str] = Query(None, description="Entreprise"),
+    source: Optional[str] = Query(None, description="Source de la candidature"),
+) -> dict:
+    return {"start": start, "end": end, "company": company, "source": source}
+
+
+@router.get("/funnel")
+async def get_funnel(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_async_db)):
+    """
+    Entonnoir : candidatures ayant atteint chaque étape et taux de conversion
+    """
+    try:
+        return await AsyncService(db, AnalyticsService).funnel(**filters)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/response-time")
+async def get_response_time(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_async_db)):
+    """
+    Délai entre la candidature et la première réponse (médiane, percentiles)
+    """
+    try:
+        return await AsyncService(db, AnalyticsService).response_time(**filters)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/response-rate")
+async def get_response_rate(
+    group_by: str = Query("company", pattern="^(company|source)$"),
+    interval: str = Query("month", pattern="^(day|week|month)$"),
+    filters: dict = Depends(_filters),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Taux de réponse par entreprise ou source et par période
+    """
+    try:
+        return {"series": await AsyncService(db, AnalyticsService).response_rate(group_by=group_by, interval=interval, **filters)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/refresh")
+def refresh_rollups(
+    full: bool = Query(False, description="Reconstruire les agrégats depuis tout l'historique"),
+    db: Session = Depends(get_db)
+):
+    """
+    Intégrer immédiatement les nouveaux événements aux agrégats
+    """
+    try:
+        analytics_service = AnalyticsService(db)
+        result = analytics_service.rebuild_rollups() if full else analytics_service.refresh_rollups()
+        return {**result, **analytics_service.rollup_status()}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
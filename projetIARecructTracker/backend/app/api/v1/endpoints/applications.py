@@ -1,31 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.models.schemas import (
     Application, ApplicationCreate, ApplicationUpdate,
-    ApplicationWithEvents, ApplicationFull
+    ApplicationWithEvents, ApplicationFull, ApplicationPage, ApplicationEventPage,
+    ApplicationBulkCreate, ApplicationBulkStatusUpdate
 )
 from app.services.application_service import ApplicationService
+from app.services.async_service import AsyncService
+from app.services.pagination import InvalidCursor
+from app.services.reminder_engine import reminder_engine
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Application])
-def get_applications(
+@router.get("/", response_model=Union[List[Application], ApplicationPage])
+async def get_applications(
     skip: int = Query(0, ge=0, description="Nombre d'éléments à ignorer"),
     limit: int = Query(50, ge=1, le=100, description="Nombre d'éléments à retourner"),
     status: Optional[str] = Query(None, description="Filtrer par statut"),
     company: Optional[str] = Query(None, description="Filtrer par entreprise"),
     q: Optional[str] = Query(None, description="Recherche textuelle"),
-    db: Session = Depends(get_db)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (liste) ou cursor (page avec curseurs)"),
+    cursor: Optional[str] = Query(None, description="Curseur next_cursor / prev_cursor d'une page précédente"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupérer la liste des candidatures avec filtres optionnels
+    Récupérer la liste des candidatures avec filtres optionnels. En mode
+    curseur, tri par date de mise à jour (la recherche filtre sans classer)
     """
     try:
-        application_service = ApplicationService(db)
-        applications = application_service.get_applications(
+        application_service = AsyncService(db, ApplicationService)
+        if pagination == "cursor" or cursor:
+            page = await application_service.get_applications_page(
+                limit=limit,
+                cursor=cursor,
+                status=status,
+                company=company,
+                search_query=q
+            )
+            return ApplicationPage(items=page.items, next_cursor=page.next_cursor, prev_cursor=page.prev_cursor)
+        applications = await application_service.get_applications(
             skip=skip, 
             limit=limit, 
             status=status, 
@@ -33,36 +50,92 @@ def get_applications(
             search_query=q
         )
         return applications
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/", response_model=Application, status_code=201)
-def create_application(
+async def create_application(
     application: ApplicationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Créer une nouvelle candidature
     """
+    try:
+        application_service = AsyncService(db, ApplicationService)
+        return await application_service.create_application(application)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk", status_code=201)
+async def bulk_create_applications(
+    payload: ApplicationBulkCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Créer des candidatures en masse (une seule transaction, événements compris)
+    """
+    try:
+        application_service = AsyncService(db, ApplicationService)
+        ids = await application_service.bulk_create_applications(payload.applications)
+        return {"created": len(ids), "ids": ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk/status")
+async def bulk_update_status(
+    payload: ApplicationBulkStatusUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Changer le statut de plusieurs candidatures (une seule transaction)
+    """
+    try:
+        application_service = AsyncService(db, ApplicationService)
+        return await application_service.bulk_update_status(payload.application_ids, payload.status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/import", status_code=201)
+def import_applications(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Importer des candidatures depuis un fichier CSV (colonnes job_title,
+    company_name, source, location, status, notes, next_action_at)
+    """
     try:
         application_service = ApplicationService(db)
-        return application_service.create_application(application)
+        return application_service.import_csv(file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{application_id}", response_model=ApplicationFull)
-def get_application(
+async def get_application(
     application_id: UUID,
-    db: Session = Depends(get_db)
+    events_limit: int = Query(20, ge=1, le=100, description="Nombre d'événements récents"),
+    emails_limit: int = Query(20, ge=1, le=100, description="Nombre d'emails liés"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupérer une candidature spécifique avec ses événements et emails
+    Récupérer une candidature avec ses derniers événements et le résumé de
+    ses emails (suite de la chronologie via /events et events_next_cursor)
     """
     try:
-        application_service = ApplicationService(db)
-        application = application_service.get_application_full(application_id)
+        application_service = AsyncService(db, ApplicationService)
+        application = await application_service.get_application_full(
+            application_id, events_limit=events_limit, emails_limit=emails_limit
+        )
         if not application:
             raise HTTPException(status_code=404, detail="Candidature non trouvée")
         return application
@@ -73,17 +146,17 @@ def get_application(
 
 
 @router.patch("/{application_id}", response_model=Application)
-def update_application(
+async def update_application(
     application_id: UUID,
     application_update: ApplicationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mettre à jour une candidature
     """
     try:
-        application_service = ApplicationService(db)
-        updated_application = application_service.update_application(
+        application_service = AsyncService(db, ApplicationService)
+        updated_application = await application_service.update_application(
             application_id, application_update
         )
         if not updated_application:
@@ -96,16 +169,16 @@ def update_application(
 
 
 @router.delete("/{application_id}", status_code=204)
-def delete_application(
+async def delete_application(
     application_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Supprimer une candidature
     """
     try:
-        application_service = ApplicationService(db)
-        success = application_service.delete_application(application_id)
+        application_service = AsyncService(db, ApplicationService)
+        success = await application_service.delete_application(application_id)
         if not success:
             raise HTTPException(status_code=404, detail="Candidature non trouvée")
     except HTTPException:
@@ -114,33 +187,49 @@ def delete_application(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{application_id}/events", response_model=List[dict])
-def get_application_events(
+@router.get("/{application_id}/events", response_model=Union[List[dict], ApplicationEventPage])
+async def get_application_events(
     application_id: UUID,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Taille de page (sinon tous les événements)"),
+    cursor: Optional[str] = Query(None, description="Curseur next_cursor / prev_cursor (ou events_next_cursor du détail)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupérer les événements d'une candidature
+    Récupérer les événements d'une candidature, du plus récent au plus ancien
     """
     try:
-        application_service = ApplicationService(db)
-        events = application_service.get_application_events(application_id)
+        application_service = AsyncService(db, ApplicationService)
+        if cursor and limit is None:
+            limit = 50
+        events = await application_service.get_application_events(application_id, limit=limit, cursor=cursor)
         if events is None:
             raise HTTPException(status_code=404, detail="Candidature non trouvée")
+        if limit is not None:
+            return ApplicationEventPage(items=events.items, next_cursor=events.next_cursor, prev_cursor=events.prev_cursor)
         return events
     except HTTPException:
         raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/stats/summary")
-def get_applications_summary(db: Session = Depends(get_db)):
+async def get_applications_summary(db: AsyncSession = Depends(get_async_db)):
     """
     Récupérer un résumé statistique des candidatures
     """
     try:
-        application_service = ApplicationService(db)
-        return application_service.get_applications_summary()
+        application_service = AsyncService(db, ApplicationService)
+        return await application_service.get_applications_summary()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/reminders/status")
+async def get_reminders_status():
+    """
+    État du moteur de rappels (échéances en attente, prochaine échéance)
+    """
+    return reminder_engine.status()
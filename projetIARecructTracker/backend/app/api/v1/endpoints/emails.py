@@ -1,26 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
-from app.core.database import get_db
-from app.models.schemas import Email, EmailCreate
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
+from app.models.schemas import Email, EmailClassificationUpdate, EmailCreate, EmailDetail, EmailPage
 from app.services.email_service import EmailService
+from app.services.async_service import AsyncService
+from app.services.mbox_importer import MboxImporter, get_import_progress, is_mbox
+from app.services.pagination import InvalidCursor
+from app.services.task_queue import TaskQueue, scoped_key
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Email])
-def get_emails(
+@router.get("/", response_model=Union[List[Email], EmailPage])
+async def get_emails(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     unlinked: bool = Query(False, description="Afficher uniquement les emails non liés"),
-    db: Session = Depends(get_db)
+    duplicates: bool = Query(True, description="Inclure les quasi-doublons (duplicate_of renseigné)"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (liste) ou cursor (page avec curseurs)"),
+    cursor: Optional[str] = Query(None, description="Curseur next_cursor / prev_cursor d'une page précédente"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupérer la liste des emails
+    Récupérer la liste des emails (par offset, ou par curseur avec `pagination=cursor`)
     """
     try:
-        email_service = EmailService(db)
-        return email_service.get_emails(skip=skip, limit=limit, unlinked_only=unlinked)
+        email_service = AsyncService(db, EmailService)
+        if pagination == "cursor" or cursor:
+            page = await email_service.get_emails_page(
+                limit=limit, cursor=cursor, unlinked_only=unlinked, include_duplicates=duplicates
+            )
+            return EmailPage(items=page.items, next_cursor=page.next_cursor, prev_cursor=page.prev_cursor)
+        return await email_service.get_emails(
+            skip=skip, limit=limit, unlinked_only=unlinked, include_duplicates=duplicates
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -35,44 +53,159 @@ def import_emails(
     """
     try:
         email_service = EmailService(db)
-        results = email_service.import_email_files(files)
+        mbox_files = [file for file in files if is_mbox(file.file, file.filename)]
+        eml_files = [file for file in files if file not in mbox_files]
+
+        results = email_service.import_email_files(eml_files) if eml_files else []
+        importer = MboxImporter(db)
+        results += [importer.import_mbox(file.file, file.filename) for file in mbox_files]
         return {"message": f"Import réussi", "results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/import/progress")
+def get_import_progress_status():
+    """
+    Avancement des imports mbox en cours ou récents
+    """
+    return {"imports": get_import_progress()}
+
+
+@router.post("/classify")
+def classify_emails(
+    response: Response,
+    unclassified_only: bool = Query(True, description="Ne classer que les emails sans classification"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Classer les emails déjà importés (modèle appris ou règles) ; avec la file
+    de tâches, mise en file pour les workers (202)
+    """
+    try:
+        if settings.TASK_QUEUE_ENABLED:
+            task = TaskQueue(db).submit(
+                "classification.reclassify",
+                {"only_unclassified": unclassified_only},
+                idempotency_key=scoped_key("classification.reclassify", idempotency_key),
+                coalesce=not idempotency_key,
+            )
+            response.status_code = 202
+            return {"message": "Classification mise en file", "task": task}
+        email_service = EmailService(db)
+        counts = email_service.reclassify_stored_emails(only_unclassified=unclassified_only)
+        return {"message": "Classification terminée", "classifications": counts}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/threads/rebuild")
+def rebuild_email_threads(db: Session = Depends(get_db)):
+    """
+    Regrouper en fils de discussion les emails importés avant le suivi des fils
+    """
+    try:
+        email_service = EmailService(db)
+        return email_service.rebuild_threads()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{email_id}/matches")
+async def get_email_matches(
+    email_id: UUID,
+    limit: int = Query(5, ge=1, le=20),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Candidatures suggérées pour un email (score de rapprochement décroissant)
+    """
+    try:
+        email_service = AsyncService(db, EmailService)
+        candidates = await email_service.get_match_candidates(email_id, limit)
+        if candidates is None:
+            raise HTTPException(status_code=404, detail="Email non trouvé")
+        return {"candidates": candidates}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/{email_id}/classification", response_model=Email)
+async def update_email_classification(
+    email_id: UUID,
+    update: EmailClassificationUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Corriger la classification d'un email (utilisée pour le réentraînement)
+    """
+    try:
+        email_service = AsyncService(db, EmailService)
+        email = await email_service.set_classification(email_id, update.classification.value)
+        if not email:
+            raise HTTPException(status_code=404, detail="Email non trouvé")
+        return email
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/link")
-def link_email_to_application(
+async def link_email_to_application(
     email_id: UUID,
     application_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lier un email à une candidature
     """
     try:
-        email_service = EmailService(db)
-        success = email_service.link_email_to_application(email_id, application_id)
-        if not success:
+        email_service = AsyncService(db, EmailService)
+        linked = await email_service.link_email_to_application(email_id, application_id)
+        if linked is None:
             raise HTTPException(status_code=404, detail="Email ou candidature non trouvé(e)")
-        return {"message": "Email lié avec succès"}
+        return {"message": "Email lié avec succès", "linked": linked}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{email_id}", response_model=Email)
-def get_email(
+@router.get("/{email_id}/thread", response_model=List[Email])
+async def get_email_thread(
     email_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Récupérer un email spécifique
+    Emails du fil de discussion d'un email, du plus ancien au plus récent
     """
     try:
-        email_service = EmailService(db)
-        email = email_service.get_email(email_id)
+        email_service = AsyncService(db, EmailService)
+        emails = await email_service.get_thread(email_id)
+        if emails is None:
+            raise HTTPException(status_code=404, detail="Email non trouvé")
+        return emails
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{email_id}", response_model=EmailDetail)
+async def get_email(
+    email_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupérer un email spécifique avec son contenu brut
+    """
+    try:
+        email_service = AsyncService(db, EmailService)
+        email = await email_service.get_email_detail(email_id)
         if not email:
             raise HTTPException(status_code=404, detail="Email non trouvé")
         return email
@@ -1,43 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from uuid import uuid4
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
+from app.services.email_service import EmailService
 from app.services.ingestion_service import IngestionService
+from app.services.async_service import AsyncService
+from app.services.ingestion_runner import ingestion_runner
+from app.services.task_queue import TaskQueue, scoped_key
+from app.nlp.entity_extractor import get_entity_extractor
+from app.nlp.model_classifier import get_model_classifier
+from app.nlp.rule_classifier import get_rule_classifier
 
 router = APIRouter()
 
 @router.post("/run")
-def run_ingestion(db: Session = Depends(get_db)):
+def run_ingestion(
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """
-    Déclencher manuellement l'ingestion d'emails
+    Déclencher manuellement l'ingestion d'emails (les comptes déjà en cours sont
+    sautés) ; avec la file de tâches, mise en file pour les workers (202)
     """
     try:
-        ingestion_service = IngestionService(db)
-        result = ingestion_service.run_ingestion()
+        if settings.TASK_QUEUE_ENABLED:
+            task = TaskQueue(db).submit(
+                "ingestion.run",
+                {"slot": idempotency_key or uuid4().hex},
+                idempotency_key=scoped_key("ingestion.run", idempotency_key),
+            )
+            response.status_code = 202
+            return {"message": "Ingestion mise en file", "task": task}
+        result = ingestion_runner.run_once()
         return {"message": "Ingestion terminée", "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/status")
-def get_ingestion_status(db: Session = Depends(get_db)):
+async def get_ingestion_status(db: AsyncSession = Depends(get_async_db)):
     """
-    Récupérer le statut de l'ingestion
+    Récupérer le statut de l'ingestion ; avec la file de tâches, lu en base
+    (tâches de synchronisation et watermarks) car exécutée par les workers
     """
     try:
-        ingestion_service = IngestionService(db)
-        status = ingestion_service.get_ingestion_status()
+        ingestion_service = AsyncService(db, IngestionService)
+        if settings.TASK_QUEUE_ENABLED:
+            status = await ingestion_service.get_task_ingestion_status()
+            status.update(ingestion_runner.scheduler_status())
+            return status
+        status = await ingestion_service.get_ingestion_status()
+        runner_status = ingestion_runner.status()
+        status.update(runner_status)
+        status["pending_emails"] = runner_status["backlog"]
+        if runner_status["running_accounts"]:
+            status["service_status"] = "running"
         return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/classification/rules")
+def get_classification_rules():
+    """
+    Règles chargées et statistiques de déclenchement par règle
+    """
+    return get_rule_classifier().stats()
+
+
+@router.post("/classification/rules/reload")
+def reload_classification_rules():
+    """
+    Relire immédiatement les fichiers de règles (sinon rechargés automatiquement)
+    """
+    classifier = get_rule_classifier()
+    classifier.reload()
+    if classifier.last_error:
+        raise HTTPException(status_code=400, detail=classifier.last_error)
+    return {"message": "Règles rechargées", "rules_loaded": len(classifier.ruleset.rules)}
+
+
 @router.post("/classification/retrain")
 def retrain_classifier(db: Session = Depends(get_db)):
     """
-    Réentraîner le modèle de classification (optionnel)
+    Réentraîner le modèle de classification sur les corrections manuelles
+    (en arrière-plan ; le nouveau modèle remplace l'actuel à la fin)
     """
     try:
-        # This would be implemented later when ML model is added
-        return {"message": "Réentraînement du modèle non encore implémenté"}
+        result = EmailService(db).start_model_training()
+        if result["status"] == "insufficient_data":
+            raise HTTPException(status_code=400, detail=result)
+        return {"message": "Réentraînement lancé", "training": result}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/classification/model")
+def get_classification_model():
+    """
+    Version et métriques du modèle actif, état du dernier entraînement
+    """
+    return get_model_classifier().status()
+
+
+@router.post("/extraction/run")
+def run_entity_extraction(
+    response: Response,
+    missing_only: bool = Query(True, description="Ne traiter que les emails sans entités extraites"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Extraire langue, entreprise, poste, dates et contacts des emails déjà
+    importés ; avec la file de tâches, mise en file pour les workers (202)
+    """
+    try:
+        if settings.TASK_QUEUE_ENABLED:
+            task = TaskQueue(db).submit(
+                "extraction.run",
+                {"only_missing": missing_only},
+                idempotency_key=scoped_key("extraction.run", idempotency_key),
+                coalesce=not idempotency_key,
+            )
+            response.status_code = 202
+            return {"message": "Extraction mise en file", "task": task}
+        result = EmailService(db).extract_stored_entities(only_missing=missing_only)
+        return {"message": "Extraction terminée", "result": result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/extraction/stats")
+def get_extraction_stats():
+    """
+    Dictionnaires chargés, emails traités et efficacité du cache de langue
+    """
+    return get_entity_extractor().stats()
@@ -0,0 +1,67 @@
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.services.async_service import AsyncService
+from app.services.task_queue import FAILED, QUEUED, QUEUES, RUNNING, SUCCEEDED, TaskQueue
+
+router = APIRouter()
+
+@router.get("/")
+async def get_tasks(
+    queue: Optional[str] = Query(None, description=f"File : {', '.join(QUEUES)}"),
+    status: Optional[str] = Query(None, pattern=f"^({QUEUED}|{RUNNING}|{SUCCEEDED}|{FAILED})$"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Tâches les plus récentes de la file (filtrables par file et statut)
+    """
+    try:
+        return await AsyncService(db, TaskQueue).list_tasks(queue=queue, status=status, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def get_task_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+    Tâches par file et par statut, limites de concurrence, retard de la plus vieille tâche due
+    """
+    try:
+        return await AsyncService(db, TaskQueue).stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{task_id}")
+async def get_task(task_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    État d'une tâche : tentatives, dernière erreur, résultat
+    """
+    try:
+        task = await AsyncService(db, TaskQueue).get_task(task_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        return task
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{task_id}/retry")
+async def retry_task(task_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    Remettre en file une tâche en échec définitif
+    """
+    try:
+        task = await AsyncService(db, TaskQueue).retry(task_id)
+        if task is None:
+            raise HTTPException(status_code=409, detail="Tâche introuvable ou pas en échec")
+        return task
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
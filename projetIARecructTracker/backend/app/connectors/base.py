@@ -0,0 +1,35 @@
+import re
+from typing import Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Indices (FR/EN) qu'un email concerne une candidature : on ne télécharge
+# le corps complet que des messages dont l'en-tête correspond
+RECRUITING_HINTS = re.compile(
+    r"candidat|postul|recrut|entretien|offre|poste\b|embauche|stage|alternance|"
+    r"application|applied|apply|interview|recruit|hiring|job|position|offer|"
+    r"talent|career|carri[eè]re|\brh\b|\bhr\b|"
+    r"greenhouse|lever\.co|workday|smartrecruiters|welcometothejungle|indeed|linkedin|jobteaser",
+    re.IGNORECASE,
+)
+
+
+def looks_like_recruiting(subject: Optional[str], sender: Optional[str]) -> bool:
+    """
+    Pré-filtre sur les en-têtes : sujet ou expéditeur évoquant un recrutement
+    """
+    return bool(RECRUITING_HINTS.search(f"{subject or ''} {sender or ''}"))
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Découper une séquence en lots de taille fixe
+    """
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,266 @@
+import base64
+import json
+import re
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import httpx
+from loguru import logger
+
+from app.connectors.base import chunked
+
+# En-têtes demandés en format "metadata" (pré-filtre avant téléchargement du corps)
+METADATA_HEADERS = ("Message-ID", "From", "To", "Cc", "Subject", "Date")
+
+# Limite documentée par Google pour une requête batch
+MAX_BATCH_SIZE = 100
+
+# Statuts d'une sous-requête batch qui justifient une nouvelle tentative
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_CONTENT_ID_RE = re.compile(rb"Content-ID:\s*<?response-item-(\d+)>?", re.IGNORECASE)
+_BLANK_LINE_RE = re.compile(rb"\r?\n\r?\n")
+
+
+class GmailHistoryExpired(Exception):
+    """
+    Le historyId stocké est trop ancien : une synchronisation complète est nécessaire
+    """
+
+
+class GmailConnector:
+    """
+    Connecteur Gmail : synchronisation initiale par messages.list, puis deltas
+    via history.list ; métadonnées et corps récupérés par requêtes batch
+    """
+    provider = "gmail"
+
+    def __init__(
+        self,
+        user: str = "",
+        client_id: str = "",
+        client_secret: str = "",
+        refresh_token: str = "",
+        label: str = "INBOX",
+        base_url: str = "https://gmail.googleapis.com",
+        token_url: str = "https://oauth2.googleapis.com/token",
+        batch_size: int = 50,
+        access_token: Optional[str] = None,
+        http_client: Optional[httpx.Client] = None,
+        max_retries: int = 3,
+    ):
+        self.user = user
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.label = label
+        self.token_url = token_url
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_retries = max_retries
+        self._client = http_client or httpx.Client(base_url=base_url, timeout=30.0)
+        self._access_token = access_token
+        self._token_expires_at = float("inf") if access_token else 0.0
+
+    @property
+    def account(self) -> str:
+        if not self.user:
+            self.user = self._get("/gmail/v1/users/me/profile")["emailAddress"]
+        return self.user
+
+    def close(self):
+        self._client.close()
+
+    # --- Synchronisation ---
+
+    def get_history_id(self) -> int:
+        """
+        historyId courant de la boîte (à lire avant la synchronisation complète)
+        """
+        return int(self._get("/gmail/v1/users/me/profile")["historyId"])
+
+    def list_message_ids(self, query: Optional[str] = None) -> List[str]:
+        """
+        Tous les identifiants de messages du label (synchronisation initiale)
+        """
+        params = {"labelIds": self.label, "maxResults": 500}
+        if query:
+            params["q"] = query
+        ids: List[str] = []
+        while True:
+            data = self._get("/gmail/v1/users/me/messages", params=params)
+            ids.extend(message["id"] for message in data.get("messages", []))
+            if not data.get("nextPageToken"):
+                break
+            params["pageToken"] = data["nextPageToken"]
+        # messages.list renvoie du plus récent au plus ancien
+        ids.reverse()
+        return ids
+
+    def list_history(self, start_history_id: int) -> Tuple[List[str], int]:
+        """
+        Messages ajoutés au label depuis start_history_id et nouveau historyId
+        """
+        params = {
+            "startHistoryId": start_history_id,
+            "labelId": self.label,
+            "historyTypes": ["messageAdded", "labelAdded"],
+            "maxResults": 500,
+        }
+        ids: Dict[str, None] = {}
+        history_id = start_history_id
+        while True:
+            try:
+                data = self._get("/gmail/v1/users/me/history", params=params)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    raise GmailHistoryExpired(str(start_history_id)) from e
+                raise
+            for record in data.get("history", []):
+                for added in record.get("messagesAdded", []) + record.get("labelsAdded", []):
+                    message = added["message"]
+                    if self.label in message.get("labelIds", [self.label]):
+                        ids[message["id"]] = None
+            history_id = int(data.get("historyId", history_id))
+            if not data.get("nextPageToken"):
+                break
+            params["pageToken"] = data["nextPageToken"]
+        return list(ids), history_id
+
+    def fetch_headers(self, ids: List[str]) -> Dict[str, Message]:
+        """
+        En-têtes d'un lot de messages (format metadata, requêtes batch)
+        """
+        query = "format=metadata&" + "&".join(f"metadataHeaders={name}" for name in METADATA_HEADERS)
+        results: Dict[str, Message] = {}
+        for message_id, data in self._batch_get_messages(ids, query).items():
+            headers = Message()
+            for header in data.get("payload", {}).get("headers", []):
+                headers[header["name"]] = header["value"]
+            results[message_id] = headers
+        return results
+
+    def fetch_messages(self, ids: List[str]) -> Dict[str, bytes]:
+        """
+        Messages complets (RFC822) d'un lot (format raw, requêtes batch)
+        """
+        return {
+            message_id: base64.urlsafe_b64decode(data["raw"] + "=" * (-len(data["raw"]) % 4))
+            for message_id, data in self._batch_get_messages(ids, "format=raw").items()
+        }
+
+    # --- HTTP ---
+
+    def _batch_get_messages(self, ids: List[str], query: str) -> Dict[str, dict]:
+        results: Dict[str, dict] = {}
+        for batch in chunked(ids, self.batch_size):
+            pending = batch
+            for attempt in range(self.max_retries + 1):
+                failed = self._send_batch(pending, query, results)
+                if not failed:
+                    break
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"Requête batch Gmail en échec pour {len(failed)} messages")
+                logger.info(f"Gmail batch: {len(failed)} messages limités, nouvelle tentative")
+                time.sleep(2 ** attempt)
+                pending = failed
+        return results
+
+    def _send_batch(self, ids: List[str], query: str, results: Dict[str, dict]) -> List[str]:
+        """
+        Envoyer une requête multipart/mixed ; retourne les identifiants à retenter
+        """
+        boundary = f"batch_{uuid4().hex}"
+        parts = []
+        for index, message_id in enumerate(ids):
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <item-{index}>\r\n\r\n"
+                f"GET /gmail/v1/users/me/messages/{message_id}?{query}\r\n\r\n"
+            )
+        body = "".join(parts) + f"--{boundary}--\r\n"
+
+        response = self._request(
+            "POST",
+            "/batch/gmail/v1",
+            content=body.encode(),
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        )
+
+        failed: List[str] = []
+        for index, status, payload in _parse_batch_response(response):
+            message_id = ids[index]
+            if status == 200:
+                results[message_id] = json.loads(payload)
+            elif status in RETRY_STATUSES:
+                failed.append(message_id)
+            elif status == 404:
+                # Message supprimé entre la liste et la récupération
+                continue
+            else:
+                raise RuntimeError(f"Gmail: statut {status} pour le message {message_id}")
+        return failed
+
+    def _get(self, url: str, params: Optional[dict] = None) -> dict:
+        return self._request("GET", url, params=params).json()
+
+    def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(2):
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers["Authorization"] = f"Bearer {self._token()}"
+            response = self._client.request(method, url, headers=headers, **kwargs)
+            kwargs["headers"] = headers
+            if response.status_code == 401 and attempt == 0 and self.refresh_token:
+                self._token_expires_at = 0.0
+                continue
+            response.raise_for_status()
+            return response
+        return response
+
+    def _token(self) -> str:
+        """
+        Jeton d'accès OAuth, rafraîchi une minute avant son expiration
+        """
+        if self._access_token and time.monotonic() < self._token_expires_at - 60:
+            return self._access_token
+        response = self._client.post(self.token_url, data={
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": self.refresh_token,
+        })
+        response.raise_for_status()
+        data = response.json()
+        self._access_token = data["access_token"]
+        self._token_expires_at = time.monotonic() + int(data.get("expires_in", 3600))
+        return self._access_token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _parse_batch_response(response: httpx.Response):
+    """
+    Découper une réponse batch en (index, statut HTTP, corps JSON)
+    """
+    match = re.search(r'boundary="?([^";]+)"?', response.headers.get("content-type", ""))
+    if not match:
+        raise RuntimeError("Réponse batch Gmail sans boundary")
+    delimiter = b"--" + match.group(1).encode()
+
+    for chunk in response.content.split(delimiter):
+        chunk = chunk.strip()
+        if not chunk or chunk == b"--":
+            continue
+        outer = _BLANK_LINE_RE.split(chunk, 1)
+        content_id = _CONTENT_ID_RE.search(outer[0])
+        if not content_id or len(outer) < 2:
+            continue
+        inner = _BLANK_LINE_RE.split(outer[1], 1)
+        status = int(inner[0].split(None, 2)[1])
+        yield int(content_id.group(1)), status, inner[1] if len(inner) > 1 else b""
@@ -0,0 +1,195 @@
+import imaplib
+import re
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+# En-têtes récupérés en lot avant de décider quels corps télécharger
+HEADER_FIELDS = "MESSAGE-ID FROM TO CC SUBJECT DATE"
+
+_UID_RE = re.compile(rb"UID (\d+)")
+
+
+def compress_uids(uids: List[int]) -> str:
+    """
+    Représenter une liste d'UID sous forme d'ensemble IMAP compact (ex. "1:5,8,10:12")
+    """
+    ranges = []
+    start = prev = None
+    for uid in sorted(uids):
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+class ImapConnector:
+    """
+    Connecteur IMAP : une connexion réutilisée d'une ingestion à l'autre,
+    recherche des UID au-delà du watermark et FETCH par lots
+    """
+    provider = "imap"
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        port: int = 993,
+        use_ssl: bool = True,
+        batch_size: int = 500,
+        imap_factory: Optional[Callable[[str, int], imaplib.IMAP4]] = None,
+    ):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.port = port
+        self.batch_size = batch_size
+        self._imap_factory = imap_factory or (imaplib.IMAP4_SSL if use_ssl else imaplib.IMAP4)
+        self._conn: Optional[imaplib.IMAP4] = None
+        # Boîte sélectionnée sur la connexion courante et son UIDVALIDITY
+        self._selected: Optional[Tuple[str, int]] = None
+
+    @property
+    def account(self) -> str:
+        return f"{self.user}@{self.host}"
+
+    def connect(self) -> imaplib.IMAP4:
+        """
+        Retourner la connexion courante, ou en ouvrir une nouvelle (authentifiée,
+        sans boîte sélectionnée)
+        """
+        if self._conn is None:
+            conn = self._imap_factory(self.host, self.port)
+            conn.login(self.user, self.password)
+            self._conn = conn
+            self._selected = None
+        return self._conn
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.logout()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+        self._conn = None
+        self._selected = None
+
+    def _drop(self):
+        self._conn = None
+        self._selected = None
+
+    def _check_alive(self):
+        """
+        NOOP une fois par synchronisation de boîte : la connexion gardée depuis
+        l'ingestion précédente a pu être fermée par le serveur
+        """
+        if self._conn is None:
+            return
+        try:
+            self._conn.noop()
+        except (imaplib.IMAP4.error, OSError):
+            logger.info(f"Connexion IMAP perdue pour {self.account}, reconnexion")
+            self._drop()
+
+    def select(self, mailbox: str) -> int:
+        """
+        Sélectionner la boîte en lecture seule et retourner son UIDVALIDITY
+        """
+        self._check_alive()
+        uid_validity = self._select(mailbox)
+        self._selected = (mailbox, uid_validity)
+        return uid_validity
+
+    def _select(self, mailbox: str) -> int:
+        conn = self.connect()
+        name = f'"{mailbox}"' if " " in mailbox else mailbox
+        typ, data = conn.select(name, readonly=True)
+        if typ != "OK":
+            raise RuntimeError(f"Impossible de sélectionner {mailbox}: {data}")
+        _, values = conn.response("UIDVALIDITY")
+        if not values or values[0] is None:
+            typ, data = conn.status(name, "(UIDVALIDITY)")
+            match = re.search(rb"UIDVALIDITY (\d+)", data[0] or b"")
+            if not match:
+                raise RuntimeError(f"UIDVALIDITY introuvable pour {mailbox}")
+            return int(match.group(1))
+        return int(values[-1])
+
+    def _uid(self, command: str, *args):
+        """
+        Commande UID sur la boîte sélectionnée. Connexion coupée en cours de
+        synchronisation : reconnexion, nouvelle sélection de la boîte et un seul
+        nouvel essai ; si l'UIDVALIDITY a changé entre-temps, erreur (le lot
+        sera repris par la synchronisation suivante)
+        """
+        try:
+            return self.connect().uid(command, *args)
+        except (imaplib.IMAP4.abort, OSError):
+            if self._selected is None:
+                raise
+            mailbox, uid_validity = self._selected
+            logger.info(f"Connexion IMAP perdue pour {self.account} pendant {command}, reconnexion")
+            self._drop()
+            if self._select(mailbox) != uid_validity:
+                raise RuntimeError(f"UIDVALIDITY modifié pendant la synchronisation de {mailbox}")
+            self._selected = (mailbox, uid_validity)
+            return self._conn.uid(command, *args)
+
+    def search_new_uids(self, last_uid: int) -> List[int]:
+        """
+        UID strictement supérieurs au watermark (la boîte doit être sélectionnée)
+        """
+        typ, data = self._uid("SEARCH", None, f"UID {last_uid + 1}:*")
+        if typ != "OK":
+            raise RuntimeError(f"UID SEARCH a échoué: {data}")
+        # "n:*" renvoie toujours le dernier UID, même s'il est <= last_uid
+        return sorted(uid for uid in map(int, (data[0] or b"").split()) if uid > last_uid)
+
+    def fetch_headers(self, uids: List[int]) -> Dict[int, Message]:
+        """
+        En-têtes d'un lot de messages, sans marquer les messages comme lus
+        """
+        parser = BytesHeaderParser()
+        return {
+            uid: parser.parsebytes(payload)
+            for uid, payload in self._fetch(uids, f"(UID BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])").items()
+        }
+
+    def fetch_messages(self, uids: List[int]) -> Dict[int, bytes]:
+        """
+        Messages complets (RFC822) d'un lot
+        """
+        return self._fetch(uids, "(UID BODY.PEEK[])")
+
+    def _fetch(self, uids: List[int], items: str) -> Dict[int, bytes]:
+        if not uids:
+            return {}
+        typ, data = self._uid("FETCH", compress_uids(uids), items)
+        if typ != "OK":
+            raise RuntimeError(f"UID FETCH a échoué: {data}")
+
+        results: Dict[int, bytes] = {}
+        for part in data:
+            if not isinstance(part, tuple):
+                continue
+            meta, payload = part[0], part[1]
+            match = _UID_RE.search(meta)
+            if match:
+                results[int(match.group(1))] = payload
+        return results
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
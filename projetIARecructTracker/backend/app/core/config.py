@@ -1,10 +1,21 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql+psycopg://airtrack:airtrackpwd@db:5432/airtrackdb"
+    # Pilote asynchrone de l'API (déduit de DATABASE_URL si vide : psycopg async, aiosqlite)
+    ASYNC_DATABASE_URL: str = ""
+    # Pool de connexions (par moteur : synchrone pour les tâches, asynchrone pour l'API)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Instrumentation : seuil du journal des requêtes lentes, répétitions signalant un N+1
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    N_PLUS_ONE_THRESHOLD: int = 5
     
     # Security
     JWT_SECRET: str = "change-me-in-production"
@@ -17,19 +28,76 @@ class Settings(BaseSettings):
     # Email providers
     GMAIL_CLIENT_ID: str = ""
     GMAIL_CLIENT_SECRET: str = ""
+    GMAIL_REFRESH_TOKEN: str = ""
+    GMAIL_USER: str = ""
+    GMAIL_LABEL: str = "INBOX"
+    GMAIL_API_BASE_URL: str = "https://gmail.googleapis.com"
+    GMAIL_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GMAIL_BATCH_SIZE: int = 50
+    # Comptes Gmail supplémentaires de la même application OAuth (JSON) :
+    # [{"user": "...", "refresh_token": "...", "label": "INBOX"}]
+    GMAIL_ACCOUNTS: List[Dict[str, Any]] = []
     
     # IMAP settings
     IMAP_HOST: str = ""
     IMAP_USER: str = ""
     IMAP_PASSWORD: str = ""
+    IMAP_PORT: int = 993
+    IMAP_USE_SSL: bool = True
+    IMAP_MAILBOXES: List[str] = ["INBOX"]
+    IMAP_FETCH_BATCH_SIZE: int = 500
+    # Comptes IMAP supplémentaires (JSON) :
+    # [{"host": "...", "user": "...", "password": "...", "port": 993, "use_ssl": true}]
+    IMAP_ACCOUNTS: List[Dict[str, Any]] = []
     
     # Scheduler
+    INGESTION_SCHEDULER_ENABLED: bool = True
     INGESTION_INTERVAL_MINUTES: int = 10
+    # Départ de chaque compte décalé au hasard dans cette fenêtre
+    INGESTION_JITTER_SECONDS: int = 30
+    INGESTION_MAX_CONCURRENCY: int = 4
     REMINDER_CHECK_INTERVAL_HOURS: int = 24
+    REMINDER_BATCH_SIZE: int = 500
+    STATS_RECONCILE_INTERVAL_MINUTES: int = 15
+    ANALYTICS_ROLLUP_INTERVAL_MINUTES: int = 5
+    ANALYTICS_BATCH_SIZE: int = 5000
+    
+    # Import de fichiers (.eml / .mbox)
+    IMPORT_PARSE_WORKERS: int = 0
+    IMPORT_BATCH_SIZE: int = 1000
     
     # Classification
     CLASSIFICATION_MODEL_PATH: str = "models/classification_model.pkl"
+    CLASSIFICATION_MODEL_MIN_CONFIDENCE: float = 0.6
+    CLASSIFICATION_MIN_TRAINING_SAMPLES: int = 20
     CLASSIFICATION_RULES_PATH: str = "rules/"
+    CLASSIFICATION_RULES_RELOAD_SECONDS: float = 5.0
+    
+    # Extraction d'entités (entreprise, poste, dates, contacts)
+    EXTRACTION_ENABLED: bool = True
+    EXTRACTION_GAZETTEERS_PATH: str = "gazetteers/"
+    
+    # Liaison automatique email -> candidature
+    MATCHING_AUTO_LINK_ENABLED: bool = True
+    MATCHING_AUTO_LINK_THRESHOLD: float = 0.5
+    MATCHING_MIN_MARGIN: float = 0.15
+    
+    # Quasi-doublons (SimHash / LSH) : classification et liaison reprises de l'original
+    NEAR_DUPLICATE_DETECTION_ENABLED: bool = True
+    
+    # File de tâches durable (ingestion, classification, extraction) exécutée par
+    # les workers (python -m app.worker) ; désactivée : traitements dans l'API
+    TASK_QUEUE_ENABLED: bool = False
+    # Tâches simultanées au plus par file, tous workers confondus (0 : sans limite)
+    TASK_QUEUE_CONCURRENCY: Dict[str, int] = {"ingestion": 4, "classification": 1, "extraction": 4}
+    TASK_MAX_ATTEMPTS: int = 5
+    # Nouvel essai après base * 2^(tentative - 1) secondes (avec gigue), plafonné
+    TASK_RETRY_BASE_SECONDS: float = 10.0
+    TASK_RETRY_MAX_SECONDS: float = 3600.0
+    # Sans battement du worker pendant ce délai, la tâche est reprise
+    TASK_LEASE_SECONDS: int = 300
+    TASK_HEARTBEAT_SECONDS: int = 30
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0
     
     class Config:
         env_file = ".env"
@@ -1,16 +1,71 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.query_metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+
+def async_database_url(url: str) -> str:
+    """
+    URL équivalente avec un pilote asynchrone (psycopg 3 en mode async, aiosqlite)
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+def pool_options(url: str) -> dict:
+    """
+    Réglages du pool (SQLite garde le pool par défaut de SQLAlchemy)
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Moteur synchrone : tâches planifiées, imports de fichiers, migrations
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone : endpoints de l'API (pas de thread bloqué pendant les requêtes SQL)
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+# Objets lisibles après commit : la réponse est sérialisée hors de la session
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
+# Dialectes supportant INSERT ... ON CONFLICT (DO NOTHING / DO UPDATE) ... RETURNING
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Session asynchrone ; le code des services (synchrone) s'y exécute via
+    `await db.run_sync(...)`, les entrées-sorties restant asynchrones
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,181 @@
+"""
+Instrumentation des requêtes SQL.
+
+Les événements SQLAlchemy (before/after_cursor_execute) des deux moteurs
+alimentent les statistiques de la requête HTTP en cours (ContextVar, propagé
+aux threads et à run_sync) : nombre d'instructions, temps SQL cumulé, plus
+lente. Le middleware les expose en en-têtes X-DB-* et en métriques
+Prometheus ; une même instruction SELECT répétée dans une requête signale un
+N+1 probable. Les instructions au-delà du seuil sont journalisées, paramètres
+masqués.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from prometheus_client import Counter as PrometheusCounter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+SLOWEST_QUERY_HEADER = "X-DB-Slowest-Ms"
+N_PLUS_ONE_HEADER = "X-DB-N-Plus-One"
+
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Instructions SQL par requête HTTP",
+    ["method", "endpoint"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Temps SQL cumulé par requête HTTP",
+    ["method", "endpoint"],
+)
+SLOW_QUERIES = PrometheusCounter("db_slow_queries_total", "Instructions SQL au-delà du seuil de lenteur")
+N_PLUS_ONE_REQUESTS = PrometheusCounter(
+    "http_request_db_n_plus_one_total",
+    "Requêtes HTTP répétant une même instruction SELECT (N+1 probable)",
+    ["method", "endpoint"],
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+    selects: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.selects[statement] += 1
+
+    def repeated(self, threshold: int = None) -> List[Tuple[str, int]]:
+        """
+        SELECT identiques exécutés au moins `threshold` fois (N+1 probable)
+        """
+        threshold = settings.N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [(statement, count) for statement, count in self.selects.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Compter les instructions SQL exécutées dans le bloc (et ses tâches / threads)
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    Paramètres liés remplacés par leur type (aucune valeur dans les journaux)
+    """
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} lignes>"
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return "<?>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        SLOW_QUERIES.inc()
+        logger.warning(
+            f"Requête SQL lente ({elapsed * 1000:.1f} ms) : {' '.join(statement.split())} "
+            f"| paramètres : {redact_parameters(parameters)}"
+        )
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine):
+    """
+    Brancher l'instrumentation sur un moteur (pour un moteur asynchrone : engine.sync_engine)
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def report_request(stats: QueryStats, method: str, endpoint: str, headers) -> None:
+    """
+    En-têtes X-DB-*, métriques de l'endpoint et signalement des N+1 probables
+    """
+    headers[QUERY_COUNT_HEADER] = str(stats.count)
+    headers[QUERY_TIME_HEADER] = f"{stats.total_seconds * 1000:.1f}"
+    headers[SLOWEST_QUERY_HEADER] = f"{stats.slowest_seconds * 1000:.1f}"
+    REQUEST_QUERIES.labels(method, endpoint).observe(stats.count)
+    REQUEST_DB_SECONDS.labels(method, endpoint).observe(stats.total_seconds)
+
+    repeated = stats.repeated()
+    if repeated:
+        headers[N_PLUS_ONE_HEADER] = str(len(repeated))
+        N_PLUS_ONE_REQUESTS.labels(method, endpoint).inc()
+        statement, count = repeated[0]
+        logger.warning(
+            f"N+1 probable sur {method} {endpoint} : {count} exécutions de "
+            f"{' '.join(statement.split())[:300]}"
+        )
+
+
+# --- Aides pour les tests ---
+
+@contextmanager
+def max_queries(max_count: int) -> Iterator[QueryStats]:
+    """
+    Échouer si le bloc (appel de service, même thread) exécute plus de `max_count` instructions
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_count:
+        raise AssertionError(f"{stats.count} instructions SQL exécutées (maximum {max_count})")
+
+
+def assert_max_queries(response, max_count: int):
+    """
+    Échouer si l'endpoint a exécuté plus de `max_count` instructions (en-tête X-DB-Query-Count)
+    """
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    if count > max_count:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} : "
+            f"{count} instructions SQL (maximum {max_count})"
+        )
@@ -0,0 +1,17 @@
+"""
+Planificateur partagé des tâches périodiques (ingestion, réconciliation des
+statistiques, agrégats analytiques)
+"""
+from apscheduler.schedulers.background import BackgroundScheduler
+
+scheduler = BackgroundScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+
+
+def start_scheduler():
+    if not scheduler.running:
+        scheduler.start()
+
+
+def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
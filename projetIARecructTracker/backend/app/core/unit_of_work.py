@@ -0,0 +1,43 @@
+"""
+Unité de travail : les écritures d'un bloc sont validées en un seul commit ou
+annulées ensemble, et les effets hors base (index en mémoire, compteurs) ne
+sont appliqués qu'une fois la transaction validée.
+"""
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+
+class UnitOfWork:
+    """
+    with UnitOfWork(db) as uow:
+        db.add(...)
+        uow.after_commit(lambda: ...)
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._after_commit: List[Callable[[], None]] = []
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Action à exécuter après validation (ignorée en cas d'annulation)
+        """
+        self._after_commit.append(callback)
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        callbacks, self._after_commit = self._after_commit, []
+        if exc_type is not None:
+            self.db.rollback()
+            return False
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        for callback in callbacks:
+            callback()
+        return False
@@ -1,7 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.core.config import settings
+from app.core.database import async_engine
+from app.core.query_metrics import (
+    N_PLUS_ONE_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, SLOWEST_QUERY_HEADER,
+    report_request, track_queries
+)
 from app.api.v1.api import api_router
+from app.services.ingestion_runner import ingestion_runner
+from app.nlp.model_classifier import get_model_classifier
+from app.core.scheduler import shutdown_scheduler, start_scheduler
+from app.services.analytics_service import start_rollup_job
+from app.services.application_stats import application_stats
+from app.services.reminder_engine import reminder_engine
 
 app = FastAPI(
     title="AI Recruit Tracker",
@@ -16,15 +28,48 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=[QUERY_COUNT_HEADER, QUERY_TIME_HEADER, SLOWEST_QUERY_HEADER, N_PLUS_ONE_HEADER],
 )
 
+# Instructions SQL par requête : en-têtes X-DB-*, métriques, détection des N+1
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    report_request(stats, request.method, getattr(route, "name", "unmatched"), response.headers)
+    return response
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def start_background_jobs():
+    if settings.INGESTION_SCHEDULER_ENABLED:
+        ingestion_runner.start()
+    application_stats.start()
+    start_rollup_job()
+    reminder_engine.start()
+    start_scheduler()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    shutdown_scheduler()
+    ingestion_runner.shutdown()
+    get_model_classifier().shutdown()
+
+@app.on_event("shutdown")
+async def close_database():
+    await async_engine.dispose()
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "message": "AI Recruit Tracker API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 def root():
     return {"message": "Welcome to AI Recruit Tracker API"}
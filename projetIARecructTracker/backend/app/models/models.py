@@ -0,0 +1,223 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    Column, String, Text, Date, DateTime, Integer, ForeignKey, JSON, Uuid, BigInteger, UniqueConstraint, Index, DDL,
+    LargeBinary, event
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+# JSONB sous PostgreSQL, JSON générique ailleurs (SQLite pour les essais locaux)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class Application(Base):
+    __tablename__ = "applications"
+    # Pagination par curseur (updated_at, id)
+    __table_args__ = (Index("ix_applications_updated_at_id", "updated_at", "id"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    job_title = Column(String(255), nullable=False)
+    company_name = Column(String(255), nullable=False)
+    source = Column(String(100))
+    location = Column(String(255))
+    status = Column(String(20), nullable=False, default="APPLIED", index=True)
+    notes = Column(Text)
+    next_action_at = Column(DateTime, index=True)
+    # Échéance déjà rappelée (égale à next_action_at tant qu'elle ne change pas)
+    reminded_at = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    events = relationship(
+        "ApplicationEvent",
+        back_populates="application",
+        cascade="all, delete-orphan",
+        order_by="desc(ApplicationEvent.created_at)",
+    )
+    emails = relationship("Email", back_populates="application")
+
+
+# Recherche plein texte sous SQLite : table FTS5 tenue à jour par triggers
+# (sous PostgreSQL : tsvector + GIN, migration 0002_application_search)
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE applications_fts USING fts5("
+    "application_id UNINDEXED, job_title, company_name, notes, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER applications_fts_insert AFTER INSERT ON applications BEGIN "
+    "INSERT INTO applications_fts (application_id, job_title, company_name, notes) "
+    "VALUES (new.id, new.job_title, new.company_name, new.notes); END",
+    "CREATE TRIGGER applications_fts_update AFTER UPDATE OF job_title, company_name, notes ON applications BEGIN "
+    "UPDATE applications_fts SET job_title = new.job_title, company_name = new.company_name, notes = new.notes "
+    "WHERE application_id = new.id; END",
+    "CREATE TRIGGER applications_fts_delete AFTER DELETE ON applications BEGIN "
+    "DELETE FROM applications_fts WHERE application_id = old.id; END",
+]
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Application.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Application.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS applications_fts").execute_if(dialect="sqlite"),
+)
+
+
+class ApplicationEvent(Base):
+    __tablename__ = "application_events"
+    # Lecture incrémentale des nouveaux événements (agrégats analytiques)
+    __table_args__ = (Index("ix_application_events_created_at_id", "created_at", "id"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    application_id = Column(Uuid, ForeignKey("applications.id", ondelete="CASCADE"), nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSONType, nullable=False, default=dict)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    application = relationship("Application", back_populates="events")
+
+
+class Email(Base):
+    __tablename__ = "emails"
+    # Pagination par curseur (created_at, id)
+    __table_args__ = (Index("ix_emails_created_at_id", "created_at", "id"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    application_id = Column(Uuid, ForeignKey("applications.id", ondelete="SET NULL"), index=True)
+    # Origine du rattachement : "auto" (rapprochement) ou "user" (liaison manuelle)
+    link_source = Column(String(10))
+    external_id = Column(String(512), unique=True, index=True)
+    # Fil de discussion (app.services.email_threading)
+    thread_id = Column(Uuid, index=True)
+    # Empreinte SimHash du corps et original dont l'email est un quasi-doublon (app.nlp.near_duplicates)
+    simhash = Column(BigInteger)
+    duplicate_of = Column(Uuid, index=True)
+    # Langue détectée et entités extraites (app.nlp.entity_extractor) ; NULL : pas encore traité
+    language = Column(String(10))
+    entities = Column(JSONType)
+    subject = Column(Text)
+    sender = Column(String(512))
+    recipients = Column(JSONType, nullable=False, default=list)
+    cc = Column(JSONType, nullable=False, default=list)
+    sent_at = Column(DateTime)
+    snippet = Column(Text)
+    classification = Column(String(20))
+    # Origine de la classification : "rules", "model" ou "user" (correction manuelle)
+    classification_source = Column(String(10), index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    application = relationship("Application", back_populates="emails")
+    # Contenu brut compressé, lu à la demande (app.services.email_content)
+    content = relationship("EmailContent", uselist=False, cascade="all, delete-orphan")
+
+
+class EmailContent(Base):
+    """
+    En-têtes et corps bruts d'un email, compressés (zstd), hors de la table emails
+    """
+    __tablename__ = "email_contents"
+
+    email_id = Column(Uuid, ForeignKey("emails.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String(10), nullable=False)
+    raw_headers = Column(LargeBinary)
+    raw_body = Column(LargeBinary)
+    # Taille avant compression (octets UTF-8)
+    raw_size = Column(Integer, nullable=False, default=0)
+
+
+class EmailThreadRef(Base):
+    """
+    Fil de discussion de chaque Message-ID connu (email stocké ou seulement cité)
+    """
+    __tablename__ = "email_thread_refs"
+
+    message_id = Column(String(512), primary_key=True)
+    thread_id = Column(Uuid, nullable=False, index=True)
+
+
+class MailboxSyncState(Base):
+    """
+    Curseur de synchronisation d'une boîte distante
+    (watermark IMAP UIDVALIDITY/UID, ou historyId Gmail)
+    """
+    __tablename__ = "mailbox_sync_states"
+    __table_args__ = (UniqueConstraint("account", "mailbox", name="uq_mailbox_sync_account_mailbox"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    provider = Column(String(20), nullable=False)
+    account = Column(String(255), nullable=False)
+    mailbox = Column(String(255), nullable=False)
+    uid_validity = Column(BigInteger)
+    last_uid = Column(BigInteger, nullable=False, default=0)
+    history_id = Column(BigInteger)
+    last_synced_at = Column(DateTime)
+
+
+class ApplicationMilestone(Base):
+    """
+    Jalons d'une candidature déjà pris en compte dans les agrégats
+    (étapes atteintes, première réponse), pour ne compter chaque étape qu'une fois
+    """
+    __tablename__ = "application_milestones"
+
+    application_id = Column(Uuid, ForeignKey("applications.id", ondelete="CASCADE"), primary_key=True)
+    cohort_day = Column(Date, nullable=False)
+    company_name = Column(String(255), nullable=False)
+    source = Column(String(100), nullable=False, default="")
+    applied_at = Column(DateTime, nullable=False)
+    first_response_at = Column(DateTime)
+    stages = Column(JSONType, nullable=False, default=list)
+
+
+class AnalyticsDailyRollup(Base):
+    """
+    Compteurs journaliers par cohorte (jour de candidature), entreprise et source
+    """
+    __tablename__ = "analytics_daily_rollups"
+    __table_args__ = (Index("ix_analytics_daily_rollups_metric_day", "metric", "day"),)
+
+    day = Column(Date, primary_key=True)
+    company_name = Column(String(255), primary_key=True)
+    source = Column(String(100), primary_key=True, default="")
+    metric = Column(String(40), primary_key=True)
+    bucket = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsWatermark(Base):
+    """
+    Dernier événement intégré aux agrégats (position (created_at, id))
+    """
+    __tablename__ = "analytics_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    last_created_at = Column(DateTime)
+    last_event_id = Column(Uuid)
+    updated_at = Column(DateTime)
+
+
+class Task(Base):
+    """
+    Tâche de la file durable (app.services.task_queue), exécutée par les
+    workers de sa file (python -m app.worker --queue ...)
+    """
+    __tablename__ = "tasks"
+    # Réservation : tâches en attente d'une file par échéance
+    __table_args__ = (Index("ix_tasks_queue_status_run_at", "queue", "status", "run_at"),)
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    queue = Column(String(50), nullable=False)
+    kind = Column(String(100), nullable=False)
+    payload = Column(JSONType, nullable=False, default=dict)
+    # QUEUED, RUNNING, SUCCEEDED ou FAILED (tentatives épuisées)
+    status = Column(String(20), nullable=False, default="QUEUED")
+    # Une seule tâche par clé, même terminée : une nouvelle demande renvoie la tâche existante
+    idempotency_key = Column(String(255), unique=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Worker en cours et dernier battement (bail expiré : tâche reprise par un autre worker)
+    locked_by = Column(String(255))
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    result = Column(JSONType)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime)
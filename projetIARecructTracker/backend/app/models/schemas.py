@@ -0,0 +1,195 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class ApplicationStatus(str, Enum):
+    APPLIED = "APPLIED"
+    ACKNOWLEDGED = "ACKNOWLEDGED"
+    SCREENING = "SCREENING"
+    INTERVIEW = "INTERVIEW"
+    OFFER = "OFFER"
+    REJECTED = "REJECTED"
+    ON_HOLD = "ON_HOLD"
+    WITHDRAWN = "WITHDRAWN"
+
+
+class EventType(str, Enum):
+    STATUS_CHANGE = "STATUS_CHANGE"
+    EMAIL_RECEIVED = "EMAIL_RECEIVED"
+    NOTE_ADDED = "NOTE_ADDED"
+    REMINDER = "REMINDER"
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Date avec fuseau ramenée en UTC sans fuseau, comme toutes les dates en base
+    (comparables dans les index en mémoire : statistiques, rappels)
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# ---------- Applications ----------
+
+class ApplicationBase(BaseModel):
+    job_title: str
+    company_name: str
+    source: Optional[str] = None
+    location: Optional[str] = None
+    status: ApplicationStatus = ApplicationStatus.APPLIED
+    notes: Optional[str] = None
+    next_action_at: Optional[datetime] = None
+
+    _next_action_at_utc = field_validator("next_action_at")(naive_utc)
+
+
+class ApplicationCreate(ApplicationBase):
+    pass
+
+
+class ApplicationUpdate(BaseModel):
+    job_title: Optional[str] = None
+    company_name: Optional[str] = None
+    source: Optional[str] = None
+    location: Optional[str] = None
+    status: Optional[ApplicationStatus] = None
+    notes: Optional[str] = None
+    next_action_at: Optional[datetime] = None
+
+    _next_action_at_utc = field_validator("next_action_at")(naive_utc)
+
+
+class Application(ApplicationBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    created_at: datetime
+    updated_at: datetime
+
+
+class ApplicationPage(BaseModel):
+    items: List[Application]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+# Opérations en masse (une transaction par requête)
+MAX_BULK_APPLICATIONS = 10000
+
+
+class ApplicationBulkCreate(BaseModel):
+    applications: List[ApplicationCreate] = Field(..., min_length=1, max_length=MAX_BULK_APPLICATIONS)
+
+
+class ApplicationBulkStatusUpdate(BaseModel):
+    application_ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BULK_APPLICATIONS)
+    status: ApplicationStatus
+
+
+# ---------- Events ----------
+
+class ApplicationEventBase(BaseModel):
+    event_type: EventType
+    payload: dict = {}
+
+
+class ApplicationEventCreate(ApplicationEventBase):
+    application_id: UUID
+
+
+class ApplicationEvent(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    application_id: UUID
+    event_type: str
+    payload: dict
+    created_at: datetime
+
+
+class ApplicationEventPage(BaseModel):
+    items: List[dict]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+# ---------- Emails ----------
+
+class EmailBase(BaseModel):
+    external_id: Optional[str] = None
+    subject: Optional[str] = None
+    sender: Optional[str] = None
+    recipients: List[str] = []
+    cc: List[str] = []
+    sent_at: Optional[datetime] = None
+    snippet: Optional[str] = None
+    classification: Optional[str] = None
+    classification_source: Optional[str] = None
+
+
+class EmailCreate(EmailBase):
+    application_id: Optional[UUID] = None
+    link_source: Optional[str] = None
+    # Message-ID cités (In-Reply-To, References) : regroupement en fils
+    references: List[str] = []
+    # Empreinte du corps et original détecté (quasi-doublons)
+    simhash: Optional[int] = None
+    duplicate_of: Optional[UUID] = None
+    raw_headers: Optional[str] = None
+    raw_body: Optional[str] = None
+
+
+class EmailClassificationUpdate(BaseModel):
+    classification: ApplicationStatus
+
+
+class Email(EmailBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    application_id: Optional[UUID] = None
+    thread_id: Optional[UUID] = None
+    duplicate_of: Optional[UUID] = None
+    language: Optional[str] = None
+    entities: Optional[dict] = None
+    created_at: datetime
+
+
+class EmailDetail(Email):
+    raw_headers: Optional[str] = None
+    raw_body: Optional[str] = None
+
+
+class EmailPage(BaseModel):
+    items: List[Email]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class EmailSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    subject: Optional[str] = None
+    sender: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    snippet: Optional[str] = None
+    classification: Optional[str] = None
+    created_at: datetime
+
+
+# ---------- Vues composées ----------
+
+class ApplicationWithEvents(Application):
+    events: List[ApplicationEvent] = []
+
+
+class ApplicationFull(ApplicationWithEvents):
+    # Derniers événements seulement : la suite via /events?cursor=events_next_cursor
+    events_next_cursor: Optional[str] = None
+    emails: List[EmailSummary] = []
+    emails_total: int = 0
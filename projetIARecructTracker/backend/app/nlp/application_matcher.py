@@ -0,0 +1,316 @@
+"""
+Rapprochement email -> candidature par index inversé en mémoire.
+
+Chaque candidature est indexée par les jetons normalisés de son entreprise, de
+son intitulé de poste et par ses domaines d'expéditeur (nom d'entreprise
+compacté, domaines des emails déjà liés). Un email ne consulte que les listes
+de ses propres jetons : le coût ne dépend pas du nombre de candidatures.
+L'index est mis à jour à chaque création / modification / suppression de
+candidature, et reconstruit si la table a changé dans un autre processus.
+
+Une liaison automatique demande l'entreprise citée et un second signal
+concordant (domaine d'expéditeur ou intitulé) : une lettre d'information qui
+nomme l'entreprise ne suffit pas. Seules les liaisons manuelles apprennent
+des domaines d'expéditeur.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parseaddr
+from typing import Dict, FrozenSet, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Application, Email
+from app.nlp.rule_classifier import normalize_text
+
+# Texte de l'email examiné : sujet, expéditeur et début du corps
+MAX_BODY_CHARS = 2000
+
+# Intervalle minimal entre deux vérifications de la table des candidatures
+REFRESH_CHECK_SECONDS = 60.0
+
+# Part minimale des mots de l'intitulé cités pour confirmer une entreprise
+MIN_TITLE_AGREEMENT = 0.5
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Formes juridiques et mots vides sans valeur discriminante
+COMPANY_STOPWORDS = frozenset({
+    "sa", "sas", "sasu", "sarl", "eurl", "inc", "ltd", "llc", "gmbh", "plc", "corp", "co",
+    "company", "group", "groupe", "france", "the", "and", "et", "de", "des", "du", "la", "le", "les",
+})
+TITLE_STOPWORDS = frozenset({
+    "de", "des", "du", "en", "et", "la", "le", "les", "un", "une", "au", "aux", "pour",
+    "the", "of", "and", "for", "in", "hf", "fh", "mf", "fm",
+})
+
+# Domaines sans lien avec l'employeur : messageries, ATS, jobboards, sous-domaines techniques
+GENERIC_DOMAIN_LABELS = frozenset({
+    "gmail", "googlemail", "outlook", "hotmail", "live", "yahoo", "icloud", "orange", "free", "laposte", "wanadoo",
+    "greenhouse", "lever", "workday", "myworkdayjobs", "smartrecruiters", "welcometothejungle", "indeed",
+    "linkedin", "jobteaser", "teamtailor", "recruitee", "workable", "taleo", "icims", "successfactors",
+    "mail", "email", "mailer", "noreply", "notifications", "careers", "career", "jobs", "job", "talent",
+    "rh", "hr", "recrutement", "recruiting", "recruitment", "www", "com", "co", "fr", "net", "org", "io",
+})
+
+
+def tokens_in_order(text: Optional[str], stopwords: FrozenSet[str] = frozenset()) -> List[str]:
+    if not text:
+        return []
+    return [token for token in _TOKEN.findall(normalize_text(text)) if len(token) > 1 and token not in stopwords]
+
+
+def tokenize(text: Optional[str], stopwords: FrozenSet[str] = frozenset()) -> Set[str]:
+    return set(tokens_in_order(text, stopwords))
+
+
+def domain_keys(sender: Optional[str]) -> Set[str]:
+    """
+    Libellés significatifs du domaine d'expéditeur ("rh@jobs.acme-corp.fr" -> {"acmecorp"})
+    """
+    address = parseaddr(sender or "")[1]
+    if "@" not in address:
+        return set()
+    labels = normalize_text(address.rsplit("@", 1)[1]).split(".")[:-1]
+    return {key for key in (label.replace("-", "") for label in labels) if key and key not in GENERIC_DOMAIN_LABELS}
+
+
+@dataclass
+class IndexedApplication:
+    id: UUID
+    company_tokens: Set[str]
+    title_tokens: Set[str]
+    name_domains: Set[str] = field(default_factory=set)
+    learned_domains: Set[str] = field(default_factory=set)
+
+    @property
+    def domains(self) -> Set[str]:
+        return self.name_domains | self.learned_domains
+
+
+@dataclass
+class MatchCandidate:
+    application_id: UUID
+    score: float
+    company_score: float
+    domain_score: float
+    title_score: float
+
+    def to_dict(self) -> dict:
+        return {
+            "application_id": str(self.application_id),
+            "score": self.score,
+            "company_score": self.company_score,
+            "domain_score": self.domain_score,
+            "title_score": self.title_score,
+        }
+
+
+class ApplicationMatcher:
+    """
+    Index inversé candidatures (entreprise, domaine, intitulé) et score des emails
+    """
+
+    def __init__(self, threshold: float = None, min_margin: float = None):
+        self.threshold = settings.MATCHING_AUTO_LINK_THRESHOLD if threshold is None else threshold
+        self.min_margin = settings.MATCHING_MIN_MARGIN if min_margin is None else min_margin
+        self._lock = threading.RLock()
+        self._applications: Dict[UUID, IndexedApplication] = {}
+        self._company_index: Dict[str, Set[UUID]] = {}
+        self._domain_index: Dict[str, Set[UUID]] = {}
+        self._title_index: Dict[str, Set[UUID]] = {}
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self.loaded = False
+
+    # --- Construction et mise à jour de l'index ---
+
+    def ensure_loaded(self, db: Session):
+        """
+        Construire l'index au premier usage, le reconstruire si la table des
+        candidatures a changé ailleurs (autre processus)
+        """
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < REFRESH_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = tuple(db.query(func.count(Application.id), func.max(Application.updated_at)).one())
+            if not self.loaded or signature != self._signature:
+                self.load(db, signature)
+
+    def load(self, db: Session, signature: tuple = None):
+        rows = db.query(Application.id, Application.company_name, Application.job_title).all()
+        linked = db.query(Email.application_id, Email.sender)\
+            .filter(Email.application_id.isnot(None), Email.link_source == "user")\
+            .distinct()\
+            .all()
+        with self._lock:
+            self._applications.clear()
+            self._company_index.clear()
+            self._domain_index.clear()
+            self._title_index.clear()
+            for row in rows:
+                self._add(row.id, row.company_name, row.job_title)
+            for row in linked:
+                self.learn_sender(row.application_id, row.sender)
+            self._signature = signature
+            self.loaded = True
+
+    def upsert(self, application_id: UUID, company_name: str, job_title: str):
+        """
+        Indexer (ou réindexer) une candidature créée ou modifiée
+        """
+        if not self.loaded:
+            return  # l'index sera construit complet au premier usage
+        with self._lock:
+            previous = self._applications.get(application_id)
+            self._remove(application_id)
+            entry = self._add(application_id, company_name, job_title)
+            if previous is not None:
+                for domain in previous.learned_domains:
+                    self._learn(entry, domain)
+
+    def remove(self, application_id: UUID):
+        with self._lock:
+            self._remove(application_id)
+
+    def learn_sender(self, application_id: UUID, sender: Optional[str]):
+        """
+        Retenir le domaine d'un email lié manuellement à la candidature
+        """
+        with self._lock:
+            entry = self._applications.get(application_id)
+            if entry is None:
+                return
+            for domain in domain_keys(sender):
+                self._learn(entry, domain)
+
+    def _learn(self, entry: IndexedApplication, domain: str):
+        entry.learned_domains.add(domain)
+        self._domain_index.setdefault(domain, set()).add(entry.id)
+
+    def _add(self, application_id: UUID, company_name: str, job_title: str) -> IndexedApplication:
+        company_tokens = tokens_in_order(company_name, COMPANY_STOPWORDS)
+        # Nom compacté : "BNP Paribas" correspond au domaine bnpparibas.com
+        compact_names = {"".join(company_tokens), "".join(tokens_in_order(company_name))}
+        entry = IndexedApplication(
+            id=application_id,
+            company_tokens=set(company_tokens),
+            title_tokens=tokenize(job_title, TITLE_STOPWORDS),
+            name_domains={name for name in compact_names | set(company_tokens) if name not in GENERIC_DOMAIN_LABELS},
+        )
+        entry.name_domains.discard("")
+        self._applications[application_id] = entry
+        for index, keys in (
+            (self._company_index, entry.company_tokens),
+            (self._title_index, entry.title_tokens),
+            (self._domain_index, entry.domains),
+        ):
+            for key in keys:
+                index.setdefault(key, set()).add(application_id)
+        return entry
+
+    def _remove(self, application_id: UUID):
+        entry = self._applications.pop(application_id, None)
+        if entry is None:
+            return
+        for index, keys in (
+            (self._company_index, entry.company_tokens),
+            (self._title_index, entry.title_tokens),
+            (self._domain_index, entry.domains),
+        ):
+            for key in keys:
+                postings = index.get(key)
+                if postings is not None:
+                    postings.discard(application_id)
+                    if not postings:
+                        del index[key]
+
+    # --- Score ---
+
+    def candidates(
+        self,
+        subject: Optional[str],
+        sender: Optional[str],
+        body: Optional[str],
+        limit: int = 5,
+        include_title: bool = True,
+    ) -> List[MatchCandidate]:
+        """
+        Candidatures classées par score décroissant pour un email. Sans
+        include_title, seules les candidatures dont l'entreprise est citée ou le
+        domaine reconnu sont examinées (l'intitulé seul ne peut atteindre le
+        seuil, et ses jetons courants ont de longues listes)
+        """
+        tokens = tokenize(f"{subject or ''} {sender or ''} {(body or '')[:MAX_BODY_CHARS]}")
+        domains = domain_keys(sender)
+        sources = [(self._company_index, tokens), (self._domain_index, domains)]
+        if include_title:
+            sources.append((self._title_index, tokens))
+        with self._lock:
+            ids: Set[UUID] = set()
+            for index, keys in sources:
+                for key in keys:
+                    ids.update(index.get(key, ()))
+            scored = [self._score(self._applications[app_id], tokens, domains) for app_id in ids]
+        scored.sort(key=lambda candidate: candidate.score, reverse=True)
+        return scored[:limit]
+
+    def match(self, subject: Optional[str], sender: Optional[str], body: Optional[str]) -> Optional[UUID]:
+        """
+        Candidature à lier automatiquement, ou None si aucune n'est assez sûre,
+        si l'entreprise citée n'est confirmée ni par le domaine ni par
+        l'intitulé, ou si deux candidatures sont trop proches (laissé à l'utilisateur)
+        """
+        best, *others = self.candidates(subject, sender, body, limit=2, include_title=False) or [None]
+        if best is None or best.score < self.threshold or not self._corroborated(best):
+            return None
+        if others and best.score - others[0].score < self.min_margin:
+            return None
+        return best.application_id
+
+    @staticmethod
+    def _corroborated(candidate: MatchCandidate) -> bool:
+        return candidate.company_score > 0 and (
+            candidate.domain_score > 0 or candidate.title_score >= MIN_TITLE_AGREEMENT
+        )
+
+    @staticmethod
+    def _score(entry: IndexedApplication, tokens: Set[str], domains: Set[str]) -> MatchCandidate:
+        company = len(entry.company_tokens & tokens) / len(entry.company_tokens) if entry.company_tokens else 0.0
+        domain = 1.0 if entry.domains & domains else 0.0
+        title = len(entry.title_tokens & tokens) / len(entry.title_tokens) if entry.title_tokens else 0.0
+        # L'entreprise (nom cité ou domaine) porte l'essentiel ; l'intitulé départage
+        score = 0.55 * max(company, domain) + 0.15 * min(company, domain) + 0.3 * title
+        return MatchCandidate(entry.id, round(score, 3), round(company, 3), domain, round(title, 3))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "applications": len(self._applications),
+                "company_tokens": len(self._company_index),
+                "domains": len(self._domain_index),
+                "title_tokens": len(self._title_index),
+                "threshold": self.threshold,
+                "min_margin": self.min_margin,
+            }
+
+
+_matcher: Optional[ApplicationMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_application_matcher() -> ApplicationMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = ApplicationMatcher()
+    return _matcher
@@ -0,0 +1,115 @@
+"""
+Débit de l'extraction d'entités sur un corpus synthétique FR/EN.
+
+    python -m app.nlp.benchmark_extraction --emails 5000 --senders 200
+
+Mesure deux passes sur le même corpus : expéditeurs récurrents (cas réel : le
+cache de langue par domaine évite la plupart des détections) et expéditeurs
+tous distincts (une détection langdetect par email).
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from langdetect import detect
+
+from app.nlp.entity_extractor import EntityExtractor
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Soylent", "Stark Industries", "Wayne Enterprises"]
+TITLES_FR = ["Développeur Backend Python", "Ingénieur DevOps", "Data Scientist", "Chef de projet", "Développeuse Full Stack"]
+TITLES_EN = ["Senior Software Engineer", "Data Engineer", "Product Manager", "Machine Learning Engineer", "Tech Lead"]
+NAMES = ["Marie Dupont", "Jean Martin", "Alice Bernard", "John Smith", "Jane Doe", "Paul Durand"]
+MONTHS_FR = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre"]
+MONTHS_EN = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October"]
+
+TEMPLATES_FR = [
+    ("Votre candidature au poste de {title}",
+     "Bonjour,\n\nNous avons bien reçu votre candidature au poste de {title} chez {company} et vous en remercions. "
+     "Notre équipe l'étudie avec attention et reviendra vers vous rapidement.\n\nCordialement,\n{name}\n{phone}"),
+    ("Invitation à un entretien - {title}",
+     "Bonjour,\n\nSuite à votre candidature, nous souhaiterions vous rencontrer le {day} {month_fr} à {hour}h30 "
+     "dans nos locaux. Merci de confirmer votre disponibilité auprès de {contact}.\n\nL'équipe recrutement de {company}"),
+]
+TEMPLATES_EN = [
+    ("Your application for {title}",
+     "Hi,\n\nThank you for applying for the {title} position at {company}. Our recruiting team is reviewing your "
+     "profile and will get back to you shortly.\n\nBest regards,\n{name}\n{phone}"),
+    ("Interview invitation - {title}",
+     "Hello,\n\nWe would like to invite you to an interview on {month_en} {day} at {hour} pm. Please confirm with "
+     "{contact} or reply to this email.\n\nThe team at {company}"),
+]
+
+Email = Tuple[str, str, str, Optional[datetime]]
+
+
+def synthetic_corpus(size: int, senders: int, seed: int = 42) -> List[Email]:
+    rng = random.Random(seed)
+    domains = [f"{rng.choice(COMPANIES).split()[0].lower()}{index}.com" for index in range(senders)]
+    # Chaque domaine écrit toujours dans la même langue
+    french = {domain: rng.random() < 0.5 for domain in domains}
+    corpus = []
+    for _ in range(size):
+        domain = rng.choice(domains)
+        is_french = french[domain]
+        subject, body = rng.choice(TEMPLATES_FR if is_french else TEMPLATES_EN)
+        name = rng.choice(NAMES)
+        values = {
+            "title": rng.choice(TITLES_FR if is_french else TITLES_EN),
+            "company": rng.choice(COMPANIES),
+            "name": name,
+            "contact": f"{name.split()[0].lower()}@{domain}",
+            "phone": f"06 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            "day": rng.randint(1, 28),
+            "month_fr": rng.choice(MONTHS_FR),
+            "month_en": rng.choice(MONTHS_EN),
+            "hour": rng.randint(9, 17) if is_french else rng.randint(1, 5),
+        }
+        sent_at = datetime(2026, 1, 1) + timedelta(days=rng.randint(0, 300))
+        corpus.append((subject.format(**values), f"{name} <jobs@{domain}>", body.format(**values), sent_at))
+    return corpus
+
+
+def run(corpus: List[Email], batch_size: int) -> dict:
+    extractor = EntityExtractor()
+    # Compilation des dictionnaires et chargement des profils langdetect hors mesure
+    extractor.gazetteers
+    detect("warm up langdetect profiles")
+    started = time.perf_counter()
+    found = 0
+    for start in range(0, len(corpus), batch_size):
+        for entities in extractor.extract_batch(corpus[start:start + batch_size]):
+            found += bool(entities.company and entities.job_title)
+    elapsed = time.perf_counter() - started
+    stats = extractor.stats()
+    return {
+        "emails_per_second": len(corpus) / elapsed,
+        "seconds": elapsed,
+        "detections": stats["language_detections"],
+        "cache_hits": stats["language_cache_hits"],
+        "company_and_title": found / len(corpus),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emails", type=int, default=5000)
+    parser.add_argument("--senders", type=int, default=200, help="Domaines d'expéditeur distincts")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.emails, args.senders)
+    # Même corpus, un expéditeur distinct par email : le cache de langue ne sert jamais
+    unique = [(subject, f"x@unique{index}.com", body, sent_at) for index, (subject, _, body, sent_at) in enumerate(corpus)]
+    print(f"{'passe':<28}{'emails/s':>10}{'secondes':>10}{'détections':>12}{'cache':>8}{'entr.+poste':>13}")
+    for label, emails in (("expéditeurs récurrents", corpus), ("expéditeurs tous distincts", unique)):
+        result = run(emails, args.batch_size)
+        print(
+            f"{label:<28}{result['emails_per_second']:>10.0f}{result['seconds']:>10.2f}"
+            f"{result['detections']:>12}{result['cache_hits']:>8}{result['company_and_title']:>12.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
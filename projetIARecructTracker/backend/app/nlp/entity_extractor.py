@@ -0,0 +1,354 @@
+"""
+Extraction d'entités des emails : entreprise, intitulé de poste, dates et contacts.
+
+Les dictionnaires FR/EN du dossier EXTRACTION_GAZETTEERS_PATH (intitulés de
+poste, motifs d'entreprise et d'intitulé, noms de mois) sont compilés une
+fois : les intitulés en une regex en arbre préfixe par langue, les motifs en
+regex précompilées. La langue est détectée une fois par email (langdetect) ;
+pour un expéditeur dont les emails précédents étaient tous dans la même
+langue, le cache par domaine évite la détection.
+
+Les emails sont traités par lots ; les résultats sont écrits en base par
+lots également (EmailService.extract_stored_entities).
+"""
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+from langdetect import DetectorFactory, LangDetectException, detect
+from loguru import logger
+
+from app.core.config import settings
+from app.nlp.application_matcher import GENERIC_DOMAIN_LABELS
+from app.nlp.rule_classifier import prefix_tree_regex, normalize_text
+
+# Résultats de langdetect reproductibles
+DetectorFactory.seed = 0
+
+# Texte examiné : sujet et début du corps
+MAX_BODY_CHARS = 5000
+DETECTION_CHARS = 1000
+
+# Cache de langue par expéditeur : détections concordantes requises
+DOMAIN_CACHE_MIN_SAMPLES = 3
+DOMAIN_CACHE_MIN_SHARE = 0.9
+DOMAIN_CACHE_MAX_KEYS = 50000
+
+MAX_DATES = 5
+MAX_CONTACTS = 5
+MAX_TITLE_WORDS = 8
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<![\w+])(?:\+\d{1,3}[ .-]?(?:\(0\))?[ .-]?\d(?:[ .-]?\d{2}){4}|0[1-9](?:[ .-]?\d{2}){4})(?!\d)")
+_NO_REPLY = re.compile(r"no-?reply|ne-?pas-?repondre|do-?not-?reply|mailer-daemon", re.IGNORECASE)
+_NUMERIC_DATE = re.compile(r"\b(?:\d{4}-\d{2}-\d{2}|\d{1,2}[/.]\d{1,2}[/.](?:\d{4}|\d{2}))\b")
+_TIME = r"(?P<hour>[01]?\d|2[0-3])(?:(?:h|:)(?P<minute>[0-5]\d)?|(?= ?[ap]m))(?: ?(?P<ampm>[ap]m))?"
+# Heure introduite comme une entreprise (« interview at 2pm ») : écartée
+_TIME_ONLY = re.compile(_TIME, re.IGNORECASE)
+
+
+@dataclass
+class ExtractedEntities:
+    language: Optional[str] = None
+    company: Optional[str] = None
+    job_title: Optional[str] = None
+    dates: List[str] = field(default_factory=list)
+    contacts: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {"company": self.company, "job_title": self.job_title, "dates": self.dates, "contacts": self.contacts}
+
+
+@dataclass
+class Gazetteer:
+    language: str
+    titles: Optional[re.Pattern]
+    title_patterns: List[re.Pattern]
+    company_patterns: List[re.Pattern]
+    company_stopwords: frozenset
+    months: Dict[str, int]
+    dates: re.Pattern
+
+
+def compile_gazetteer(data: dict, language: str) -> Gazetteer:
+    titles = {normalize_text(title).strip() for title in data.get("job_titles", [])}
+    titles.discard("")
+    prefixes = [normalize_text(prefix) for prefix in data.get("title_prefixes", [])]
+    title_regex = None
+    if titles:
+        prefix = f"(?:(?:{'|'.join(map(re.escape, prefixes))}) )?" if prefixes else ""
+        title_regex = re.compile(rf"\b{prefix}(?:{prefix_tree_regex(titles)})\b")
+
+    months = {normalize_text(name): number for name, number in data.get("months", {}).items()}
+    month_names = "|".join(sorted(map(re.escape, months), key=len, reverse=True))
+    separators = "|".join(map(re.escape, data.get("time_separators", [])))
+    time_suffix = rf"(?:,? (?:(?:{separators}) )?{_TIME})?" if separators else rf"(?:,? {_TIME})?"
+    dates = re.compile(
+        rf"\b(?:(?P<day>\d{{1,2}})(?:er|st|nd|rd|th)? (?P<month>{month_names})\.?(?: (?P<year>\d{{4}}))?"
+        rf"|(?P<month2>{month_names})\.? (?P<day2>\d{{1,2}})(?:st|nd|rd|th)?(?:,? (?P<year2>\d{{4}}))?)\b"
+        + time_suffix
+    )
+    return Gazetteer(
+        language=language,
+        titles=title_regex,
+        title_patterns=[re.compile(pattern) for pattern in data.get("title_patterns", [])],
+        company_patterns=[re.compile(rf"\b(?:{pattern})") for pattern in data.get("company_patterns", [])],
+        company_stopwords=frozenset(normalize_text(word) for word in data.get("company_stopwords", [])),
+        months=months,
+        dates=dates,
+    )
+
+
+def _sender_key(sender: Optional[str]) -> Optional[str]:
+    """
+    Clé du cache de langue : domaine, ou adresse complète pour une messagerie / un ATS générique
+    """
+    address = parseaddr(sender or "")[1].lower()
+    if "@" not in address:
+        return None
+    domain = address.rsplit("@", 1)[1]
+    labels = domain.split(".")
+    return address if any(label in GENERIC_DOMAIN_LABELS for label in labels[:-1]) else domain
+
+
+def _year_for(month: int, day: int, reference: datetime) -> int:
+    """
+    Année d'une date sans année : la plus proche après la date de l'email (un mois de tolérance)
+    """
+    year = reference.year
+    try:
+        if datetime(year, month, day) < reference - timedelta(days=30):
+            year += 1
+    except ValueError:
+        pass
+    return year
+
+
+class EntityExtractor:
+    """
+    Extraction par lots, avec cache de langue par expéditeur et statistiques
+    """
+
+    def __init__(self, gazetteers_path: str = None):
+        self.gazetteers_path = Path(gazetteers_path or settings.EXTRACTION_GAZETTEERS_PATH)
+        self._gazetteers: Optional[Dict[str, Gazetteer]] = None
+        self._lock = threading.Lock()
+        self._sender_languages: Dict[str, Counter] = {}
+        self.emails_processed = 0
+        self.detections = 0
+        self.cache_hits = 0
+
+    @property
+    def gazetteers(self) -> Dict[str, Gazetteer]:
+        if self._gazetteers is None:
+            with self._lock:
+                if self._gazetteers is None:
+                    self._gazetteers = self._load()
+        return self._gazetteers
+
+    def _load(self) -> Dict[str, Gazetteer]:
+        gazetteers = {}
+        for path in sorted(self.gazetteers_path.glob("*.json")):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            language = data.get("language", path.stem)
+            gazetteers[language] = compile_gazetteer(data, language)
+        logger.info(f"Dictionnaires d'extraction chargés : {', '.join(gazetteers) or 'aucun'}")
+        return gazetteers
+
+    # --- Langue ---
+
+    def detect_language(self, sender: Optional[str], text: str) -> Optional[str]:
+        key = _sender_key(sender)
+        if key is not None:
+            with self._lock:
+                seen = self._sender_languages.get(key)
+                if seen:
+                    language, count = seen.most_common(1)[0]
+                    total = sum(seen.values())
+                    if total >= DOMAIN_CACHE_MIN_SAMPLES and count >= DOMAIN_CACHE_MIN_SHARE * total:
+                        self.cache_hits += 1
+                        return language
+        try:
+            language = detect(text[:DETECTION_CHARS]) if text.strip() else None
+        except LangDetectException:
+            language = None
+        with self._lock:
+            self.detections += 1
+            if key is not None and language:
+                if key not in self._sender_languages and len(self._sender_languages) >= DOMAIN_CACHE_MAX_KEYS:
+                    self._sender_languages.clear()
+                self._sender_languages.setdefault(key, Counter())[language] += 1
+        return language
+
+    # --- Entités ---
+
+    def extract_batch(
+        self, emails: List[Tuple[Optional[str], Optional[str], Optional[str], Optional[datetime]]]
+    ) -> List[ExtractedEntities]:
+        """
+        Entités d'un lot de (sujet, expéditeur, corps, date d'envoi)
+        """
+        gazetteers = self.gazetteers
+        results = [self._extract(gazetteers, *email_fields) for email_fields in emails]
+        with self._lock:
+            self.emails_processed += len(emails)
+        return results
+
+    def extract(self, subject, sender, body, sent_at=None) -> ExtractedEntities:
+        return self.extract_batch([(subject, sender, body, sent_at)])[0]
+
+    def _extract(
+        self, gazetteers: Dict[str, Gazetteer], subject: Optional[str], sender: Optional[str],
+        body: Optional[str], sent_at: Optional[datetime]
+    ) -> ExtractedEntities:
+        subject = subject or ""
+        body = (body or "")[:MAX_BODY_CHARS]
+        text = f"{subject}\n{body}"
+        language = self.detect_language(sender, text)
+        # Langue sans dictionnaire : tous les dictionnaires, dans l'ordre
+        candidates = [gazetteers[language]] if language in gazetteers else list(gazetteers.values())
+
+        normalized_subject = normalize_text(subject)
+        normalized = normalize_text(text)
+        # Les positions du texte normalisé valent dans l'original (casse restituée) s'ils ont la même longueur
+        original = text if len(normalized) == len(text) else None
+
+        return ExtractedEntities(
+            language=language,
+            company=self._company(candidates, text, sender),
+            job_title=self._job_title(candidates, normalized_subject, normalized, original),
+            dates=self._dates(candidates, normalized, sent_at or datetime.utcnow()),
+            contacts=self._contacts(text, sender),
+        )
+
+    @staticmethod
+    def _company(gazetteers: List[Gazetteer], text: str, sender: Optional[str]) -> Optional[str]:
+        for gazetteer in gazetteers:
+            for pattern in gazetteer.company_patterns:
+                for match in pattern.finditer(text):
+                    company = match.group("company").rstrip(".’'-")
+                    if _TIME_ONLY.fullmatch(company):
+                        continue
+                    if normalize_text(company.split()[0]) not in gazetteer.company_stopwords:
+                        return company
+        # Repli : domaine de l'expéditeur s'il est propre à l'employeur
+        address = parseaddr(sender or "")[1].lower()
+        if "@" in address:
+            labels = address.rsplit("@", 1)[1].split(".")
+            if len(labels) >= 2 and labels[-2] not in GENERIC_DOMAIN_LABELS:
+                return labels[-2].capitalize()
+        return None
+
+    @staticmethod
+    def _job_title(
+        gazetteers: List[Gazetteer], normalized_subject: str, normalized: str, original: Optional[str]
+    ) -> Optional[str]:
+        def restore(match: re.Match, group=0) -> str:
+            start, end = match.span(group)
+            return (original[start:end] if original is not None else match.group(group)).strip()
+
+        for gazetteer in gazetteers:
+            for pattern in gazetteer.title_patterns:
+                match = pattern.search(normalized)
+                if match and len(match.group("title").split()) <= MAX_TITLE_WORDS:
+                    return restore(match, "title")
+        for gazetteer in gazetteers:
+            if gazetteer.titles is None:
+                continue
+            # Le sujet d'abord (il nomme en général le poste), puis le corps
+            match = gazetteer.titles.search(normalized_subject) or gazetteer.titles.search(normalized)
+            if match:
+                return restore(match)
+        return None
+
+    @staticmethod
+    def _dates(gazetteers: List[Gazetteer], normalized: str, reference: datetime) -> List[str]:
+        found: List[Tuple[int, str]] = []
+        for gazetteer in gazetteers:
+            for match in gazetteer.dates.finditer(normalized):
+                day = int(match.group("day") or match.group("day2"))
+                month = gazetteer.months[match.group("month") or match.group("month2")]
+                year = match.group("year") or match.group("year2")
+                year = int(year) if year else _year_for(month, day, reference)
+                try:
+                    value = datetime(year, month, day)
+                except ValueError:
+                    continue
+                if match.group("hour"):
+                    hour = int(match.group("hour"))
+                    if match.group("ampm") == "pm" and hour < 12:
+                        hour += 12
+                    elif match.group("ampm") == "am" and hour == 12:
+                        hour = 0
+                    value = value.replace(hour=hour, minute=int(match.group("minute") or 0))
+                    found.append((match.start(), value.isoformat(timespec="minutes")))
+                else:
+                    found.append((match.start(), value.date().isoformat()))
+        dayfirst = not gazetteers or gazetteers[0].language != "en"
+        # Numéros de téléphone à points (06.12.34.56.78) : pas des dates
+        phones = [match.span() for match in _PHONE.finditer(normalized)]
+        for match in _NUMERIC_DATE.finditer(normalized):
+            if any(start < match.end() and match.start() < end for start, end in phones):
+                continue
+            try:
+                value = date_parser.parse(match.group(), dayfirst=dayfirst, default=reference)
+            except (ValueError, OverflowError):
+                continue
+            if 2000 <= value.year <= 2100:
+                found.append((match.start(), value.date().isoformat()))
+
+        dates: List[str] = []
+        for _, value in sorted(found):
+            if value not in dates:
+                dates.append(value)
+        return dates[:MAX_DATES]
+
+    @staticmethod
+    def _contacts(text: str, sender: Optional[str]) -> dict:
+        name, address = parseaddr(sender or "")
+        emails: List[str] = []
+        for candidate in [address] + _EMAIL.findall(text):
+            candidate = candidate.lower()
+            if candidate and "@" in candidate and not _NO_REPLY.search(candidate) and candidate not in emails:
+                emails.append(candidate)
+        phones: List[str] = []
+        for match in _PHONE.finditer(text):
+            phone = re.sub(r"[ .-]|\(0\)", "", match.group())
+            if phone not in phones:
+                phones.append(phone)
+        return {
+            "name": name.strip() or None,
+            "emails": emails[:MAX_CONTACTS],
+            "phones": phones[:MAX_CONTACTS],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "gazetteers_path": str(self.gazetteers_path),
+                "languages": sorted(self._gazetteers) if self._gazetteers is not None else [],
+                "emails_processed": self.emails_processed,
+                "language_detections": self.detections,
+                "language_cache_hits": self.cache_hits,
+                "cached_senders": len(self._sender_languages),
+            }
+
+
+_extractor: Optional[EntityExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_entity_extractor() -> EntityExtractor:
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = EntityExtractor()
+    return _extractor
@@ -0,0 +1,223 @@
+"""
+Classifieur appris (TF-IDF + régression logistique) à partir des corrections
+manuelles de classification.
+
+L'entraînement tourne dans un processus séparé et produit un artefact versionné
+(modèle + métriques) ; le modèle actif est remplacé atomiquement, sur disque
+(os.replace) comme en mémoire (simple réaffectation de référence).
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import joblib
+from loguru import logger
+
+from app.core.config import settings
+
+# Corps tronqué : l'essentiel du signal est en début de message
+MAX_BODY_CHARS = 5000
+
+# Intervalle minimal entre deux vérifications du fichier modèle (autres processus)
+RELOAD_CHECK_SECONDS = 5.0
+
+
+def training_text(subject: Optional[str], body: Optional[str]) -> str:
+    return f"{subject or ''}\n{(body or '')[:MAX_BODY_CHARS]}"
+
+
+def train_model(texts: List[str], labels: List[str], model_path: str) -> dict:
+    """
+    Entraîner, évaluer puis publier un modèle (exécuté dans un processus dédié)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, classification_report, f1_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+
+    from app.nlp.rule_classifier import normalize_text
+
+    def build() -> Pipeline:
+        return Pipeline([
+            ("tfidf", TfidfVectorizer(
+                preprocessor=normalize_text,
+                ngram_range=(1, 2),
+                sublinear_tf=True,
+                min_df=2 if len(texts) >= 200 else 1,
+                max_features=50000,
+            )),
+            ("clf", LogisticRegression(max_iter=1000, class_weight="balanced")),
+        ])
+
+    started = time.perf_counter()
+    metrics = {"samples": len(texts), "labels": sorted(set(labels))}
+
+    # Évaluation sur un jeu de test réservé si chaque classe a assez d'exemples
+    counts = {label: labels.count(label) for label in set(labels)}
+    if len(texts) >= 20 and min(counts.values()) >= 2:
+        x_train, x_test, y_train, y_test = train_test_split(
+            texts, labels, test_size=0.2, stratify=labels, random_state=42
+        )
+        evaluated = build().fit(x_train, y_train)
+        predicted = evaluated.predict(x_test)
+        metrics.update(
+            test_samples=len(x_test),
+            accuracy=round(accuracy_score(y_test, predicted), 4),
+            macro_f1=round(f1_score(y_test, predicted, average="macro"), 4),
+            report=classification_report(y_test, predicted, output_dict=True, zero_division=0),
+        )
+
+    pipeline = build().fit(texts, labels)
+    version = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    metrics.update(version=version, trained_at=datetime.utcnow().isoformat(),
+                   training_seconds=round(time.perf_counter() - started, 3))
+
+    # Artefact versionné, puis publication atomique du modèle actif
+    active = Path(model_path)
+    version_dir = active.parent / "versions" / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    artifact = {"pipeline": pipeline, "version": version, "metrics": metrics}
+    joblib.dump(artifact, version_dir / "model.pkl")
+    (version_dir / "metrics.json").write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+
+    tmp_path = active.with_name(f".{active.name}.{version}.tmp")
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, active)
+    return metrics
+
+
+class ModelClassifier:
+    """
+    Modèle actif en mémoire, rechargé si le fichier change, et
+    réentraînement en arrière-plan (un seul à la fois)
+    """
+
+    def __init__(self, model_path: str = None):
+        self.model_path = Path(model_path or settings.CLASSIFICATION_MODEL_PATH)
+        self._artifact: Optional[dict] = None
+        self._loaded_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._training: Optional[Future] = None
+        self.last_training: dict = {"status": "never"}
+
+    # --- Prédiction ---
+
+    def _current(self) -> Optional[dict]:
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return self._artifact
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self.model_path.stat().st_mtime_ns
+            except OSError:
+                return self._artifact
+            if mtime != self._loaded_mtime:
+                self._load(mtime)
+        return self._artifact
+
+    def _load(self, mtime: int):
+        try:
+            artifact = joblib.load(self.model_path)
+        except Exception as e:
+            logger.error(f"Modèle de classification illisible ({self.model_path}) : {e}")
+            return
+        # Réaffectation unique : les lots en cours gardent l'ancien modèle
+        self._artifact = artifact
+        self._loaded_mtime = mtime
+        logger.info(f"Modèle de classification {artifact['version']} chargé")
+
+    @property
+    def version(self) -> Optional[str]:
+        artifact = self._current()
+        return artifact["version"] if artifact else None
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[Optional[str], float]]:
+        """
+        (label, probabilité) pour un lot de textes, en un seul appel vectorisé
+        """
+        artifact = self._current()
+        if artifact is None or not texts:
+            return [(None, 0.0)] * len(texts)
+        pipeline = artifact["pipeline"]
+        probabilities = pipeline.predict_proba(texts)
+        classes = pipeline.classes_
+        best = probabilities.argmax(axis=1)
+        return [(str(classes[index]), float(row[index])) for row, index in zip(probabilities, best)]
+
+    # --- Entraînement ---
+
+    @property
+    def training(self) -> bool:
+        return self._training is not None and not self._training.done()
+
+    def start_training(self, texts: List[str], labels: List[str]) -> dict:
+        """
+        Lancer l'entraînement dans un processus séparé (sans attendre)
+        """
+        with self._lock:
+            if self.training:
+                return self.last_training
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            self.last_training = {
+                "status": "running",
+                "samples": len(texts),
+                "started_at": datetime.utcnow().isoformat(),
+            }
+            self._training = self._executor.submit(train_model, texts, labels, str(self.model_path.resolve()))
+            self._training.add_done_callback(self._on_trained)
+            return self.last_training
+
+    def _on_trained(self, future: Future):
+        finished_at = datetime.utcnow().isoformat()
+        try:
+            metrics = future.result()
+        except Exception as e:
+            logger.error(f"Échec du réentraînement : {e}")
+            self.last_training = {**self.last_training, "status": "error", "error": str(e), "finished_at": finished_at}
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                self._load(self.model_path.stat().st_mtime_ns)
+            except OSError as e:
+                logger.error(f"Modèle entraîné introuvable : {e}")
+        # Terminé une fois le nouveau modèle actif
+        self.last_training = {**self.last_training, "status": "completed", "finished_at": finished_at, "metrics": metrics}
+
+    def status(self) -> dict:
+        artifact = self._current()
+        return {
+            "model_path": str(self.model_path),
+            "active_version": artifact["version"] if artifact else None,
+            "active_metrics": artifact["metrics"] if artifact else None,
+            "training": self.last_training,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_classifier: Optional[ModelClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_model_classifier() -> ModelClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = ModelClassifier()
+    return _classifier
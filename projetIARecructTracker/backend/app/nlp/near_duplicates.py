@@ -0,0 +1,119 @@
+"""
+Détection des quasi-doublons d'emails par index LSH en bandes.
+
+L'empreinte SimHash 64 bits du corps (app.nlp.simhash) est découpée en
+4 bandes de 16 bits ; deux empreintes à distance de Hamming <= 3 ont
+forcément une bande identique (principe des tiroirs). La recherche ne
+consulte donc que 4 seaux, quel que soit le nombre d'emails indexés.
+
+Seuls les originaux sont indexés ; l'index est construit au premier usage et
+reconstruit si les emails ont changé dans un autre processus.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.models import Email
+from app.nlp.simhash import BANDS, MAX_DISTANCE, bands, distance
+
+# Intervalle minimal entre deux vérifications de la table des emails
+REFRESH_CHECK_SECONDS = 60.0
+
+
+class NearDuplicateIndex:
+    """
+    Index LSH des empreintes des emails originaux
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._buckets: List[Dict[int, List[Tuple[int, UUID]]]] = [{} for _ in range(BANDS)]
+        self._size = 0
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self.loaded = False
+
+    def ensure_loaded(self, db: Session):
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < REFRESH_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = tuple(
+                db.query(func.count(Email.id), func.max(Email.created_at))
+                .filter(Email.simhash.isnot(None), Email.duplicate_of.is_(None))
+                .one()
+            )
+            if not self.loaded or signature != self._signature:
+                self.load(db, signature)
+
+    def load(self, db: Session, signature: tuple = None):
+        rows = db.query(Email.id, Email.simhash)\
+            .filter(Email.simhash.isnot(None), Email.duplicate_of.is_(None))\
+            .all()
+        with self._lock:
+            self._buckets = [{} for _ in range(BANDS)]
+            self._size = 0
+            self.add_many((row.id, row.simhash) for row in rows)
+            self._signature = signature
+            self.loaded = True
+
+    def add_many(self, entries):
+        with self._lock:
+            for email_id, simhash in entries:
+                for buckets, key in zip(self._buckets, bands(simhash)):
+                    buckets.setdefault(key, []).append((simhash, email_id))
+                self._size += 1
+
+    @staticmethod
+    def _find(buckets: List[Dict[int, List[Tuple[int, UUID]]]], simhash: int) -> Optional[UUID]:
+        for band_buckets, key in zip(buckets, bands(simhash)):
+            for candidate, email_id in band_buckets.get(key, ()):
+                if distance(candidate, simhash) <= MAX_DISTANCE:
+                    return email_id
+        return None
+
+    def match_batch(self, entries: List[Tuple[UUID, Optional[int]]]) -> List[Optional[UUID]]:
+        """
+        Original de chaque (id, empreinte) d'un lot : email indexé ou email
+        précédent du même lot ; None pour un original (à indexer après insertion)
+        """
+        batch: List[Dict[int, List[Tuple[int, UUID]]]] = [{} for _ in range(BANDS)]
+        originals: List[Optional[UUID]] = []
+        with self._lock:
+            for email_id, simhash in entries:
+                if simhash is None:
+                    originals.append(None)
+                    continue
+                original = self._find(self._buckets, simhash) or self._find(batch, simhash)
+                if original is None:
+                    for band_buckets, key in zip(batch, bands(simhash)):
+                        band_buckets.setdefault(key, []).append((simhash, email_id))
+                originals.append(original)
+        return originals
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "fingerprints": self._size,
+                "buckets": sum(len(band_buckets) for band_buckets in self._buckets),
+                "max_distance": MAX_DISTANCE,
+            }
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex()
+    return _index
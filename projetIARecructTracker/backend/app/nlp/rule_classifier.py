@@ -0,0 +1,320 @@
+"""
+Classification des emails par règles FR/EN.
+
+Les fichiers JSON du dossier CLASSIFICATION_RULES_PATH sont compilés en un
+seul automate : tous les mots-clés (toutes langues) sont factorisés en une
+regex en arbre préfixe, et les regex libres en une regex combinée par langue
+(un groupe nommé par règle). Chaque email est parcouru une fois, quel que soit
+le nombre de mots-clés.
+Les fichiers sont relus automatiquement lorsqu'ils changent. Mots-clés et
+regex s'appliquent au texte normalisé (minuscules, sans accents).
+"""
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.schemas import ApplicationStatus
+
+# Départage des égalités de score : l'étape la plus avancée l'emporte
+LABEL_PRIORITY = [
+    ApplicationStatus.OFFER,
+    ApplicationStatus.REJECTED,
+    ApplicationStatus.INTERVIEW,
+    ApplicationStatus.WITHDRAWN,
+    ApplicationStatus.SCREENING,
+    ApplicationStatus.ON_HOLD,
+    ApplicationStatus.ACKNOWLEDGED,
+    ApplicationStatus.APPLIED,
+]
+_PRIORITY = {label.value: rank for rank, label in enumerate(LABEL_PRIORITY)}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minuscules sans accents : les règles s'écrivent sans se soucier des diacritiques
+    """
+    text = text.casefold()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    label: str
+    language: str
+    weight: float = 1.0
+
+
+@dataclass
+class ClassificationResult:
+    label: Optional[str]
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+
+
+class CompiledRuleSet:
+    """
+    Règles compilées : une regex préfixe pour les mots-clés, une regex
+    combinée par langue pour les motifs libres
+    """
+
+    def __init__(
+        self,
+        rules: List[Rule],
+        keyword_pattern: Optional["re.Pattern"],
+        keyword_rules: Dict[str, List[str]],
+        patterns: Dict[str, "re.Pattern"],
+        signature: tuple,
+    ):
+        self.rules = {rule.id: rule for rule in rules}
+        self.keyword_pattern = keyword_pattern
+        self.keyword_rules = keyword_rules
+        self.patterns = patterns
+        self.signature = signature
+        # Groupe nommé -> règle
+        self._groups: Dict[str, Rule] = {f"r{index}": rule for index, rule in enumerate(rules)}
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted({rule.language for rule in self.rules.values()})
+
+    def match(self, text: str) -> Counter:
+        """
+        Nombre d'occurrences de chaque règle dans le texte (déjà normalisé)
+        """
+        hits: Counter = Counter()
+        if self.keyword_pattern is not None:
+            for keyword in self.keyword_pattern.findall(text):
+                hits.update(self.keyword_rules[keyword])
+        for pattern in self.patterns.values():
+            for match in pattern.finditer(text):
+                hits[self._groups[match.lastgroup].id] += 1
+        return hits
+
+    def score(self, hits: Counter) -> ClassificationResult:
+        scores: Dict[str, float] = {}
+        for rule_id, count in hits.items():
+            rule = self.rules[rule_id]
+            scores[rule.label] = scores.get(rule.label, 0.0) + rule.weight * count
+        if not scores:
+            return ClassificationResult(label=None, confidence=0.0)
+        label = min(scores, key=lambda name: (-scores[name], _PRIORITY.get(name, len(_PRIORITY))))
+        return ClassificationResult(
+            label=label,
+            confidence=round(scores[label] / sum(scores.values()), 3),
+            scores=scores,
+            rule_hits=dict(hits),
+        )
+
+
+def prefix_tree_regex(words: Iterable[str]) -> str:
+    """
+    Alternative factorisée en arbre préfixe : le moteur de regex ne teste plus
+    chaque mot-clé à chaque position, seulement le chemin commun
+    """
+    tree: dict = {}
+    for word in words:
+        node = tree
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Mot-clé terminé ici mais prolongeable : suite optionnelle (gourmande)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(tree)
+
+
+def compile_rules(files: Iterable[Path], signature: tuple = ()) -> CompiledRuleSet:
+    """
+    Charger les fichiers de règles et les compiler
+    """
+    rules: List[Rule] = []
+    keyword_rules: Dict[str, List[str]] = {}
+    alternatives: Dict[str, List[str]] = {}
+
+    for path in files:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        language = data.get("language", path.stem)
+        for definition in data.get("rules", []):
+            rule = Rule(
+                id=definition["id"],
+                label=ApplicationStatus(definition["label"]).value,
+                language=language,
+                weight=float(definition.get("weight", 1.0)),
+            )
+            group = f"r{len(rules)}"
+            rules.append(rule)
+
+            for keyword in definition.get("keywords", []):
+                keyword_rules.setdefault(normalize_text(keyword).strip(), []).append(rule.id)
+            patterns = definition.get("patterns", [])
+            for pattern in patterns:
+                re.compile(pattern)  # erreur explicite sur le motif fautif
+            if patterns:
+                body = "|".join(f"(?:{pattern})" for pattern in patterns)
+                alternatives.setdefault(language, []).append(f"(?P<{group}>{body})")
+
+    keyword_rules.pop("", None)
+    keyword_pattern = (
+        re.compile(r"\b(?:" + prefix_tree_regex(keyword_rules) + r")\b") if keyword_rules else None
+    )
+    patterns = {language: re.compile("|".join(groups)) for language, groups in alternatives.items()}
+    return CompiledRuleSet(rules, keyword_pattern, keyword_rules, patterns, signature)
+
+
+class RuleClassifier:
+    """
+    Classifieur à règles rechargées à chaud, avec statistiques par règle
+    """
+
+    def __init__(self, rules_path: str = None, reload_interval: float = None):
+        self.rules_path = Path(rules_path or settings.CLASSIFICATION_RULES_PATH)
+        self.reload_interval = (
+            settings.CLASSIFICATION_RULES_RELOAD_SECONDS if reload_interval is None else reload_interval
+        )
+        self._ruleset: Optional[CompiledRuleSet] = None
+        self._checked_at = 0.0
+        self._failed_signature: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.rule_hits: Counter = Counter()
+        self.rule_emails: Counter = Counter()
+        self.label_counts: Counter = Counter()
+        self.emails_classified = 0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        if not self.rules_path.is_dir():
+            return ()
+        return tuple(
+            (path.name, path.stat().st_mtime_ns, path.stat().st_size)
+            for path in sorted(self.rules_path.glob("*.json"))
+        )
+
+    @property
+    def ruleset(self) -> CompiledRuleSet:
+        """
+        Jeu de règles courant, recompilé si les fichiers ont changé
+        (vérification au plus une fois par reload_interval)
+        """
+        now = time.monotonic()
+        if self._ruleset is not None and now - self._checked_at < self.reload_interval:
+            return self._ruleset
+
+        with self._lock:
+            if self._ruleset is not None and now - self._checked_at < self.reload_interval:
+                return self._ruleset
+            self._checked_at = now
+            signature = self._signature()
+            if self._ruleset is None or signature not in (self._ruleset.signature, self._failed_signature):
+                self._reload(signature)
+            return self._ruleset
+
+    def _reload(self, signature: tuple):
+        files = [self.rules_path / name for name, _, _ in signature]
+        try:
+            ruleset = compile_rules(files, signature)
+        except (OSError, ValueError, KeyError, re.error) as e:
+            self.last_error = str(e)
+            self._failed_signature = signature
+            logger.error(f"Règles de classification invalides, version précédente conservée : {e}")
+            if self._ruleset is None:
+                self._ruleset = CompiledRuleSet([], None, {}, {}, signature)
+            return
+        self._ruleset = ruleset
+        self.last_error = None
+        self.reloads += 1
+        logger.info(f"{len(ruleset.rules)} règles de classification chargées depuis {self.rules_path}")
+
+    def reload(self):
+        """
+        Forcer la relecture des fichiers de règles
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._reload(self._signature())
+
+    def classify(self, subject: Optional[str], body: Optional[str]) -> ClassificationResult:
+        return self.classify_batch([(subject, body)])[0]
+
+    def classify_batch(self, emails: List[Tuple[Optional[str], Optional[str]]]) -> List[ClassificationResult]:
+        """
+        Classer un lot de (sujet, corps) en un seul passage par email
+        """
+        ruleset = self.ruleset
+        results = []
+        batch_hits: Counter = Counter()
+        batch_emails: Counter = Counter()
+        batch_labels: Counter = Counter()
+
+        for subject, body in emails:
+            hits = ruleset.match(normalize_text(f"{subject or ''}\n{body or ''}"))
+            result = ruleset.score(hits)
+            results.append(result)
+            batch_hits.update(hits)
+            batch_emails.update(hits.keys())
+            if result.label:
+                batch_labels[result.label] += 1
+
+        with self._stats_lock:
+            self.rule_hits.update(batch_hits)
+            self.rule_emails.update(batch_emails)
+            self.label_counts.update(batch_labels)
+            self.emails_classified += len(emails)
+        return results
+
+    def stats(self) -> dict:
+        ruleset = self.ruleset
+        with self._stats_lock:
+            return {
+                "rules_path": str(self.rules_path),
+                "languages": ruleset.languages,
+                "rules_loaded": len(ruleset.rules),
+                "reloads": self.reloads,
+                "last_error": self.last_error,
+                "emails_classified": self.emails_classified,
+                "labels": dict(self.label_counts),
+                "rules": [
+                    {
+                        "id": rule.id,
+                        "label": rule.label,
+                        "language": rule.language,
+                        "hits": self.rule_hits.get(rule.id, 0),
+                        "emails": self.rule_emails.get(rule.id, 0),
+                    }
+                    for rule in ruleset.rules.values()
+                ],
+            }
+
+
+_classifier: Optional[RuleClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_rule_classifier() -> RuleClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = RuleClassifier()
+    return _classifier
@@ -0,0 +1,68 @@
+"""
+Empreintes SimHash des corps d'emails (fonctions pures, utilisables dans un
+pool de processus).
+
+Le corps normalisé (minuscules sans accents, sans citations, en-têtes de
+transfert, chiffres ni URL) est réduit à 64 bits sur ses triplets de mots :
+deux renvois du même accusé de réception, ou une copie transférée, ne
+diffèrent que de quelques bits.
+"""
+import hashlib
+import re
+from typing import List, Optional
+
+from app.nlp.rule_classifier import normalize_text
+
+# Bandes LSH (app.nlp.near_duplicates) : à distance <= MAX_DISTANCE, une bande au moins est identique
+BANDS = 4
+BAND_BITS = 16
+MAX_DISTANCE = BANDS - 1
+
+SHINGLE_SIZE = 3
+# En deçà, l'empreinte n'est pas assez discriminante (« Merci, bien reçu. »)
+MIN_TOKENS = 12
+MAX_BODY_CHARS = 10000
+
+_MASK64 = (1 << 64) - 1
+_BAND_MASK = (1 << BAND_BITS) - 1
+_URL = re.compile(r"(https?://|www\.)\S+")
+_WORD = re.compile(r"[a-z]{2,}")
+# Citations, en-têtes de message transféré ou cité, séparateurs
+_NOISE_LINE = re.compile(
+    r"^\s*(>|-{3,}|_{3,}|(de|from|a|to|cc|date|envoye|sent|objet|subject)\s*:|(le|on)\b.*(a ecrit|wrote)\s*:)"
+)
+
+
+def normalized_tokens(body: Optional[str]) -> List[str]:
+    if not body:
+        return []
+    lines = normalize_text(body[:MAX_BODY_CHARS]).splitlines()
+    text = " ".join(line for line in lines if not _NOISE_LINE.match(line))
+    return _WORD.findall(_URL.sub(" ", text))
+
+
+def fingerprint(body: Optional[str]) -> Optional[int]:
+    """
+    SimHash 64 bits (entier signé, stockable en BIGINT) du corps, None s'il est trop court
+    """
+    tokens = normalized_tokens(body)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big"), "064b")
+        for shingle in shingles
+    ]
+    # Vote par bit (colonne) : majorité des triplets
+    bits = "".join("1" if column.count("1") * 2 > len(rows) else "0" for column in zip(*rows))
+    value = int(bits, 2)
+    return value - (1 << 64) if value >> 63 else value
+
+
+def distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK64).bit_count()
+
+
+def bands(simhash: int) -> List[int]:
+    value = simhash & _MASK64
+    return [(value >> (band * BAND_BITS)) & _BAND_MASK for band in range(BANDS)]
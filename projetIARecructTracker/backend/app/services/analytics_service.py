@@ -0,0 +1,371 @@
+"""
+Analyses de l'entonnoir de recrutement servies depuis des agrégats journaliers.
+
+Les événements STATUS_CHANGE sont intégrés par lots, dans l'ordre
+(created_at, id), à partir d'un watermark : chaque lot met à jour les jalons
+des candidatures concernées et incrémente les compteurs journaliers, dans la
+même transaction que l'avancement du watermark. Les compteurs sont rattachés
+à la cohorte (jour de création de la candidature), à l'entreprise et à la source.
+
+Métriques : "applications", "stage:<STATUT>" (étape atteinte, une fois par
+candidature), "responded" (première réponse) et "response_days" (histogramme
+du délai de première réponse, en jours, dans `bucket`).
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, UPSERT_INSERTS
+from app.core.scheduler import scheduler
+from app.models.models import (
+    AnalyticsDailyRollup, AnalyticsWatermark, Application, ApplicationEvent, ApplicationMilestone
+)
+from app.models.schemas import ApplicationStatus, EventType
+
+WATERMARK = "application_events"
+JOB_ID = "analytics_rollups"
+
+# Étapes ordonnées : atteindre une étape vaut passage par les précédentes
+FUNNEL = [
+    ApplicationStatus.APPLIED.value,
+    ApplicationStatus.ACKNOWLEDGED.value,
+    ApplicationStatus.SCREENING.value,
+    ApplicationStatus.INTERVIEW.value,
+    ApplicationStatus.OFFER.value,
+]
+# Statuts valant réponse de l'entreprise
+RESPONSE_STATUSES = frozenset({
+    ApplicationStatus.ACKNOWLEDGED.value,
+    ApplicationStatus.SCREENING.value,
+    ApplicationStatus.INTERVIEW.value,
+    ApplicationStatus.OFFER.value,
+    ApplicationStatus.REJECTED.value,
+})
+ALL_STAGES = FUNNEL + [
+    ApplicationStatus.REJECTED.value,
+    ApplicationStatus.ON_HOLD.value,
+    ApplicationStatus.WITHDRAWN.value,
+]
+
+# Un événement n'est intégré qu'après ce délai : une transaction encore en cours
+# ne doit pas valider un événement antérieur au watermark. Hypothèse : aucune
+# transaction écrivant des événements ne dure plus longtemps. Les imports en
+# masse (bulk, CSV) qui la dépassent sont signalés (check_commit_lag) ; leurs
+# événements ne sont repris que par rebuild_rollups (/analytics/refresh?full=true)
+COMMIT_LAG = timedelta(seconds=60)
+
+RollupKey = Tuple[date, str, str, str, int]
+
+
+def _reached_stages(status: str) -> List[str]:
+    if status in FUNNEL:
+        return FUNNEL[:FUNNEL.index(status) + 1]
+    return [status] if status in ALL_STAGES else []
+
+
+def _percentile(histogram: Dict[int, int], fraction: float) -> Optional[int]:
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = fraction * total
+    running = 0
+    for bucket in sorted(histogram):
+        running += histogram[bucket]
+        if running >= threshold:
+            return bucket
+    return None
+
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- Intégration incrémentale des événements ---
+
+    def refresh_rollups(self, batch_size: int = None, now: datetime = None) -> dict:
+        """
+        Intégrer les événements postérieurs au watermark ; un commit par lot
+        """
+        batch_size = batch_size or settings.ANALYTICS_BATCH_SIZE
+        horizon = (now or datetime.utcnow()) - COMMIT_LAG
+        totals = {"events": 0, "batches": 0}
+
+        while True:
+            watermark = self._locked_watermark()
+            query = self.db.query(ApplicationEvent, Application)\
+                .join(Application, Application.id == ApplicationEvent.application_id)\
+                .filter(ApplicationEvent.created_at < horizon)
+            if watermark.last_created_at is not None:
+                query = query.filter(
+                    tuple_(ApplicationEvent.created_at, ApplicationEvent.id)
+                    > tuple_(watermark.last_created_at, watermark.last_event_id)
+                )
+            rows = query.order_by(ApplicationEvent.created_at, ApplicationEvent.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            self._integrate(rows)
+            last_event = rows[-1][0]
+            watermark.last_created_at = last_event.created_at
+            watermark.last_event_id = last_event.id
+            watermark.updated_at = datetime.utcnow()
+            self.db.commit()
+
+            totals["events"] += len(rows)
+            totals["batches"] += 1
+            if len(rows) < batch_size:
+                break
+        self.db.commit()
+        return totals
+
+    def rebuild_rollups(self, batch_size: int = None, now: datetime = None) -> dict:
+        """
+        Reconstruire les agrégats depuis tout l'historique : jalons et compteurs
+        vidés et watermark remis à zéro dans une même transaction, puis
+        intégration complète par lots (agrégats partiels pendant la reprise)
+        """
+        watermark = self._locked_watermark()
+        self.db.query(AnalyticsDailyRollup).delete(synchronize_session=False)
+        self.db.query(ApplicationMilestone).delete(synchronize_session=False)
+        watermark.last_created_at = None
+        watermark.last_event_id = None
+        watermark.updated_at = datetime.utcnow()
+        self.db.commit()
+        logger.info("Agrégats analytiques vidés, reconstruction complète")
+        return self.refresh_rollups(batch_size, now)
+
+    def _locked_watermark(self) -> AnalyticsWatermark:
+        """
+        Watermark verrouillé jusqu'au commit du lot (FOR UPDATE) : deux mises à
+        jour concurrentes ne peuvent pas intégrer deux fois les mêmes événements
+        """
+        query = self.db.query(AnalyticsWatermark)\
+            .filter(AnalyticsWatermark.name == WATERMARK)\
+            .with_for_update()
+        watermark = query.first()
+        if watermark is None:
+            self.db.add(AnalyticsWatermark(name=WATERMARK))
+            self.db.flush()
+            watermark = query.first()
+        return watermark
+
+    def _integrate(self, rows: List[Tuple[ApplicationEvent, Application]]):
+        application_ids = {application.id for _, application in rows}
+        milestones = {
+            milestone.application_id: milestone
+            for milestone in self.db.query(ApplicationMilestone)
+            .filter(ApplicationMilestone.application_id.in_(application_ids))
+        }
+        increments: Counter = Counter()
+
+        for event, application in rows:
+            milestone = milestones.get(application.id)
+            if milestone is None:
+                milestone = ApplicationMilestone(
+                    application_id=application.id,
+                    cohort_day=application.created_at.date(),
+                    company_name=application.company_name,
+                    source=application.source or "",
+                    applied_at=application.created_at,
+                    stages=[],
+                )
+                self.db.add(milestone)
+                milestones[application.id] = milestone
+                increments[self._key(milestone, "applications")] += 1
+
+            if event.event_type != EventType.STATUS_CHANGE.value:
+                continue
+            payload = event.payload or {}
+            new_status = payload.get("new_status")
+
+            reached = [stage for stage in _reached_stages(new_status) if stage not in milestone.stages]
+            if reached:
+                # Nouvelle liste : la modification d'une colonne JSON doit être réaffectée
+                milestone.stages = milestone.stages + reached
+                for stage in reached:
+                    increments[self._key(milestone, f"stage:{stage}")] += 1
+
+            # L'événement de création n'est pas une réponse
+            if payload.get("previous_status") and milestone.first_response_at is None and new_status in RESPONSE_STATUSES:
+                milestone.first_response_at = event.created_at
+                days = max(0, (event.created_at - milestone.applied_at).days)
+                increments[self._key(milestone, "responded")] += 1
+                increments[self._key(milestone, "response_days", days)] += 1
+
+        self._increment(increments)
+
+    @staticmethod
+    def _key(milestone: ApplicationMilestone, metric: str, bucket: int = 0) -> RollupKey:
+        return milestone.cohort_day, milestone.company_name, milestone.source, metric, bucket
+
+    def _increment(self, increments: Counter):
+        if not increments:
+            return
+        rows = [
+            {"day": day, "company_name": company, "source": source, "metric": metric, "bucket": bucket, "count": count}
+            for (day, company, source, metric, bucket), count in increments.items()
+        ]
+        dialect_insert = UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(AnalyticsDailyRollup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day", "company_name", "source", "metric", "bucket"],
+                set_={"count": AnalyticsDailyRollup.count + stmt.excluded["count"]},
+            )
+            self.db.execute(stmt, rows)
+            return
+        for row in rows:
+            key = (row["day"], row["company_name"], row["source"], row["metric"], row["bucket"])
+            existing = self.db.get(AnalyticsDailyRollup, key)
+            if existing:
+                existing.count += row["count"]
+            else:
+                self.db.add(AnalyticsDailyRollup(**row))
+
+    # --- Lecture des agrégats ---
+
+    def _rollups(self, metrics, start: date = None, end: date = None, company: str = None, source: str = None):
+        query = self.db.query(AnalyticsDailyRollup)
+        if isinstance(metrics, str):
+            query = query.filter(AnalyticsDailyRollup.metric == metrics)
+        else:
+            query = query.filter(AnalyticsDailyRollup.metric.in_(list(metrics)))
+        if start:
+            query = query.filter(AnalyticsDailyRollup.day >= start)
+        if end:
+            query = query.filter(AnalyticsDailyRollup.day <= end)
+        if company:
+            query = query.filter(AnalyticsDailyRollup.company_name == company)
+        if source is not None:
+            query = query.filter(AnalyticsDailyRollup.source == source)
+        return query
+
+    def _metric_totals(self, metrics, **filters) -> Dict[str, int]:
+        rows = self._rollups(metrics, **filters)\
+            .with_entities(AnalyticsDailyRollup.metric, func.sum(AnalyticsDailyRollup.count))\
+            .group_by(AnalyticsDailyRollup.metric)\
+            .all()
+        return {metric: int(total) for metric, total in rows}
+
+    def funnel(self, **filters) -> dict:
+        """
+        Candidatures ayant atteint chaque étape et conversion d'une étape à la suivante
+        """
+        totals = self._metric_totals(["applications"] + [f"stage:{stage}" for stage in ALL_STAGES], **filters)
+        stages = {stage: totals.get(f"stage:{stage}", 0) for stage in ALL_STAGES}
+        conversions = [
+            {
+                "from": previous,
+                "to": stage,
+                "rate": round(stages[stage] / stages[previous], 4) if stages[previous] else None,
+            }
+            for previous, stage in zip(FUNNEL, FUNNEL[1:])
+        ]
+        return {"applications": totals.get("applications", 0), "stages": stages, "conversions": conversions}
+
+    def response_time(self, **filters) -> dict:
+        """
+        Délai de première réponse (jours) : médiane et percentiles sur l'histogramme
+        """
+        totals = self._metric_totals(["applications", "responded"], **filters)
+        rows = self._rollups("response_days", **filters)\
+            .with_entities(AnalyticsDailyRollup.bucket, func.sum(AnalyticsDailyRollup.count))\
+            .group_by(AnalyticsDailyRollup.bucket)\
+            .all()
+        histogram = {int(bucket): int(count) for bucket, count in rows}
+        applications = totals.get("applications", 0)
+        responded = totals.get("responded", 0)
+        return {
+            "applications": applications,
+            "responded": responded,
+            "response_rate": round(responded / applications, 4) if applications else None,
+            "median_days": _percentile(histogram, 0.5),
+            "p75_days": _percentile(histogram, 0.75),
+            "p90_days": _percentile(histogram, 0.9),
+            "histogram": histogram,
+        }
+
+    def response_rate(self, group_by: str = "company", interval: str = "month", **filters) -> List[dict]:
+        """
+        Taux de réponse par entreprise ou source et par période de cohorte
+        """
+        group_column = AnalyticsDailyRollup.company_name if group_by == "company" else AnalyticsDailyRollup.source
+        rows = self._rollups(["applications", "responded"], **filters)\
+            .with_entities(
+                AnalyticsDailyRollup.day, group_column, AnalyticsDailyRollup.metric, func.sum(AnalyticsDailyRollup.count)
+            )\
+            .group_by(AnalyticsDailyRollup.day, group_column, AnalyticsDailyRollup.metric)\
+            .all()
+
+        series: Dict[Tuple[date, str], Counter] = {}
+        for day, key, metric, count in rows:
+            series.setdefault((self._period_start(day, interval), key), Counter())[metric] += int(count)
+        return [
+            {
+                "period": period.isoformat(),
+                group_by: key,
+                "applications": counts["applications"],
+                "responded": counts["responded"],
+                "response_rate": round(counts["responded"] / counts["applications"], 4) if counts["applications"] else None,
+            }
+            for (period, key), counts in sorted(series.items())
+        ]
+
+    @staticmethod
+    def _period_start(day: date, interval: str) -> date:
+        if interval == "week":
+            return day - timedelta(days=day.weekday())
+        if interval == "month":
+            return day.replace(day=1)
+        return day
+
+    def rollup_status(self) -> dict:
+        watermark = self.db.get(AnalyticsWatermark, WATERMARK)
+        return {
+            "last_event_at": watermark.last_created_at.isoformat() if watermark and watermark.last_created_at else None,
+            "updated_at": watermark.updated_at.isoformat() if watermark and watermark.updated_at else None,
+        }
+
+
+def check_commit_lag(started_at: datetime):
+    """
+    Après le commit d'une transaction d'événements : au-delà de COMMIT_LAG,
+    ses événements ont pu être validés derrière le watermark
+    """
+    elapsed = datetime.utcnow() - started_at
+    if elapsed >= COMMIT_LAG:
+        logger.warning(
+            f"Transaction d'événements validée après {elapsed.total_seconds():.0f} s (> {COMMIT_LAG.total_seconds():.0f} s) : "
+            "agrégats à reconstruire (/analytics/refresh?full=true)"
+        )
+
+
+def _refresh_job():
+    db = SessionLocal()
+    try:
+        result = AnalyticsService(db).refresh_rollups()
+        if result["events"]:
+            logger.info(f"Agrégats analytiques : {result['events']} événements intégrés")
+    except Exception:
+        db.rollback()
+        logger.exception("Échec de la mise à jour des agrégats analytiques")
+    finally:
+        db.close()
+
+
+def start_rollup_job():
+    """
+    Planifier l'intégration périodique des nouveaux événements
+    """
+    scheduler.add_job(
+        _refresh_job,
+        "interval",
+        minutes=settings.ANALYTICS_ROLLUP_INTERVAL_MINUTES,
+        id=JOB_ID,
+        replace_existing=True,
+    )
@@ -0,0 +1,91 @@
+"""
+Recherche plein texte classée sur les candidatures.
+
+PostgreSQL : colonne générée `search_vector` (configurations french + english,
+nom d'entreprise en 'simple') indexée en GIN, et index trigrammes pour la
+recherche approchée sur l'entreprise (migration 0002_application_search).
+SQLite : table FTS5 `applications_fts` tenue à jour par triggers (créée avec
+les tables, cf. app.models.models), pour exercer le même comportement en local.
+Autres bases : repli sur ILIKE, sans classement.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import Float, bindparam, cast, column, func, literal_column, or_, table
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Query
+
+from app.models.models import Application
+
+# Poids BM25 des colonnes de applications_fts (application_id, job_title, company_name, notes)
+FTS5_WEIGHTS = (0.0, 4.0, 4.0, 1.0)
+
+_FTS5_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+applications_fts = table("applications_fts", column("application_id"))
+
+
+def fts5_query(search_query: str) -> Optional[str]:
+    """
+    Requête FTS5 sûre : chaque mot entre guillemets, en préfixe, tous requis
+    """
+    tokens = _FTS5_TOKEN.findall(search_query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _postgres_tsquery(search_query: str):
+    configs = ("french", "english", "simple")
+    queries = [func.websearch_to_tsquery(cast(config, REGCONFIG), search_query) for config in configs]
+    tsquery = queries[0]
+    for query in queries[1:]:
+        tsquery = tsquery.op("||")(query)
+    return tsquery
+
+
+def apply_search(query: Query, search_query: str, dialect: str, ranked: bool = True) -> Query:
+    """
+    Filtrer `query` sur le texte recherché et, si `ranked`, la classer par
+    pertinence (sinon l'ordre est laissé à l'appelant, ex. pagination par curseur)
+    """
+    if dialect == "postgresql":
+        search_vector = literal_column("applications.search_vector")
+        tsquery = _postgres_tsquery(search_query)
+        fuzzy_company = Application.company_name.op("%")(search_query)
+        query = query.filter(or_(search_vector.op("@@")(tsquery), fuzzy_company))
+        if not ranked:
+            return query
+        rank = cast(func.ts_rank_cd(search_vector, tsquery), Float) + func.similarity(Application.company_name, search_query)
+        return query.order_by(rank.desc(), Application.updated_at.desc())
+
+    if dialect == "sqlite":
+        match = fts5_query(search_query)
+        if match is None:
+            return query.order_by(Application.updated_at.desc()) if ranked else query
+        query = query\
+            .join(applications_fts, applications_fts.c.application_id == Application.id)\
+            .filter(literal_column("applications_fts").op("MATCH")(bindparam("fts_query", match)))
+        if not ranked:
+            return query
+        bm25 = func.bm25(literal_column("applications_fts"), *FTS5_WEIGHTS)
+        return query.order_by(bm25, Application.updated_at.desc())
+
+    pattern = f"%{search_query}%"
+    query = query.filter(or_(
+        Application.job_title.ilike(pattern),
+        Application.company_name.ilike(pattern),
+        Application.notes.ilike(pattern),
+    ))
+    return query.order_by(Application.updated_at.desc()) if ranked else query
+
+
+def company_filter(company: str, dialect: str):
+    """
+    Filtre entreprise : sous-chaîne (accélérée par l'index trigrammes sous
+    PostgreSQL) ou nom approchant
+    """
+    condition = Application.company_name.ilike(f"%{company}%")
+    if dialect == "postgresql":
+        condition = or_(condition, Application.company_name.op("%")(company))
+    return condition
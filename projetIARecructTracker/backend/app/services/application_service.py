@@ -1,14 +1,41 @@
+import csv
+import io
+from pydantic import ValidationError
+from sqlalchemy import and_, func, insert, update
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from uuid import UUID
-from app.models.models import Application, ApplicationEvent
+from typing import Any, BinaryIO, List, Optional, Tuple
+from uuid import UUID, uuid4
+from app.connectors.base import chunked
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Application, ApplicationEvent, Email
+from app.nlp.application_matcher import get_application_matcher
+from app.services.analytics_service import check_commit_lag
+from app.services.application_search import apply_search, company_filter
+from app.services.application_stats import application_stats
+from app.services.reminder_engine import reminder_engine
+from app.services.pagination import KeysetPage, keyset_condition, keyset_order, keyset_page, keyset_paginate
 from app.models.schemas import (
     ApplicationCreate, ApplicationUpdate, ApplicationStatus,
     ApplicationEventCreate, EventType
 )
 from datetime import datetime, timedelta
 
+# Lignes par INSERT / UPDATE multi-lignes, identifiants par clause IN
+BULK_BATCH_SIZE = 500
+
+# Import CSV : colonnes reconnues et obligatoires
+CSV_COLUMNS = frozenset(ApplicationCreate.model_fields)
+CSV_REQUIRED_COLUMNS = frozenset({"job_title", "company_name"})
+CSV_SNIFF_BYTES = 4096
+
+# Vue détaillée : événements récents (suite par curseur) et emails liés résumés
+DETAIL_EVENTS_LIMIT = 20
+DETAIL_EMAILS_LIMIT = 20
+EMAIL_SUMMARY_COLUMNS = (
+    Email.id, Email.subject, Email.sender, Email.sent_at,
+    Email.snippet, Email.classification, Email.created_at,
+)
+
 
 class ApplicationService:
     def __init__(self, db: Session):
@@ -25,22 +52,46 @@ class ApplicationService:
         """
         Récupérer les candidatures avec filtres optionnels
         """
+        query = self._filter_applications(status, company, search_query, ranked=True)
+        if not (search_query and search_query.strip()):
+            query = query.order_by(Application.updated_at.desc())
+        
+        return query.offset(skip).limit(limit).all()
+
+    def get_applications_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        company: Optional[str] = None,
+        search_query: Optional[str] = None
+    ) -> KeysetPage:
+        """
+        Page de candidatures par curseur sur (updated_at, id), plus récentes d'abord
+        """
+        query = self._filter_applications(status, company, search_query, ranked=False)
+        return keyset_paginate(query, Application.updated_at, Application.id, limit, cursor)
+
+    def _filter_applications(
+        self,
+        status: Optional[str],
+        company: Optional[str],
+        search_query: Optional[str],
+        ranked: bool
+    ):
         query = self.db.query(Application)
+        dialect = self.db.get_bind().dialect.name
         
         if status:
             query = query.filter(Application.status == status)
         
         if company:
-            query = query.filter(Application.company_name.ilike(f"%{company}%"))
+            query = query.filter(company_filter(company, dialect))
             
-        if search_query:
-            query = query.filter(
-                (Application.job_title.ilike(f"%{search_query}%")) |
-                (Application.company_name.ilike(f"%{search_query}%")) |
-                (Application.notes.ilike(f"%{search_query}%"))
-            )
-        
-        return query.order_by(Application.updated_at.desc()).offset(skip).limit(limit).all()
+        if search_query and search_query.strip():
+            # Index plein texte ; classement par pertinence si `ranked`
+            query = apply_search(query, search_query.strip(), dialect, ranked=ranked)
+        return query
 
     def create_application(self, application: ApplicationCreate) -> Application:
         """
@@ -49,40 +100,64 @@ class ApplicationService:
         # Définir la prochaine action par défaut (7 jours après la candidature)
         next_action_at = application.next_action_at or (datetime.utcnow() + timedelta(days=7))
         
-        db_application = Application(
-            job_title=application.job_title,
-            company_name=application.company_name,
-            source=application.source,
-            location=application.location,
-            status=application.status,
-            notes=application.notes,
-            next_action_at=next_action_at
-        )
-        
-        self.db.add(db_application)
-        self.db.commit()
-        self.db.refresh(db_application)
-        
-        # Créer un événement pour la création
-        self._create_event(
-            db_application.id,
-            EventType.STATUS_CHANGE,
-            {
-                "previous_status": None,
-                "new_status": application.status.value,
-                "action": "application_created"
-            }
-        )
+        # Identifiant attribué côté client : candidature et événement partent dans le même flush
+        with UnitOfWork(self.db) as uow:
+            db_application = Application(
+                id=uuid4(),
+                job_title=application.job_title,
+                company_name=application.company_name,
+                source=application.source,
+                location=application.location,
+                status=application.status.value,
+                notes=application.notes,
+                next_action_at=next_action_at
+            )
+            self.db.add(db_application)
+            
+            # Créer un événement pour la création
+            self._create_event(
+                db_application.id,
+                EventType.STATUS_CHANGE,
+                {
+                    "previous_status": None,
+                    "new_status": application.status.value,
+                    "action": "application_created"
+                }
+            )
+            uow.after_commit(self._indexer([(
+                db_application.id, application.company_name, application.job_title,
+                application.status.value, next_action_at
+            )]))
         
         return db_application
 
-    def get_application_full(self, application_id: UUID):
+    def get_application_full(
+        self,
+        application_id: UUID,
+        events_limit: int = DETAIL_EVENTS_LIMIT,
+        emails_limit: int = DETAIL_EMAILS_LIMIT
+    ) -> Optional[dict]:
         """
-        Récupérer une candidature avec ses événements et emails
+        Candidature avec ses derniers événements (curseur vers les plus anciens)
+        et le résumé de ses emails liés, en deux requêtes quel que soit l'historique
         """
-        return self.db.query(Application)\
-            .filter(Application.id == application_id)\
-            .first()
+        application, timeline = self._event_timeline(application_id, Application, events_limit)
+        if application is None:
+            return None
+        
+        emails = self.db.query(*EMAIL_SUMMARY_COLUMNS, func.count().over().label("total"))\
+            .filter(Email.application_id == application_id)\
+            .order_by(Email.sent_at.desc().nulls_last(), Email.id.desc())\
+            .limit(emails_limit)\
+            .all()
+        
+        return {
+            **{column.key: getattr(application, column.key) for column in Application.__table__.columns},
+            "events": timeline.items,
+            "events_next_cursor": timeline.next_cursor,
+            "emails": emails,
+            "emails_total": emails[0].total if emails else 0,
+        }
 
     def update_application(self, application_id: UUID, application_update: ApplicationUpdate):
         """
@@ -96,26 +171,32 @@ class ApplicationService:
             return None
         
         update_data = application_update.model_dump(exclude_unset=True)
+        if update_data.get("status") is not None:
+            update_data["status"] = update_data["status"].value
         previous_status = db_application.status
         
-        for field, value in update_data.items():
-            setattr(db_application, field, value)
-        
-        db_application.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_application)
-        
-        # Créer un événement si le statut a changé
-        if "status" in update_data and previous_status != db_application.status:
-            self._create_event(
-                application_id,
-                EventType.STATUS_CHANGE,
-                {
-                    "previous_status": previous_status,
-                    "new_status": db_application.status,
-                    "action": "status_updated"
-                }
-            )
+        with UnitOfWork(self.db) as uow:
+            for field, value in update_data.items():
+                setattr(db_application, field, value)
+            
+            db_application.updated_at = datetime.utcnow()
+            
+            # Créer un événement si le statut a changé (même transaction)
+            if "status" in update_data and previous_status != db_application.status:
+                self._create_event(
+                    application_id,
+                    EventType.STATUS_CHANGE,
+                    {
+                        "previous_status": previous_status,
+                        "new_status": db_application.status,
+                        "action": "status_updated"
+                    }
+                )
+            uow.after_commit(self._indexer(
+                [(application_id, db_application.company_name, db_application.job_title,
+                  db_application.status, db_application.next_action_at)],
+                reindex="company_name" in update_data or "job_title" in update_data
+            ))
         
         return db_application
 
@@ -130,65 +211,237 @@ class ApplicationService:
         if not db_application:
             return False
         
-        self.db.delete(db_application)
-        self.db.commit()
+        with UnitOfWork(self.db) as uow:
+            self.db.delete(db_application)
+            uow.after_commit(lambda: get_application_matcher().remove(application_id))
+            uow.after_commit(lambda: application_stats.on_delete(application_id))
+            uow.after_commit(lambda: reminder_engine.on_delete(application_id))
         return True
 
-    def get_application_events(self, application_id: UUID):
+    def get_application_events(
+        self, application_id: UUID, limit: Optional[int] = None, cursor: Optional[str] = None
+    ):
         """
-        Récupérer les événements d'une candidature
+        Récupérer les événements d'une candidature (tous, ou une page par
+        curseur si `limit` est donné) ; None si la candidature n'existe pas
         """
-        # Vérifier que la candidature existe
-        application = self.db.query(Application)\
-            .filter(Application.id == application_id)\
-            .first()
-        
-        if not application:
+        head, timeline = self._event_timeline(application_id, Application.id, limit, cursor)
+        if head is None:
             return None
         
-        events = self.db.query(ApplicationEvent)\
-            .filter(ApplicationEvent.application_id == application_id)\
-            .order_by(ApplicationEvent.created_at.desc())\
-            .all()
-        
-        return [
+        events = [
             {
                 "id": event.id,
                 "event_type": event.event_type,
                 "payload": event.payload,
                 "created_at": event.created_at
             }
-            for event in events
+            for event in timeline.items
         ]
+        if limit is None:
+            return events
+        return KeysetPage(items=events, next_cursor=timeline.next_cursor, prev_cursor=timeline.prev_cursor)
+
+    def _event_timeline(
+        self, application_id: UUID, head, limit: Optional[int], cursor: Optional[str] = None
+    ) -> Tuple[Any, KeysetPage]:
+        """
+        Candidature (`head` : entité ou colonne) et événements en une seule
+        instruction : jointure externe dont la condition porte le curseur, pour
+        garder la ligne de la candidature même sans événement. (None, None) si
+        la candidature n'existe pas
+        """
+        condition, direction = keyset_condition(ApplicationEvent.created_at, ApplicationEvent.id, cursor)
+        on_clause = ApplicationEvent.application_id == Application.id
+        if condition is not None:
+            on_clause = and_(on_clause, condition)
+        
+        query = self.db.query(head, ApplicationEvent)\
+            .select_from(Application)\
+            .outerjoin(ApplicationEvent, on_clause)\
+            .filter(Application.id == application_id)\
+            .order_by(*keyset_order(ApplicationEvent.created_at, ApplicationEvent.id, direction))
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = query.all()
+        if not rows:
+            return None, None
+        
+        events = [event for _, event in rows if event is not None]
+        if limit is None:
+            return rows[0][0], KeysetPage(items=events)
+        return rows[0][0], keyset_page(
+            events, ApplicationEvent.created_at, ApplicationEvent.id, limit, cursor, direction
+        )
 
     def get_applications_summary(self):
         """
-        Récupérer un résumé statistique des candidatures
+        Récupérer un résumé statistique des candidatures (compteurs tenus à
+        jour en mémoire, sans agrégat en base)
+        """
+        application_stats.ensure_loaded(self.db)
+        return application_stats.summary()
+
+    def bulk_create_applications(
+        self, applications: List[ApplicationCreate], batch_size: int = BULK_BATCH_SIZE
+    ) -> List[UUID]:
         """
-        # Comptage par statut
-        status_counts = self.db.query(
-            Application.status,
-            func.count(Application.id).label('count')
-        ).group_by(Application.status).all()
+        Créer des candidatures en masse : INSERT multi-lignes des candidatures
+        puis de leurs événements de création, dans une seule transaction
+        """
+        now = datetime.utcnow()
+        default_next_action = now + timedelta(days=7)
+        rows = [
+            {
+                "id": uuid4(),
+                "job_title": application.job_title,
+                "company_name": application.company_name,
+                "source": application.source,
+                "location": application.location,
+                "status": application.status.value,
+                "notes": application.notes,
+                "next_action_at": application.next_action_at or default_next_action,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for application in applications
+        ]
+        events = [
+            self._event_row(row["id"], EventType.STATUS_CHANGE, {
+                "previous_status": None,
+                "new_status": row["status"],
+                "action": "application_created"
+            }, now)
+            for row in rows
+        ]
         
-        # Total des candidatures
-        total = self.db.query(func.count(Application.id)).scalar()
+        with UnitOfWork(self.db) as uow:
+            for batch in chunked(rows, batch_size):
+                self.db.execute(insert(Application), batch)
+            for batch in chunked(events, batch_size):
+                self.db.execute(insert(ApplicationEvent), batch)
+            uow.after_commit(self._indexer([
+                (row["id"], row["company_name"], row["job_title"], row["status"], row["next_action_at"])
+                for row in rows
+            ]))
+            uow.after_commit(lambda: check_commit_lag(now))
+        return [row["id"] for row in rows]
+
+    def bulk_update_status(
+        self, application_ids: List[UUID], status: ApplicationStatus, batch_size: int = BULK_BATCH_SIZE
+    ) -> dict:
+        """
+        Changer le statut de candidatures en masse : lecture des statuts
+        actuels par lots (verrouillés sous PostgreSQL), UPDATE par clé primaire
+        et événements des seules candidatures modifiées, dans une seule transaction
+        """
+        new_status = status.value
+        now = datetime.utcnow()
+        ids = list(dict.fromkeys(application_ids))
+        found = 0
+        changed: List[tuple] = []
         
-        # Candidatures avec prochaine action en retard
-        overdue_count = self.db.query(func.count(Application.id))\
-            .filter(Application.next_action_at < datetime.utcnow())\
-            .filter(Application.status.in_(['APPLIED', 'ACKNOWLEDGED', 'SCREENING']))\
-            .scalar()
+        with UnitOfWork(self.db) as uow:
+            for batch in chunked(ids, batch_size):
+                rows = self.db.query(Application.id, Application.status, Application.next_action_at)\
+                    .filter(Application.id.in_(batch))\
+                    .with_for_update()\
+                    .all()
+                found += len(rows)
+                rows = [row for row in rows if row.status != new_status]
+                if not rows:
+                    continue
+                self.db.execute(update(Application), [
+                    {"id": row.id, "status": new_status, "updated_at": now} for row in rows
+                ])
+                self.db.execute(insert(ApplicationEvent), [
+                    self._event_row(row.id, EventType.STATUS_CHANGE, {
+                        "previous_status": row.status,
+                        "new_status": new_status,
+                        "action": "status_updated"
+                    }, now)
+                    for row in rows
+                ])
+                changed.extend((row.id, None, None, new_status, row.next_action_at) for row in rows)
+            uow.after_commit(self._indexer(changed, reindex=False))
+            uow.after_commit(lambda: check_commit_lag(now))
+        
+        return {
+            "updated": len(changed),
+            "unchanged": found - len(changed),
+            "not_found": len(ids) - found,
+        }
+
+    def import_csv(self, file: BinaryIO, batch_size: int = BULK_BATCH_SIZE) -> dict:
+        """
+        Importer des candidatures depuis un CSV (colonnes de ApplicationCreate,
+        séparateur , ; ou tabulation) : lignes invalides signalées, lignes
+        valides créées en masse dans une seule transaction
+        """
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            sample = text.read(CSV_SNIFF_BYTES)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(text, dialect=dialect)
+            columns = {(name or "").strip() for name in reader.fieldnames or []}
+            missing = CSV_REQUIRED_COLUMNS - columns
+            if missing:
+                raise ValueError(f"Colonnes manquantes dans le CSV : {', '.join(sorted(missing))}")
+            
+            applications: List[ApplicationCreate] = []
+            errors: List[dict] = []
+            for record in reader:
+                values = {
+                    key.strip(): value.strip()
+                    for key, value in record.items()
+                    if key and key.strip() in CSV_COLUMNS and isinstance(value, str) and value.strip()
+                }
+                if "status" in values:
+                    values["status"] = values["status"].upper()
+                try:
+                    applications.append(ApplicationCreate.model_validate(values))
+                except ValidationError as e:
+                    errors.append({
+                        "line": reader.line_num,
+                        "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                    })
+        finally:
+            text.detach()
         
+        ids = self.bulk_create_applications(applications, batch_size) if applications else []
+        return {"imported": len(ids), "ids": ids, "errors": errors}
+
+    def _indexer(self, entries: List[tuple], reindex: bool = True):
+        """
+        Action post-commit : index de rapprochement, statistiques en mémoire et rappels
+        pour des (id, entreprise, intitulé, statut, prochaine action)
+        """
+        def apply():
+            matcher = get_application_matcher()
+            for application_id, company_name, job_title, status, next_action_at in entries:
+                if reindex:
+                    matcher.upsert(application_id, company_name, job_title)
+                application_stats.on_upsert(application_id, status, next_action_at)
+                reminder_engine.on_upsert(application_id, status, next_action_at)
+        return apply
+
+    @staticmethod
+    def _event_row(application_id: UUID, event_type: EventType, payload: dict, created_at: datetime) -> dict:
         return {
-            "total": total,
-            "status_breakdown": {status: count for status, count in status_counts},
-            "overdue_actions": overdue_count
+            "id": uuid4(),
+            "application_id": application_id,
+            "event_type": event_type.value,
+            "payload": payload,
+            "created_at": created_at,
         }
 
     def _create_event(self, application_id: UUID, event_type: EventType, payload: dict):
         """
-        Créer un événement pour une candidature
+        Ajouter un événement à la transaction en cours (validé avec la candidature)
         """
         event = ApplicationEvent(
             application_id=application_id,
@@ -196,4 +449,3 @@ class ApplicationService:
             payload=payload
         )
         self.db.add(event)
-        self.db.commit()
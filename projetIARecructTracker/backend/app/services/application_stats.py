@@ -0,0 +1,175 @@
+"""
+Statistiques des candidatures tenues à jour en mémoire.
+
+Compteurs par statut et échéances triées des candidatures en attente,
+mis à jour à chaque création / modification / suppression : le résumé se lit
+sans requête (retard = recherche dichotomique sur les échéances). Une
+réconciliation périodique avec la base corrige la dérive (écritures faites
+par un autre processus, modifications hors service).
+"""
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.scheduler import scheduler
+from app.models.models import Application
+
+# Statuts pour lesquels une prochaine action dépassée compte comme retard
+OVERDUE_STATUSES = frozenset({"APPLIED", "ACKNOWLEDGED", "SCREENING"})
+
+JOB_ID = "application_stats_reconciliation"
+
+Entry = Tuple[str, Optional[datetime]]
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status)
+
+
+class ApplicationStats:
+    """
+    Compteurs par statut et liste triée des échéances (next_action_at, id)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[UUID, Entry] = {}
+        self._status_counts: Counter = Counter()
+        self._due: List[Tuple[datetime, UUID]] = []
+        # Écritures reçues pendant chaque réconciliation en cours (elles peuvent
+        # se chevaucher : requêtes concurrentes), rejouées sur le nouvel état
+        self._journals: List[List[Tuple[UUID, Optional[Entry]]]] = []
+        self.loaded = False
+        self.reconciliations = 0
+        self.drift_corrections = 0
+        self.last_reconciled_at: Optional[datetime] = None
+
+    # --- Événements d'écriture ---
+
+    def on_upsert(self, application_id: UUID, status, next_action_at: Optional[datetime]):
+        entry = (_status_value(status), next_action_at)
+        with self._lock:
+            for journal in self._journals:
+                journal.append((application_id, entry))
+            self._apply(application_id, entry)
+
+    def on_delete(self, application_id: UUID):
+        with self._lock:
+            for journal in self._journals:
+                journal.append((application_id, None))
+            self._apply(application_id, None)
+
+    def _apply(self, application_id: UUID, entry: Optional[Entry]):
+        previous = self._entries.pop(application_id, None)
+        if previous is not None:
+            self._status_counts[previous[0]] -= 1
+            if not self._status_counts[previous[0]]:
+                del self._status_counts[previous[0]]
+            if previous[0] in OVERDUE_STATUSES and previous[1] is not None:
+                index = bisect.bisect_left(self._due, (previous[1], application_id))
+                if index < len(self._due) and self._due[index] == (previous[1], application_id):
+                    del self._due[index]
+        if entry is None:
+            return
+        self._entries[application_id] = entry
+        self._status_counts[entry[0]] += 1
+        if entry[0] in OVERDUE_STATUSES and entry[1] is not None:
+            bisect.insort(self._due, (entry[1], application_id))
+
+    # --- Lecture ---
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            self.reconcile(db)
+
+    def summary(self, now: datetime = None) -> dict:
+        """
+        Résumé sans requête : total, répartition par statut, actions en retard
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            return {
+                "total": len(self._entries),
+                "status_breakdown": dict(self._status_counts),
+                "overdue_actions": bisect.bisect_left(self._due, (now,)),
+            }
+
+    # --- Réconciliation ---
+
+    def reconcile(self, db: Session) -> dict:
+        """
+        Recharger l'état depuis la base ; retourne les écarts corrigés
+        """
+        journal: List[Tuple[UUID, Optional[Entry]]] = []
+        with self._lock:
+            self._journals.append(journal)
+        try:
+            rows = db.query(Application.id, Application.status, Application.next_action_at).all()
+        except Exception:
+            with self._lock:
+                self._journals.remove(journal)
+            raise
+
+        with self._lock:
+            before = dict(self._status_counts), len(self._due)
+            self._journals.remove(journal)
+            self._entries, self._status_counts, self._due = {}, Counter(), []
+            for row in rows:
+                self._apply(row.id, (row.status, row.next_action_at))
+            for application_id, entry in journal:
+                self._apply(application_id, entry)
+
+            drift = {
+                status: self._status_counts.get(status, 0) - before[0].get(status, 0)
+                for status in set(before[0]) | set(self._status_counts)
+                if self._status_counts.get(status, 0) != before[0].get(status, 0)
+            }
+            if len(self._due) != before[1]:
+                drift["pending_actions"] = len(self._due) - before[1]
+            if self.loaded and drift:
+                self.drift_corrections += 1
+                logger.warning(f"Statistiques des candidatures corrigées : {drift}")
+            self.loaded = True
+            self.reconciliations += 1
+            self.last_reconciled_at = datetime.utcnow()
+        return drift
+
+    def _reconcile_job(self):
+        db = SessionLocal()
+        try:
+            self.reconcile(db)
+        except Exception:
+            logger.exception("Échec de la réconciliation des statistiques")
+        finally:
+            db.close()
+
+    def start(self):
+        """
+        Planifier la réconciliation périodique avec la base
+        """
+        scheduler.add_job(
+            self._reconcile_job,
+            "interval",
+            minutes=settings.STATS_RECONCILE_INTERVAL_MINUTES,
+            id=JOB_ID,
+            replace_existing=True,
+        )
+
+    def status(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "reconciliations": self.reconciliations,
+            "drift_corrections": self.drift_corrections,
+            "last_reconciled_at": self.last_reconciled_at.isoformat() if self.last_reconciled_at else None,
+        }
+
+
+application_stats = ApplicationStats()
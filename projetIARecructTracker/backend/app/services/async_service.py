@@ -0,0 +1,34 @@
+"""
+Exécution asynchrone des services.
+
+Les services (ApplicationService, EmailService, ...) sont écrits sur une
+Session synchrone, partagée avec les tâches planifiées et les imports. Dans
+les endpoints asynchrones, AsyncService les exécute sur une AsyncSession via
+`run_sync` : chaque requête SQL est attendue sur la boucle d'événements
+(psycopg async), sans occuper de thread du pool de FastAPI.
+
+    applications = await AsyncService(db, ApplicationService).get_applications(limit=20)
+"""
+from typing import Any, Callable, Generic, Type, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ServiceT = TypeVar("ServiceT")
+
+
+class AsyncService(Generic[ServiceT]):
+    def __init__(self, db: AsyncSession, service_class: Type[ServiceT]):
+        self.db = db
+        self.service_class = service_class
+
+    async def run(self, fn: Callable[[ServiceT], Any]) -> Any:
+        """
+        Exécuter `fn(service)` dans la session ; y sérialiser le résultat s'il
+        faut charger des relations (pas de chargement paresseux hors session)
+        """
+        return await self.db.run_sync(lambda session: fn(self.service_class(session)))
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            return await self.run(lambda service: getattr(service, name)(*args, **kwargs))
+        return call
@@ -0,0 +1,77 @@
+"""
+Contenu brut des emails, compressé hors de la table principale.
+
+En-têtes et corps sont compressés en zstd dans email_contents (une ligne par
+email) : la table emails ne garde que les colonnes affichées dans les listes,
+dont la taille et le coût de lecture ne dépendent plus du volume des messages.
+Le contenu n'est lu et décompressé qu'à la demande (vue détaillée,
+classification, rapprochement), par lots d'identifiants.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import zstandard
+from sqlalchemy.orm import Session
+
+from app.connectors.base import chunked
+from app.models.models import EmailContent
+
+CODEC = "zstd"
+COMPRESSION_LEVEL = 3
+
+# Identifiants par clause IN
+LOAD_BATCH_SIZE = 500
+
+
+def _pack(compressor: zstandard.ZstdCompressor, text: Optional[str]) -> Optional[bytes]:
+    return None if text is None else compressor.compress(text.encode("utf-8"))
+
+
+def unpack(blob: Optional[bytes], codec: str = CODEC) -> Optional[str]:
+    if blob is None:
+        return None
+    if codec != CODEC:
+        raise ValueError(f"Codec de contenu inconnu : {codec}")
+    return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+
+
+def content_rows(items: Iterable[Tuple[UUID, Optional[str], Optional[str]]]) -> List[dict]:
+    """
+    Lignes email_contents pour des (email_id, en-têtes, corps) ; rien pour un email sans contenu
+    """
+    compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+    rows = []
+    for email_id, raw_headers, raw_body in items:
+        if raw_headers is None and raw_body is None:
+            continue
+        rows.append({
+            "email_id": email_id,
+            "codec": CODEC,
+            "raw_headers": _pack(compressor, raw_headers),
+            "raw_body": _pack(compressor, raw_body),
+            "raw_size": len((raw_headers or "").encode("utf-8")) + len((raw_body or "").encode("utf-8")),
+        })
+    return rows
+
+
+def load_bodies(db: Session, email_ids: Iterable[UUID]) -> Dict[UUID, str]:
+    """
+    Corps décompressés des emails donnés (absents du résultat s'ils n'en ont pas)
+    """
+    bodies: Dict[UUID, str] = {}
+    for batch in chunked(set(email_ids), LOAD_BATCH_SIZE):
+        rows = db.query(EmailContent.email_id, EmailContent.codec, EmailContent.raw_body)\
+            .filter(EmailContent.email_id.in_(batch), EmailContent.raw_body.isnot(None))\
+            .all()
+        bodies.update({row.email_id: unpack(row.raw_body, row.codec) for row in rows})
+    return bodies
+
+
+def load_content(db: Session, email_id: UUID) -> Dict[str, Optional[str]]:
+    """
+    En-têtes et corps d'un email (vue détaillée)
+    """
+    row = db.query(EmailContent).filter(EmailContent.email_id == email_id).first()
+    if row is None:
+        return {"raw_headers": None, "raw_body": None}
+    return {"raw_headers": unpack(row.raw_headers, row.codec), "raw_body": unpack(row.raw_body, row.codec)}
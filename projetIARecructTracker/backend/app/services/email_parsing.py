@@ -0,0 +1,196 @@
+"""
+Analyse MIME des emails en une seule passe (en-têtes, corps texte, extrait).
+
+Fonctions de module sans état : utilisables telles quelles dans un pool de processus.
+"""
+import email
+import html
+import re
+from datetime import datetime, timezone
+from email.header import decode_header
+from email.utils import parsedate_to_datetime
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from app.nlp.simhash import fingerprint
+
+SNIPPET_LENGTH = 200
+
+# Lignes "From " échappées dans le corps (formats mboxo / mboxrd)
+_ESCAPED_FROM = re.compile(rb"^>+From ")
+
+_HTML_DROP = re.compile(r"<(script|style|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r"<\s*(br|/p|/div|/li|/tr|/h\d)\b[^>]*>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+# Identifiants <...> des en-têtes Message-ID / In-Reply-To / References
+_MESSAGE_ID = re.compile(r"<([^<>\s]+)>")
+
+
+def _decode_bytes(data: bytes, charset: Optional[str]) -> str:
+    if charset and charset != "unknown-8bit":
+        try:
+            return data.decode(charset, errors="replace")
+        except LookupError:
+            pass
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def decode_header_value(value) -> Optional[str]:
+    """
+    En-tête décodé (RFC 2047 ou octets 8 bits bruts) en texte
+    """
+    if value is None:
+        return None
+    chunks = decode_header(value)
+    return "".join(
+        _decode_bytes(chunk, charset) if isinstance(chunk, bytes) else chunk
+        for chunk, charset in chunks
+    )
+
+
+def parse_date(value) -> Optional[datetime]:
+    """
+    Date d'envoi (en-tête Date) en UTC naïf, None si absente ou illisible
+    """
+    if not value:
+        return None
+    try:
+        sent_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if sent_at.tzinfo is not None:
+        sent_at = sent_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return sent_at
+
+
+def normalize_message_id(value: Optional[str]) -> Optional[str]:
+    """
+    Message-ID sans chevrons ni espaces (clé de regroupement en fils)
+    """
+    if not value:
+        return None
+    match = _MESSAGE_ID.search(value)
+    normalized = match.group(1) if match else value.strip()
+    return normalized or None
+
+
+def referenced_ids(in_reply_to: Optional[str], references: Optional[str]) -> List[str]:
+    """
+    Message-ID cités par In-Reply-To et References, sans doublon, dans l'ordre
+    """
+    ids: List[str] = []
+    for value in (references, in_reply_to):
+        for message_id in _MESSAGE_ID.findall(value or ""):
+            if message_id not in ids:
+                ids.append(message_id)
+    return ids
+
+
+def html_to_text(markup: str) -> str:
+    """
+    Texte lisible d'un corps HTML (repli quand il n'y a pas de partie text/plain)
+    """
+    text = _HTML_DROP.sub("", markup)
+    text = _HTML_BREAK.sub("\n", text)
+    text = html.unescape(_HTML_TAG.sub("", text))
+    text = _SPACES.sub(" ", text)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def _decode_part(part) -> str:
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        # Charset inconnu de Python : latin-1 n'échoue jamais
+        return payload.decode("latin-1")
+
+
+def extract_text(msg) -> Tuple[str, str]:
+    """
+    Corps texte (text/plain, sinon HTML converti) et extrait, en un seul parcours
+    """
+    html_part = None
+    body = None
+    for part in msg.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        content_type = part.get_content_type()
+        if content_type == "text/plain":
+            body = _decode_part(part)
+            break
+        if content_type == "text/html" and html_part is None:
+            html_part = part
+
+    if body is None:
+        body = html_to_text(_decode_part(html_part)) if html_part is not None else ""
+
+    snippet = body.strip()[:SNIPPET_LENGTH]
+    if len(body) > SNIPPET_LENGTH:
+        snippet += "..."
+    return body, snippet
+
+
+def message_fields(msg) -> dict:
+    """
+    Champs d'un EmailCreate à partir d'un message déjà parsé (politique compat32,
+    nettement plus rapide que policy.default sur de gros volumes)
+    """
+    to, cc = decode_header_value(msg.get("To")), decode_header_value(msg.get("Cc"))
+    body, snippet = extract_text(msg)
+    return {
+        "external_id": decode_header_value(msg.get("Message-ID")),
+        "subject": decode_header_value(msg.get("Subject")),
+        "sender": decode_header_value(msg.get("From")),
+        "recipients": [to] if to else [],
+        "cc": [cc] if cc else [],
+        "sent_at": parse_date(msg.get("Date")),
+        "references": referenced_ids(
+            decode_header_value(msg.get("In-Reply-To")), decode_header_value(msg.get("References"))
+        ),
+        "raw_headers": "\n".join(f"{name}: {decode_header_value(value)}" for name, value in msg.items()),
+        "raw_body": body,
+        "snippet": snippet,
+        "simhash": fingerprint(body),
+    }
+
+
+def parse_raw_emails(raws: List[bytes]) -> List[dict]:
+    """
+    Analyser un lot de messages bruts (exécuté dans un processus du pool) ;
+    un message illisible donne {"error": ...} au lieu d'interrompre le lot
+    """
+    results = []
+    for raw in raws:
+        try:
+            msg = email.message_from_bytes(raw)
+            if not msg.keys():
+                raise ValueError("Aucun en-tête email trouvé")
+            results.append(message_fields(msg))
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def iter_mbox_messages(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Découper une archive mbox ligne à ligne, sans la charger en mémoire
+    """
+    lines: List[bytes] = []
+    for line in stream:
+        if line.startswith(b"From "):
+            if lines:
+                yield b"".join(lines)
+            lines = []
+            continue
+        if _ESCAPED_FROM.match(line):
+            line = line[1:]
+        lines.append(line)
+    if lines:
+        yield b"".join(lines)
@@ -1,18 +1,74 @@
+from sqlalchemy import insert, or_, update
 from sqlalchemy.orm import Session
-from typing import List
-from uuid import UUID
-from app.models.models import Email
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+from app.connectors.base import chunked
+from app.core.config import settings
+from app.core.database import UPSERT_INSERTS
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Email, EmailContent
 from app.models.schemas import EmailCreate
+from app.nlp.application_matcher import get_application_matcher
+from app.nlp.entity_extractor import get_entity_extractor
+from app.nlp.model_classifier import get_model_classifier, training_text
+from app.nlp.near_duplicates import get_near_duplicate_index
+from app.nlp.simhash import fingerprint
+from app.nlp.rule_classifier import get_rule_classifier
+from app.services.email_content import content_rows, load_bodies, load_content, unpack
+from app.services.email_parsing import message_fields, referenced_ids
+from app.services.email_threading import assign_threads, propagate_application, thread_applications
+from app.services.pagination import KeysetPage, keyset_paginate
+from app.services.task_queue import TaskQueue
 from fastapi import UploadFile
 import email
-from email.parser import Parser
+import time
+
+# Lignes par INSERT multi-valeurs / identifiants par clause IN
+BULK_BATCH_SIZE = 500
+
+# Champs d'EmailCreate stockés compressés dans email_contents
+RAW_FIELDS = {"raw_headers", "raw_body"}
+# Champs d'EmailCreate hors de la table emails
+EXCLUDED_FIELDS = RAW_FIELDS | {"references"}
+
+
+def _body(row) -> Optional[str]:
+    """
+    Corps décompressé d'une ligne jointe à email_contents, sinon l'extrait
+    """
+    return unpack(row.raw_body, row.codec) if row.raw_body is not None else row.snippet
+
+
+def _references(raw_headers: Optional[str]) -> List[str]:
+    """
+    Message-ID cités par les en-têtes stockés ("Nom: valeur" par ligne)
+    """
+    values = {"in-reply-to": None, "references": None}
+    for line in (raw_headers or "").splitlines():
+        name, _, value = line.partition(":")
+        if name.strip().lower() in values:
+            values[name.strip().lower()] = value
+    return referenced_ids(values["in-reply-to"], values["references"])
+
+
+def _copy_from_original(email_data: EmailCreate, original):
+    """
+    Reprendre la classification et la candidature de l'original (sans écraser celles fournies)
+    """
+    if not email_data.classification and original.classification:
+        email_data.classification = original.classification
+        email_data.classification_source = original.classification_source
+    if not email_data.application_id and original.application_id:
+        email_data.application_id = original.application_id
 
 
 class EmailService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_emails(self, skip: int = 0, limit: int = 50, unlinked_only: bool = False) -> List[Email]:
+    def get_emails(
+        self, skip: int = 0, limit: int = 50, unlinked_only: bool = False, include_duplicates: bool = True
+    ) -> List[Email]:
         """
         Récupérer les emails avec option de filtrage
         """
@@ -20,110 +76,518 @@ class EmailService:
         
         if unlinked_only:
             query = query.filter(Email.application_id.is_(None))
+        if not include_duplicates:
+            query = query.filter(Email.duplicate_of.is_(None))
         
         return query.order_by(Email.created_at.desc()).offset(skip).limit(limit).all()
 
+    def get_emails_page(
+        self, limit: int = 50, cursor: Optional[str] = None, unlinked_only: bool = False, include_duplicates: bool = True
+    ) -> KeysetPage:
+        """
+        Page d'emails par curseur sur (created_at, id), plus récents d'abord
+        """
+        query = self.db.query(Email)
+        if unlinked_only:
+            query = query.filter(Email.application_id.is_(None))
+        if not include_duplicates:
+            query = query.filter(Email.duplicate_of.is_(None))
+        return keyset_paginate(query, Email.created_at, Email.id, limit, cursor)
+
     def get_email(self, email_id: UUID) -> Email:
         """
         Récupérer un email spécifique
         """
         return self.db.query(Email).filter(Email.id == email_id).first()
 
+    def get_email_detail(self, email_id: UUID) -> Optional[dict]:
+        """
+        Email avec son contenu brut (décompressé à la demande)
+        """
+        db_email = self.get_email(email_id)
+        if not db_email:
+            return None
+        return {
+            **{column.key: getattr(db_email, column.key) for column in Email.__table__.columns},
+            **load_content(self.db, email_id),
+        }
+
     def create_email(self, email_data: EmailCreate) -> Email:
         """
         Créer un nouvel email
         """
-        db_email = Email(**email_data.model_dump())
-        self.db.add(db_email)
+        email_id = uuid4()
+        with UnitOfWork(self.db) as uow:
+            self._flag_near_duplicates([email_id], [email_data])
+            thread_ids, links = self._thread([email_id], [email_data])
+            db_email = Email(id=email_id, thread_id=thread_ids[0], **email_data.model_dump(exclude=EXCLUDED_FIELDS))
+            self.db.add(db_email)
+            for row in content_rows([(db_email.id, email_data.raw_headers, email_data.raw_body)]):
+                db_email.content = EmailContent(**row)
+            self.db.flush()
+            propagate_application(self.db, links)
+            uow.after_commit(self._index_originals([email_id], [email_data]))
+        self.db.refresh(db_email)
+        return db_email
+
+    def bulk_insert_emails(
+        self, emails: List[EmailCreate], uow: UnitOfWork, batch_size: int = BULK_BATCH_SIZE
+    ) -> List[Optional[UUID]]:
+        """
+        Insérer des emails par lots sans commit, en ignorant les conflits sur
+        external_id ; retourne l'identifiant de chaque email (None s'il existait déjà).
+        Les index en mémoire ne sont mis à jour qu'une fois `uow` validée.
+        """
+        ids = [uuid4() for _ in emails]
+        self._flag_near_duplicates(ids, emails)
+        thread_ids, links = self._thread(ids, emails)
+        self.classify_emails([
+            email_data for email_data in emails if not email_data.classification and not email_data.duplicate_of
+        ])
+        # Quasi-doublons d'un original du même lot : classification et liaison reprises
+        batch = dict(zip(ids, emails))
+        for email_data in emails:
+            if email_data.duplicate_of in batch:
+                _copy_from_original(email_data, batch[email_data.duplicate_of])
+        rows = [
+            {"id": email_id, "thread_id": thread_id, **email_data.model_dump(exclude=EXCLUDED_FIELDS)}
+            for email_id, thread_id, email_data in zip(ids, thread_ids, emails)
+        ]
+        # Avec la file de tâches, l'extraction est confiée aux workers dédiés (ci-dessous)
+        if settings.EXTRACTION_ENABLED and not settings.TASK_QUEUE_ENABLED:
+            extracted = get_entity_extractor().extract_batch([
+                (email_data.subject, email_data.sender, email_data.raw_body or email_data.snippet, email_data.sent_at)
+                for email_data in emails
+            ])
+            for row, entities in zip(rows, extracted):
+                row.update(language=entities.language, entities=entities.to_dict())
+        dialect_insert = UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        inserted: Set[UUID] = set()
+
+        for batch in chunked(rows, batch_size):
+            if dialect_insert is None:
+                # Dialecte sans ON CONFLICT : l'appelant a déjà filtré les doublons
+                self.db.execute(insert(Email), batch)
+                inserted.update(row["id"] for row in batch)
+                continue
+            stmt = dialect_insert(Email).on_conflict_do_nothing(index_elements=["external_id"]).returning(Email.id)
+            inserted.update(self.db.scalars(stmt, batch))
+
+        # Contenu brut compressé, pour les seuls emails réellement insérés
+        contents = content_rows(
+            (row["id"], email_data.raw_headers, email_data.raw_body)
+            for row, email_data in zip(rows, emails)
+            if row["id"] in inserted
+        )
+        for batch in chunked(contents, batch_size):
+            self.db.execute(insert(EmailContent), batch)
+
+        # Emails déjà stockés des fils liés par ce lot
+        propagate_application(self.db, links)
+        if settings.EXTRACTION_ENABLED and settings.TASK_QUEUE_ENABLED and inserted:
+            # Validée avec le lot : pas d'emails insérés sans extraction prévue
+            TaskQueue(self.db).enqueue("extraction.emails", {
+                "email_ids": [str(email_id) for email_id in ids if email_id in inserted]
+            })
+        uow.after_commit(self._index_originals([email_id for email_id in ids if email_id in inserted], [
+            email_data for email_id, email_data in zip(ids, emails) if email_id in inserted
+        ]))
+        return [row["id"] if row["id"] in inserted else None for row in rows]
+
+    def _flag_near_duplicates(self, ids: List[UUID], emails: List[EmailCreate]):
+        """
+        Empreinte de chaque email et original éventuel (duplicate_of) dans
+        l'index LSH ; un quasi-doublon d'un email stocké en reprend
+        classification et candidature
+        """
+        if not settings.NEAR_DUPLICATE_DETECTION_ENABLED:
+            return
+        for email_data in emails:
+            if email_data.simhash is None:
+                email_data.simhash = fingerprint(email_data.raw_body or email_data.snippet)
+        index = get_near_duplicate_index()
+        index.ensure_loaded(self.db)
+        originals = index.match_batch([(email_id, email_data.simhash) for email_id, email_data in zip(ids, emails)])
+
+        batch_ids = set(ids)
+        stored: Dict[UUID, object] = {}
+        for chunk in chunked({original for original in originals if original and original not in batch_ids}, BULK_BATCH_SIZE):
+            rows = self.db.query(Email.id, Email.classification, Email.classification_source, Email.application_id)\
+                .filter(Email.id.in_(chunk))\
+                .all()
+            stored.update({row.id: row for row in rows})
+        for email_data, original in zip(emails, originals):
+            if original in stored:
+                email_data.duplicate_of = original
+                _copy_from_original(email_data, stored[original])
+            elif original in batch_ids:
+                email_data.duplicate_of = original
+
+    def _index_originals(self, ids: List[UUID], emails: List[EmailCreate]) -> Callable[[], None]:
+        """
+        Ajout à l'index LSH des originaux insérés, à exécuter après validation
+        """
+        entries = [
+            (email_id, email_data.simhash)
+            for email_id, email_data in zip(ids, emails)
+            if email_data.simhash is not None and not email_data.duplicate_of
+        ]
+
+        def apply():
+            if settings.NEAR_DUPLICATE_DETECTION_ENABLED and entries:
+                get_near_duplicate_index().add_many(entries)
+        return apply
+
+    def _thread(self, ids: List[UUID], emails: List[EmailCreate]) -> Tuple[List[UUID], Dict[UUID, UUID]]:
+        """
+        Fil de chaque email et candidature par fil : celle déjà liée au fil,
+        sinon le rapprochement d'un des emails du lot, reportée à tout le fil ;
+        retourne aussi les fils nouvellement liés (à propager aux emails stockés)
+        """
+        thread_ids = assign_threads(self.db, [
+            (email_id, email_data.external_id, email_data.references)
+            for email_id, email_data in zip(ids, emails)
+        ])
+        known = thread_applications(self.db, thread_ids)
+        for email_data, thread_id in zip(emails, thread_ids):
+            if not email_data.application_id and thread_id in known:
+                email_data.application_id = known[thread_id]
+        if settings.MATCHING_AUTO_LINK_ENABLED:
+            # Rapprochement par fil : arrêt au premier email du fil rattaché
+            unlinked: Dict[UUID, List[EmailCreate]] = {}
+            for email_data, thread_id in zip(emails, thread_ids):
+                if not email_data.application_id and not email_data.duplicate_of and thread_id not in known:
+                    unlinked.setdefault(thread_id, []).append(email_data)
+            for thread_emails in unlinked.values():
+                for email_data in thread_emails:
+                    if self.auto_link_emails([email_data]):
+                        break
+
+        batch_links: Dict[UUID, Set[UUID]] = {}
+        for email_data, thread_id in zip(emails, thread_ids):
+            if email_data.application_id and thread_id not in known:
+                batch_links.setdefault(thread_id, set()).add(email_data.application_id)
+        links = {thread_id: applications.pop() for thread_id, applications in batch_links.items() if len(applications) == 1}
+        for email_data, thread_id in zip(emails, thread_ids):
+            if not email_data.application_id and thread_id in links:
+                email_data.application_id = links[thread_id]
+        return thread_ids, links
+
+    def classify_emails(self, emails: List[EmailCreate]):
+        """
+        Renseigner la classification d'un lot d'emails (modèle appris si assez
+        confiant, sinon règles FR/EN)
+        """
+        if not emails:
+            return
+        results = self._classify([(email_data.subject, email_data.raw_body or email_data.snippet) for email_data in emails])
+        for email_data, (label, source) in zip(emails, results):
+            email_data.classification = label
+            email_data.classification_source = source
+
+    def auto_link_emails(self, emails: List[EmailCreate]) -> int:
+        """
+        Rattacher à leur candidature les emails dont le rapprochement est sûr ;
+        les cas ambigus restent non liés. Un rattachement automatique n'apprend
+        pas le domaine de l'expéditeur (réservé aux liaisons manuelles).
+        """
+        if not emails:
+            return 0
+        matcher = get_application_matcher()
+        matcher.ensure_loaded(self.db)
+        linked = 0
+        for email_data in emails:
+            application_id = matcher.match(email_data.subject, email_data.sender, email_data.raw_body or email_data.snippet)
+            if application_id:
+                email_data.application_id = application_id
+                email_data.link_source = "auto"
+                linked += 1
+        return linked
+
+    def get_match_candidates(self, email_id: UUID, limit: int = 5) -> Optional[List[dict]]:
+        """
+        Candidatures les plus proches d'un email (suggestions pour la liaison manuelle)
+        """
+        db_email = self.get_email(email_id)
+        if not db_email:
+            return None
+        body = load_bodies(self.db, [email_id]).get(email_id)
+        matcher = get_application_matcher()
+        matcher.ensure_loaded(self.db)
+        candidates = matcher.candidates(db_email.subject, db_email.sender, body or db_email.snippet, limit)
+        return [candidate.to_dict() for candidate in candidates]
+
+    def _classify(self, texts: List[Tuple[Optional[str], Optional[str]]]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        (label, origine) par email : prédiction du modèle au-dessus du seuil de
+        confiance, règles sinon
+        """
+        rule_results = get_rule_classifier().classify_batch(texts)
+        predictions = get_model_classifier().predict_batch(
+            [training_text(subject, body) for subject, body in texts]
+        )
+        results = []
+        for rule_result, (model_label, probability) in zip(rule_results, predictions):
+            if model_label and probability >= settings.CLASSIFICATION_MODEL_MIN_CONFIDENCE:
+                results.append((model_label, "model"))
+            else:
+                results.append((rule_result.label, "rules" if rule_result.label else None))
+        return results
+
+    def reclassify_stored_emails(self, only_unclassified: bool = True, batch_size: int = BULK_BATCH_SIZE) -> dict:
+        """
+        (Re)classer les emails déjà en base, par lots (les corrections manuelles
+        sont conservées)
+        """
+        counts: Dict[str, int] = {}
+        query = (
+            self.db.query(Email.id, Email.subject, Email.snippet, EmailContent.codec, EmailContent.raw_body)
+            .outerjoin(EmailContent, EmailContent.email_id == Email.id)
+            .filter(or_(Email.classification_source.is_(None), Email.classification_source != "user"))
+            .order_by(Email.id)
+        )
+        if only_unclassified:
+            query = query.filter(Email.classification.is_(None))
+
+        for batch in chunked(query.yield_per(batch_size), batch_size):
+            results = self._classify([(row.subject, _body(row)) for row in batch])
+            self.db.execute(update(Email), [
+                {"id": row.id, "classification": label, "classification_source": source}
+                for row, (label, source) in zip(batch, results)
+            ])
+            for label, _ in results:
+                key = label or "UNCLASSIFIED"
+                counts[key] = counts.get(key, 0) + 1
+        self.db.commit()
+        return counts
+
+    def rebuild_threads(self, batch_size: int = BULK_BATCH_SIZE) -> dict:
+        """
+        Regrouper en fils les emails stockés qui n'en ont pas encore (en-têtes
+        In-Reply-To / References relus dans le contenu compressé), par lots
+        """
+        threaded = 0
+        while True:
+            rows = (
+                self.db.query(Email.id, Email.external_id, EmailContent.codec, EmailContent.raw_headers)
+                .outerjoin(EmailContent, EmailContent.email_id == Email.id)
+                .filter(Email.thread_id.is_(None))
+                .order_by(Email.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            thread_ids = assign_threads(self.db, [
+                (row.id, row.external_id, _references(unpack(row.raw_headers, row.codec) if row.raw_headers else None))
+                for row in rows
+            ])
+            self.db.execute(update(Email), [
+                {"id": row.id, "thread_id": thread_id} for row, thread_id in zip(rows, thread_ids)
+            ])
+            propagate_application(self.db, thread_applications(self.db, thread_ids))
+            self.db.commit()
+            threaded += len(rows)
+        return {"threaded": threaded}
+
+    def extract_stored_entities(
+        self, only_missing: bool = True, batch_size: int = BULK_BATCH_SIZE, email_ids: List[UUID] = None
+    ) -> dict:
+        """
+        (Re)extraire langue et entités des emails déjà en base (ou des seuls
+        `email_ids`), par lots (lecture par position sur l'identifiant,
+        écriture groupée par lot)
+        """
+        extractor = get_entity_extractor()
+        languages: Dict[str, int] = {}
+        processed = 0
+        started = time.perf_counter()
+        query = (
+            self.db.query(
+                Email.id, Email.subject, Email.sender, Email.sent_at, Email.snippet,
+                EmailContent.codec, EmailContent.raw_body
+            )
+            .outerjoin(EmailContent, EmailContent.email_id == Email.id)
+            .order_by(Email.id)
+        )
+        if only_missing:
+            query = query.filter(Email.entities.is_(None))
+        if email_ids is not None:
+            query = query.filter(Email.id.in_(email_ids))
+        last_id = None
+        while True:
+            page = query.filter(Email.id > last_id) if last_id is not None else query
+            rows = page.limit(batch_size).all()
+            if not rows:
+                break
+            results = extractor.extract_batch([(row.subject, row.sender, _body(row), row.sent_at) for row in rows])
+            self.db.execute(update(Email), [
+                {"id": row.id, "language": entities.language, "entities": entities.to_dict()}
+                for row, entities in zip(rows, results)
+            ])
+            self.db.commit()
+            for entities in results:
+                key = entities.language or "unknown"
+                languages[key] = languages.get(key, 0) + 1
+            processed += len(rows)
+            last_id = rows[-1].id
+
+        elapsed = time.perf_counter() - started
+        return {
+            "processed": processed,
+            "languages": languages,
+            "seconds": round(elapsed, 3),
+            "emails_per_second": round(processed / elapsed, 1) if processed and elapsed else None,
+        }
+
+    def set_classification(self, email_id: UUID, classification: str) -> Optional[Email]:
+        """
+        Correction manuelle de la classification (sert d'exemple d'entraînement)
+        """
+        db_email = self.get_email(email_id)
+        if not db_email:
+            return None
+        db_email.classification = classification
+        db_email.classification_source = "user"
         self.db.commit()
         self.db.refresh(db_email)
         return db_email
 
-    def link_email_to_application(self, email_id: UUID, application_id: UUID) -> bool:
+    def start_model_training(self) -> dict:
+        """
+        Lancer le réentraînement du modèle sur les classifications corrigées
+        """
+        rows = (
+            self.db.query(Email.subject, Email.snippet, Email.classification, EmailContent.codec, EmailContent.raw_body)
+            .outerjoin(EmailContent, EmailContent.email_id == Email.id)
+            .filter(Email.classification_source == "user", Email.classification.isnot(None))
+            .all()
+        )
+        labels = [row.classification for row in rows]
+        if len(rows) < settings.CLASSIFICATION_MIN_TRAINING_SAMPLES or len(set(labels)) < 2:
+            return {
+                "status": "insufficient_data",
+                "samples": len(rows),
+                "labels": len(set(labels)),
+                "min_samples": settings.CLASSIFICATION_MIN_TRAINING_SAMPLES,
+            }
+        texts = [training_text(row.subject, _body(row)) for row in rows]
+        return get_model_classifier().start_training(texts, labels)
+
+    def get_ids_by_external_id(self, external_ids: Iterable[str]) -> Dict[str, UUID]:
         """
-        Lier un email à une candidature
+        Identifiants des emails déjà présents parmi les external_id donnés
+        (une requête IN par lot)
+        """
+        ids = {external_id for external_id in external_ids if external_id}
+        found: Dict[str, UUID] = {}
+        for batch in chunked(ids, BULK_BATCH_SIZE):
+            rows = self.db.query(Email.external_id, Email.id).filter(Email.external_id.in_(batch)).all()
+            found.update({row.external_id: row.id for row in rows})
+        return found
+
+    def get_existing_external_ids(self, external_ids: Iterable[str]) -> Set[str]:
+        """
+        Parmi les identifiants donnés, ceux déjà présents en base
+        """
+        return set(self.get_ids_by_external_id(external_ids))
+
+    def link_email_to_application(self, email_id: UUID, application_id: UUID) -> Optional[int]:
+        """
+        Lier un email à une candidature, ainsi que les emails non liés de son
+        fil ; retourne le nombre d'emails liés (None si l'email n'existe pas)
         """
         db_email = self.db.query(Email).filter(Email.id == email_id).first()
         if not db_email:
-            return False
+            return None
         
         db_email.application_id = application_id
+        db_email.link_source = "user"
+        linked = 1
+        if db_email.thread_id:
+            linked += self.db.query(Email)\
+                .filter(Email.thread_id == db_email.thread_id, Email.application_id.is_(None), Email.id != email_id)\
+                .update({Email.application_id: application_id}, synchronize_session=False)
         self.db.commit()
-        return True
+        get_application_matcher().learn_sender(application_id, db_email.sender)
+        return linked
+
+    def get_thread(self, email_id: UUID) -> Optional[List[Email]]:
+        """
+        Emails du fil d'un email, du plus ancien au plus récent
+        """
+        db_email = self.get_email(email_id)
+        if not db_email:
+            return None
+        if not db_email.thread_id:
+            return [db_email]
+        return self.db.query(Email)\
+            .filter(Email.thread_id == db_email.thread_id)\
+            .order_by(Email.sent_at.asc().nulls_last(), Email.created_at.asc())\
+            .all()
 
     def import_email_files(self, files: List[UploadFile]) -> List[dict]:
         """
-        Importer des emails depuis des fichiers .eml
+        Importer des emails depuis des fichiers .eml : analyse de tous les
+        fichiers, dédoublonnage ensembliste puis insertion par lots dans une
+        seule transaction
         """
-        results = []
-        parser = Parser()
-        
+        results: List[dict] = []
+        parsed: List[tuple] = []
+
         for file in files:
             try:
-                content = file.file.read().decode('utf-8')
-                msg = parser.parsestr(content)
-                
-                # Extraire les informations de l'email
-                email_data = EmailCreate(
-                    external_id=msg.get('Message-ID'),
-                    subject=msg.get('Subject'),
-                    sender=msg.get('From'),
-                    recipients=[msg.get('To')] if msg.get('To') else [],
-                    cc=[msg.get('Cc')] if msg.get('Cc') else [],
-                    raw_headers=str(msg.items()),
-                    raw_body=self._extract_body(msg),
-                    snippet=self._extract_snippet(msg)
-                )
-                
-                # Vérifier si l'email n'existe pas déjà
-                existing = self.db.query(Email).filter(
-                    Email.external_id == email_data.external_id
-                ).first()
-                
-                if not existing:
-                    created_email = self.create_email(email_data)
-                    results.append({
-                        "filename": file.filename,
-                        "status": "imported",
-                        "email_id": str(created_email.id)
-                    })
-                else:
-                    results.append({
-                        "filename": file.filename,
-                        "status": "already_exists",
-                        "email_id": str(existing.id)
-                    })
-                    
+                msg = email.message_from_bytes(file.file.read())
+                if not msg.keys():
+                    raise ValueError("Aucun en-tête email trouvé")
+                parsed.append((len(results), self.parse_message(msg)))
+                results.append({"filename": file.filename})
             except Exception as e:
                 results.append({
                     "filename": file.filename,
                     "status": "error",
                     "error": str(e)
                 })
-        
-        return results
 
-    def _extract_body(self, msg) -> str:
-        """
-        Extraire le corps de l'email
-        """
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    return part.get_payload(decode=True).decode('utf-8', errors='ignore')
-        else:
-            return msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-        return ""
+        existing = self.get_ids_by_external_id(email_data.external_id for _, email_data in parsed)
+        pending: List[tuple] = []
+        duplicates: List[tuple] = []
+        claimed: Set[str] = set()
+
+        for index, email_data in parsed:
+            external_id = email_data.external_id
+            if external_id in existing or external_id in claimed:
+                duplicates.append((index, external_id))
+                continue
+            if external_id:
+                claimed.add(external_id)
+            pending.append((index, email_data))
+
+        with UnitOfWork(self.db) as uow:
+            email_ids = self.bulk_insert_emails([email_data for _, email_data in pending], uow)
+
+        for (index, email_data), email_id in zip(pending, email_ids):
+            if email_id:
+                if email_data.external_id:
+                    existing[email_data.external_id] = email_id
+                results[index].update(status="imported", email_id=str(email_id))
+                if email_data.application_id:
+                    results[index]["application_id"] = str(email_data.application_id)
+                if email_data.duplicate_of:
+                    results[index]["duplicate_of"] = str(email_data.duplicate_of)
+            else:
+                # Inséré entre-temps par une autre transaction
+                duplicates.append((index, email_data.external_id))
+
+        unresolved = [external_id for _, external_id in duplicates if external_id not in existing]
+        existing.update(self.get_ids_by_external_id(unresolved))
+        for index, external_id in duplicates:
+            results[index].update(status="already_exists", email_id=str(existing.get(external_id)))
+
+        return results
 
-    def _extract_snippet(self, msg) -> str:
+    def parse_message(self, msg) -> EmailCreate:
         """
-        Extraire un extrait de l'email (première ligne ou 200 premiers caractères)
+        Construire un EmailCreate à partir d'un message déjà parsé
         """
-        body = self._extract_body(msg)
-        if body:
-            # Prendre les 200 premiers caractères ou la première ligne
-            snippet = body.strip()[:200]
-            if len(body) > 200:
-                snippet += "..."
-            return snippet
-        return ""
+        return EmailCreate(**message_fields(msg))
@@ -0,0 +1,169 @@
+"""
+Regroupement des emails en fils de discussion (Message-ID, In-Reply-To, References).
+
+Chaque Message-ID connu, d'un email stocké ou seulement cité en référence,
+est rattaché à un fil dans email_thread_refs. À l'import, un lot est regroupé
+par union-find en mémoire sur ses Message-ID et les fils existants qu'ils
+touchent ; un email qui relie plusieurs fils les fusionne en réécrivant les
+plus petits vers le plus grand (union par taille : chaque Message-ID n'est
+réécrit qu'un nombre logarithmique de fois). Une réponse arrivée avant son
+message d'origine ouvre un fil que l'origine rejoindra.
+
+Le rattachement à une candidature se fait ensuite par fil : un nouvel email
+hérite de la candidature de son fil, et lier un email la propage aux emails
+non liés du même fil.
+"""
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.connectors.base import chunked
+from app.core.database import UPSERT_INSERTS
+from app.models.models import Email, EmailThreadRef
+from app.services.email_parsing import normalize_message_id
+
+# Identifiants par clause IN / lignes par INSERT multi-valeurs
+BATCH_SIZE = 500
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[Hashable, Hashable] = {}
+
+    def find(self, node: Hashable) -> Hashable:
+        parent = self.parent.setdefault(node, node)
+        while parent != node:
+            # Compression de chemin par division
+            grandparent = self.parent[parent]
+            self.parent[node] = grandparent
+            node, parent = parent, grandparent
+        return node
+
+    def union(self, a: Hashable, b: Hashable):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def _known_threads(db: Session, message_ids: Iterable[str]) -> Dict[str, UUID]:
+    found: Dict[str, UUID] = {}
+    for batch in chunked(set(message_ids), BATCH_SIZE):
+        rows = db.query(EmailThreadRef.message_id, EmailThreadRef.thread_id)\
+            .filter(EmailThreadRef.message_id.in_(batch))\
+            .all()
+        found.update({row.message_id: row.thread_id for row in rows})
+    return found
+
+
+def _thread_sizes(db: Session, thread_ids: Set[UUID]) -> Dict[UUID, int]:
+    sizes: Dict[UUID, int] = {}
+    for batch in chunked(thread_ids, BATCH_SIZE):
+        rows = db.query(EmailThreadRef.thread_id, func.count())\
+            .filter(EmailThreadRef.thread_id.in_(batch))\
+            .group_by(EmailThreadRef.thread_id)\
+            .all()
+        sizes.update(dict(rows))
+    return sizes
+
+
+def assign_threads(db: Session, emails: List[Tuple[UUID, Optional[str], List[str]]]) -> List[UUID]:
+    """
+    Fil de chaque email (id, Message-ID, Message-ID cités) ; enregistre les
+    nouveaux Message-ID et fusionne les fils reliés par le lot (sans commit)
+    """
+    if not emails:
+        return []
+    # Nœuds : Message-ID (str), fil existant ("thread", id), email sans Message-ID ("email", id)
+    own_nodes: List[Hashable] = []
+    links: List[Tuple[Hashable, List[str]]] = []
+    for email_id, external_id, references in emails:
+        own = normalize_message_id(external_id) or ("email", email_id)
+        own_nodes.append(own)
+        links.append((own, references))
+
+    message_ids = {node for node in own_nodes if isinstance(node, str)}
+    message_ids.update(ref for _, references in links for ref in references)
+    known = _known_threads(db, message_ids)
+
+    forest = _UnionFind()
+    for message_id, thread_id in known.items():
+        forest.union(("thread", thread_id), message_id)
+    for own, references in links:
+        forest.find(own)
+        for ref in references:
+            forest.union(own, ref)
+
+    existing: Dict[Hashable, Set[UUID]] = defaultdict(set)
+    for thread_id in set(known.values()):
+        existing[forest.find(("thread", thread_id))].add(thread_id)
+
+    # Fil retenu par composante ; fusion des autres fils existants vers le plus grand
+    merged = {thread_id for threads in existing.values() if len(threads) > 1 for thread_id in threads}
+    sizes = _thread_sizes(db, merged) if merged else {}
+    thread_of_root: Dict[Hashable, UUID] = {}
+    merges: Dict[UUID, UUID] = {}
+    for own in own_nodes:
+        root = forest.find(own)
+        if root in thread_of_root:
+            continue
+        threads = existing.get(root)
+        if not threads:
+            thread_of_root[root] = uuid4()
+            continue
+        target = max(threads, key=lambda thread_id: (sizes.get(thread_id, 0), str(thread_id)))
+        thread_of_root[root] = target
+        merges.update({thread_id: target for thread_id in threads if thread_id != target})
+
+    if merges:
+        params = [{"b_old": old, "b_new": new} for old, new in merges.items()]
+        for table in (EmailThreadRef.__table__, Email.__table__):
+            db.execute(
+                update(table).where(table.c.thread_id == bindparam("b_old")).values(thread_id=bindparam("b_new")),
+                params,
+            )
+
+    new_refs = [
+        {"message_id": message_id, "thread_id": thread_of_root[forest.find(message_id)]}
+        for message_id in message_ids - set(known)
+    ]
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    for batch in chunked(new_refs, BATCH_SIZE):
+        if dialect_insert is None:
+            db.execute(insert(EmailThreadRef), batch)
+        else:
+            # Message-ID enregistré entre-temps par un autre import : le premier fil l'emporte
+            db.execute(dialect_insert(EmailThreadRef).on_conflict_do_nothing(index_elements=["message_id"]), batch)
+
+    return [thread_of_root[forest.find(own)] for own in own_nodes]
+
+
+def thread_applications(db: Session, thread_ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+    """
+    Candidature de chaque fil déjà lié (fils liés à plusieurs candidatures exclus)
+    """
+    applications: Dict[UUID, Set[UUID]] = defaultdict(set)
+    for batch in chunked({thread_id for thread_id in thread_ids if thread_id}, BATCH_SIZE):
+        rows = db.query(Email.thread_id, Email.application_id)\
+            .filter(Email.thread_id.in_(batch), Email.application_id.isnot(None))\
+            .distinct()\
+            .all()
+        for row in rows:
+            applications[row.thread_id].add(row.application_id)
+    return {thread_id: ids.pop() for thread_id, ids in applications.items() if len(ids) == 1}
+
+
+def propagate_application(db: Session, links: Dict[UUID, UUID]):
+    """
+    Lier à la candidature de leur fil les emails encore non liés (sans commit)
+    """
+    if not links:
+        return
+    db.execute(
+        update(Email.__table__)
+        .where(Email.__table__.c.thread_id == bindparam("b_thread"), Email.__table__.c.application_id.is_(None))
+        .values(application_id=bindparam("b_application")),
+        [{"b_thread": thread_id, "b_application": application_id} for thread_id, application_id in links.items()],
+    )
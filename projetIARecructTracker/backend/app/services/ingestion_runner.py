@@ -0,0 +1,229 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.scheduler import scheduler
+from app.services.ingestion_service import (
+    IngestionService,
+    close_connectors,
+    get_gmail_connectors,
+    get_imap_connectors,
+)
+from app.services.task_queue import TaskQueue
+
+JOB_ID = "email_ingestion"
+
+
+class AccountRunStats:
+    """
+    Métriques de la dernière exécution pour un compte
+    """
+
+    def __init__(self, provider: str, account: str):
+        self.provider = provider
+        self.account = account
+        self.runs = 0
+        self.skipped_runs = 0
+        self.errors = 0
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_s: Optional[float] = None
+        self.last_stats: dict = {}
+
+    @property
+    def backlog(self) -> int:
+        """
+        Messages découverts mais pas encore traités (non nul après une erreur)
+        """
+        return self.last_stats.get("emails_discovered", 0) - self.last_stats.get("emails_processed", 0)
+
+    def to_dict(self, running: bool) -> dict:
+        processed = self.last_stats.get("emails_processed", 0)
+        return {
+            "provider": self.provider,
+            "account": self.account,
+            "running": running,
+            "runs": self.runs,
+            "skipped_runs": self.skipped_runs,
+            "errors": self.errors,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "last_duration_s": self.last_duration_s,
+            "emails_per_second": round(processed / self.last_duration_s, 2) if self.last_duration_s else None,
+            "backlog": self.backlog,
+            **self.last_stats,
+        }
+
+
+class IngestionRunner:
+    """
+    Exécute l'ingestion compte par compte dans un pool borné : une seule
+    exécution à la fois par compte, les comptes occupés sont sautés
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or settings.INGESTION_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingestion")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, AccountRunStats] = {}
+        self._registry_lock = threading.Lock()
+
+    def connectors(self) -> list:
+        return get_imap_connectors() + get_gmail_connectors()
+
+    def run_once(self, connectors: list = None, jitter: float = 0) -> dict:
+        """
+        Lancer une ingestion sur tous les comptes et attendre la fin ; avec
+        `jitter`, le départ de chaque compte est décalé au hasard (0 à `jitter` s)
+        """
+        connectors = self.connectors() if connectors is None else connectors
+        # Le verrou du compte est pris avant la mise en file : un compte encore
+        # en cours est sauté immédiatement au lieu d'attendre derrière lui-même
+        futures = []
+        for connector in connectors:
+            key = f"{connector.provider}:{connector.account}"
+            lock, stats = self._account_entry(connector.provider, connector.account, key)
+            if not lock.acquire(blocking=False):
+                stats.skipped_runs += 1
+                logger.info(f"Ingestion déjà en cours pour {key}, exécution sautée")
+                futures.append(None)
+                continue
+            delay = random.uniform(0, jitter) if jitter else 0
+            futures.append(self._executor.submit(self._run_account, connector, key, lock, stats, delay))
+        results = [
+            future.result() if future else {"account": f"{c.provider}:{c.account}", "status": "skipped"}
+            for c, future in zip(connectors, futures)
+        ]
+
+        totals = {"emails_processed": 0, "new_emails": 0, "skipped_emails": 0, "linked_emails": 0}
+        for result in results:
+            for key in totals:
+                totals[key] += result.get(key, 0)
+        errors = [result["error"] for result in results if result.get("status") == "error"]
+
+        return {
+            "status": "error" if errors else "completed",
+            "timestamp": datetime.utcnow().isoformat(),
+            **totals,
+            "accounts": results,
+            **({"error": "; ".join(errors)} if errors else {}),
+            "message": "Ingestion terminée" if connectors else "Aucun connecteur email configuré"
+        }
+
+    def _run_account(
+        self, connector, key: str, lock: threading.Lock, stats: "AccountRunStats", delay: float = 0
+    ) -> dict:
+        """
+        Synchroniser un compte après `delay` secondes (verrou déjà acquis, relâché ici)
+        """
+        if delay:
+            time.sleep(delay)
+        db = SessionLocal()
+        started = time.perf_counter()
+        stats.last_started_at = datetime.utcnow()
+        stats.last_stats = run_stats = {}
+        try:
+            IngestionService(db).sync_connector(connector, run_stats)
+            stats.last_status, stats.last_error = "completed", None
+        except Exception as e:
+            db.rollback()
+            stats.errors += 1
+            stats.last_status, stats.last_error = "error", str(e)
+            logger.exception(f"Échec de l'ingestion pour {key}")
+        finally:
+            db.close()
+            stats.runs += 1
+            stats.last_duration_s = round(time.perf_counter() - started, 3)
+            stats.last_finished_at = datetime.utcnow()
+            lock.release()
+
+        result = {"account": key, "status": stats.last_status, **run_stats}
+        if stats.last_error:
+            result["error"] = stats.last_error
+        return result
+
+    def _account_entry(self, provider: str, account: str, key: str):
+        with self._registry_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+                self._stats[key] = AccountRunStats(provider, account)
+            return self._locks[key], self._stats[key]
+
+    def status(self) -> dict:
+        """
+        Métriques des dernières exécutions et état du planificateur
+        """
+        with self._registry_lock:
+            accounts = [
+                stats.to_dict(running=self._locks[key].locked())
+                for key, stats in self._stats.items()
+            ]
+        return {
+            **self.scheduler_status(),
+            "max_concurrency": self.max_workers,
+            "running_accounts": sum(1 for account in accounts if account["running"]),
+            "backlog": sum(account["backlog"] for account in accounts),
+            "accounts": accounts,
+        }
+
+    def scheduler_status(self) -> dict:
+        job = scheduler.get_job(JOB_ID)
+        return {
+            "scheduler_running": bool(job and scheduler.running),
+            "next_run_at": job.next_run_time.isoformat() if job and job.next_run_time else None,
+            "interval_minutes": settings.INGESTION_INTERVAL_MINUTES,
+        }
+
+    def enqueue(self) -> dict:
+        """
+        Mettre l'ingestion en file pour les workers ; la clé du créneau évite
+        une seconde tâche quand plusieurs instances de l'API sont planifiées
+        """
+        slot = int(time.time() // (settings.INGESTION_INTERVAL_MINUTES * 60))
+        db = SessionLocal()
+        try:
+            return TaskQueue(db).submit(
+                "ingestion.run", {"slot": f"periodic-{slot}"}, idempotency_key=f"ingestion.run:periodic-{slot}"
+            )
+        finally:
+            db.close()
+
+    def run_scheduled(self) -> dict:
+        """
+        Exécution planifiée : départs des comptes étalés (gigue par compte)
+        pour ne pas ouvrir toutes les connexions au même instant
+        """
+        return self.run_once(jitter=settings.INGESTION_JITTER_SECONDS)
+
+    def start(self):
+        """
+        Planifier l'ingestion périodique, exécutée ici (gigue par compte) ou
+        mise en file pour les workers (TASK_QUEUE_ENABLED, gigue du créneau)
+        """
+        scheduler.add_job(
+            self.enqueue if settings.TASK_QUEUE_ENABLED else self.run_scheduled,
+            "interval",
+            minutes=settings.INGESTION_INTERVAL_MINUTES,
+            jitter=settings.INGESTION_JITTER_SECONDS if settings.TASK_QUEUE_ENABLED else None,
+            id=JOB_ID,
+            replace_existing=True,
+        )
+        logger.info(f"Ingestion planifiée toutes les {settings.INGESTION_INTERVAL_MINUTES} min")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        close_connectors()
+
+
+ingestion_runner = IngestionRunner()
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Set
+from uuid import uuid4
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.connectors.base import chunked
+from app.core.config import settings
+from app.core.unit_of_work import UnitOfWork
+from app.models.schemas import EmailCreate
+from app.services.email_parsing import iter_mbox_messages, parse_raw_emails
+from app.services.email_service import EmailService
+
+# Messages envoyés ensemble à un processus d'analyse
+PARSE_CHUNK_SIZE = 50
+
+# Imports en cours ou récents (consultables pendant un long import)
+_progress: Dict[str, dict] = {}
+_progress_lock = threading.Lock()
+
+
+def is_mbox(stream: BinaryIO, filename: Optional[str] = None) -> bool:
+    """
+    Archive mbox : extension .mbox ou première ligne "From "
+    """
+    if filename and filename.lower().endswith(".mbox"):
+        return True
+    head = stream.read(5)
+    stream.seek(0)
+    return head == b"From "
+
+
+def get_import_progress() -> List[dict]:
+    with _progress_lock:
+        return [dict(entry) for entry in _progress.values()]
+
+
+class MboxImporter:
+    """
+    Import en flux d'une archive mbox : découpage au fil de la lecture,
+    analyse MIME dans un pool de processus, insertions par lots validées
+    lot par lot (un lot est analysé pendant que le précédent est inséré)
+    """
+
+    def __init__(self, db: Session, workers: int = None, batch_size: int = None):
+        self.db = db
+        self.email_service = EmailService(db)
+        self.workers = workers or settings.IMPORT_PARSE_WORKERS or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    def import_mbox(self, stream: BinaryIO, filename: str = None) -> dict:
+        """
+        Importer une archive mbox ; retourne le bilan de l'import
+        """
+        import_id = str(uuid4())
+        progress = {
+            "import_id": import_id,
+            "filename": filename,
+            "status": "running",
+            "bytes_read": 0,
+            "total_bytes": _stream_size(stream),
+            "messages": 0,
+            "imported": 0,
+            "already_exists": 0,
+            "linked": 0,
+            "errors": 0,
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+        }
+        with _progress_lock:
+            _progress[import_id] = progress
+
+        seen: Set[str] = set()
+        # "spawn" : pas de fork d'un serveur multi-threadé
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                pending: List[Future] = []
+                for batch in chunked(iter_mbox_messages(stream), self.batch_size):
+                    futures = [pool.submit(parse_raw_emails, chunk) for chunk in chunked(batch, PARSE_CHUNK_SIZE)]
+                    if pending:
+                        self._store(pending, seen, progress, stream)
+                    pending = futures
+                if pending:
+                    self._store(pending, seen, progress, stream)
+            progress["status"] = "imported"
+        except Exception as e:
+            self.db.rollback()
+            progress.update(status="error", error=str(e))
+            logger.exception(f"Échec de l'import mbox {filename}")
+        finally:
+            progress["finished_at"] = datetime.utcnow().isoformat()
+
+        result_keys = ("filename", "status", "messages", "imported", "already_exists", "linked", "errors", "error")
+        return {key: progress[key] for key in result_keys if key in progress}
+
+    def _store(self, futures: List[Future], seen: Set[str], progress: dict, stream: BinaryIO):
+        """
+        Dédoublonner puis insérer un lot analysé, et valider
+        """
+        parsed = [fields for future in futures for fields in future.result()]
+        emails: List[EmailCreate] = []
+        errors = 0
+        for fields in parsed:
+            if "error" in fields:
+                errors += 1
+                continue
+            emails.append(EmailCreate(**fields))
+
+        existing = self.email_service.get_existing_external_ids(e.external_id for e in emails)
+        to_insert = []
+        for email_data in emails:
+            external_id = email_data.external_id
+            if external_id in existing or external_id in seen:
+                continue
+            if external_id:
+                seen.add(external_id)
+            to_insert.append(email_data)
+
+        with UnitOfWork(self.db) as uow:
+            email_ids = self.email_service.bulk_insert_emails(to_insert, uow)
+
+        imported = sum(1 for email_id in email_ids if email_id)
+        linked = sum(1 for email_id, email_data in zip(email_ids, to_insert) if email_id and email_data.application_id)
+        progress["messages"] += len(parsed)
+        progress["imported"] += imported
+        progress["already_exists"] += len(emails) - imported
+        progress["linked"] += linked
+        progress["errors"] += errors
+        progress["bytes_read"] = _stream_position(stream, progress["bytes_read"])
+        logger.info(
+            f"Import mbox {progress['filename']}: {progress['messages']} messages, "
+            f"{progress['bytes_read']}/{progress['total_bytes']} octets"
+        )
+
+
+def _stream_size(stream: BinaryIO) -> Optional[int]:
+    try:
+        position = stream.tell()
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+def _stream_position(stream: BinaryIO, default: int) -> int:
+    try:
+        return stream.tell()
+    except (AttributeError, OSError):
+        return default
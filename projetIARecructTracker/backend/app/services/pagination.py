@@ -0,0 +1,102 @@
+"""
+Pagination par curseur (keyset) sur un couple (horodatage, id), du plus récent
+au plus ancien : coût constant quelle que soit la profondeur, et pas de
+décalage des pages quand des lignes sont insérées entre deux requêtes.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+NEXT = "next"
+PREV = "prev"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID, direction: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), str(row_id), direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID, str]:
+    """
+    Curseur opaque -> (horodatage, id, sens) ; InvalidCursor s'il est illisible
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return datetime.fromisoformat(sort_value), UUID(row_id), direction
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Curseur de pagination invalide") from e
+
+
+def keyset_condition(sort_column, id_column, cursor: Optional[str]) -> Tuple[Any, str]:
+    """
+    Condition de position du curseur (None sans curseur) et sens de lecture
+    """
+    if not cursor:
+        return None, NEXT
+    sort_value, row_id, direction = decode_cursor(cursor)
+    position = tuple_(sort_column, id_column)
+    if direction == NEXT:
+        return position < tuple_(sort_value, row_id), direction
+    return position > tuple_(sort_value, row_id), direction
+
+
+def keyset_order(sort_column, id_column, direction: str) -> list:
+    if direction == NEXT:
+        return [sort_column.desc(), id_column.desc()]
+    return [sort_column.asc(), id_column.asc()]
+
+
+def keyset_page(rows: List[Any], sort_column, id_column, limit: int, cursor: Optional[str], direction: str) -> KeysetPage:
+    """
+    Page et curseurs à partir des `limit + 1` lignes lues dans le sens `direction`
+    """
+    # Un élément de plus pour savoir s'il reste une page dans ce sens
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+
+    page = KeysetPage(items=rows)
+    if not rows:
+        return page
+
+    def position_of(row) -> Tuple[datetime, UUID]:
+        return getattr(row, sort_column.key), getattr(row, id_column.key)
+
+    if direction == PREV or has_more:
+        page.next_cursor = encode_cursor(*position_of(rows[-1]), NEXT)
+    if (direction == NEXT and cursor) or (direction == PREV and has_more):
+        page.prev_cursor = encode_cursor(*position_of(rows[0]), PREV)
+    return page
+
+
+def keyset_paginate(query: Query, sort_column, id_column, limit: int, cursor: Optional[str] = None) -> KeysetPage:
+    """
+    Page de `limit` éléments triés par (sort_column, id_column) décroissants,
+    après (NEXT) ou avant (PREV) la position du curseur
+    """
+    condition, direction = keyset_condition(sort_column, id_column, cursor)
+    if condition is not None:
+        query = query.filter(condition)
+    rows = query.order_by(*keyset_order(sort_column, id_column, direction)).limit(limit + 1).all()
+    return keyset_page(rows, sort_column, id_column, limit, cursor, direction)
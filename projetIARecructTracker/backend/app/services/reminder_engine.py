@@ -0,0 +1,240 @@
+"""
+Rappels des prochaines actions (next_action_at).
+
+Les échéances à venir sont tenues dans une file de priorité en mémoire (tas
+de (échéance, id)), amorcée par une requête indexée et mise à jour à chaque
+écriture de candidature. Une tâche « date » du planificateur partagé est
+programmée sur la prochaine échéance : réveil au moment exact, sans balayage
+périodique de la table, et travail proportionnel au nombre de rappels dus.
+
+Chaque lot de rappels dus passe par un UPDATE conditionnel
+(reminded_at = next_action_at ... RETURNING) : une échéance ne produit qu'un
+seul rappel, même avec plusieurs processus. Les événements REMINDER sont
+insérés dans la même transaction. Une resynchronisation toutes les
+REMINDER_CHECK_INTERVAL_HOURS reprend les écritures faites ailleurs.
+"""
+import heapq
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from loguru import logger
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.scheduler import scheduler
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Application, ApplicationEvent
+from app.models.schemas import EventType
+
+# Candidatures closes : plus de rappel
+CLOSED_STATUSES = frozenset({"REJECTED", "WITHDRAWN"})
+
+FIRE_JOB_ID = "reminders_fire"
+RESYNC_JOB_ID = "reminders_resync"
+
+# Échéance ouverte : fixée, candidature active, pas encore rappelée
+PENDING_REMINDER = and_(
+    Application.next_action_at.isnot(None),
+    Application.status.notin_(CLOSED_STATUSES),
+    or_(Application.reminded_at.is_(None), Application.reminded_at != Application.next_action_at),
+)
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status)
+
+
+class ReminderEngine:
+    """
+    File de priorité des échéances et réveil programmé sur la plus proche
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[datetime, UUID]] = []
+        # Échéance courante par candidature ; les entrées du tas qui ne
+        # correspondent plus (modifiées, supprimées) sont ignorées au dépilage
+        self._scheduled: Dict[UUID, datetime] = {}
+        self._wake_at: Optional[datetime] = None
+        self.started = False
+        self.reminders_sent = 0
+        self.last_fired_at: Optional[datetime] = None
+
+    # --- File des échéances ---
+
+    def seed(self, db: Session):
+        """
+        (Re)construire la file depuis la base (index sur next_action_at)
+        """
+        rows = db.query(Application.id, Application.next_action_at).filter(PENDING_REMINDER).all()
+        with self._lock:
+            self._scheduled = {row.id: row.next_action_at for row in rows}
+            self._heap = [(due, application_id) for application_id, due in self._scheduled.items()]
+            heapq.heapify(self._heap)
+            self._wake_at = None
+            self._arm()
+
+    def on_upsert(self, application_id: UUID, status, next_action_at: Optional[datetime]):
+        with self._lock:
+            if next_action_at is None or _status_value(status) in CLOSED_STATUSES:
+                self._scheduled.pop(application_id, None)
+                return
+            if self._scheduled.get(application_id) == next_action_at:
+                return
+            self._scheduled[application_id] = next_action_at
+            heapq.heappush(self._heap, (next_action_at, application_id))
+            self._compact()
+            self._arm()
+
+    def on_delete(self, application_id: UUID):
+        with self._lock:
+            self._scheduled.pop(application_id, None)
+
+    def _peek(self) -> Optional[datetime]:
+        while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._scheduled) + 1024:
+            self._heap = [(due, application_id) for application_id, due in self._scheduled.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: datetime, limit: int) -> List[Tuple[UUID, datetime]]:
+        due: List[Tuple[UUID, datetime]] = []
+        with self._lock:
+            while len(due) < limit:
+                next_due = self._peek()
+                if next_due is None or next_due > now:
+                    break
+                _, application_id = heapq.heappop(self._heap)
+                due.append((application_id, self._scheduled.pop(application_id)))
+        return due
+
+    def _requeue(self, entries: List[Tuple[UUID, datetime]]):
+        with self._lock:
+            for application_id, due in entries:
+                if application_id not in self._scheduled:
+                    self._scheduled[application_id] = due
+                    heapq.heappush(self._heap, (due, application_id))
+
+    # --- Réveil ---
+
+    def _arm(self):
+        """
+        Programmer la tâche de rappel sur la prochaine échéance (verrou tenu)
+        """
+        if not self.started:
+            return
+        next_due = self._peek()
+        if next_due is None or (self._wake_at is not None and self._wake_at <= next_due):
+            return
+        self._wake_at = next_due
+        scheduler.add_job(
+            self._fire_job,
+            "date",
+            run_date=next_due.replace(tzinfo=timezone.utc),
+            id=FIRE_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    def _fire_job(self):
+        with self._lock:
+            self._wake_at = None
+        db = SessionLocal()
+        try:
+            self.fire_due(db)
+        except Exception:
+            logger.exception("Échec de l'envoi des rappels")
+        finally:
+            db.close()
+            with self._lock:
+                self._arm()
+
+    def fire_due(self, db: Session, now: datetime = None) -> int:
+        """
+        Émettre les rappels des échéances atteintes, par lots ; retourne leur nombre
+        """
+        now = now or datetime.utcnow()
+        sent = 0
+        while True:
+            batch = self._pop_due(now, settings.REMINDER_BATCH_SIZE)
+            if not batch:
+                break
+            try:
+                sent += self._send(db, [application_id for application_id, _ in batch], now)
+            except Exception:
+                self._requeue(batch)
+                raise
+        if sent:
+            self.reminders_sent += sent
+            self.last_fired_at = now
+            logger.info(f"{sent} rappel(s) de prochaine action émis")
+        return sent
+
+    def _send(self, db: Session, application_ids: List[UUID], now: datetime) -> int:
+        with UnitOfWork(db):
+            rows = db.execute(
+                update(Application)
+                .where(Application.id.in_(application_ids), Application.next_action_at <= now, PENDING_REMINDER)
+                # updated_at inchangé : un rappel n'est pas une modification de la candidature
+                .values(reminded_at=Application.next_action_at, updated_at=Application.updated_at)
+                .returning(Application.id, Application.next_action_at, Application.status),
+                execution_options={"synchronize_session": False},
+            ).all()
+            if rows:
+                db.execute(insert(ApplicationEvent), [
+                    {
+                        "id": uuid4(),
+                        "application_id": row.id,
+                        "event_type": EventType.REMINDER.value,
+                        "payload": {"due_at": row.next_action_at.isoformat(), "status": row.status},
+                        "created_at": now,
+                    }
+                    for row in rows
+                ])
+        return len(rows)
+
+    # --- Cycle de vie ---
+
+    def _resync_job(self):
+        db = SessionLocal()
+        try:
+            self.seed(db)
+        except Exception:
+            logger.exception("Échec de la resynchronisation des rappels")
+        finally:
+            db.close()
+
+    def start(self):
+        """
+        Amorcer la file au démarrage du planificateur, puis la resynchroniser périodiquement
+        """
+        self.started = True
+        scheduler.add_job(
+            self._resync_job,
+            "interval",
+            hours=settings.REMINDER_CHECK_INTERVAL_HOURS,
+            id=RESYNC_JOB_ID,
+            replace_existing=True,
+            next_run_time=datetime.now(timezone.utc),
+        )
+
+    def status(self) -> dict:
+        with self._lock:
+            next_due = self._peek()
+            return {
+                "started": self.started,
+                "pending": len(self._scheduled),
+                "next_due_at": next_due.isoformat() if next_due else None,
+                "reminders_sent": self.reminders_sent,
+                "last_fired_at": self.last_fired_at.isoformat() if self.last_fired_at else None,
+            }
+
+
+reminder_engine = ReminderEngine()
@@ -0,0 +1,84 @@
+"""
+Gestionnaires des tâches de la file (app.services.task_queue), par type.
+
+Chaque gestionnaire reçoit la session du worker et la charge utile de la
+tâche, et retourne un résultat sérialisable en JSON. Une exception déclenche
+un nouvel essai différé.
+"""
+from typing import Callable, Dict
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.services.email_service import EmailService
+from app.services.ingestion_runner import ingestion_runner
+from app.services.ingestion_service import IngestionService
+from app.services.task_queue import TaskQueue, exclusive
+
+
+def run_ingestion(db: Session, payload: dict) -> dict:
+    """
+    Répartir l'ingestion : une tâche par compte, exécutables par des workers différents
+    """
+    queue = TaskQueue(db)
+    slot = payload.get("slot", "manual")
+    accounts = []
+    for connector in ingestion_runner.connectors():
+        task = queue.enqueue(
+            "ingestion.account",
+            {"provider": connector.provider, "account": connector.account},
+            # Nouvel essai de la répartition : pas de seconde tâche par compte
+            idempotency_key=f"ingestion.account:{connector.provider}:{connector.account}:{slot}",
+        )
+        accounts.append({"account": f"{connector.provider}:{connector.account}", "task_id": str(task.id)})
+    db.commit()
+    return {
+        "accounts": accounts,
+        "message": "Ingestion répartie par compte" if accounts else "Aucun connecteur email configuré",
+    }
+
+
+def run_account_ingestion(db: Session, payload: dict) -> dict:
+    """
+    Synchroniser un compte (sauté si un autre worker le synchronise déjà)
+    """
+    key = f"{payload['provider']}:{payload['account']}"
+    connector = next(
+        (c for c in ingestion_runner.connectors() if f"{c.provider}:{c.account}" == key),
+        None,
+    )
+    if connector is None:
+        return {"account": key, "status": "skipped", "message": "Compte plus configuré"}
+    with exclusive(f"ingestion:{key}") as acquired:
+        if not acquired:
+            return {"account": key, "status": "skipped", "message": "Ingestion déjà en cours pour ce compte"}
+        stats: dict = {}
+        IngestionService(db).sync_connector(connector, stats)
+    return {"account": key, "status": "completed", **stats}
+
+
+def run_classification(db: Session, payload: dict) -> dict:
+    counts = EmailService(db).reclassify_stored_emails(only_unclassified=payload.get("only_unclassified", True))
+    return {"classifications": counts}
+
+
+def run_extraction(db: Session, payload: dict) -> dict:
+    return EmailService(db).extract_stored_entities(only_missing=payload.get("only_missing", True))
+
+
+def run_email_extraction(db: Session, payload: dict) -> dict:
+    """
+    Extraction des emails d'un lot importé (tâches indépendantes : réparties entre les workers)
+    """
+    return EmailService(db).extract_stored_entities(
+        only_missing=True, email_ids=[UUID(email_id) for email_id in payload["email_ids"]]
+    )
+
+
+HANDLERS: Dict[str, Callable[[Session, dict], dict]] = {
+    "ingestion.run": run_ingestion,
+    "ingestion.account": run_account_ingestion,
+    "classification.reclassify": run_classification,
+    "extraction.run": run_extraction,
+    "extraction.emails": run_email_extraction,
+}
@@ -0,0 +1,335 @@
+"""
+File de tâches durable en base, partagée entre l'API et les workers.
+
+L'API met les traitements lourds en file (ingestion, classification,
+extraction) et répond aussitôt ; des workers séparés, un ou plusieurs par
+file et par conteneur, les exécutent (python -m app.worker --queue ...).
+
+Réservation : UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) :
+deux workers ne prennent jamais la même tâche et ne s'attendent pas sur les
+lignes déjà réservées. Sous PostgreSQL, un verrou consultatif par file
+(pg_advisory_xact_lock) sérialise les réservations d'une file limitée, pour
+que le nombre de tâches en cours ne dépasse pas TASK_QUEUE_CONCURRENCY.
+
+Une tâche réservée porte le nom du worker et un battement (locked_at) : un
+worker arrêté sans terminer laisse son bail expirer et la tâche est reprise.
+Un échec est réessayé avec un délai exponentiel, jusqu'à max_attempts.
+Une clé d'idempotence garantit une seule tâche pour une même demande.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import UPSERT_INSERTS, engine
+from app.models.models import Task
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+# File de chaque type de tâche (gestionnaires : app.services.task_handlers)
+TASK_QUEUES = {
+    "ingestion.run": "ingestion",
+    "ingestion.account": "ingestion",
+    "classification.reclassify": "classification",
+    "extraction.run": "extraction",
+    "extraction.emails": "extraction",
+}
+QUEUES = sorted(set(TASK_QUEUES.values()))
+
+# Longueur conservée du dernier message d'erreur
+MAX_ERROR_LENGTH = 4000
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    Délai avant le nouvel essai après la tentative `attempt` (exponentiel
+    plafonné, gigue de 50 % pour ne pas relancer ensemble les tâches d'une panne)
+    """
+    delay = min(settings.TASK_RETRY_BASE_SECONDS * 2 ** (attempt - 1), settings.TASK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def scoped_key(kind: str, key: Optional[str]) -> Optional[str]:
+    """
+    Clé d'idempotence fournie par un client (en-tête Idempotency-Key), propre au type de tâche
+    """
+    return f"{kind}:{key}" if key else None
+
+
+def concurrency_limit(queue: str) -> int:
+    return settings.TASK_QUEUE_CONCURRENCY.get(queue, 0)
+
+
+@contextmanager
+def exclusive(key: str) -> Iterator[bool]:
+    """
+    Verrou consultatif PostgreSQL entre processus, tenu sur une connexion
+    dédiée (sans attente : False si un autre processus le détient)
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect() as connection:
+        acquired = connection.scalar(text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": key})
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": key})
+            connection.commit()
+
+
+def task_to_dict(task: Task) -> dict:
+    return {
+        "id": str(task.id),
+        "queue": task.queue,
+        "kind": task.kind,
+        "payload": task.payload,
+        "status": task.status,
+        "idempotency_key": task.idempotency_key,
+        "attempts": task.attempts,
+        "max_attempts": task.max_attempts,
+        "run_at": task.run_at.isoformat() if task.run_at else None,
+        "locked_by": task.locked_by,
+        "locked_at": task.locked_at.isoformat() if task.locked_at else None,
+        "last_error": task.last_error,
+        "result": task.result,
+        "created_at": task.created_at.isoformat() if task.created_at else None,
+        "finished_at": task.finished_at.isoformat() if task.finished_at else None,
+    }
+
+
+class TaskQueue:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---------- Côté API ----------
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict = None,
+        idempotency_key: str = None,
+        coalesce: bool = False,
+        run_at: datetime = None,
+        max_attempts: int = None,
+    ) -> Task:
+        """
+        Mettre une tâche en file (sans commit : validée avec les écritures de
+        l'appelant). Avec une clé déjà connue, retourne la tâche existante ;
+        avec `coalesce`, une tâche identique encore en attente est réutilisée
+        """
+        if kind not in TASK_QUEUES:
+            raise ValueError(f"Type de tâche inconnu : {kind}")
+        payload = payload or {}
+        if idempotency_key:
+            existing = self.db.query(Task).filter(Task.idempotency_key == idempotency_key).first()
+            if existing is not None:
+                return existing
+        if coalesce:
+            pending = self.db.query(Task).filter(Task.kind == kind, Task.status == QUEUED).all()
+            for task in pending:
+                if task.payload == payload:
+                    return task
+
+        row = {
+            "queue": TASK_QUEUES[kind],
+            "kind": kind,
+            "payload": payload,
+            "status": QUEUED,
+            "idempotency_key": idempotency_key,
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.TASK_MAX_ATTEMPTS,
+            "run_at": run_at or datetime.utcnow(),
+        }
+        dialect_insert = UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        if idempotency_key and dialect_insert is not None:
+            # Même clé mise en file entre-temps par une autre instance : la première l'emporte
+            task_id = self.db.scalar(
+                dialect_insert(Task).values(**row)
+                .on_conflict_do_nothing(index_elements=["idempotency_key"])
+                .returning(Task.id)
+            )
+            if task_id is None:
+                return self.db.query(Task).filter(Task.idempotency_key == idempotency_key).one()
+            return self.db.get(Task, task_id)
+        task = Task(**row)
+        self.db.add(task)
+        self.db.flush()
+        return task
+
+    def submit(self, kind: str, payload: dict = None, idempotency_key: str = None, coalesce: bool = False) -> dict:
+        """
+        Mettre une tâche en file et valider ; retourne la tâche sérialisée
+        """
+        task = self.enqueue(kind, payload, idempotency_key=idempotency_key, coalesce=coalesce)
+        self.db.commit()
+        return task_to_dict(task)
+
+    def get_task(self, task_id: UUID) -> Optional[dict]:
+        task = self.db.get(Task, task_id)
+        return task_to_dict(task) if task else None
+
+    def list_tasks(self, queue: str = None, status: str = None, limit: int = 50) -> List[dict]:
+        query = self.db.query(Task)
+        if queue:
+            query = query.filter(Task.queue == queue)
+        if status:
+            query = query.filter(Task.status == status)
+        return [task_to_dict(task) for task in query.order_by(Task.created_at.desc()).limit(limit).all()]
+
+    def retry(self, task_id: UUID) -> Optional[dict]:
+        """
+        Remettre en file une tâche en échec définitif (compteur de tentatives remis à zéro)
+        """
+        task = self.db.get(Task, task_id)
+        if task is None or task.status != FAILED:
+            return None
+        task.status = QUEUED
+        task.attempts = 0
+        task.run_at = datetime.utcnow()
+        task.finished_at = None
+        self.db.commit()
+        return task_to_dict(task)
+
+    def stats(self) -> dict:
+        """
+        Tâches par file et par statut, ancienneté de la plus vieille tâche due
+        """
+        now = datetime.utcnow()
+        queues = {
+            queue: {"concurrency_limit": concurrency_limit(queue), QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for queue in QUEUES
+        }
+        rows = self.db.query(Task.queue, Task.status, func.count()).group_by(Task.queue, Task.status).all()
+        for queue, status, count in rows:
+            queues.setdefault(queue, {"concurrency_limit": concurrency_limit(queue)})[status] = count
+        oldest = self.db.query(Task.queue, func.min(Task.run_at))\
+            .filter(Task.status == QUEUED, Task.run_at <= now)\
+            .group_by(Task.queue)\
+            .all()
+        for queue, run_at in oldest:
+            queues[queue]["oldest_due_seconds"] = round((now - run_at).total_seconds(), 1)
+        return {"enabled": settings.TASK_QUEUE_ENABLED, "queues": queues}
+
+    # ---------- Côté worker (chaque opération est validée aussitôt) ----------
+
+    def claim(self, queue: str, worker_id: str, limit: int) -> list:
+        """
+        Réserver jusqu'à `limit` tâches dues de la file, dans la limite de
+        concurrence de la file ; retourne (id, kind, payload, attempts)
+        """
+        now = datetime.utcnow()
+        max_running = concurrency_limit(queue)
+        try:
+            if max_running and self.db.get_bind().dialect.name == "postgresql":
+                self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"tasks:{queue}"})
+            self._recover_expired(queue, now)
+            if max_running:
+                running = self.db.query(func.count(Task.id))\
+                    .filter(Task.queue == queue, Task.status == RUNNING)\
+                    .scalar()
+                limit = min(limit, max_running - running)
+            if limit <= 0:
+                self.db.commit()
+                return []
+            candidates = (
+                select(Task.id)
+                .where(Task.queue == queue, Task.status == QUEUED, Task.run_at <= now)
+                .order_by(Task.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            rows = self.db.execute(
+                update(Task)
+                .where(Task.id.in_(candidates))
+                .values(status=RUNNING, locked_by=worker_id, locked_at=now, attempts=Task.attempts + 1)
+                .returning(Task.id, Task.kind, Task.payload, Task.attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+            self.db.commit()
+            return rows
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _recover_expired(self, queue: str, now: datetime):
+        """
+        Tâches dont le worker a cessé de battre : remises en file, ou en échec
+        si c'était la dernière tentative
+        """
+        expired = (Task.queue == queue, Task.status == RUNNING,
+                   Task.locked_at < now - timedelta(seconds=settings.TASK_LEASE_SECONDS))
+        released = {"locked_by": None, "locked_at": None, "last_error": "Bail expiré : worker arrêté pendant la tâche"}
+        self.db.execute(
+            update(Task).where(*expired, Task.attempts >= Task.max_attempts)
+            .values(status=FAILED, finished_at=now, **released)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.execute(
+            update(Task).where(*expired)
+            .values(status=QUEUED, run_at=now, **released)
+            .execution_options(synchronize_session=False)
+        )
+
+    def heartbeat(self, worker_id: str, task_ids: List[UUID]) -> set:
+        """
+        Prolonger le bail des tâches en cours ; retourne celles encore détenues
+        """
+        if not task_ids:
+            return set()
+        held = self.db.scalars(
+            update(Task)
+            .where(Task.id.in_(task_ids), Task.locked_by == worker_id, Task.status == RUNNING)
+            .values(locked_at=datetime.utcnow())
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        self.db.commit()
+        return set(held)
+
+    def complete(self, task_id: UUID, worker_id: str, result: dict = None) -> bool:
+        """
+        Marquer la tâche réussie (False si le bail a été perdu entre-temps)
+        """
+        updated = self.db.execute(
+            update(Task)
+            .where(Task.id == task_id, Task.locked_by == worker_id, Task.status == RUNNING)
+            .values(status=SUCCEEDED, result=result, finished_at=datetime.utcnow(), locked_by=None, locked_at=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        return bool(updated)
+
+    def fail(self, task_id: UUID, worker_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Enregistrer un échec : nouvel essai différé tant qu'il reste des
+        tentatives, sinon échec définitif ; retourne le nouveau statut
+        """
+        task = self.db.query(Task)\
+            .filter(Task.id == task_id, Task.locked_by == worker_id, Task.status == RUNNING)\
+            .with_for_update()\
+            .first()
+        if task is None:
+            self.db.rollback()
+            return None
+        now = datetime.utcnow()
+        if retry and task.attempts < task.max_attempts:
+            task.status = QUEUED
+            task.run_at = now + timedelta(seconds=retry_delay(task.attempts))
+        else:
+            task.status = FAILED
+            task.finished_at = now
+        task.last_error = error[:MAX_ERROR_LENGTH]
+        task.locked_by = None
+        task.locked_at = None
+        self.db.commit()
+        return task.status
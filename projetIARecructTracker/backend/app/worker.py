@@ -0,0 +1,131 @@
+"""
+Worker de la file de tâches (app.services.task_queue), un processus par file.
+
+    python -m app.worker --queue ingestion --concurrency 2
+
+Autant de workers que voulu par file, dans autant de conteneurs : la
+réservation SKIP LOCKED répartit les tâches et la limite de la file
+(TASK_QUEUE_CONCURRENCY) s'applique à l'ensemble. SIGTERM termine les
+tâches en cours avant de quitter ; un worker tué laisse son bail expirer.
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+from uuid import UUID
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.ingestion_service import close_connectors
+from app.services.task_handlers import HANDLERS
+from app.services.task_queue import QUEUES, TaskQueue
+
+
+class Worker:
+    def __init__(self, queue: str, concurrency: int = 1, poll_interval: float = None):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval or settings.TASK_POLL_INTERVAL_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{queue}"
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"task-{queue}")
+        self._running: Dict[UUID, Future] = {}
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        if not self._stop.is_set():
+            logger.info(f"Arrêt demandé : fin des {len(self._running)} tâche(s) en cours")
+        self._stop.set()
+
+    def run(self):
+        logger.info(f"Worker {self.worker_id} démarré ({self.concurrency} tâche(s) simultanée(s))")
+        last_heartbeat = time.monotonic()
+        while not self._stop.is_set() or self._running:
+            self._running = {task_id: f for task_id, f in self._running.items() if not f.done()}
+            claimed = 0
+            free = self.concurrency - len(self._running)
+            if free > 0 and not self._stop.is_set():
+                claimed = self._claim(free)
+            if time.monotonic() - last_heartbeat >= settings.TASK_HEARTBEAT_SECONDS:
+                self._heartbeat()
+                last_heartbeat = time.monotonic()
+            if self._stop.is_set():
+                # Arrêt : attente de la fin des tâches en cours
+                time.sleep(self.poll_interval)
+            elif not claimed or len(self._running) >= self.concurrency:
+                # File non vide et emplacement libre : nouvelle réservation sans attendre
+                self._stop.wait(self.poll_interval)
+        self._executor.shutdown(wait=True)
+        close_connectors()
+        logger.info(f"Worker {self.worker_id} arrêté")
+
+    def _claim(self, limit: int) -> int:
+        db = SessionLocal()
+        try:
+            tasks = TaskQueue(db).claim(self.queue, self.worker_id, limit)
+        except Exception:
+            logger.exception(f"Réservation impossible dans la file {self.queue}")
+            return 0
+        finally:
+            db.close()
+        for task in tasks:
+            self._running[task.id] = self._executor.submit(self._execute, task.id, task.kind, task.payload, task.attempts)
+        return len(tasks)
+
+    def _heartbeat(self):
+        task_ids = list(self._running)
+        if not task_ids:
+            return
+        db = SessionLocal()
+        try:
+            held = TaskQueue(db).heartbeat(self.worker_id, task_ids)
+            for task_id in set(task_ids) - held:
+                logger.warning(f"Bail perdu pour la tâche {task_id} (reprise par un autre worker)")
+        except Exception:
+            logger.exception("Battement des tâches en cours impossible")
+        finally:
+            db.close()
+
+    def _execute(self, task_id: UUID, kind: str, payload: dict, attempt: int):
+        handler = HANDLERS.get(kind)
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                TaskQueue(db).fail(task_id, self.worker_id, f"Aucun gestionnaire pour {kind}", retry=False)
+                return
+            result = handler(db, payload or {})
+            TaskQueue(db).complete(task_id, self.worker_id, result)
+            logger.info(f"Tâche {kind} {task_id} terminée en {time.perf_counter() - started:.2f} s")
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Échec de la tâche {kind} {task_id} (tentative {attempt})")
+            try:
+                status = TaskQueue(db).fail(task_id, self.worker_id, f"{type(e).__name__}: {e}")
+                logger.info(f"Tâche {task_id} : {status}")
+            except Exception:
+                logger.exception(f"Échec de la tâche {task_id} non enregistré (bail repris à expiration)")
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queue", required=True, choices=QUEUES)
+    parser.add_argument("--concurrency", type=int, default=1, help="Tâches simultanées dans ce processus")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Secondes entre deux réservations à vide")
+    args = parser.parse_args()
+
+    worker = Worker(args.queue, args.concurrency, args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
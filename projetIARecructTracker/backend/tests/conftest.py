@@ -0,0 +1,64 @@
+"""
+Tests du backend sur SQLite : base de fichier temporaire, schéma recréé et
+index en mémoire remis à zéro avant chaque test. Un DATABASE_URL PostgreSQL
+fourni (base de test dédiée) est conservé pour les tests propres à PostgreSQL.
+"""
+import os
+import tempfile
+
+# Avant tout import de l'application : la configuration est lue à l'import
+_TMP_DIR = tempfile.mkdtemp(prefix="airtrack-tests-")
+_POSTGRES_URL = os.environ.get("DATABASE_URL", "")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["INGESTION_SCHEDULER_ENABLED"] = "false"
+os.environ["CLASSIFICATION_MODEL_PATH"] = f"{_TMP_DIR}/classification_model.pkl"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models.models  # noqa: E402,F401
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.nlp import application_matcher, entity_extractor, model_classifier, near_duplicates  # noqa: E402
+from app.services import ingestion_service, mbox_importer  # noqa: E402
+from app.services.application_stats import application_stats  # noqa: E402
+from app.services.reminder_engine import reminder_engine  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    application_stats.__init__()
+    reminder_engine.__init__()
+    application_matcher._matcher = None
+    near_duplicates._index = None
+    entity_extractor._extractor = None
+    if model_classifier._classifier is not None:
+        model_classifier._classifier.shutdown()
+    model_classifier._classifier = None
+    ingestion_service._connectors.clear()
+    mbox_importer._progress.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def postgres_url():
+    if not _POSTGRES_URL.startswith("postgresql"):
+        pytest.skip("DATABASE_URL PostgreSQL requis")
+    return _POSTGRES_URL
+
+
+@pytest.fixture
+def client():
+    # Sans bloc `with` : les tâches planifiées du démarrage ne sont pas lancées
+    from app.main import app
+    return TestClient(app)
@@ -0,0 +1,149 @@
+"""
+Agrégats analytiques : intégration incrémentale idempotente, indépendante du
+découpage en lots, et événements trop récents différés au passage suivant.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.models import (
+    AnalyticsDailyRollup, AnalyticsWatermark, Application, ApplicationEvent, ApplicationMilestone
+)
+from app.services.analytics_service import COMMIT_LAG, AnalyticsService
+
+# Passé : l'endpoint de mise à jour intègre tout l'historique
+NOW = datetime.utcnow().replace(microsecond=0) - timedelta(days=1)
+
+
+def status_change(application, previous, new, at):
+    return ApplicationEvent(
+        application=application,
+        event_type="STATUS_CHANGE",
+        payload={"previous_status": previous, "new_status": new},
+        created_at=at,
+    )
+
+
+@pytest.fixture
+def history(db):
+    applied = NOW - timedelta(days=20)
+    acme = Application(company_name="Acme", job_title="Dev", source="linkedin", created_at=applied)
+    globex = Application(company_name="Globex", job_title="Dev", source="linkedin", created_at=applied)
+    initech = Application(company_name="Initech", job_title="Dev", source="site", created_at=applied)
+    db.add_all([
+        status_change(acme, None, "APPLIED", applied),
+        status_change(acme, "APPLIED", "ACKNOWLEDGED", applied + timedelta(days=2)),
+        status_change(acme, "ACKNOWLEDGED", "INTERVIEW", applied + timedelta(days=6)),
+        # Retour en arrière : l'étape déjà atteinte n'est pas recomptée
+        status_change(acme, "INTERVIEW", "SCREENING", applied + timedelta(days=7)),
+        status_change(acme, "SCREENING", "INTERVIEW", applied + timedelta(days=8)),
+        status_change(globex, None, "APPLIED", applied),
+        status_change(globex, "APPLIED", "REJECTED", applied + timedelta(days=5)),
+        status_change(initech, None, "APPLIED", applied),
+        ApplicationEvent(application=initech, event_type="NOTE", payload={}, created_at=applied + timedelta(days=1)),
+    ])
+    db.commit()
+
+
+def rollup_rows(db):
+    return sorted(
+        (row.day, row.company_name, row.source, row.metric, row.bucket, row.count)
+        for row in db.query(AnalyticsDailyRollup)
+    )
+
+
+def test_batch_size_does_not_change_the_rollups(db, history):
+    single = AnalyticsService(db).refresh_rollups(batch_size=100, now=NOW)
+    assert single == {"events": 9, "batches": 1}
+    expected = rollup_rows(db)
+
+    for model in (AnalyticsDailyRollup, ApplicationMilestone, AnalyticsWatermark):
+        db.query(model).delete()
+    db.commit()
+
+    batched = AnalyticsService(db).refresh_rollups(batch_size=2, now=NOW)
+    assert batched == {"events": 9, "batches": 5}
+    assert rollup_rows(db) == expected
+
+
+def test_funnel_and_response_time(db, history):
+    service = AnalyticsService(db)
+    service.refresh_rollups(batch_size=2, now=NOW)
+
+    funnel = service.funnel()
+    assert funnel["applications"] == 3
+    assert funnel["stages"]["APPLIED"] == 3
+    assert funnel["stages"]["ACKNOWLEDGED"] == 1
+    assert funnel["stages"]["SCREENING"] == 1
+    assert funnel["stages"]["INTERVIEW"] == 1
+    assert funnel["stages"]["REJECTED"] == 1
+    assert funnel["conversions"][0] == {"from": "APPLIED", "to": "ACKNOWLEDGED", "rate": round(1 / 3, 4)}
+
+    response_time = service.response_time()
+    assert response_time["responded"] == 2 and response_time["histogram"] == {2: 1, 5: 1}
+    assert response_time["median_days"] == 2 and response_time["p90_days"] == 5
+    assert service.response_time(company="Initech")["responded"] == 0
+
+
+def test_refresh_is_idempotent(db, history):
+    service = AnalyticsService(db)
+    service.refresh_rollups(batch_size=3, now=NOW)
+    expected = rollup_rows(db)
+    assert service.refresh_rollups(batch_size=3, now=NOW) == {"events": 0, "batches": 0}
+    assert service.refresh_rollups(batch_size=3, now=NOW + timedelta(hours=1)) == {"events": 0, "batches": 0}
+    assert rollup_rows(db) == expected
+
+
+def test_recent_events_wait_for_the_commit_lag(db, history):
+    service = AnalyticsService(db)
+    service.refresh_rollups(now=NOW)
+    initech = db.query(Application).filter(Application.company_name == "Initech").one()
+    db.add(status_change(initech, "APPLIED", "OFFER", NOW - COMMIT_LAG / 2))
+    db.commit()
+
+    assert service.refresh_rollups(now=NOW) == {"events": 0, "batches": 0}
+    assert service.funnel()["stages"]["OFFER"] == 0
+    assert service.refresh_rollups(now=NOW + COMMIT_LAG)["events"] == 1
+    funnel = service.funnel()
+    assert funnel["stages"]["OFFER"] == 1 and funnel["stages"]["INTERVIEW"] == 2
+    assert service.response_time(company="Initech")["histogram"] == {19: 1}
+
+
+def test_analytics_endpoints(client, db, history):
+    assert client.post("/api/v1/analytics/refresh").json()["events"] == 9
+    assert client.post("/api/v1/analytics/refresh").json()["events"] == 0
+    funnel = client.get("/api/v1/analytics/funnel", params={"source": "linkedin"}).json()
+    assert funnel["applications"] == 2 and funnel["stages"]["REJECTED"] == 1
+    series = client.get("/api/v1/analytics/response-rate", params={"group_by": "source"}).json()["series"]
+    assert {(row["source"], row["responded"], row["applications"]) for row in series} == {("linkedin", 2, 2), ("site", 0, 1)}
+
+
+def test_rebuild_recovers_events_committed_behind_the_watermark(client, db, history):
+    service = AnalyticsService(db)
+    service.refresh_rollups(now=NOW)
+    expected_stages = service.funnel()["stages"]
+    # Transaction plus longue que COMMIT_LAG : événement daté avant le watermark
+    initech = db.query(Application).filter(Application.company_name == "Initech").one()
+    db.add(status_change(initech, "APPLIED", "SCREENING", NOW - timedelta(days=15)))
+    db.commit()
+
+    assert service.refresh_rollups(now=NOW)["events"] == 0
+    assert service.funnel()["stages"] == expected_stages
+
+    result = client.post("/api/v1/analytics/refresh", params={"full": True}).json()
+    assert result["events"] == 10 and result["last_event_at"] == (NOW - timedelta(days=12)).isoformat()
+    db.expire_all()
+    funnel = service.funnel()
+    assert funnel["applications"] == 3 and funnel["stages"]["SCREENING"] == 2
+    assert service.response_time(company="Initech")["histogram"] == {5: 1}
+    assert db.query(ApplicationMilestone).count() == 3
+
+    # Même résultat qu'une intégration depuis une base vide
+    rebuilt = rollup_rows(db)
+    for model in (AnalyticsDailyRollup, ApplicationMilestone, AnalyticsWatermark):
+        db.query(model).delete()
+    db.commit()
+    service.refresh_rollups(batch_size=4, now=NOW)
+    assert rollup_rows(db) == rebuilt
+    assert service.rebuild_rollups(batch_size=3, now=NOW) == {"events": 10, "batches": 4}
+    assert rollup_rows(db) == rebuilt
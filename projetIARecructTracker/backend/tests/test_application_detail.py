@@ -0,0 +1,70 @@
+"""
+Détail d'une candidature : derniers événements, suite de la chronologie par
+curseur, résumé des emails liés et candidature inconnue.
+"""
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.models.models import Application, ApplicationEvent, Email
+
+
+@pytest.fixture
+def application_id(db):
+    now = datetime.utcnow()
+    application = Application(company_name="Acme", job_title="Dev")
+    db.add(application)
+    db.add_all([
+        # Horodatages en double : départagés par l'id
+        ApplicationEvent(application=application, event_type="NOTE", payload={"index": index},
+                         created_at=now - timedelta(minutes=index // 2))
+        for index in range(7)
+    ])
+    db.add_all([
+        Email(external_id=f"<{index}@acme.fr>", subject=f"Message {index}", application=application,
+              sent_at=now - timedelta(days=index))
+        for index in range(3)
+    ])
+    db.add(Email(external_id="<autre@globex.fr>", subject="Autre"))
+    db.commit()
+    return str(application.id)
+
+
+def test_detail_then_timeline_walks_every_event_once(client, db, application_id):
+    detail = client.get(f"/api/v1/applications/{application_id}", params={"events_limit": 3, "emails_limit": 2}).json()
+    assert detail["company_name"] == "Acme"
+    assert [email["subject"] for email in detail["emails"]] == ["Message 0", "Message 1"]
+    assert detail["emails_total"] == 3
+
+    seen = [event["id"] for event in detail["events"]]
+    cursor = detail["events_next_cursor"]
+    while cursor:
+        page = client.get(f"/api/v1/applications/{application_id}/events", params={"limit": 3, "cursor": cursor}).json()
+        seen += [event["id"] for event in page["items"]]
+        cursor = page["next_cursor"]
+
+    expected = db.query(ApplicationEvent.id)\
+        .order_by(ApplicationEvent.created_at.desc(), ApplicationEvent.id.desc())\
+        .all()
+    assert seen == [str(row.id) for row in expected]
+    # Sans pagination : tout l'historique, du plus récent au plus ancien
+    events = client.get(f"/api/v1/applications/{application_id}/events").json()
+    assert [event["id"] for event in events] == seen
+
+
+def test_application_without_events_or_emails(client, db):
+    application = Application(company_name="Initech", job_title="Ops")
+    db.add(application)
+    db.commit()
+    detail = client.get(f"/api/v1/applications/{application.id}").json()
+    assert detail["events"] == [] and detail["events_next_cursor"] is None
+    assert detail["emails"] == [] and detail["emails_total"] == 0
+    assert client.get(f"/api/v1/applications/{application.id}/events", params={"limit": 5}).json()["items"] == []
+
+
+def test_unknown_application(client, application_id):
+    unknown = uuid4()
+    assert client.get(f"/api/v1/applications/{unknown}").status_code == 404
+    assert client.get(f"/api/v1/applications/{unknown}/events").status_code == 404
+    assert client.get(f"/api/v1/applications/{application_id}/events", params={"cursor": "xyz"}).status_code == 400
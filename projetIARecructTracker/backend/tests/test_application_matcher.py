@@ -0,0 +1,107 @@
+"""
+Rapprochement email -> candidature : index inversé, seuil et marge,
+signal concordant requis et domaines appris des seules liaisons manuelles.
+"""
+import pytest
+
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Application, Email
+from app.models.schemas import EmailCreate
+from app.nlp.application_matcher import domain_keys, get_application_matcher
+from app.services.email_service import EmailService
+
+
+@pytest.fixture
+def applications(db):
+    rows = {
+        "acme": Application(company_name="Acme SAS", job_title="Data Engineer"),
+        "bnp": Application(company_name="BNP Paribas", job_title="Développeur Java"),
+        "globex": Application(company_name="Globex", job_title="Data Engineer"),
+        "globex_ops": Application(company_name="Globex", job_title="Ingénieur DevOps"),
+    }
+    db.add_all(rows.values())
+    db.commit()
+    return {key: row.id for key, row in rows.items()}
+
+
+def email(external_id: str, subject: str, sender: str, body: str = "Bonjour,") -> EmailCreate:
+    return EmailCreate(external_id=external_id, subject=subject, sender=sender, raw_body=body)
+
+
+def test_domain_keys_skip_mail_providers_and_ats():
+    assert domain_keys("RH <rh@jobs.acme-corp.fr>") == {"acmecorp"}
+    assert domain_keys("no-reply@greenhouse.io") == set()
+    assert domain_keys("camille@gmail.com") == set()
+    assert domain_keys(None) == set()
+
+
+def test_company_needs_an_agreeing_signal(db, applications):
+    matcher = get_application_matcher()
+    matcher.ensure_loaded(db)
+    # Entreprise citée et confirmée par l'intitulé
+    assert matcher.match("Votre candidature Data Engineer chez Acme", "no-reply@greenhouse.io", None) == applications["acme"]
+    # Nom compacté : "BNP Paribas" reconnu dans bnpparibas.com
+    assert matcher.match("BNP Paribas : accusé de réception", "recrutement@bnpparibas.com", None) == applications["bnp"]
+    # Un seul signal : entreprise seule, domaine seul ou intitulé seul
+    assert matcher.match("Votre candidature chez Acme", "no-reply@greenhouse.io", None) is None
+    assert matcher.match("Accusé de réception", "recrutement@bnpparibas.com", None) is None
+    assert matcher.match("Poste de Data Engineer", "camille@gmail.com", None) is None
+
+
+def test_newsletters_and_job_alerts_naming_the_company_stay_unlinked(db, applications):
+    service = EmailService(db)
+    newsletter = email("<n@fnac.com>", "Les offres de la semaine", "news@fnac.com",
+                       "Profitez de -20 % sur les box et forfaits BNP Paribas Mobile et Acme Telecom.")
+    alert = email("<j@linkedin.com>", "Nouvelles offres : Chef de projet chez Acme",
+                  "jobalerts-noreply@linkedin.com", "3 nouvelles offres correspondent à votre alerte.")
+    with UnitOfWork(db) as uow:
+        service.bulk_insert_emails([newsletter, alert], uow)
+    assert db.query(Email).filter(Email.application_id.isnot(None)).count() == 0
+
+    # Même quand un rattachement automatique a lieu, le domaine n'est pas appris
+    with UnitOfWork(db) as uow:
+        service.bulk_insert_emails([email("<p@fnac.com>", "Acme : votre candidature Data Engineer", "news@fnac.com")], uow)
+    assert db.query(Email).filter(Email.link_source == "auto").count() == 1
+    assert get_application_matcher().match("Acme : nouveautés", "news@fnac.com", None) is None
+
+
+def test_ambiguous_matches_are_left_to_the_user(db, applications):
+    matcher = get_application_matcher()
+    matcher.ensure_loaded(db)
+    assert matcher.match("Votre candidature chez Globex", "rh@globex.com", None) is None
+    # L'intitulé départage les deux candidatures Globex
+    assert matcher.match("Globex : votre candidature Ingénieur DevOps", "rh@globex.com", None) == applications["globex_ops"]
+    candidates = matcher.candidates("Votre candidature chez Globex", "rh@globex.com", None)
+    assert {candidate.application_id for candidate in candidates[:2]} == {applications["globex"], applications["globex_ops"]}
+
+
+def test_manual_link_teaches_the_sender_domain(db, applications):
+    stored = Email(external_id="<a@x>", subject="Entretien", sender="talent@initech.io")
+    db.add(stored)
+    db.commit()
+    matcher = get_application_matcher()
+    matcher.ensure_loaded(db)
+    follow_up = ("Suite de votre entretien chez Acme", "talent@initech.io", None)
+    assert matcher.match(*follow_up) is None
+
+    assert EmailService(db).link_email_to_application(stored.id, applications["acme"]) == 1
+    assert db.get(Email, stored.id).link_source == "user"
+    assert matcher.match(*follow_up) == applications["acme"]
+
+    # Index reconstruit (autre processus) : les liaisons manuelles sont réapprises
+    matcher.load(db)
+    assert matcher.match(*follow_up) == applications["acme"]
+
+
+def test_index_follows_application_changes(client, db):
+    created = client.post("/api/v1/applications/", json={"job_title": "Data Engineer", "company_name": "Umbrella"}).json()
+    matcher = get_application_matcher()
+    matcher.ensure_loaded(db)
+    assert str(matcher.match("Candidature Umbrella Data Engineer", None, None)) == created["id"]
+
+    client.patch(f"/api/v1/applications/{created['id']}", json={"company_name": "Hooli"})
+    assert matcher.match("Candidature Umbrella Data Engineer", None, None) is None
+    assert str(matcher.match("Candidature Hooli Data Engineer", None, None)) == created["id"]
+
+    client.delete(f"/api/v1/applications/{created['id']}")
+    assert matcher.match("Candidature Hooli Data Engineer", None, None) is None
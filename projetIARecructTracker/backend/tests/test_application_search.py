@@ -0,0 +1,65 @@
+"""
+Recherche plein texte des candidatures (FTS5 sous SQLite) : classement,
+préfixes, accents, requêtes hostiles et index tenu à jour par triggers.
+"""
+import pytest
+
+from app.services.application_search import fts5_query
+
+
+@pytest.fixture
+def applications(client):
+    created = {}
+    for key, payload in {
+        "title": {"job_title": "Data Engineer", "company_name": "Acme"},
+        "notes": {"job_title": "Développeur", "company_name": "Globex", "notes": "Stack data moderne"},
+        "company": {"job_title": "Analyste", "company_name": "Data Corp"},
+        "other": {"job_title": "Chef de projet", "company_name": "Initech"},
+    }.items():
+        created[key] = client.post("/api/v1/applications/", json=payload).json()["id"]
+    return created
+
+
+def search(client, q, **params):
+    response = client.get("/api/v1/applications/", params={"q": q, **params})
+    assert response.status_code == 200
+    return [application["id"] for application in response.json()]
+
+
+def test_ranks_title_and_company_above_notes(client, applications):
+    results = search(client, "data")
+    assert set(results) == {applications["title"], applications["notes"], applications["company"]}
+    assert results[-1] == applications["notes"]
+
+
+def test_prefix_accent_and_multi_word_queries(client, applications):
+    assert search(client, "dévelop") == [applications["notes"]]
+    assert search(client, "Engi") == [applications["title"]]
+    # Tous les mots sont requis
+    assert search(client, "data engineer") == [applications["title"]]
+    assert search(client, "data initech") == []
+
+
+@pytest.mark.parametrize("q", ['"', "data OR", "NEAR(data", "*", "a:b", "-data", "'; DROP TABLE applications; --"])
+def test_hostile_queries_do_not_fail(client, applications, q):
+    search(client, q)
+
+
+def test_fts5_query_quotes_every_token():
+    assert fts5_query('data" OR x') == '"data"* "OR"* "x"*'
+    assert fts5_query("  ;; ") is None
+
+
+def test_index_follows_updates_and_deletes(client, applications):
+    client.patch(f"/api/v1/applications/{applications['other']}", json={"notes": "Pipeline data temps réel"})
+    assert applications["other"] in search(client, "pipeline")
+    client.delete(f"/api/v1/applications/{applications['title']}")
+    assert search(client, "engineer") == []
+
+
+def test_search_combines_with_filters_and_cursor_pagination(client, applications):
+    assert search(client, "data", company="Globex") == [applications["notes"]]
+    page = client.get("/api/v1/applications/", params={"q": "data", "pagination": "cursor", "limit": 2}).json()
+    rest = client.get("/api/v1/applications/", params={"q": "data", "cursor": page["next_cursor"], "limit": 2}).json()
+    ids = [item["id"] for item in page["items"] + rest["items"]]
+    assert sorted(ids) == sorted([applications["title"], applications["notes"], applications["company"]])
@@ -0,0 +1,105 @@
+"""
+Statistiques tenues à jour en mémoire : cohérence avec la base après les
+écritures du service, réconciliation des écarts et écritures concurrentes.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import update
+
+from app.models.models import Application
+from app.services.application_stats import ApplicationStats, application_stats
+
+
+def database_summary(db) -> dict:
+    now = datetime.utcnow()
+    rows = db.query(Application.status, Application.next_action_at).all()
+    return {
+        "total": len(rows),
+        "status_breakdown": dict(Counter(row.status for row in rows)),
+        "overdue_actions": sum(
+            1 for row in rows
+            if row.status in ("APPLIED", "ACKNOWLEDGED", "SCREENING") and row.next_action_at and row.next_action_at < now
+        ),
+    }
+
+
+def test_summary_follows_service_writes(client, db):
+    past = (datetime.utcnow() - timedelta(days=2)).isoformat()
+    ids = [
+        client.post("/api/v1/applications/", json={"job_title": "Dev", "company_name": f"E{index}", "next_action_at": past}).json()["id"]
+        for index in range(4)
+    ]
+    client.post("/api/v1/applications/", json={"job_title": "Dev", "company_name": "Future"})
+    client.patch(f"/api/v1/applications/{ids[0]}", json={"status": "INTERVIEW"})
+    client.patch(f"/api/v1/applications/{ids[1]}", json={"next_action_at": (datetime.utcnow() + timedelta(days=3)).isoformat()})
+    client.delete(f"/api/v1/applications/{ids[2]}")
+
+    summary = client.get("/api/v1/applications/stats/summary").json()
+    assert summary == database_summary(db)
+    assert summary == {"total": 4, "status_breakdown": {"APPLIED": 3, "INTERVIEW": 1}, "overdue_actions": 1}
+
+
+def test_reconciliation_corrects_out_of_band_writes(client, db):
+    for index in range(3):
+        client.post("/api/v1/applications/", json={"job_title": "Dev", "company_name": f"E{index}"})
+    client.get("/api/v1/applications/stats/summary")
+    assert application_stats.reconcile(db) == {}
+
+    # Écriture d'un autre processus, invisible pour les compteurs en mémoire
+    db.execute(update(Application).values(status="REJECTED").where(Application.company_name == "E0"))
+    db.commit()
+    assert client.get("/api/v1/applications/stats/summary").json()["status_breakdown"] == {"APPLIED": 3}
+
+    # La candidature refusée quitte aussi les échéances suivies
+    assert application_stats.reconcile(db) == {"APPLIED": -1, "REJECTED": 1, "pending_actions": -1}
+    assert client.get("/api/v1/applications/stats/summary").json() == database_summary(db)
+    assert application_stats.status()["drift_corrections"] == 1
+
+
+class ConcurrentWriteSession:
+    """
+    Session dont la lecture de réconciliation voit l'état d'avant une
+    écriture arrivée pendant la requête
+    """
+
+    def __init__(self, stats, rows, write):
+        self.stats, self.rows, self.write = stats, rows, write
+
+    def query(self, *columns):
+        return self
+
+    def all(self):
+        self.write(self.stats)
+        return self.rows
+
+
+def test_writes_during_reconciliation_are_replayed():
+    stats = ApplicationStats()
+    kept, deleted, created = uuid4(), uuid4(), uuid4()
+    due = datetime.utcnow() - timedelta(days=1)
+    stale_rows = [
+        SimpleNamespace(id=kept, status="APPLIED", next_action_at=due),
+        SimpleNamespace(id=deleted, status="APPLIED", next_action_at=due),
+    ]
+
+    def concurrent_writes(stats):
+        stats.on_upsert(kept, "OFFER", None)
+        stats.on_delete(deleted)
+        stats.on_upsert(created, "SCREENING", due)
+
+    stats.reconcile(ConcurrentWriteSession(stats, stale_rows, concurrent_writes))
+    assert stats.summary() == {"total": 2, "status_breakdown": {"OFFER": 1, "SCREENING": 1}, "overdue_actions": 1}
+
+
+def test_overdue_uses_the_due_time_order():
+    stats = ApplicationStats()
+    now = datetime.utcnow()
+    for days in (-3, -1, 2):
+        stats.on_upsert(uuid4(), "APPLIED", now + timedelta(days=days))
+    stats.on_upsert(uuid4(), "INTERVIEW", now - timedelta(days=5))
+    stats.on_upsert(uuid4(), "APPLIED", None)
+    assert stats.summary(now)["overdue_actions"] == 2
+    assert stats.summary(now + timedelta(days=3))["overdue_actions"] == 3
@@ -0,0 +1,78 @@
+import io
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Application, ApplicationEvent
+from app.models.schemas import ApplicationCreate, ApplicationStatus
+from app.services.application_service import ApplicationService
+from app.services.application_stats import application_stats
+from app.services.reminder_engine import reminder_engine
+
+
+def test_create_with_timezone_aware_next_action(client, db):
+    response = client.post("/api/v1/applications/", json={
+        "job_title": "Data Engineer", "company_name": "Acme", "next_action_at": "2030-01-01T02:00:00+02:00",
+    })
+    assert response.status_code == 201
+    application = db.get(Application, UUID(response.json()["id"]))
+    assert application.next_action_at == datetime(2030, 1, 1, 0, 0)
+    # Les index en mémoire restent comparables avec des dates sans fuseau
+    application_stats.on_upsert(uuid4(), "APPLIED", datetime(2029, 1, 1))
+    reminder_engine.on_upsert(uuid4(), "APPLIED", datetime(2029, 1, 1))
+    assert reminder_engine.status()["pending"] == 2
+
+
+def test_update_with_timezone_aware_next_action(client):
+    created = client.post("/api/v1/applications/", json={"job_title": "Dev", "company_name": "Acme"}).json()
+    client.post("/api/v1/applications/", json={"job_title": "Ops", "company_name": "Globex"})
+    response = client.patch(f"/api/v1/applications/{created['id']}", json={"next_action_at": "2030-01-01T00:00:00Z"})
+    assert response.status_code == 200
+    assert response.json()["next_action_at"] == "2030-01-01T00:00:00"
+    assert client.get("/api/v1/applications/stats/summary").json()["total"] == 2
+
+
+def test_create_writes_status_event_in_same_transaction(db):
+    application = ApplicationService(db).create_application(ApplicationCreate(job_title="Dev", company_name="Acme"))
+    events = db.query(ApplicationEvent).filter(ApplicationEvent.application_id == application.id).all()
+    assert [event.payload["action"] for event in events] == ["application_created"]
+    assert application.next_action_at > datetime.utcnow() + timedelta(days=6)
+
+
+def test_bulk_create_and_status_update(db):
+    service = ApplicationService(db)
+    ids = service.bulk_create_applications([
+        ApplicationCreate(job_title=f"Poste {i}", company_name="Acme") for i in range(5)
+    ], batch_size=2)
+    assert db.query(Application).count() == 5
+    assert db.query(ApplicationEvent).count() == 5
+
+    result = service.bulk_update_status(ids[:3] + [uuid4()], ApplicationStatus.INTERVIEW)
+    assert result == {"updated": 3, "unchanged": 0, "not_found": 1}
+    assert service.bulk_update_status(ids[:1], ApplicationStatus.INTERVIEW)["unchanged"] == 1
+    assert application_stats.summary()["status_breakdown"] == {"INTERVIEW": 3, "APPLIED": 2}
+
+
+def test_csv_import_reports_invalid_lines(db):
+    csv_data = b"job_title;company_name;status\nDev;Acme;applied\n;Globex;\nOps;Initech;NOPE\n"
+    result = ApplicationService(db).import_csv(io.BytesIO(csv_data))
+    assert result["imported"] == 1
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+
+
+def test_unit_of_work_runs_callbacks_only_after_commit(db):
+    applied = []
+    with UnitOfWork(db) as uow:
+        db.add(Application(job_title="Dev", company_name="Acme"))
+        uow.after_commit(lambda: applied.append("committed"))
+    assert applied == ["committed"]
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(db) as uow:
+            db.add(Application(job_title="Ops", company_name="Acme"))
+            uow.after_commit(lambda: applied.append("rolled back"))
+            raise RuntimeError("échec")
+    assert applied == ["committed"]
+    assert db.query(Application).count() == 1
@@ -0,0 +1,92 @@
+"""
+Sessions asynchrones de l'API : une session par requête, requêtes
+concurrentes servies en parallèle, et réglages dérivés de DATABASE_URL.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import async_database_url, pool_options
+from app.models.models import Application
+
+
+class TrackedSessions:
+    """
+    Fabrique de sessions comptant les sessions ouvertes en même temps
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.sessions = []
+        self.open = 0
+        self.peak = 0
+
+    def __call__(self):
+        tracker = self
+
+        class Tracked:
+            async def __aenter__(self):
+                self.session = await tracker.factory().__aenter__()
+                tracker.sessions.append(self.session)
+                tracker.open += 1
+                tracker.peak = max(tracker.peak, tracker.open)
+                # Laisser les autres requêtes ouvrir leur session
+                await asyncio.sleep(0.01)
+                return self.session
+
+            async def __aexit__(self, *exc_info):
+                tracker.open -= 1
+                return await self.session.__aexit__(*exc_info)
+        return Tracked()
+
+
+def test_concurrent_requests_get_their_own_session(db, monkeypatch):
+    from app.main import app
+    db.add_all([Application(company_name=f"Entreprise {index}", job_title="Dev") for index in range(3)])
+    db.commit()
+    tracked = TrackedSessions(database.AsyncSessionLocal)
+    monkeypatch.setattr(database, "AsyncSessionLocal", tracked)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[client.get("/api/v1/applications/") for _ in range(8)],
+                client.get("/api/v1/applications/00000000-0000-0000-0000-000000000000"),
+                client.get("/api/v1/analytics/funnel"),
+            )
+    responses = asyncio.run(run())
+
+    assert [response.status_code for response in responses] == [200] * 8 + [404, 200]
+    assert all(len(response.json()) == 3 for response in responses[:8])
+    assert tracked.peak == 10 and tracked.open == 0
+    assert len({id(session) for session in tracked.sessions}) == 10
+    assert not any(session.in_transaction() for session in tracked.sessions)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://airtrack:secret@db:5432/airtrackdb", "postgresql+psycopg://airtrack:secret@db:5432/airtrackdb"),
+    ("postgresql+psycopg2://airtrack:secret@db/airtrackdb", "postgresql+psycopg://airtrack:secret@db/airtrackdb"),
+    ("sqlite:////tmp/airtrack.db", "sqlite+aiosqlite:////tmp/airtrack.db"),
+    ("sqlite+aiosqlite:///airtrack.db", "sqlite+aiosqlite:///airtrack.db"),
+    ("mysql+aiomysql://airtrack:secret@db/airtrackdb", "mysql+aiomysql://airtrack:secret@db/airtrackdb"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+
+def test_pool_options(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 2)
+    assert pool_options("sqlite:///airtrack.db") == {}
+    assert pool_options("sqlite+aiosqlite:///airtrack.db") == {}
+    assert pool_options("postgresql+psycopg://airtrack:secret@db/airtrackdb") == {
+        "pool_size": 5,
+        "max_overflow": 2,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
@@ -0,0 +1,67 @@
+"""
+Contenu brut des emails compressé (zstd) dans email_contents : aller-retour,
+lecture par lots, vue détaillée et listes sans contenu.
+"""
+import pytest
+
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Email, EmailContent
+from app.models.schemas import EmailCreate
+from app.services import email_content
+from app.services.email_content import content_rows, load_bodies, load_content, unpack
+from app.services.email_service import EmailService
+
+HEADERS = "From: rh@acme.fr\r\nSubject: Entretien\r\nMessage-ID: <1@acme.fr>"
+BODY = "Bonjour,\n\nNous souhaitons vous rencontrer pour un entretien. Réponse attendue. " * 40
+
+
+def test_rows_round_trip_and_skip_empty_content():
+    rows = content_rows([("a", HEADERS, BODY), ("b", None, None), ("c", None, "Été")])
+    assert [row["email_id"] for row in rows] == ["a", "c"]
+    packed = rows[0]
+    assert len(packed["raw_body"]) < len(BODY.encode("utf-8")) // 5
+    assert unpack(packed["raw_headers"]) == HEADERS and unpack(packed["raw_body"]) == BODY
+    assert packed["raw_size"] == len(HEADERS) + len(BODY.encode("utf-8"))
+    assert rows[1]["raw_headers"] is None and unpack(rows[1]["raw_body"]) == "Été"
+    with pytest.raises(ValueError):
+        unpack(packed["raw_body"], "gzip")
+
+
+def test_created_email_stores_content_in_the_side_table(client, db):
+    email = EmailService(db).create_email(
+        EmailCreate(external_id="<1@acme.fr>", subject="Entretien", raw_headers=HEADERS, raw_body=BODY)
+    )
+    assert "raw_body" not in Email.__table__.columns
+    stored = db.get(EmailContent, email.id)
+    assert stored.codec == "zstd" and stored.raw_body != BODY.encode("utf-8")
+    assert load_content(db, email.id) == {"raw_headers": HEADERS, "raw_body": BODY}
+
+    detail = client.get(f"/api/v1/emails/{email.id}").json()
+    assert detail["raw_body"] == BODY and detail["raw_headers"] == HEADERS
+    listed = client.get("/api/v1/emails/").json()
+    assert [item["id"] for item in listed] == [str(email.id)] and "raw_body" not in listed[0]
+
+
+def test_email_without_content_has_no_row(db):
+    email = EmailService(db).create_email(EmailCreate(external_id="<2@acme.fr>", subject="Sans corps"))
+    assert db.get(EmailContent, email.id) is None
+    assert load_content(db, email.id) == {"raw_headers": None, "raw_body": None}
+
+
+def test_bulk_insert_stores_content_once_and_loads_in_batches(db, monkeypatch):
+    service = EmailService(db)
+    emails = [
+        EmailCreate(external_id=f"<{index}@acme.fr>", subject=f"Message {index}", raw_body=f"Corps numéro {index}")
+        for index in range(5)
+    ]
+    with UnitOfWork(db) as uow:
+        ids = service.bulk_insert_emails(emails, uow)
+    # Déjà stocké : ni email ni contenu en double
+    with UnitOfWork(db) as uow:
+        again = service.bulk_insert_emails([EmailCreate(external_id="<0@acme.fr>", raw_body="Autre corps")], uow)
+    assert again == [None]
+    assert db.query(EmailContent).count() == 5
+
+    monkeypatch.setattr(email_content, "LOAD_BATCH_SIZE", 2)
+    bodies = load_bodies(db, ids + [ids[0]])
+    assert bodies == {email_id: f"Corps numéro {index}" for index, email_id in enumerate(ids)}
@@ -0,0 +1,73 @@
+"""
+Import de fichiers .eml : dédoublonnage ensembliste (base et lot), erreurs par
+fichier, insertion en une transaction à nombre de requêtes constant.
+"""
+from app.core.query_metrics import QUERY_COUNT_HEADER
+from app.models.models import Email
+
+
+def eml(message_id: str, subject: str = "Votre candidature chez Acme") -> bytes:
+    return (
+        f"Message-ID: <{message_id}@mail.example.com>\r\n"
+        "From: Acme RH <jobs@acme.com>\r\nTo: candidat@example.com\r\n"
+        f"Subject: {subject}\r\nDate: Mon, 05 Oct 2026 10:00:00 +0000\r\n\r\n"
+        "Bonjour,\r\nNous avons bien reçu votre candidature.\r\n"
+    ).encode()
+
+
+def upload(client, files):
+    return client.post(
+        "/api/v1/emails/import",
+        files=[("files", (name, content, "message/rfc822")) for name, content in files],
+    )
+
+
+def test_statuses_per_file(client, db):
+    db.add(Email(external_id="<known@mail.example.com>", subject="Déjà importé"))
+    db.commit()
+
+    response = upload(client, [
+        ("a.eml", eml("a")),
+        ("vide.eml", b""),
+        ("a-bis.eml", eml("a")),
+        ("known.eml", eml("known")),
+        ("b.eml", eml("b", "Invitation à un entretien")),
+    ])
+
+    assert response.status_code == 200
+    results = {result["filename"]: result for result in response.json()["results"]}
+    assert results["a.eml"]["status"] == "imported"
+    assert results["b.eml"]["status"] == "imported"
+    assert results["vide.eml"]["status"] == "error"
+    # Doublon du lot : renvoie l'email importé par le premier fichier
+    assert results["a-bis.eml"] == {
+        "filename": "a-bis.eml", "status": "already_exists", "email_id": results["a.eml"]["email_id"]
+    }
+    known_id = db.query(Email.id).filter(Email.external_id == "<known@mail.example.com>").scalar()
+    assert results["known.eml"]["email_id"] == str(known_id)
+    assert db.query(Email).count() == 3
+
+
+def test_imported_email_keeps_parsed_fields_and_raw_content(client, db):
+    (result,) = upload(client, [("a.eml", eml("a"))]).json()["results"]
+    detail = client.get(f"/api/v1/emails/{result['email_id']}").json()
+    assert detail["external_id"] == "<a@mail.example.com>"
+    assert detail["subject"] == "Votre candidature chez Acme"
+    assert "jobs@acme.com" in detail["sender"]
+    assert "bien reçu votre candidature" in detail["raw_body"]
+    assert detail["classification"]
+
+
+def test_query_count_does_not_grow_with_the_batch(client, db):
+    small = upload(client, [(f"s{index}.eml", eml(f"s{index}")) for index in range(3)])
+    large = upload(client, [(f"l{index}.eml", eml(f"l{index}")) for index in range(30)])
+    assert sum(result["status"] == "imported" for result in large.json()["results"]) == 30
+    assert int(large.headers[QUERY_COUNT_HEADER]) <= int(small.headers[QUERY_COUNT_HEADER]) + 2
+
+
+def test_reimport_is_idempotent(client, db):
+    files = [(f"{index}.eml", eml(str(index))) for index in range(5)]
+    upload(client, files)
+    results = upload(client, files).json()["results"]
+    assert {result["status"] for result in results} == {"already_exists"}
+    assert db.query(Email).count() == 5
@@ -0,0 +1,103 @@
+"""
+Fils de discussion par Message-ID : réponses dans et entre les lots, réponse
+arrivée avant l'origine, fusion de fils, reconstruction et candidature par fil.
+"""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import pytest
+
+from app.core.config import settings
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Application, Email, EmailContent, EmailThreadRef
+from app.models.schemas import EmailCreate
+from app.services.email_content import content_rows
+from app.services.email_service import EmailService
+
+SENT = datetime(2026, 9, 1, 9, 0)
+
+
+@pytest.fixture(autouse=True)
+def no_auto_link(monkeypatch):
+    # Candidature d'un fil : seulement celle posée par les tests
+    monkeypatch.setattr(settings, "MATCHING_AUTO_LINK_ENABLED", False)
+
+
+def message(message_id, *references, hours=0, **fields):
+    return EmailCreate(
+        external_id=f"<{message_id}>", subject=f"Re: {message_id}", sender="rh@acme.fr",
+        references=list(references), sent_at=SENT + timedelta(hours=hours), **fields
+    )
+
+
+def insert(db, *emails):
+    with UnitOfWork(db) as uow:
+        ids = EmailService(db).bulk_insert_emails(list(emails), uow)
+    return ids
+
+
+def thread_of(db, email_id):
+    return db.get(Email, email_id).thread_id
+
+
+def test_replies_join_their_thread_within_and_across_batches(db):
+    first, reply = insert(db, message("a@acme.fr"), message("b@acme.fr", "a@acme.fr", hours=1))
+    later, = insert(db, message("c@acme.fr", "a@acme.fr", "b@acme.fr", hours=2))
+    other, = insert(db, message("z@globex.fr"))
+    assert thread_of(db, first) == thread_of(db, reply) == thread_of(db, later) != thread_of(db, other)
+
+
+def test_reply_before_its_origin_opens_the_thread(db):
+    reply, = insert(db, message("b@acme.fr", "a@acme.fr", hours=1))
+    origin, = insert(db, message("a@acme.fr"))
+    assert thread_of(db, origin) == thread_of(db, reply)
+    # L'origine, citée avant d'être reçue, était déjà rattachée au fil
+    assert db.get(EmailThreadRef, "a@acme.fr").thread_id == thread_of(db, reply)
+
+
+def test_email_linking_two_threads_merges_them_into_the_larger(db):
+    big = insert(db, message("a1@x"), message("a2@x", "a1@x"), message("a3@x", "a2@x"))
+    small, = insert(db, message("b1@x"))
+    target = thread_of(db, big[0])
+    bridge, = insert(db, message("m@x", "a3@x", "b1@x"))
+
+    assert {thread_of(db, email_id) for email_id in big + [small, bridge]} == {target}
+    assert {ref.thread_id for ref in db.query(EmailThreadRef)} == {target}
+
+
+def test_rebuild_threads_reads_stored_headers(client, db):
+    rows = [
+        Email(external_id="<o@acme.fr>", subject="Candidature"),
+        Email(external_id="<r@acme.fr>", subject="Re: Candidature"),
+        Email(external_id="<x@globex.fr>", subject="Autre"),
+    ]
+    db.add_all(rows)
+    db.flush()
+    headers = "From: rh@acme.fr\nIn-Reply-To: <o@acme.fr>\nReferences: <o@acme.fr>"
+    for row in content_rows([(rows[1].id, headers, "Réponse")]):
+        db.add(EmailContent(**row))
+    db.commit()
+
+    assert client.post("/api/v1/emails/threads/rebuild").json() == {"threaded": 3}
+    db.expire_all()
+    assert rows[0].thread_id == rows[1].thread_id != rows[2].thread_id
+    assert client.post("/api/v1/emails/threads/rebuild").json() == {"threaded": 0}
+
+
+def test_application_follows_the_thread(client, db):
+    application = Application(company_name="Acme", job_title="Dev")
+    db.add(application)
+    db.commit()
+    origin, reply = insert(db, message("a@acme.fr"), message("b@acme.fr", "a@acme.fr", hours=1))
+
+    response = client.post("/api/v1/emails/link", params={"email_id": str(reply), "application_id": str(application.id)})
+    assert response.json()["linked"] == 2
+    db.expire_all()
+    assert db.get(Email, origin).application_id == application.id
+
+    # Un nouvel email du fil hérite de sa candidature
+    follow_up, = insert(db, message("c@acme.fr", "b@acme.fr", hours=2))
+    assert db.get(Email, follow_up).application_id == application.id
+
+    thread = client.get(f"/api/v1/emails/{follow_up}/thread").json()
+    assert [UUID(item["id"]) for item in thread] == [origin, reply, follow_up]
@@ -0,0 +1,126 @@
+"""
+Extraction d'entités FR/EN : entreprise, poste, dates, contacts, cache de
+langue par expéditeur et extraction par lots des emails stockés.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Email, EmailContent
+from app.models.schemas import EmailCreate
+from app.nlp.entity_extractor import EntityExtractor, get_entity_extractor
+from app.services.email_service import EmailService
+
+SENT = datetime(2026, 9, 1, 9, 0)
+
+FRENCH = (
+    "Entretien pour le poste de Développeur Python",
+    "Marie Dupont <marie.dupont@acme-conseil.fr>",
+    "Bonjour,\n\nSuite à votre candidature chez Acme Conseil, nous vous proposons un entretien "
+    "le 12 septembre à 14h30. Vous pouvez me joindre au 06 12 34 56 78 ou à recrutement@acme-conseil.fr.\n\n"
+    "Cordialement",
+)
+ENGLISH = (
+    "Interview invitation - Data Engineer",
+    "Jane Smith <jane@globex.com>",
+    "Hello,\n\nThank you for applying for the Data Engineer position. We would like to invite you "
+    "to an interview on October 3rd at 2pm. Please reply to careers@globex.com.",
+)
+
+
+@pytest.fixture
+def extractor():
+    return EntityExtractor()
+
+
+def test_french_email(extractor):
+    entities = extractor.extract(*FRENCH, SENT)
+    assert entities.language == "fr"
+    assert entities.company == "Acme Conseil" and entities.job_title == "Développeur Python"
+    assert entities.dates == ["2026-09-12T14:30"]
+    assert entities.contacts == {
+        "name": "Marie Dupont",
+        "emails": ["marie.dupont@acme-conseil.fr", "recrutement@acme-conseil.fr"],
+        "phones": ["0612345678"],
+    }
+
+
+def test_english_email_does_not_take_a_time_for_the_company(extractor):
+    entities = extractor.extract(*ENGLISH, SENT)
+    assert entities.language == "en"
+    # « at 2pm » : heure, l'entreprise vient du domaine de l'expéditeur
+    assert entities.company == "Globex" and entities.job_title == "Data Engineer"
+    assert entities.dates == ["2026-10-03T14:00"]
+    assert entities.contacts["emails"] == ["jane@globex.com", "careers@globex.com"]
+
+
+@pytest.mark.parametrize("body, sent_at, dates", [
+    # Date sans année antérieure à l'email : l'année suivante
+    ("Votre entretien aura lieu le 5 janvier.", datetime(2026, 12, 20), ["2027-01-05"]),
+    ("Réponse attendue avant le 05/10/2026, entretien le 2026-10-20.", SENT, ["2026-10-05", "2026-10-20"]),
+    ("Please reply before 05/10/2026 so we can schedule the interview.", SENT, ["2026-05-10"]),
+    # Numéros de téléphone à points : pas des dates
+    ("Appelez-moi au 06.12.34.56.78 pour l'entretien du 2026-10-20.", SENT, ["2026-10-20"]),
+    ("Standard : 01.02.03.04.05", SENT, []),
+    # 12am : minuit, 12pm : midi
+    ("The call is scheduled for October 3rd at 12am.", SENT, ["2026-10-03T00:00"]),
+    ("The call is scheduled for October 3rd at 12pm.", SENT, ["2026-10-03T12:00"]),
+])
+def test_dates(extractor, body, sent_at, dates):
+    assert extractor.extract("Candidature", "rh@acme.fr", body, sent_at).dates == dates
+
+
+def test_no_reply_senders_are_not_contacts(extractor):
+    entities = extractor.extract(
+        "Votre candidature", "no-reply@welcometothejungle.com",
+        "Nous avons bien reçu votre candidature pour le poste de chef de projet digital.", SENT,
+    )
+    assert entities.job_title == "chef de projet digital"
+    assert entities.company is None and entities.contacts["emails"] == []
+
+
+def test_language_cache_per_sender_domain(extractor):
+    extractor.extract_batch([FRENCH + (SENT,)] * 3)
+    assert extractor.stats()["language_detections"] == 3
+    # Trois détections concordantes : la langue du domaine est reprise
+    assert extractor.extract("Relance", "paul@acme-conseil.fr", "Hello there", SENT).language == "fr"
+    # Messagerie générique : clé par adresse, pas par domaine
+    extractor.extract_batch([("Candidature", "a@gmail.com", FRENCH[2], SENT)] * 3)
+    assert extractor.extract("Hi", "b@gmail.com", ENGLISH[2], SENT).language == "en"
+    stats = extractor.stats()
+    assert stats["language_cache_hits"] == 1 and stats["cached_senders"] == 3
+
+
+def test_stored_emails_are_extracted_in_batches(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_ENABLED", False)
+    with UnitOfWork(db) as uow:
+        EmailService(db).bulk_insert_emails([
+            EmailCreate(external_id=f"<{index}@acme.fr>", subject=FRENCH[0], sender=FRENCH[1], raw_body=FRENCH[2], sent_at=SENT)
+            for index in range(3)
+        ], uow)
+    snippet_only = Email(external_id="<s@globex.com>", subject=ENGLISH[0], sender=ENGLISH[1], snippet=ENGLISH[2], sent_at=SENT)
+    db.add(snippet_only)
+    db.commit()
+    assert db.query(Email).filter(Email.entities.isnot(None)).count() == 0
+
+    result = EmailService(db).extract_stored_entities(batch_size=3)
+    assert result["processed"] == 4 and result["languages"] == {"fr": 3, "en": 1}
+    db.expire_all()
+    assert snippet_only.entities["company"] == "Globex" and snippet_only.language == "en"
+    assert {email.entities["job_title"] for email in db.query(Email).join(EmailContent)} == {"Développeur Python"}
+
+    # Déjà extraits : rien à refaire, sauf demande explicite
+    assert client.post("/api/v1/ingestion/extraction/run").json()["result"]["processed"] == 0
+    assert client.post("/api/v1/ingestion/extraction/run", params={"missing_only": False}).json()["result"]["processed"] == 4
+    assert get_entity_extractor().stats()["emails_processed"] == 8
+
+
+def test_inline_extraction_on_insert(db):
+    with UnitOfWork(db) as uow:
+        email_id, = EmailService(db).bulk_insert_emails([
+            EmailCreate(external_id="<1@acme.fr>", subject=FRENCH[0], sender=FRENCH[1], raw_body=FRENCH[2], sent_at=SENT)
+        ], uow)
+    email = db.get(Email, email_id)
+    assert email.language == "fr" and email.entities["dates"] == ["2026-09-12T14:30"]
@@ -0,0 +1,217 @@
+"""
+Connecteur Gmail contre une API simulée en local (httpx.MockTransport) :
+synchronisation complète, delta par historyId, historyId expiré, lots limités (429).
+"""
+import base64
+import json
+import re
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+
+from app.connectors import gmail_connector
+from app.connectors.gmail_connector import GmailConnector
+from app.models.models import Email, MailboxSyncState
+from app.services.ingestion_service import IngestionService
+
+ACCOUNT = "candidat@example.com"
+
+
+def raw_message(message_id: str, subject: str, sender: str = "Acme RH <jobs@acme.com>") -> bytes:
+    return (
+        f"Message-ID: <{message_id}@mail.example.com>\r\n"
+        f"From: {sender}\r\nTo: {ACCOUNT}\r\nSubject: {subject}\r\n"
+        "Date: Mon, 05 Oct 2026 10:00:00 +0000\r\n\r\n"
+        "Bonjour,\r\nNous avons bien reçu votre candidature et reviendrons vers vous.\r\n"
+    ).encode()
+
+
+class FakeGmail:
+    """
+    API Gmail minimale : profil, messages.list paginé, history.list,
+    requêtes batch multipart et rafraîchissement du jeton
+    """
+
+    def __init__(self, page_size: int = 2):
+        self.page_size = page_size
+        self.messages = {}
+        self.history = []
+        self.history_id = 100
+        # historyId plus anciens que ce seuil : 404 (historique purgé)
+        self.oldest_history_id = 0
+        # Statuts imposés par identifiant (consommés au fil des requêtes batch)
+        self.batch_failures = {}
+        self.calls = Counter()
+        self.fetched = {"metadata": [], "raw": []}
+
+    def add(self, message_id: str, subject: str, **kwargs):
+        self.history_id += 1
+        self.messages[message_id] = raw_message(message_id, subject, **kwargs)
+        self.history.append({"id": str(self.history_id), "messagesAdded": [
+            {"message": {"id": message_id, "labelIds": ["INBOX"]}}
+        ]})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        params = parse_qs(request.url.query.decode())
+        self.calls[path] += 1
+        if request.url.host == "oauth2.example.com":
+            return httpx.Response(200, json={"access_token": "token", "expires_in": 3600})
+        assert request.headers["Authorization"] == "Bearer token"
+        if path == "/gmail/v1/users/me/profile":
+            return httpx.Response(200, json={"emailAddress": ACCOUNT, "historyId": str(self.history_id)})
+        if path == "/gmail/v1/users/me/messages":
+            ids = list(reversed(self.messages))
+            start = int(params.get("pageToken", ["0"])[0])
+            page = ids[start:start + self.page_size]
+            data = {"messages": [{"id": message_id} for message_id in page]}
+            if start + self.page_size < len(ids):
+                data["nextPageToken"] = str(start + self.page_size)
+            return httpx.Response(200, json=data)
+        if path == "/gmail/v1/users/me/history":
+            start = int(params["startHistoryId"][0])
+            if start < self.oldest_history_id:
+                return httpx.Response(404, json={"error": {"code": 404}})
+            records = [record for record in self.history if int(record["id"]) > start]
+            return httpx.Response(200, json={"history": records, "historyId": str(self.history_id)})
+        if path == "/batch/gmail/v1":
+            return self.batch(request)
+        return httpx.Response(404)
+
+    def batch(self, request: httpx.Request) -> httpx.Response:
+        boundary = "response_boundary"
+        parts = []
+        for content_id, url in re.findall(rb"Content-ID: <item-(\d+)>\r\n\r\nGET (\S+)", request.content):
+            url = urlsplit(url.decode())
+            message_id = url.path.rsplit("/", 1)[1]
+            message_format = parse_qs(url.query)["format"][0]
+            failures = self.batch_failures.get(message_id)
+            if failures:
+                status, body = failures.pop(0), "{}"
+            elif message_id not in self.messages:
+                status, body = 404, "{}"
+            else:
+                status, body = 200, json.dumps(self.resource(message_id, message_format))
+                self.fetched[message_format].append(message_id)
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-item-{content_id.decode()}>\r\n\r\n"
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n{body}\r\n"
+            )
+        return httpx.Response(
+            200,
+            content=("".join(parts) + f"--{boundary}--\r\n").encode(),
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        )
+
+    def resource(self, message_id: str, message_format: str) -> dict:
+        raw = self.messages[message_id]
+        if message_format == "raw":
+            return {"id": message_id, "raw": base64.urlsafe_b64encode(raw).decode().rstrip("=")}
+        head = raw.split(b"\r\n\r\n", 1)[0].decode()
+        headers = [dict(zip(("name", "value"), line.split(": ", 1))) for line in head.split("\r\n")]
+        return {"id": message_id, "payload": {"headers": headers}}
+
+
+@pytest.fixture
+def gmail():
+    return FakeGmail()
+
+
+@pytest.fixture
+def connector(gmail):
+    client = httpx.Client(base_url="https://gmail.example.com", transport=gmail.transport())
+    return GmailConnector(
+        user=ACCOUNT, refresh_token="refresh", token_url="https://oauth2.example.com/token",
+        batch_size=2, http_client=client,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(gmail_connector.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def sync_state(db) -> MailboxSyncState:
+    db.expire_all()
+    return db.query(MailboxSyncState).filter(MailboxSyncState.account == ACCOUNT).one()
+
+
+def test_initial_full_sync(db, gmail, connector):
+    gmail.add("m1", "Votre candidature au poste de Data Engineer")
+    gmail.add("m2", "Newsletter de la semaine", sender="news@shop.example.com")
+    gmail.add("m3", "Invitation à un entretien")
+
+    stats = IngestionService(db).sync_gmail_account(connector)
+
+    assert stats["emails_processed"] == 3 and stats["new_emails"] == 2
+    assert {email.external_id for email in db.query(Email)} == {"<m1@mail.example.com>", "<m3@mail.example.com>"}
+    # En-têtes de tous les messages, corps des seuls messages de recrutement
+    assert sorted(gmail.fetched["metadata"]) == ["m1", "m2", "m3"]
+    assert sorted(gmail.fetched["raw"]) == ["m1", "m3"]
+    # Liste paginée (2 par page) et curseur lu avant la liste
+    assert gmail.calls["/gmail/v1/users/me/messages"] == 2
+    assert sync_state(db).history_id == 103
+
+
+def test_history_delta_fetches_only_new_messages(db, gmail, connector):
+    gmail.add("m1", "Votre candidature au poste de Data Engineer")
+    IngestionService(db).sync_gmail_account(connector)
+    gmail.add("m2", "Suite de votre candidature : entretien")
+    gmail.fetched = {"metadata": [], "raw": []}
+
+    stats = IngestionService(db).sync_gmail_account(connector)
+
+    assert gmail.calls["/gmail/v1/users/me/messages"] == 1
+    assert gmail.calls["/gmail/v1/users/me/history"] == 1
+    assert gmail.fetched == {"metadata": ["m2"], "raw": ["m2"]}
+    assert stats["new_emails"] == 1
+    assert db.query(Email).count() == 2
+    assert sync_state(db).history_id == 102
+
+
+def test_expired_history_falls_back_to_full_sync(db, gmail, connector):
+    gmail.add("m1", "Votre candidature au poste de Data Engineer")
+    IngestionService(db).sync_gmail_account(connector)
+    gmail.add("m2", "Invitation à un entretien")
+    gmail.oldest_history_id = 1000
+    gmail.history_id = 1500
+
+    stats = IngestionService(db).sync_gmail_account(connector)
+
+    assert gmail.calls["/gmail/v1/users/me/history"] == 1
+    assert gmail.calls["/gmail/v1/users/me/messages"] == 2
+    # m1 déjà connu : écarté par Message-ID sans retélécharger son corps
+    assert stats["emails_processed"] == 2 and stats["new_emails"] == 1
+    assert gmail.fetched["raw"] == ["m1", "m2"]
+    assert db.query(Email).count() == 2
+    assert sync_state(db).history_id == 1500
+
+
+def test_batch_retries_rate_limited_items(gmail, connector, no_backoff):
+    for index in range(4):
+        gmail.add(f"m{index}", "Votre candidature")
+    gmail.batch_failures = {"m1": [429], "m3": [429, 503]}
+
+    headers = connector.fetch_headers(["m0", "m1", "m2", "m3"])
+
+    assert sorted(headers) == ["m0", "m1", "m2", "m3"]
+    assert headers["m3"]["Subject"] == "Votre candidature"
+    # Seuls les messages limités sont renvoyés, avec attente exponentielle
+    assert Counter(gmail.fetched["metadata"]) == Counter({"m0": 1, "m1": 1, "m2": 1, "m3": 1})
+    assert no_backoff == [1, 1, 2]
+
+
+def test_batch_gives_up_after_max_retries(gmail, connector):
+    gmail.add("m1", "Votre candidature")
+    gmail.batch_failures = {"m1": [429] * 10}
+
+    with pytest.raises(RuntimeError):
+        connector.fetch_messages(["m1"])
@@ -0,0 +1,286 @@
+"""
+Connecteur IMAP contre un serveur simulé (imap_factory) : watermark UID,
+changement d'UIDVALIDITY, en-têtes d'abord puis corps des seuls nouveaux messages.
+"""
+import imaplib
+import re
+
+import pytest
+
+from app.connectors.imap_connector import ImapConnector, compress_uids
+from app.models.models import Email, MailboxSyncState
+from app.services.ingestion_service import IngestionService
+
+MAILBOX = "INBOX"
+
+
+def raw_message(uid: int, subject: str, message_id: str = None, sender: str = "Acme RH <jobs@acme.com>") -> bytes:
+    return (
+        f"Message-ID: <{message_id or f'uid{uid}@mail.example.com'}>\r\n"
+        f"From: {sender}\r\nTo: candidat@example.com\r\nSubject: {subject}\r\n"
+        "Date: Mon, 05 Oct 2026 10:00:00 +0000\r\n\r\n"
+        "Bonjour,\r\nMerci pour votre candidature.\r\n"
+    ).encode()
+
+
+class FakeImap:
+    """
+    Serveur IMAP minimal : SELECT (UIDVALIDITY), UID SEARCH n:* et UID FETCH
+    (en-têtes ou message complet), avec journal des commandes. Une connexion
+    coupée rejette toute commande ; une nouvelle connexion est dans l'état
+    AUTH jusqu'au SELECT
+    """
+
+    def __init__(self, uid_validity: int = 7):
+        self.uid_validity = uid_validity
+        self.messages = {}
+        self.commands = []
+        self.fail_fetch_uid = None
+        self.connections = 0
+        self.alive = True
+        self.selected = False
+        self.noops = 0
+        # Connexion coupée (une fois) après ce nombre de FETCH
+        self.drop_after_fetches = None
+
+    def add(self, uid: int, subject: str, **kwargs):
+        self.messages[uid] = raw_message(uid, subject, **kwargs)
+
+    def __call__(self, host: str, port: int) -> "FakeImap":
+        self.connections += 1
+        self.alive = True
+        self.selected = False
+        return self
+
+    def login(self, user, password):
+        return "OK", [b"Logged in"]
+
+    def noop(self):
+        self.noops += 1
+        if not self.alive:
+            raise imaplib.IMAP4.abort("connexion fermée")
+        return "OK", [b""]
+
+    def logout(self):
+        return "BYE", [b""]
+
+    def select(self, name, readonly=False):
+        assert readonly
+        if not self.alive:
+            raise imaplib.IMAP4.abort("connexion fermée")
+        self.selected = True
+        return "OK", [str(len(self.messages)).encode()]
+
+    def response(self, code):
+        return code, [str(self.uid_validity).encode()]
+
+    def uid(self, command, *args):
+        if not self.alive:
+            raise imaplib.IMAP4.abort("connexion fermée")
+        if not self.selected:
+            raise imaplib.IMAP4.error("command UID illegal in state AUTH, only allowed in states SELECTED")
+        self.commands.append((command, args))
+        if command == "SEARCH":
+            start = int(re.match(r"UID (\d+):\*", args[1]).group(1))
+            uids = sorted(uid for uid in self.messages if uid >= start)
+            # Comme un vrai serveur : "n:*" inclut toujours le plus grand UID
+            if not uids and self.messages:
+                uids = [max(self.messages)]
+            return "OK", [" ".join(map(str, uids)).encode()]
+        if command == "FETCH":
+            fetches = sum(1 for logged, _ in self.commands if logged == "FETCH")
+            if self.drop_after_fetches is not None and fetches > self.drop_after_fetches:
+                self.commands.pop()
+                self.alive, self.drop_after_fetches = False, None
+                raise imaplib.IMAP4.abort("socket error: EOF")
+            uids, items = self.parse_set(args[0]), args[1]
+            data = []
+            for uid in uids:
+                if uid == self.fail_fetch_uid:
+                    return "NO", [b"fetch failed"]
+                if uid not in self.messages:
+                    continue
+                payload = self.messages[uid]
+                if "HEADER.FIELDS" in items:
+                    payload = payload.split(b"\r\n\r\n", 1)[0] + b"\r\n\r\n"
+                data.append((f"{uid} (UID {uid} BODY[] {{{len(payload)}}}".encode(), payload))
+                data.append(b")")
+            return "OK", data
+        raise AssertionError(command)
+
+    @staticmethod
+    def parse_set(uid_set: str):
+        uids = []
+        for part in uid_set.split(","):
+            start, _, end = part.partition(":")
+            uids.extend(range(int(start), int(end or start) + 1))
+        return uids
+
+    def fetched(self, kind: str):
+        """
+        UID demandés par les FETCH d'en-têtes ("headers") ou de corps ("bodies")
+        """
+        headers = kind == "headers"
+        return [
+            uid
+            for command, args in self.commands
+            if command == "FETCH" and ("HEADER.FIELDS" in args[1]) == headers
+            for uid in self.parse_set(args[0])
+        ]
+
+
+@pytest.fixture
+def server():
+    return FakeImap()
+
+
+@pytest.fixture
+def connector(server):
+    return ImapConnector("imap.example.com", "candidat", "secret", batch_size=2, imap_factory=server)
+
+
+def sync_state(db) -> MailboxSyncState:
+    db.expire_all()
+    return db.query(MailboxSyncState).filter(MailboxSyncState.mailbox == MAILBOX).one()
+
+
+def test_compress_uids():
+    assert compress_uids([5, 1, 2, 3, 8, 10, 11, 12]) == "1:3,5,8,10:12"
+    assert compress_uids([]) == ""
+
+
+def test_watermark_limits_sync_to_new_uids(db, server, connector):
+    for uid in (1, 2, 3):
+        server.add(uid, f"Votre candidature n°{uid}")
+    stats = IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    assert stats["new_emails"] == 3
+    assert sync_state(db).last_uid == 3 and sync_state(db).uid_validity == 7
+
+    server.commands.clear()
+    stats = IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    # Le dernier UID renvoyé par "4:*" est écarté : rien à récupérer
+    assert stats["emails_processed"] == 0
+    assert server.fetched("headers") == []
+
+    server.add(4, "Invitation à un entretien")
+    server.add(6, "Offre d'emploi")
+    IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    assert server.commands[-3][1][1] == "UID 4:*"
+    assert server.fetched("headers") == [4, 6]
+    assert sync_state(db).last_uid == 6
+    assert db.query(Email).count() == 5
+
+
+def test_watermark_advances_per_committed_batch(db, server, connector):
+    for uid in range(1, 6):
+        server.add(uid, f"Votre candidature n°{uid}")
+    server.fail_fetch_uid = 4
+
+    with pytest.raises(RuntimeError):
+        IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    db.rollback()
+    # Lot 1-2 validé avec son watermark ; le lot en échec sera repris
+    assert sync_state(db).last_uid == 2
+    assert db.query(Email).count() == 2
+
+    server.fail_fetch_uid = None
+    server.commands.clear()
+    IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    assert server.fetched("headers") == [3, 4, 5]
+    assert db.query(Email).count() == 5
+
+
+def test_uidvalidity_change_triggers_full_resync(db, server, connector):
+    server.add(1, "Votre candidature")
+    server.add(2, "Invitation à un entretien")
+    IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+
+    # Boîte renumérotée : mêmes messages sous de nouveaux UID, plus un nouveau
+    server.uid_validity = 8
+    server.messages = {
+        10: raw_message(1, "Votre candidature"),
+        11: raw_message(2, "Invitation à un entretien"),
+        12: raw_message(12, "Offre d'emploi"),
+    }
+    server.commands.clear()
+    stats = IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+
+    assert server.commands[0][1][1] == "UID 1:*"
+    assert server.fetched("headers") == [10, 11, 12]
+    # Messages déjà connus reconnus par Message-ID : seul le nouveau corps est téléchargé
+    assert server.fetched("bodies") == [12]
+    assert stats["new_emails"] == 1 and stats["skipped_emails"] == 2
+    state = sync_state(db)
+    assert (state.uid_validity, state.last_uid) == (8, 12)
+    assert db.query(Email).count() == 3
+
+
+def test_headers_first_then_bodies_only_for_new_recruiting_messages(db, server, connector):
+    server.add(1, "Votre candidature au poste de Data Engineer")
+    server.add(2, "Soldes d'automne : -50 %", sender="promo@shop.example.com")
+    server.add(3, "Entretien : confirmation", message_id="deja-vu@mail.example.com")
+    db.add(Email(external_id="<deja-vu@mail.example.com>", subject="Entretien : confirmation"))
+    db.commit()
+
+    stats = IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+
+    assert server.fetched("headers") == [1, 2, 3]
+    assert server.fetched("bodies") == [1]
+    # Chaque lot : FETCH des en-têtes avant celui des corps
+    fetches = [args[1] for command, args in server.commands if command == "FETCH"]
+    assert "HEADER.FIELDS" in fetches[0] and "HEADER.FIELDS" not in fetches[1]
+    assert stats["new_emails"] == 1 and stats["emails_processed"] == 3
+
+
+def test_reconnects_when_connection_is_lost(server, connector):
+    connector.select(MAILBOX)
+    connector.select(MAILBOX)
+    assert server.connections == 1
+    server.alive = False
+    connector.select(MAILBOX)
+    assert server.connections == 2
+
+
+def test_liveness_is_checked_once_per_mailbox_sync(db, server, connector):
+    for uid in range(1, 6):
+        server.add(uid, f"Votre candidature n°{uid}")
+    IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    # Connexion neuve : pas de NOOP, puis aucun avant chaque SEARCH / FETCH
+    assert server.noops == 0
+
+    server.add(6, "Invitation à un entretien")
+    IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    assert server.noops == 1 and server.connections == 1
+
+
+def test_connection_dropped_between_fetch_batches(db, server, connector):
+    for uid in range(1, 6):
+        server.add(uid, f"Votre candidature n°{uid}")
+    # Lot 1 (en-têtes et corps) servi, puis coupure avant les en-têtes du lot 2
+    server.drop_after_fetches = 2
+
+    stats = IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    assert server.connections == 2
+    assert stats["new_emails"] == 5
+    assert sync_state(db).last_uid == 5
+    assert db.query(Email).count() == 5
+
+
+def test_uidvalidity_change_on_reconnect_fails_the_batch(db, server, connector):
+    for uid in range(1, 6):
+        server.add(uid, f"Votre candidature n°{uid}")
+    server.drop_after_fetches = 2
+    real_call = server.__call__
+
+    def renumbered(host, port):
+        # Boîte renumérotée avant la reconnexion
+        if server.connections:
+            server.uid_validity = 9
+        return real_call(host, port)
+    connector._imap_factory = renumbered
+
+    with pytest.raises(RuntimeError, match="UIDVALIDITY"):
+        IngestionService(db).sync_imap_mailbox(connector, MAILBOX)
+    db.rollback()
+    # Lot validé conservé ; la synchronisation suivante repart de la nouvelle numérotation
+    assert sync_state(db).last_uid == 2 and sync_state(db).uid_validity == 7
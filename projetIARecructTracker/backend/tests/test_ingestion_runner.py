@@ -0,0 +1,146 @@
+"""
+Ingestion planifiée par compte : compte occupé sauté, concurrence bornée,
+métriques par compte (durée, débit, reliquat) et comptes multiples.
+"""
+import threading
+import time
+
+import pytest
+
+from app.api.v1.endpoints import ingestion as ingestion_endpoints
+from app.connectors.imap_connector import ImapConnector
+from app.core.config import settings
+from app.services import ingestion_runner as runner_module
+from app.services.ingestion_runner import IngestionRunner
+from app.services.ingestion_service import IngestionService, get_gmail_connectors, get_imap_connectors
+from tests.test_imap_connector import FakeImap
+
+
+class StubConnector:
+    provider = "imap"
+
+    def __init__(self, account: str):
+        self.account = account
+
+
+@pytest.fixture
+def runner():
+    runner = IngestionRunner(max_workers=2)
+    yield runner
+    runner._executor.shutdown(wait=True)
+
+
+def test_busy_account_is_skipped(runner, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def sync(service, connector, stats):
+        if connector.account == "lent":
+            started.set()
+            release.wait(5)
+        stats["emails_processed"] = 1
+        return stats
+    monkeypatch.setattr(IngestionService, "sync_connector", sync)
+    slow, other = StubConnector("lent"), StubConnector("rapide")
+
+    first = threading.Thread(target=runner.run_once, args=([slow],))
+    first.start()
+    assert started.wait(5)
+    try:
+        result = runner.run_once([slow, other])
+        assert [account["status"] for account in result["accounts"]] == ["skipped", "completed"]
+        assert result["emails_processed"] == 1
+        status = runner.status()
+        assert status["running_accounts"] == 1
+        assert {account["account"]: account["running"] for account in status["accounts"]} == {"lent": True, "rapide": False}
+    finally:
+        release.set()
+        first.join(5)
+
+    accounts = {account["account"]: account for account in runner.status()["accounts"]}
+    assert accounts["lent"]["skipped_runs"] == 1 and accounts["lent"]["runs"] == 1
+    assert accounts["rapide"]["runs"] == 1
+
+
+def test_concurrency_is_bounded_by_max_workers(runner, monkeypatch):
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def sync(service, connector, stats):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return stats
+    monkeypatch.setattr(IngestionService, "sync_connector", sync)
+
+    result = runner.run_once([StubConnector(f"compte{index}") for index in range(5)])
+    assert [account["status"] for account in result["accounts"]] == ["completed"] * 5
+    assert peak[0] == 2
+
+
+def test_jitter_delays_each_account(runner, monkeypatch):
+    delays = []
+    monkeypatch.setattr(IngestionService, "sync_connector", lambda service, connector, stats: stats)
+    monkeypatch.setattr(runner_module.time, "sleep", delays.append)
+    monkeypatch.setattr(runner_module.random, "uniform", lambda low, high: high / 2)
+
+    runner.run_once([StubConnector("a"), StubConnector("b")])
+    assert delays == []
+    runner.run_once([StubConnector("a"), StubConnector("b")], jitter=10)
+    assert delays == [5.0, 5.0]
+
+
+def imap_account(host: str, subjects: int) -> ImapConnector:
+    server = FakeImap()
+    for uid in range(1, subjects + 1):
+        server.add(uid, f"Votre candidature n°{uid}", message_id=f"{uid}@{host}")
+    return ImapConnector(host, "candidat", "secret", batch_size=2, imap_factory=server)
+
+
+def test_status_reports_timings_and_backlog(client, runner, monkeypatch):
+    healthy, failing = imap_account("imap.a.example.com", 3), imap_account("imap.b.example.com", 5)
+    # Lot 3-4 en échec : deux messages traités sur cinq
+    failing._imap_factory.fail_fetch_uid = 4
+    monkeypatch.setattr(ingestion_endpoints, "ingestion_runner", runner)
+    monkeypatch.setattr(runner, "connectors", lambda: [healthy, failing])
+
+    result = client.post("/api/v1/ingestion/run").json()["result"]
+    assert result["status"] == "error" and result["new_emails"] == 5
+
+    status = client.get("/api/v1/ingestion/status").json()
+    accounts = {account["account"]: account for account in status["accounts"]}
+    ok, ko = accounts["candidat@imap.a.example.com"], accounts["candidat@imap.b.example.com"]
+    assert ok["last_status"] == "completed" and ok["backlog"] == 0 and ok["emails_processed"] == 3
+    assert ko["last_status"] == "error" and "UID FETCH" in ko["last_error"]
+    assert (ko["emails_discovered"], ko["emails_processed"], ko["backlog"]) == (5, 2, 3)
+    for account in (ok, ko):
+        assert account["last_duration_s"] > 0 and account["emails_per_second"] > 0
+        assert account["last_started_at"] <= account["last_finished_at"]
+    assert status["backlog"] == status["pending_emails"] == 3
+    assert status["max_concurrency"] == 2 and status["running_accounts"] == 0
+
+
+def test_several_accounts_per_provider(monkeypatch):
+    monkeypatch.setattr(settings, "IMAP_HOST", "imap.example.com")
+    monkeypatch.setattr(settings, "IMAP_USER", "principal")
+    monkeypatch.setattr(settings, "IMAP_ACCOUNTS", [
+        {"host": "imap.autre.example.com", "user": "second", "password": "x", "port": 143, "use_ssl": False},
+    ])
+    monkeypatch.setattr(settings, "GMAIL_CLIENT_ID", "client")
+    monkeypatch.setattr(settings, "GMAIL_REFRESH_TOKEN", "")
+    monkeypatch.setattr(settings, "GMAIL_ACCOUNTS", [
+        {"user": "a@gmail.com", "refresh_token": "ra"},
+        {"user": "b@gmail.com", "refresh_token": "rb", "label": "Candidatures"},
+    ])
+
+    imap = get_imap_connectors()
+    assert [connector.account for connector in imap] == ["principal@imap.example.com", "second@imap.autre.example.com"]
+    assert imap[1].port == 143
+    gmail = get_gmail_connectors()
+    assert [(connector.account, connector.label) for connector in gmail] == [
+        ("a@gmail.com", "INBOX"), ("b@gmail.com", "Candidatures")
+    ]
+    # Connecteurs conservés d'une ingestion à l'autre
+    assert get_imap_connectors()[0] is imap[0] and get_gmail_connectors()[1] is gmail[1]
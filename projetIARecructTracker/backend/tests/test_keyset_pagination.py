@@ -0,0 +1,90 @@
+"""
+Pagination par curseur (updated_at/created_at, id) : parcours complet dans les
+deux sens, égalités d'horodatage, insertions concurrentes et curseurs invalides.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.models import Application, Email
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def application_ids(db):
+    now = datetime.utcnow()
+    rows = [
+        # Horodatages en double : départagés par l'id
+        Application(company_name=f"Entreprise {index}", job_title="Dev", updated_at=now - timedelta(minutes=index // 3))
+        for index in range(11)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in sorted(rows, key=lambda row: (row.updated_at, row.id), reverse=True)]
+
+
+def page(client, path="/api/v1/applications/", **params):
+    response = client.get(path, params={"pagination": "cursor", **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def walk(client, direction, start, path="/api/v1/applications/", limit=4, **filters):
+    ids, current = [], start
+    while current:
+        ids.append([item["id"] for item in current["items"]])
+        cursor = current[direction]
+        current = page(client, path, limit=limit, cursor=cursor, **filters) if cursor else None
+    return ids
+
+
+def test_forward_then_backward_walks_every_row_once(client, application_ids):
+    first = page(client, limit=4)
+    assert first["prev_cursor"] is None
+    forward = walk(client, "next_cursor", first)
+    assert [len(ids) for ids in forward] == [4, 4, 3]
+    assert [item for ids in forward for item in ids] == [str(app_id) for app_id in application_ids]
+
+    last = page(client, limit=4, cursor=page(client, limit=4, cursor=first["next_cursor"])["next_cursor"])
+    assert last["next_cursor"] is None
+    backward = walk(client, "prev_cursor", last)
+    assert backward == list(reversed(forward))
+
+
+def test_rows_inserted_meanwhile_do_not_shift_pages(client, db, application_ids):
+    first = page(client, limit=4)
+    db.add(Application(company_name="Nouvelle", job_title="Dev", updated_at=datetime.utcnow() + timedelta(hours=1)))
+    db.commit()
+    second = page(client, limit=4, cursor=first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == [str(app_id) for app_id in application_ids[4:8]]
+
+
+def test_filters_apply_to_cursor_pages(client, db, application_ids):
+    db.query(Application).filter(Application.id.in_(application_ids[:5])).update(
+        {Application.status: "INTERVIEW"}, synchronize_session=False
+    )
+    db.commit()
+    pages = walk(client, "next_cursor", page(client, limit=2, status="INTERVIEW"), limit=2, status="INTERVIEW")
+    assert [len(ids) for ids in pages] == [2, 2, 1]
+    assert sorted(item for ids in pages for item in ids) == sorted(str(app_id) for app_id in application_ids[:5])
+
+
+def test_invalid_cursors_are_rejected(client, application_ids):
+    for cursor in ("pas-un-curseur", encode_cursor(datetime.utcnow(), application_ids[0], "sideways")):
+        assert client.get("/api/v1/applications/", params={"cursor": cursor}).status_code == 400
+    assert client.get("/api/v1/emails/", params={"cursor": "xyz"}).status_code == 400
+    with pytest.raises(InvalidCursor):
+        decode_cursor("e30")
+
+
+def test_email_cursor_pages(client, db):
+    now = datetime.utcnow()
+    db.add_all([
+        Email(external_id=f"<{index}@x>", subject=f"Sujet {index}", created_at=now - timedelta(seconds=index))
+        for index in range(7)
+    ])
+    db.commit()
+    pages = walk(client, "next_cursor", page(client, "/api/v1/emails/", limit=3), "/api/v1/emails/", limit=3)
+    ids = [item for page_ids in pages for item in page_ids]
+    assert len(set(ids)) == 7
+    assert [len(page_ids) for page_ids in pages] == [3, 3, 1]
@@ -0,0 +1,74 @@
+"""
+Import mbox en flux : découpage, analyse MIME hors processus, lots validés
+un à un, dédoublonnage et avancement.
+"""
+import io
+
+from app.models.models import Email
+from app.services.email_parsing import iter_mbox_messages, parse_raw_emails
+from app.services.mbox_importer import MboxImporter, get_import_progress, is_mbox
+
+
+def message(message_id: str, subject: str, body: str = "Merci pour votre candidature.") -> bytes:
+    return (
+        f"Message-ID: <{message_id}@mail.example.com>\n"
+        f"From: Acme RH <jobs@acme.com>\nTo: candidat@example.com\nSubject: {subject}\n"
+        f"Date: Mon, 05 Oct 2026 10:00:00 +0000\n\n{body}\n"
+    ).encode()
+
+
+def mbox(*messages: bytes) -> bytes:
+    return b"".join(b"From jobs@acme.com Mon Oct  5 10:00:00 2026\n" + raw + b"\n" for raw in messages)
+
+
+def test_split_and_unescape_from_lines():
+    archive = mbox(
+        message("a", "Candidature", "Bonjour,\n>From the team\nCordialement"),
+        message("b", "Entretien"),
+    )
+    raws = list(iter_mbox_messages(io.BytesIO(archive)))
+    assert len(raws) == 2
+    assert b"\nFrom the team\n" in raws[0]
+    assert is_mbox(io.BytesIO(archive)) and not is_mbox(io.BytesIO(raws[0]))
+    assert is_mbox(io.BytesIO(b""), "export.MBOX")
+
+
+def test_unreadable_message_does_not_stop_its_chunk():
+    results = parse_raw_emails([b"", message("a", "Candidature")])
+    assert "error" in results[0]
+    assert results[1]["external_id"] == "<a@mail.example.com>" and results[1]["simhash"] is None
+
+
+def test_import_in_batches_with_dedup(db):
+    db.add(Email(external_id="<known@mail.example.com>", subject="Déjà importé"))
+    db.commit()
+    archive = mbox(
+        *(message(f"m{index}", f"Votre candidature n°{index}") for index in range(5)),
+        message("m1", "Doublon dans l'archive"),
+        message("known", "Déjà en base"),
+        b"",
+    )
+
+    result = MboxImporter(db, workers=1, batch_size=3).import_mbox(io.BytesIO(archive), "export.mbox")
+
+    assert result == {
+        "filename": "export.mbox", "status": "imported", "messages": 8, "imported": 5,
+        "already_exists": 2, "linked": 0, "errors": 1,
+    }
+    assert db.query(Email).count() == 6
+    (progress,) = get_import_progress()
+    assert progress["status"] == "imported" and progress["bytes_read"] == progress["total_bytes"] == len(archive)
+    assert progress["finished_at"] is not None
+
+
+def test_mbox_upload_through_the_import_endpoint(client, db):
+    archive = mbox(message("a", "Candidature"), message("b", "Entretien"))
+    response = client.post(
+        "/api/v1/emails/import",
+        files=[("files", ("boite", archive, "application/mbox")), ("files", ("a.eml", message("c", "Offre"), "message/rfc822"))],
+    )
+    results = response.json()["results"]
+    assert [result.get("status") for result in results] == ["imported", "imported"]
+    assert results[1]["imported"] == 2
+    assert client.get("/api/v1/emails/import/progress").json()["imports"][0]["messages"] == 2
+    assert db.query(Email).count() == 3
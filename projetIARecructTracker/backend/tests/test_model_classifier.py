@@ -0,0 +1,123 @@
+"""
+Classifieur appris : entraînement versionné, publication atomique, rechargement
+à chaud et priorité sur les règles au-dessus du seuil de confiance.
+"""
+import json
+import random
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.models import Email
+from app.models.schemas import EmailCreate
+from app.nlp import model_classifier
+from app.nlp.model_classifier import ModelClassifier, train_model
+from app.services.email_service import EmailService
+
+TEMPLATES = {
+    "INTERVIEW": [
+        "Nous souhaitons vous rencontrer pour un entretien {day} matin",
+        "Pouvez-vous confirmer le créneau d'entretien de {day} avec l'équipe",
+        "Invitation : entretien technique {day} en visioconférence",
+    ],
+    "REJECTED": [
+        "Nous sommes au regret de ne pas donner suite à votre candidature {day}",
+        "Malheureusement votre profil n'a pas été retenu, décision prise {day}",
+        "Après étude nous ne poursuivrons pas le processus, réponse du {day}",
+    ],
+}
+DAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi"]
+
+
+def corpus(size: int = 30, seed: int = 1):
+    random.seed(seed)
+    labels = [label for label in TEMPLATES for _ in range(size // 2)]
+    texts = [random.choice(TEMPLATES[label]).format(day=random.choice(DAYS)) for label in labels]
+    return texts, labels
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    return tmp_path / "classification_model.pkl"
+
+
+def test_training_publishes_a_versioned_artifact(model_path):
+    metrics = train_model(*corpus(), str(model_path))
+
+    assert model_path.exists()
+    version_dir = model_path.parent / "versions" / metrics["version"]
+    assert json.loads((version_dir / "metrics.json").read_text())["version"] == metrics["version"]
+    assert metrics["samples"] == 30 and metrics["test_samples"] == 6
+    assert metrics["accuracy"] >= 0.8
+    assert not list(model_path.parent.glob(".*.tmp"))
+
+
+def test_predictions_and_hot_swap(model_path):
+    classifier = ModelClassifier(str(model_path))
+    assert classifier.predict_batch(["Entretien mardi"]) == [(None, 0.0)]
+
+    train_model(*corpus(), str(model_path))
+    classifier._checked_at = 0.0
+    (label, probability), (other, _) = classifier.predict_batch([
+        "Confirmez-vous l'entretien de jeudi ?", "Nous sommes au regret de ne pas donner suite"
+    ])
+    assert (label, other) == ("INTERVIEW", "REJECTED") and 0.5 < probability <= 1.0
+    first_version = classifier.version
+
+    # Modèle publié par un autre processus : pris en compte à la vérification suivante
+    train_model(*corpus(seed=2), str(model_path))
+    assert classifier.version == first_version
+    classifier._checked_at = 0.0
+    assert classifier.version != first_version
+
+
+def test_unreadable_model_keeps_the_active_one(model_path):
+    train_model(*corpus(), str(model_path))
+    classifier = ModelClassifier(str(model_path))
+    version = classifier.version
+    model_path.write_bytes(b"pas un modele")
+    classifier._checked_at = 0.0
+    assert classifier.version == version
+
+
+def test_background_training_swaps_the_model(model_path):
+    classifier = ModelClassifier(str(model_path))
+    try:
+        started = classifier.start_training(*corpus())
+        assert started["status"] == "running" and classifier.training
+        # Un seul entraînement à la fois
+        assert classifier.start_training(*corpus()) is classifier.last_training
+        classifier._training.result(timeout=120)
+        # Rappel de fin exécuté par le thread du pool juste après le résultat
+        deadline = time.monotonic() + 10
+        while classifier.last_training["status"] == "running" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert classifier.last_training["status"] == "completed"
+        assert classifier.status()["active_version"] == classifier.last_training["metrics"]["version"]
+    finally:
+        classifier.shutdown()
+
+
+def test_retraining_needs_enough_user_corrections(client, db):
+    db.add(Email(external_id="<a@x>", subject="Entretien", classification="INTERVIEW", classification_source="user"))
+    db.commit()
+    response = client.post("/api/v1/ingestion/classification/retrain")
+    assert response.status_code == 400
+    assert response.json()["detail"]["status"] == "insufficient_data"
+
+
+def test_confident_model_overrides_rules(db, model_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLASSIFICATION_MODEL_PATH", str(model_path))
+    monkeypatch.setattr(model_classifier, "RELOAD_CHECK_SECONDS", 0.0)
+    train_model(*corpus(), str(model_path))
+
+    def classify():
+        email_data = EmailCreate(subject="Point d'étape", raw_body="Pouvez-vous confirmer le créneau d'entretien de lundi")
+        EmailService(db).classify_emails([email_data])
+        return email_data.classification, email_data.classification_source
+
+    assert classify() == ("INTERVIEW", "model")
+    # Prédiction sous le seuil de confiance : règles utilisées
+    monkeypatch.setattr(settings, "CLASSIFICATION_MODEL_MIN_CONFIDENCE", 1.01)
+    assert classify() == ("INTERVIEW", "rules")
@@ -0,0 +1,94 @@
+"""
+Quasi-doublons : empreintes SimHash, index LSH en bandes et mise à jour de
+l'index après validation seulement.
+"""
+import random
+
+import pytest
+
+from app.core.unit_of_work import UnitOfWork
+from app.models.models import Email
+from app.models.schemas import EmailCreate
+from app.nlp.near_duplicates import get_near_duplicate_index
+from app.nlp.simhash import MAX_DISTANCE, bands, distance, fingerprint
+from app.services.email_service import EmailService
+
+BODY = (
+    "Bonjour Camille, nous avons bien reçu votre candidature pour le poste de "
+    "Data Engineer et nous vous remercions de l'intérêt porté à notre société. "
+    "Notre équipe de recrutement étudie votre profil et reviendra vers vous "
+    "dans les deux prochaines semaines. Bien cordialement, l'équipe RH d'Acme."
+)
+OTHER_BODY = (
+    "Suite à notre échange téléphonique, je vous propose un entretien technique "
+    "mardi prochain à quatorze heures dans nos locaux de Lyon avec le responsable "
+    "de la plateforme de données. Merci de me confirmer votre disponibilité."
+)
+
+
+def email(external_id: str, body: str, **kwargs) -> EmailCreate:
+    return EmailCreate(external_id=external_id, subject="Votre candidature", raw_body=body, **kwargs)
+
+
+def test_fingerprint_ignores_quotes_forward_headers_and_numbers():
+    forwarded = (
+        "---------- Forwarded message ----------\nDe : rh@acme.com\nDate : 05/10/2026\n"
+        + BODY + " Réf. 2026-10481\n> Ma candidature initiale\n> Camille"
+    )
+    assert distance(fingerprint(BODY), fingerprint(forwarded)) <= MAX_DISTANCE
+    assert distance(fingerprint(BODY), fingerprint(OTHER_BODY)) > MAX_DISTANCE
+    assert fingerprint("Merci, bien reçu.") is None
+    assert -(1 << 63) <= fingerprint(BODY) < (1 << 63)
+
+
+def test_close_fingerprints_share_a_band():
+    random.seed(4)
+    for _ in range(200):
+        value = random.getrandbits(64) - (1 << 63)
+        flipped = value
+        for bit in random.sample(range(64), MAX_DISTANCE):
+            flipped ^= 1 << bit
+        flipped = flipped - (1 << 64) if flipped >= (1 << 63) else flipped
+        assert distance(value, flipped) == MAX_DISTANCE
+        assert set(enumerate(bands(value))) & set(enumerate(bands(flipped)))
+
+
+def test_duplicates_within_a_batch_and_against_stored_emails(db):
+    service = EmailService(db)
+    with UnitOfWork(db) as uow:
+        first, copy = service.bulk_insert_emails([
+            email("<a@x>", BODY, classification="ACK"),
+            email("<b@x>", "> transféré\n" + BODY),
+        ], uow)
+    with UnitOfWork(db) as uow:
+        late, unrelated = service.bulk_insert_emails([email("<c@x>", BODY), email("<d@x>", OTHER_BODY)], uow)
+
+    rows = {row.id: row for row in db.query(Email)}
+    assert rows[copy].duplicate_of == first and rows[copy].classification == "ACK"
+    assert rows[late].duplicate_of == first and rows[late].classification == "ACK"
+    assert rows[unrelated].duplicate_of is None
+    # Seuls les originaux sont indexés
+    assert get_near_duplicate_index().stats()["fingerprints"] == 2
+
+
+def test_index_is_left_untouched_when_the_batch_rolls_back(db):
+    service = EmailService(db)
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(db) as uow:
+            service.bulk_insert_emails([email("<a@x>", BODY)], uow)
+            raise RuntimeError("échec après insertion")
+    assert db.query(Email).count() == 0
+    assert get_near_duplicate_index().stats()["fingerprints"] == 0
+
+    # L'email annulé n'est pas pris pour l'original du suivant
+    with UnitOfWork(db) as uow:
+        (email_id,) = service.bulk_insert_emails([email("<b@x>", BODY)], uow)
+    assert db.get(Email, email_id).duplicate_of is None
+    assert get_near_duplicate_index().stats()["fingerprints"] == 1
+
+
+def test_create_email_indexes_after_commit(db):
+    original = EmailService(db).create_email(email("<a@x>", BODY))
+    duplicate = EmailService(db).create_email(email("<b@x>", BODY))
+    assert duplicate.duplicate_of == original.id
+    assert get_near_duplicate_index().stats()["fingerprints"] == 1
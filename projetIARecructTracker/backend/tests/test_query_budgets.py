@@ -0,0 +1,110 @@
+"""
+Budgets d'instructions SQL par endpoint (en-tête X-DB-Query-Count) : le nombre
+de requêtes ne dépend pas du volume de données.
+"""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import pytest
+
+from app.core.query_metrics import N_PLUS_ONE_HEADER, QueryStats, assert_max_queries, max_queries, redact_parameters
+from app.models.models import Application, ApplicationEvent, Email
+from app.services.application_service import ApplicationService
+
+
+@pytest.fixture
+def application_id(client, db):
+    application_id = client.post("/api/v1/applications/", json={"job_title": "Dev", "company_name": "Acme"}).json()["id"]
+    for index in range(40):
+        client.patch(f"/api/v1/applications/{application_id}", json={"notes": f"note {index}"})
+    start = datetime.utcnow() - timedelta(days=30)
+    application = db.get(Application, UUID(application_id))
+    for index in range(30):
+        db.add(ApplicationEvent(
+            application_id=application.id, event_type="NOTE_ADDED", payload={"n": index},
+            created_at=start + timedelta(hours=index),
+        ))
+        db.add(Email(
+            application_id=application.id, external_id=f"<m{index}@x>", subject=f"Sujet {index}",
+            sent_at=start + timedelta(hours=index),
+        ))
+    for index in range(10):
+        client.post("/api/v1/applications/", json={"job_title": f"Poste {index}", "company_name": "Globex"})
+    db.commit()
+    return application_id
+
+
+def test_application_detail_budget(client, application_id):
+    response = client.get(f"/api/v1/applications/{application_id}")
+    assert response.status_code == 200
+    assert len(response.json()["events"]) == 20 and response.json()["emails_total"] == 30
+    # Candidature + événements récents, puis emails liés (avec leur total)
+    assert_max_queries(response, 2)
+
+
+def test_application_events_budget(client, application_id):
+    assert_max_queries(client.get(f"/api/v1/applications/{application_id}/events"), 1)
+    page = client.get(f"/api/v1/applications/{application_id}/events", params={"limit": 10})
+    assert_max_queries(page, 1)
+    next_page = client.get(
+        f"/api/v1/applications/{application_id}/events",
+        params={"limit": 10, "cursor": page.json()["next_cursor"]},
+    )
+    assert_max_queries(next_page, 1)
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": 5},
+    {"limit": 5, "pagination": "cursor"},
+    {"limit": 5, "status": "APPLIED", "company": "Globex"},
+    {"q": "Poste"},
+])
+def test_application_listing_budget(client, application_id, params):
+    response = client.get("/api/v1/applications/", params=params)
+    assert response.status_code == 200
+    assert_max_queries(response, 1)
+
+
+def test_email_listing_budget(client, application_id):
+    assert_max_queries(client.get("/api/v1/emails/", params={"limit": 20}), 1)
+    assert_max_queries(client.get("/api/v1/emails/", params={"limit": 20, "pagination": "cursor"}), 1)
+
+
+def test_summary_is_served_from_memory(client, application_id):
+    client.get("/api/v1/applications/stats/summary")
+    assert_max_queries(client.get("/api/v1/applications/stats/summary"), 0)
+
+
+def test_assert_max_queries_reports_overruns(client, application_id):
+    response = client.get(f"/api/v1/applications/{application_id}")
+    with pytest.raises(AssertionError, match="2 instructions SQL"):
+        assert_max_queries(response, 1)
+
+
+def test_max_queries_on_service_calls(db, application_id):
+    service = ApplicationService(db)
+    with max_queries(2) as stats:
+        service.get_application_full(UUID(application_id))
+    assert stats.count == 2
+    with pytest.raises(AssertionError):
+        with max_queries(3):
+            for application in db.query(Application).all():
+                db.query(ApplicationEvent).filter(ApplicationEvent.application_id == application.id).all()
+
+
+def test_repeated_selects_are_flagged_as_n_plus_one():
+    stats = QueryStats()
+    for _ in range(5):
+        stats.record("SELECT * FROM application_events WHERE application_id = ?", 0.001)
+    stats.record("UPDATE applications SET notes = ?", 0.001)
+    assert stats.repeated(threshold=5) == [("SELECT * FROM application_events WHERE application_id = ?", 5)]
+    assert stats.repeated(threshold=6) == []
+
+
+def test_single_query_endpoints_have_no_n_plus_one_header(client, application_id):
+    assert N_PLUS_ONE_HEADER not in client.get(f"/api/v1/applications/{application_id}").headers
+
+
+def test_slow_query_log_redacts_parameters():
+    assert redact_parameters({"email": "a@b.c", "n": 3}) == {"email": "<str>", "n": "<int>"}
+    assert redact_parameters([{"id": 1}, {"id": 2}]) == "<2 lignes>"
@@ -0,0 +1,86 @@
+"""
+Rappels des prochaines actions : émission des échéances atteintes, un seul
+rappel par échéance (y compris entre processus) et file tenue à jour.
+"""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.models.models import Application, ApplicationEvent
+from app.services.reminder_engine import ReminderEngine, reminder_engine
+
+
+def create(client, company, due=None, **fields):
+    payload = {"job_title": "Dev", "company_name": company, **fields}
+    if due is not None:
+        payload["next_action_at"] = due.isoformat()
+    return UUID(client.post("/api/v1/applications/", json=payload).json()["id"])
+
+
+def reminders(db):
+    return sorted(
+        (event.application_id, event.payload["due_at"])
+        for event in db.query(ApplicationEvent).filter(ApplicationEvent.event_type == "REMINDER")
+    )
+
+
+def test_due_actions_fire_once(client, db):
+    now = datetime.utcnow()
+    due = create(client, "Acme", now - timedelta(hours=1))
+    create(client, "Globex", now + timedelta(days=1))
+    # Sans échéance : relance par défaut une semaine plus tard
+    create(client, "Initech")
+    create(client, "Umbrella", now - timedelta(hours=2), status="REJECTED")
+    assert reminder_engine.status()["pending"] == 3
+
+    updated_at = db.get(Application, due).updated_at
+    assert reminder_engine.fire_due(db, now) == 1
+    assert reminders(db) == [(due, (now - timedelta(hours=1)).isoformat())]
+    assert reminder_engine.fire_due(db, now) == 0
+    db.expire_all()
+    application = db.get(Application, due)
+    assert application.reminded_at == application.next_action_at and application.updated_at == updated_at
+
+    status = client.get("/api/v1/applications/reminders/status").json()
+    assert status["pending"] == 2 and status["reminders_sent"] == 1
+
+
+def test_rescheduled_action_fires_again(client, db):
+    now = datetime.utcnow()
+    application_id = create(client, "Acme", now - timedelta(hours=1))
+    reminder_engine.fire_due(db, now)
+    client.patch(f"/api/v1/applications/{application_id}", json={"next_action_at": (now + timedelta(hours=1)).isoformat()})
+    assert reminder_engine.fire_due(db, now) == 0
+    assert reminder_engine.fire_due(db, now + timedelta(hours=2)) == 1
+    assert len(reminders(db)) == 2
+
+
+def test_closed_or_deleted_applications_leave_the_queue(client, db):
+    now = datetime.utcnow()
+    rejected = create(client, "Acme", now - timedelta(hours=1))
+    deleted = create(client, "Globex", now - timedelta(hours=1))
+    client.patch(f"/api/v1/applications/{rejected}", json={"status": "REJECTED"})
+    client.delete(f"/api/v1/applications/{deleted}")
+    assert reminder_engine.status()["pending"] == 0
+    assert reminder_engine.fire_due(db, now) == 0
+    assert reminders(db) == []
+
+
+def test_engines_in_two_processes_send_one_reminder(client, db):
+    now = datetime.utcnow()
+    ids = {create(client, f"Entreprise {index}", now - timedelta(minutes=index + 1)) for index in range(3)}
+    create(client, "Plus tard", now + timedelta(days=2))
+    # Deux processus amorcés depuis la même base
+    first, second = ReminderEngine(), ReminderEngine()
+    first.seed(db)
+    second.seed(db)
+    assert first.status()["pending"] == second.status()["pending"] == 4
+
+    assert first.fire_due(db, now) + second.fire_due(db, now) == 3
+    assert {application_id for application_id, _ in reminders(db)} == ids
+    assert second.status()["pending"] == 1
+
+    # Resynchronisation : seules les échéances non rappelées reviennent dans la file
+    third = ReminderEngine()
+    third.seed(db)
+    assert third.status()["pending"] == 1
+    assert third.status()["next_due_at"] == (now + timedelta(days=2)).isoformat()
@@ -0,0 +1,93 @@
+"""
+Classifieur à règles FR/EN : automate compilé, départage des scores,
+rechargement à chaud et statistiques par règle.
+"""
+import json
+import random
+import re
+
+import pytest
+
+from app.nlp.rule_classifier import RuleClassifier, compile_rules, normalize_text, prefix_tree_regex
+
+
+@pytest.fixture
+def classifier():
+    return RuleClassifier(reload_interval=0)
+
+
+@pytest.mark.parametrize("subject, body, label", [
+    ("Votre candidature", "Nous avons bien reçu votre candidature et reviendrons vers vous.", "ACKNOWLEDGED"),
+    ("Invitation à un entretien", "Merci de nous indiquer vos disponibilités.", "INTERVIEW"),
+    ("Your application", "Thank you for applying. We would like to invite you to an interview.", "INTERVIEW"),
+    ("Suite de votre candidature",
+     "Nous sommes au regret de vous informer que votre candidature n'a pas été retenue.", "REJECTED"),
+    ("Newsletter", "Les soldes d'automne commencent demain.", None),
+])
+def test_classifies_french_and_english_emails(classifier, subject, body, label):
+    assert classifier.classify(subject, body).label == label
+
+
+def test_normalize_text_drops_case_and_accents():
+    assert normalize_text("Été RÉUSSI, Entretien Confirmé") == "ete reussi, entretien confirme"
+    assert normalize_text("plain ascii") == "plain ascii"
+
+
+def test_prefix_tree_regex_matches_like_a_plain_alternation():
+    random.seed(3)
+    words = {"".join(random.choice("abc ") for _ in range(random.randint(1, 6))).strip() for _ in range(200)} - {""}
+    tree = re.compile(r"\b(?:" + prefix_tree_regex(words) + r")\b")
+    plain = re.compile(r"\b(?:" + "|".join(sorted(map(re.escape, words), key=len, reverse=True)) + r")\b")
+    for _ in range(300):
+        text = "".join(random.choice("abc ") for _ in range(30))
+        assert tree.findall(text) == plain.findall(text)
+
+
+def write_rules(path, rules, language="fr"):
+    path.write_text(json.dumps({"language": language, "rules": rules}), encoding="utf-8")
+
+
+def test_ties_go_to_the_most_advanced_stage(tmp_path):
+    write_rules(tmp_path / "fr.json", [
+        {"id": "ack", "label": "ACKNOWLEDGED", "keywords": ["bien recu"]},
+        {"id": "offer", "label": "OFFER", "keywords": ["proposition"]},
+    ])
+    ruleset = compile_rules([tmp_path / "fr.json"])
+    result = ruleset.score(ruleset.match("bien recu, proposition"))
+    assert result.label == "OFFER" and result.confidence == 0.5
+    assert result.rule_hits == {"ack": 1, "offer": 1}
+
+
+def test_hot_reload_keeps_previous_rules_on_error(tmp_path):
+    rules_file = tmp_path / "fr.json"
+    write_rules(rules_file, [{"id": "interview", "label": "INTERVIEW", "keywords": ["entretien"]}])
+    classifier = RuleClassifier(rules_path=str(tmp_path), reload_interval=0)
+    assert classifier.classify("Entretien", None).label == "INTERVIEW"
+
+    write_rules(rules_file, [
+        {"id": "interview", "label": "INTERVIEW", "keywords": ["entretien"]},
+        {"id": "offer", "label": "OFFER", "weight": 5, "patterns": ["offre (?:ferme|d'embauche)"]},
+    ])
+    assert classifier.classify("Entretien final et offre ferme", None).label == "OFFER"
+    assert classifier.reloads == 2
+
+    rules_file.write_text('{"rules": [{"id": "broken", "label": "OFFER", "patterns": ["(unclosed"]}]}', encoding="utf-8")
+    assert classifier.classify("Offre d'embauche", None).label == "OFFER"
+    assert classifier.last_error and classifier.reloads == 2
+    assert {rule["id"] for rule in classifier.stats()["rules"]} == {"interview", "offer"}
+
+
+def test_batch_statistics_per_rule(tmp_path):
+    write_rules(tmp_path / "en.json", [{"id": "interview", "label": "INTERVIEW", "keywords": ["interview"]}], "en")
+    classifier = RuleClassifier(rules_path=str(tmp_path), reload_interval=0)
+    classifier.classify_batch([("Interview", "Interview on Monday"), ("Hello", None), ("Interview", None)])
+    stats = classifier.stats()
+    assert stats["emails_classified"] == 3 and stats["labels"] == {"INTERVIEW": 2}
+    assert stats["rules"] == [{"id": "interview", "label": "INTERVIEW", "language": "en", "hits": 3, "emails": 2}]
+
+
+def test_rules_endpoints(client):
+    rules = client.get("/api/v1/ingestion/classification/rules").json()
+    assert set(rules["languages"]) == {"en", "fr"} and rules["rules_loaded"] > 0
+    reloaded = client.post("/api/v1/ingestion/classification/rules/reload").json()
+    assert reloaded["rules_loaded"] == rules["rules_loaded"]
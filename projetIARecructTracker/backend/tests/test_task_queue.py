@@ -0,0 +1,213 @@
+"""
+File de tâches durable : idempotence, réservation, nouvel essai, bail expiré,
+et statut d'ingestion lu dans la table des tâches.
+"""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import pytest
+
+from app.connectors.imap_connector import ImapConnector
+from app.core.config import settings
+from app.models.models import Email, Task
+from app.services.ingestion_runner import ingestion_runner
+from app.services.ingestion_service import IngestionService
+from app.services.task_queue import FAILED, QUEUED, SUCCEEDED, TaskQueue
+from app.worker import Worker
+from tests.test_imap_connector import FakeImap
+
+
+@pytest.fixture
+def queue(db):
+    return TaskQueue(db)
+
+
+@pytest.fixture
+def task_queue_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_QUEUE_ENABLED", True)
+
+
+def reload(db, task_id) -> Task:
+    db.expire_all()
+    return db.get(Task, UUID(str(task_id)))
+
+
+def test_idempotency_key_and_coalescing(queue):
+    first = queue.submit("ingestion.run", {"slot": "a"}, idempotency_key="ingestion.run:a")
+    assert queue.submit("ingestion.run", {"slot": "b"}, idempotency_key="ingestion.run:a")["id"] == first["id"]
+
+    pending = queue.submit("extraction.run", {"only_missing": True}, coalesce=True)
+    assert queue.submit("extraction.run", {"only_missing": True}, coalesce=True)["id"] == pending["id"]
+    assert queue.submit("extraction.run", {"only_missing": False}, coalesce=True)["id"] != pending["id"]
+    with pytest.raises(ValueError):
+        queue.enqueue("inconnue")
+
+
+def test_claim_respects_run_at_and_queue_concurrency(db, queue, monkeypatch):
+    monkeypatch.setitem(settings.TASK_QUEUE_CONCURRENCY, "extraction", 2)
+    for index in range(3):
+        queue.enqueue("extraction.emails", {"email_ids": [], "n": index})
+    later = queue.enqueue("extraction.run", run_at=datetime.utcnow() + timedelta(hours=1))
+    db.commit()
+
+    claimed = queue.claim("extraction", "worker-a", limit=10)
+    assert len(claimed) == 2 and {row.attempts for row in claimed} == {1}
+    # File pleine : rien pour un second worker tant que les tâches tournent
+    assert queue.claim("extraction", "worker-b", limit=10) == []
+    assert queue.complete(claimed[0].id, "worker-a", {"ok": True})
+    (third,) = queue.claim("extraction", "worker-b", limit=10)
+    assert third.id not in {row.id for row in claimed} and third.id != later.id
+    assert queue.claim("classification", "worker-c", limit=10) == []
+
+
+def test_failures_are_retried_with_backoff_then_fail(db, queue, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_RETRY_BASE_SECONDS", 10.0)
+    task_id = queue.submit("extraction.run")["id"]
+    task = reload(db, task_id)
+    task.max_attempts = 2
+    db.commit()
+
+    (claimed,) = queue.claim("extraction", "worker-a", limit=1)
+    assert queue.fail(claimed.id, "worker-a", "boom") == QUEUED
+    task = reload(db, claimed.id)
+    assert 4 <= (task.run_at - datetime.utcnow()).total_seconds() <= 10
+    assert task.last_error == "boom" and task.locked_by is None
+    assert queue.claim("extraction", "worker-a", limit=1) == []
+
+    task.run_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    (claimed,) = queue.claim("extraction", "worker-a", limit=1)
+    assert claimed.attempts == 2
+    assert queue.fail(claimed.id, "worker-a", "boom encore") == FAILED
+    assert reload(db, claimed.id).finished_at is not None
+
+    retried = queue.retry(claimed.id)
+    assert retried["status"] == QUEUED and retried["attempts"] == 0
+    assert queue.retry(claimed.id) is None
+
+
+def test_expired_lease_is_taken_over_by_another_worker(db, queue):
+    task_id = queue.submit("extraction.run")["id"]
+    (claimed,) = queue.claim("extraction", "worker-a", limit=1)
+    assert queue.heartbeat("worker-a", [claimed.id]) == {claimed.id}
+
+    # worker-a arrêté : plus de battement au-delà du bail
+    task = reload(db, task_id)
+    task.locked_at = datetime.utcnow() - timedelta(seconds=settings.TASK_LEASE_SECONDS + 1)
+    db.commit()
+    (recovered,) = queue.claim("extraction", "worker-b", limit=1)
+    assert recovered.id == claimed.id and recovered.attempts == 2
+    assert reload(db, task_id).locked_by == "worker-b"
+
+    # L'ancien worker ne peut plus ni battre ni conclure
+    assert queue.heartbeat("worker-a", [claimed.id]) == set()
+    assert not queue.complete(claimed.id, "worker-a")
+    assert queue.fail(claimed.id, "worker-a", "trop tard") is None
+    assert queue.complete(claimed.id, "worker-b", {"ok": True})
+    assert reload(db, task_id).status == SUCCEEDED
+
+
+def test_expired_lease_on_last_attempt_fails_the_task(db, queue):
+    task_id = queue.submit("extraction.run")["id"]
+    task = reload(db, task_id)
+    task.max_attempts = 1
+    db.commit()
+    queue.claim("extraction", "worker-a", limit=1)
+    task = reload(db, task_id)
+    task.locked_at = datetime.utcnow() - timedelta(seconds=settings.TASK_LEASE_SECONDS + 1)
+    db.commit()
+
+    assert queue.claim("extraction", "worker-b", limit=1) == []
+    task = reload(db, task_id)
+    assert task.status == FAILED and "Bail expiré" in task.last_error
+
+
+def test_worker_runs_handler_and_records_unknown_kinds(db, queue):
+    db.add(Task(queue="extraction", kind="extraction.obsolete", payload={}, max_attempts=3))
+    db.commit()
+    worker = Worker("extraction")
+    for row in queue.claim("extraction", worker.worker_id, limit=5):
+        worker._execute(row.id, row.kind, row.payload, row.attempts)
+    task = db.query(Task).one()
+    db.refresh(task)
+    assert task.status == FAILED and "Aucun gestionnaire" in task.last_error
+
+
+@pytest.fixture
+def imap_account(monkeypatch):
+    server = FakeImap()
+    server.add(1, "Votre candidature au poste de Data Engineer")
+    server.add(2, "Invitation à un entretien")
+    connector = ImapConnector("imap.example.com", "candidat", "secret", batch_size=2, imap_factory=server)
+    monkeypatch.setattr(ingestion_runner, "connectors", lambda: [connector])
+    monkeypatch.setattr(settings, "IMAP_MAILBOXES", ["INBOX"])
+    return connector
+
+
+def run_ingestion_tasks(db, worker: Worker):
+    while True:
+        claimed = TaskQueue(db).claim("ingestion", worker.worker_id, limit=5)
+        if not claimed:
+            return
+        for row in claimed:
+            worker._execute(row.id, row.kind, row.payload, row.attempts)
+
+
+def test_ingestion_status_is_read_from_tasks(client, db, imap_account, task_queue_enabled):
+    response = client.post("/api/v1/ingestion/run", headers={"Idempotency-Key": "k1"})
+    assert response.status_code == 202
+    status = client.get("/api/v1/ingestion/status").json()
+    assert status["service_status"] == "queued" and status["queued_tasks"] == 1
+    assert status["accounts"] == [] and status["last_task_finished_at"] is None
+
+    worker = Worker("ingestion")
+    # Répartition : une tâche par compte, visible avant toute synchronisation
+    (dispatch,) = TaskQueue(db).claim("ingestion", worker.worker_id, limit=1)
+    worker._execute(dispatch.id, dispatch.kind, dispatch.payload, dispatch.attempts)
+    status = client.get("/api/v1/ingestion/status").json()
+    assert status["queued_tasks"] == 1
+    assert [(a["provider"], a["account"], a["last_status"]) for a in status["accounts"]] == [("imap", imap_account.account, QUEUED)]
+
+    run_ingestion_tasks(db, worker)
+    status = client.get("/api/v1/ingestion/status").json()
+    assert db.query(Email).count() == 2
+    assert status["service_status"] == "ready"
+    assert (status["queued_tasks"], status["running_tasks"], status["failed_tasks"]) == (0, 0, 0)
+    (account,) = status["accounts"]
+    assert account["last_status"] == SUCCEEDED and account["new_emails"] == 2 and not account["running"]
+    assert status["last_task_finished_at"] is not None
+    # Watermark persisté de la boîte
+    assert [(m["mailbox"], m["last_uid"]) for m in status["mailboxes"]] == [("INBOX", 2)]
+    assert "scheduler_running" in status
+
+
+def test_ingestion_status_reports_failed_account_tasks(client, db, imap_account, task_queue_enabled):
+    imap_account._imap_factory.fail_fetch_uid = 2
+    client.post("/api/v1/ingestion/run")
+    worker = Worker("ingestion")
+    run_ingestion_tasks(db, worker)
+    account_task = db.query(Task).filter(Task.kind == "ingestion.account").one()
+    account_task.run_at = datetime.utcnow()
+    account_task.attempts = account_task.max_attempts - 1
+    db.commit()
+    run_ingestion_tasks(db, worker)
+
+    status = client.get("/api/v1/ingestion/status").json()
+    assert status["failed_tasks"] == 1
+    (account,) = status["accounts"]
+    assert account["last_status"] == FAILED and "RuntimeError" in account["last_error"]
+    assert account["attempts"] == settings.TASK_MAX_ATTEMPTS
+
+
+def test_running_account_task_is_reported(db, imap_account):
+    queue = TaskQueue(db)
+    account = imap_account.account
+    queue.enqueue("ingestion.account", {"provider": "imap", "account": account},
+                  idempotency_key=f"ingestion.account:imap:{account}:s1")
+    db.commit()
+    queue.claim("ingestion", "worker-a", limit=1)
+
+    status = IngestionService(db).get_task_ingestion_status()
+    assert status["service_status"] == "running"
+    assert status["running_tasks"] == 1 and status["running_accounts"] == 1
+    assert status["accounts"][0]["running"] is True
@@ -0,0 +1,120 @@
+"""
+File de tâches sous PostgreSQL (ignoré sans DATABASE_URL PostgreSQL) :
+réservations concurrentes de deux sessions, verrou consultatif par file,
+FOR UPDATE SKIP LOCKED et verrou exclusif entre processus.
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.models import Task
+from app.services import task_queue
+from app.services.task_queue import RUNNING, TaskQueue, exclusive
+
+
+@pytest.fixture
+def pg_engine(postgres_url):
+    engine = create_engine(postgres_url)
+    Task.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        connection.execute(Task.__table__.delete())
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(pg_engine):
+    factory = sessionmaker(bind=pg_engine, autoflush=False)
+    opened = [factory(), factory()]
+    yield opened
+    for session in opened:
+        session.rollback()
+        session.close()
+
+
+def enqueue(session, count: int):
+    queue = TaskQueue(session)
+    for index in range(count):
+        queue.enqueue("extraction.emails", {"email_ids": [], "n": index})
+    session.commit()
+
+
+def claim_concurrently(sessions, limit: int) -> list:
+    barrier = threading.Barrier(len(sessions))
+    results = [None] * len(sessions)
+
+    def claim(index):
+        barrier.wait()
+        results[index] = TaskQueue(sessions[index]).claim("extraction", f"worker-{index}", limit=limit)
+    threads = [threading.Thread(target=claim, args=(index,)) for index in range(len(sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_claims_respect_the_queue_limit(sessions, monkeypatch):
+    monkeypatch.setitem(settings.TASK_QUEUE_CONCURRENCY, "extraction", 3)
+    enqueue(sessions[0], 6)
+
+    claimed = set()
+    for _ in range(2):
+        results = claim_concurrently(sessions, limit=2)
+        ids = [row.id for rows in results for row in rows]
+        # Sans verrou consultatif, chaque session compterait 0 tâche en cours et en prendrait 2
+        assert len(ids) == len(set(ids)) == 3 and not claimed & set(ids)
+        claimed |= set(ids)
+        for index, rows in enumerate(results):
+            for row in rows:
+                assert TaskQueue(sessions[index]).complete(row.id, f"worker-{index}")
+    assert len(claimed) == 6
+
+
+def test_advisory_lock_serializes_claims_of_a_limited_queue(sessions, monkeypatch):
+    monkeypatch.setitem(settings.TASK_QUEUE_CONCURRENCY, "extraction", 2)
+    holder, claimer = sessions
+    enqueue(holder, 2)
+    # Réservation en cours dans une autre session : verrou de la file tenu jusqu'au commit
+    holder.execute(text("SELECT pg_advisory_xact_lock(hashtext('tasks:extraction'))"))
+
+    result = []
+    thread = threading.Thread(target=lambda: result.extend(TaskQueue(claimer).claim("extraction", "worker-b", limit=5)))
+    thread.start()
+    thread.join(0.5)
+    assert thread.is_alive() and result == []
+    holder.commit()
+    thread.join(10)
+    assert not thread.is_alive() and len(result) == 2
+
+
+def test_locked_rows_are_skipped_without_waiting(sessions, monkeypatch):
+    monkeypatch.setitem(settings.TASK_QUEUE_CONCURRENCY, "extraction", 0)
+    holder, claimer = sessions
+    enqueue(holder, 3)
+    locked = holder.query(Task).order_by(Task.run_at).with_for_update().first()
+
+    # Une attente de verrou échouerait au lieu de bloquer le test
+    claimer.execute(text("SET lock_timeout = '1s'"))
+    rows = TaskQueue(claimer).claim("extraction", "worker-b", limit=5)
+    assert len(rows) == 2 and locked.id not in {row.id for row in rows}
+    holder.commit()
+
+    (last,) = TaskQueue(claimer).claim("extraction", "worker-b", limit=5)
+    assert last.id == locked.id
+    assert claimer.query(Task).filter(Task.status == RUNNING).count() == 3
+
+
+def test_exclusive_lock_between_connections(pg_engine, monkeypatch):
+    monkeypatch.setattr(task_queue, "engine", pg_engine)
+    with exclusive("ingestion:imap:candidat@imap.example.com") as first:
+        with exclusive("ingestion:imap:candidat@imap.example.com") as second:
+            assert first and not second
+        with exclusive("ingestion:imap:autre@imap.example.com") as other:
+            assert other
+    # Libéré à la sortie du premier bloc
+    with exclusive("ingestion:imap:candidat@imap.example.com") as again:
+        assert again
@@ -8,12 +8,6 @@ cd "$(dirname "$0")/../backend"
 echo "📥 Installation des dépendances Python..."
 pip install -r requirements.txt
 
-echo "🔄 Initialisation d'Alembic..."
-alembic init alembic
-
-echo "📝 Génération de la première migration..."
-alembic revision --autogenerate -m "Initial migration"
-
 echo "⬆️ Application des migrations..."
 alembic upgrade head
 